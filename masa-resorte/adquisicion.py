@@ -0,0 +1,574 @@
+"""
+================================================================================
+DAEMON DE ADQUISICIÓN DEL SENSOR (MEMORIA COMPARTIDA)
+Proyecto: Análisis de Resonancia en Sistema Masa-Resorte
+================================================================================
+
+Solo un proceso puede abrir el puerto serial. Si el ArduinoHandler vive
+dentro de app.py, únicamente un worker web ve los datos. Este daemon es el
+dueño de los puertos: captura los paquetes de cada dispositivo y los
+escribe en un BufferCompartido (multiprocessing.shared_memory) propio. Cada
+worker web se adjunta en solo lectura con ArduinoRemoto, que ofrece la
+misma interfaz que ArduinoHandler, y envía las órdenes (conectar,
+desconectar, estado, modo crudo, detector de resonancia) por un canal de
+control local.
+
+Uso:
+    python adquisicion.py --control 127.0.0.1:6010
+    MASA_RESORTE_ADQUISICION=127.0.0.1:6010 uvicorn servidor_async:aplicacion --workers 4
+
+Los workers deben arrancar después del daemon; si el daemon se reinicia,
+hay que reiniciar los workers (el anillo nuevo es otro bloque de memoria).
+
+El canal de control transporta objetos serializados con pickle, así que
+solo escucha en loopback y exige una clave: MASA_RESORTE_CLAVE o, si no
+está definida, una clave aleatoria que el daemon escribe al arrancar en
+resultados/adquisicion.clave (permisos 0600) y que los workers leen.
+
+Funcionalidades:
+- Único dueño de los puertos serie (uno o varios dispositivos)
+- Anillo de paquetes en memoria compartida, lectura sin copias en los workers
+- Canal de control con autenticación (multiprocessing.connection)
+- Cada worker mantiene sus propias suscripciones sobre el mismo anillo
+================================================================================
+"""
+
+import argparse
+import ipaddress
+import os
+import secrets
+import signal
+import threading
+import time
+from collections import deque
+from multiprocessing.connection import Client, Listener, AuthenticationError
+
+from buffer_circular import BufferCompartido, CAPACIDAD_POR_DEFECTO
+from distribuidor import Distribuidor
+from registro_sensores import RegistroSensores, DispositivoNoRegistrado, DISPOSITIVO_POR_DEFECTO
+from serial_handler import ArduinoHandler
+from detector_resonancia import MAX_EVENTOS
+
+
+DIRECCION_CONTROL = ('127.0.0.1', 6010)
+
+# Archivo con la clave del canal de control cuando no se define MASA_RESORTE_CLAVE
+RUTA_CLAVE = os.path.join('resultados', 'adquisicion.clave')
+
+# Segundos que un worker espera al daemon al arrancar
+ESPERA_DAEMON = 10
+
+# Segundos que un worker reutiliza el estado de conexión consultado
+VIGENCIA_ESTADO = 1.0
+
+# Segundos entre consultas de eventos de resonancia al daemon (los streams
+# la hacen en cada lote; acota lo que un evento tarda en llegar al worker)
+VIGENCIA_EVENTOS = 0.1
+
+# Órdenes que usan el puerto serial: se ejecutan de a una por dispositivo
+ORDENES_PUERTO = {'conectar', 'desconectar', 'modo_crudo'}
+
+# Órdenes que registran el dispositivo si aún no existe ('estado' lo crea
+# para que un worker pueda adjuntarse a su memoria antes de conectarlo)
+ORDENES_CREAN_DISPOSITIVO = {'conectar', 'estado'}
+
+
+def direccion_control(texto):
+    """
+    Convierte 'host:puerto' (o solo 'puerto') en la tupla del canal de control
+
+    Raises:
+        ValueError: Si el puerto no es un número o el host no es loopback
+    """
+    host, _, puerto = str(texto).rpartition(':')
+    direccion = (host.strip('[]') or DIRECCION_CONTROL[0], int(puerto))
+    verificar_loopback(direccion)
+    return direccion
+
+
+def verificar_loopback(direccion):
+    """
+    Rechaza un canal de control fuera de loopback: cualquiera que alcance
+    el puerto y conozca la clave ejecuta código en el daemon (pickle)
+
+    Raises:
+        ValueError: Si el host no es una dirección de loopback
+    """
+    host = direccion[0]
+    if host == 'localhost':
+        return
+    try:
+        loopback = ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        loopback = False
+    if not loopback:
+        raise ValueError(f'El canal de control solo puede escuchar en loopback '
+                         f'(127.0.0.1 o localhost), no en {host}')
+
+
+def clave_control(crear=False, ruta=RUTA_CLAVE):
+    """
+    Clave de autenticación del canal de control
+
+    MASA_RESORTE_CLAVE tiene prioridad. Si no está definida, el daemon
+    (crear=True) genera una clave aleatoria nueva en `ruta` con permisos
+    0600 y los workers la leen de ahí.
+
+    Raises:
+        RuntimeError: Si no hay clave, o el archivo es legible por otros usuarios
+    """
+    clave = os.environ.get('MASA_RESORTE_CLAVE')
+    if clave:
+        return clave.encode()
+
+    if crear:
+        os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+        temporal = f'{ruta}.{os.getpid()}.tmp'
+        descriptor = os.open(temporal, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(descriptor, 'w') as archivo:
+            archivo.write(secrets.token_hex(32))
+        os.replace(temporal, ruta)
+
+    try:
+        with open(ruta) as archivo:
+            if os.fstat(archivo.fileno()).st_mode & 0o077:
+                raise RuntimeError(f'{ruta} es accesible por otros usuarios (se requiere 0600)')
+            clave = archivo.read().strip()
+    except FileNotFoundError:
+        clave = None
+    if not clave:
+        raise RuntimeError(f'No hay clave para el canal de control: definir MASA_RESORTE_CLAVE '
+                           f'o arrancar antes el daemon de adquisición (escribe {ruta})')
+    return clave.encode()
+
+
+class DaemonAdquisicion:
+    """
+    Proceso dueño del puerto serial y productor del anillo compartido
+    """
+
+    def __init__(self, direccion=DIRECCION_CONTROL, clave=None,
+                 capacidad=CAPACIDAD_POR_DEFECTO):
+        """
+        Args:
+            direccion: (host, puerto) del canal de control (solo loopback)
+            clave: Clave de autenticación del canal (None: clave_control())
+            capacidad: Paquetes retenidos en el anillo compartido de cada dispositivo
+
+        Raises:
+            ValueError: Si la dirección no es loopback
+        """
+        verificar_loopback(direccion)
+        self.direccion = direccion
+        self.clave = clave or clave_control(crear=True)
+        self.capacidad = capacidad
+        self._locks = {}
+        self.sensores = RegistroSensores(crear_handler=self._crear_handler)
+        self.sensores.obtener(DISPOSITIVO_POR_DEFECTO, crear=True)
+        self.listener = None
+        self.activo = False
+
+    def _crear_handler(self, id_dispositivo, lector):
+        # Un anillo compartido por dispositivo; el lock serializa sus órdenes de puerto
+        self._locks[id_dispositivo] = threading.Lock()
+        return ArduinoHandler(buffer=BufferCompartido.crear(self.capacidad),
+                              id_dispositivo=id_dispositivo, lector=lector)
+
+    def atender(self):
+        """
+        Acepta conexiones del canal de control (bloquea hasta cerrar())
+        """
+        self.listener = Listener(self.direccion, authkey=self.clave)
+        self.activo = True
+        print(f"📡 Canal de control en {self.direccion[0]}:{self.direccion[1]}")
+
+        while self.activo:
+            try:
+                conexion = self.listener.accept()
+            except AuthenticationError:
+                print("⚠️  Conexión rechazada: clave de control incorrecta")
+                continue
+            except OSError:
+                break
+            threading.Thread(target=self._atender_cliente, args=(conexion,), daemon=True).start()
+
+    def _atender_cliente(self, conexion):
+        """Responde las órdenes de un worker hasta que cierre la conexión"""
+        with conexion:
+            while self.activo:
+                try:
+                    orden = conexion.recv()
+                except (EOFError, OSError):
+                    break
+                conexion.send(self.ejecutar(orden))
+
+    def ejecutar(self, orden):
+        """
+        Ejecuta una orden del canal de control
+
+        Args:
+            orden: dict con 'comando' y sus parámetros
+
+        Returns:
+            dict: {'success': True, ...} o {'success': False, 'error': ...}
+        """
+        comando = orden.get('comando')
+        if comando == 'dispositivos':
+            return {'success': True, 'dispositivos': self.sensores.ids()}
+        metodo = getattr(self, f'_orden_{comando}', None)
+        if metodo is None:
+            return {'success': False, 'error': f'Orden no válida: {comando}'}
+        try:
+            id_dispositivo = orden.get('dispositivo', DISPOSITIVO_POR_DEFECTO)
+            arduino = self.sensores.obtener(id_dispositivo, crear=comando in ORDENES_CREAN_DISPOSITIVO)
+            if comando in ORDENES_PUERTO:
+                with self._locks[id_dispositivo]:
+                    return {'success': True, **metodo(arduino, orden)}
+            return {'success': True, **metodo(arduino, orden)}
+        except DispositivoNoRegistrado as e:
+            return {'success': False, 'error': str(e), 'no_registrado': True}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _orden_conectar(self, arduino, orden):
+        arduino.protocolo_preferido = orden.get('protocolo', 'auto')
+        conectado = arduino.conectar(orden.get('puerto')) and arduino.iniciar_captura()
+        return {'conectado': bool(conectado), 'puerto': arduino.puerto,
+                'protocolo': arduino.protocolo}
+
+    def _orden_desconectar(self, arduino, orden):
+        arduino.desconectar()
+        return {}
+
+    def _orden_estado(self, arduino, orden):
+        return {'conectado': bool(arduino.esta_conectado()),
+                'memoria': arduino.buffer_datos.nombre,
+                'estado': arduino.obtener_estadisticas()}
+
+    def _orden_modo_crudo(self, arduino, orden):
+        if orden.get('activar', True):
+            ok = arduino.iniciar_modo_crudo(orden.get('frecuencia', 1000))
+        else:
+            ok = arduino.detener_modo_crudo()
+        return {'ok': ok, 'modo_crudo': arduino.modo_crudo}
+
+    def _orden_muestras_crudas(self, arduino, orden):
+        return {'crudas': arduino.obtener_muestras_crudas(orden.get('n'), orden.get('segundos'))}
+
+    def _orden_detector(self, arduino, orden):
+        return {'detector': arduino.configurar_detector(orden.get('frecuencia'), **orden.get('opciones', {}))}
+
+    def _orden_eventos_resonancia(self, arduino, orden):
+        return {'eventos': arduino.eventos_resonancia(orden.get('desde', 0))}
+
+    def cerrar(self):
+        """
+        Cierra el canal, los puertos serie y elimina la memoria compartida
+        """
+        self.activo = False
+        if self.listener:
+            self.listener.close()
+        self.sensores.desconectar_todos()
+        for id_dispositivo in self.sensores.ids():
+            self.sensores.dispositivos[id_dispositivo].buffer_datos.cerrar()
+
+
+class CanalControl:
+    """
+    Conexión de un worker con el canal de control del daemon
+    """
+
+    def __init__(self, direccion=DIRECCION_CONTROL, clave=None, espera=ESPERA_DAEMON):
+        """
+        Args:
+            direccion: (host, puerto) del canal de control del daemon
+            clave: Clave de autenticación del canal (None: clave_control())
+            espera: Segundos que se espera a que el daemon responda
+
+        Raises:
+            ConnectionError: Si el daemon no responde dentro de `espera`
+            RuntimeError: Si no hay clave para el canal
+        """
+        self.direccion = direccion
+        self.clave = clave or clave_control()
+        self._conexion = None
+        self.lock = threading.Lock()
+
+        limite = time.monotonic() + espera
+        while True:
+            try:
+                self.comando('dispositivos')
+                break
+            except ConnectionError:
+                if time.monotonic() >= limite:
+                    raise
+                time.sleep(0.5)
+
+    def comando(self, comando, conexion_propia=False, **parametros):
+        """
+        Envía una orden al daemon y devuelve su respuesta
+
+        Args:
+            comando: Nombre de la orden
+            conexion_propia: True para órdenes lentas (conectar espera el
+                reinicio del Arduino): usan una conexión aparte y no
+                bloquean las consultas de estado de los streams
+            **parametros: Parámetros de la orden
+
+        Raises:
+            ConnectionError: Si el daemon no está disponible
+            DispositivoNoRegistrado: Si el daemon no conoce el dispositivo
+            RuntimeError: Si el daemon no pudo ejecutar la orden
+        """
+        if conexion_propia:
+            try:
+                with Client(self.direccion, authkey=self.clave) as conexion:
+                    conexion.send({'comando': comando, **parametros})
+                    respuesta = conexion.recv()
+            except (OSError, EOFError) as e:
+                raise ConnectionError(f'Daemon de adquisición no disponible en '
+                                      f'{self.direccion[0]}:{self.direccion[1]}: {e}') from e
+            return self._verificar(respuesta)
+
+        with self.lock:
+            for intento in range(2):
+                try:
+                    if self._conexion is None:
+                        self._conexion = Client(self.direccion, authkey=self.clave)
+                    self._conexion.send({'comando': comando, **parametros})
+                    respuesta = self._conexion.recv()
+                    break
+                except (OSError, EOFError) as e:
+                    # Conexión caída (p. ej. daemon reiniciado): un reintento
+                    if self._conexion is not None:
+                        self._conexion.close()
+                        self._conexion = None
+                    if intento:
+                        raise ConnectionError(
+                            f'Daemon de adquisición no disponible en '
+                            f'{self.direccion[0]}:{self.direccion[1]}: {e}') from e
+        return self._verificar(respuesta)
+
+    @staticmethod
+    def _verificar(respuesta):
+        if not respuesta.get('success'):
+            if respuesta.get('no_registrado'):
+                raise DispositivoNoRegistrado(respuesta['error'])
+            raise RuntimeError(respuesta.get('error', 'Error del daemon de adquisición'))
+        return respuesta
+
+
+class ArduinoRemoto:
+    """
+    Vista de un worker web sobre un dispositivo del daemon de adquisición
+
+    Misma interfaz que ArduinoHandler para las rutas de app.py: las órdenes
+    viajan por el canal de control y los datos se leen del anillo compartido
+    con suscripciones propias de este proceso.
+    """
+
+    def __init__(self, canal, id_dispositivo=DISPOSITIVO_POR_DEFECTO):
+        """
+        Args:
+            canal: CanalControl con el daemon
+            id_dispositivo: Dispositivo del daemon (se registra si no existe)
+        """
+        self.canal = canal
+        self.id_dispositivo = id_dispositivo
+        self.protocolo_preferido = 'auto'
+        self.protocolo = None
+        self.puerto = None
+        self.modo_crudo = False
+
+        self._estado = None
+        self._hora_estado = 0.0
+        respuesta = self._actualizar_estado()
+
+        # Eventos de resonancia ya traídos del daemon
+        self._eventos = deque(maxlen=MAX_EVENTOS)
+        self._hora_eventos = 0.0
+        self._lock_eventos = threading.Lock()
+
+        self.buffer_datos = BufferCompartido.adjuntar(respuesta['memoria'])
+        self.distribuidor = Distribuidor(self.buffer_datos)
+        self._suscripcion = self.distribuidor.suscribir('obtener_dato')
+
+    def _comando(self, comando, **parametros):
+        return self.canal.comando(comando, dispositivo=self.id_dispositivo, **parametros)
+
+    def _actualizar_estado(self):
+        respuesta = self._comando('estado')
+        estado = respuesta['estado']
+        self.puerto = estado['puerto']
+        self.protocolo = estado['protocolo']
+        self.modo_crudo = estado['modo_crudo']
+        self._estado = respuesta
+        self._hora_estado = time.monotonic()
+        return respuesta
+
+    def conectar(self, puerto=None):
+        """
+        Pide al daemon que conecte con Arduino e inicie la captura
+
+        Returns:
+            bool: True si la conexión fue exitosa
+        """
+        respuesta = self._comando('conectar', conexion_propia=True, puerto=puerto,
+                                  protocolo=self.protocolo_preferido)
+        self.puerto = respuesta['puerto']
+        self.protocolo = respuesta['protocolo']
+        self._estado = None
+        return respuesta['conectado']
+
+    def iniciar_captura(self):
+        """La captura la hace el daemon al conectar"""
+        return self.esta_conectado()
+
+    def desconectar(self):
+        self._comando('desconectar')
+        self._estado = None
+
+    def esta_conectado(self):
+        """
+        Verifica si el daemon tiene Arduino conectado (estado en caché por
+        VIGENCIA_ESTADO segundos: los streams lo consultan en cada lote)
+
+        Returns:
+            bool: True si está conectado
+        """
+        try:
+            if self._estado is None or time.monotonic() - self._hora_estado > VIGENCIA_ESTADO:
+                self._actualizar_estado()
+        except ConnectionError:
+            return False
+        return self._estado['conectado']
+
+    def iniciar_modo_crudo(self, frecuencia=1000):
+        respuesta = self._comando('modo_crudo', activar=True, frecuencia=frecuencia)
+        self.modo_crudo = respuesta['modo_crudo']
+        return respuesta['ok']
+
+    def detener_modo_crudo(self):
+        respuesta = self._comando('modo_crudo', activar=False)
+        self.modo_crudo = respuesta['modo_crudo']
+        return respuesta['ok']
+
+    def obtener_muestras_crudas(self, n=None, segundos=None):
+        return self._comando('muestras_crudas', n=n, segundos=segundos)['crudas']
+
+    def configurar_detector(self, frecuencia=None, **opciones):
+        return self._comando('detector', frecuencia=frecuencia, opciones=opciones)['detector']
+
+    def eventos_resonancia(self, desde=0):
+        """
+        Eventos del detector del daemon con secuencia mayor que `desde`
+        (se piden al daemon a lo sumo cada VIGENCIA_EVENTOS segundos y solo
+        los que este worker aún no tiene)
+
+        Returns:
+            list: Eventos de inicio/fin de resonancia
+        """
+        with self._lock_eventos:
+            if time.monotonic() - self._hora_eventos > VIGENCIA_EVENTOS:
+                ultimo = self._eventos[-1]['secuencia'] if self._eventos else 0
+                try:
+                    self._eventos.extend(self._comando('eventos_resonancia', desde=ultimo)['eventos'])
+                except ConnectionError:
+                    return []
+                self._hora_eventos = time.monotonic()
+            return [evento for evento in self._eventos if evento['secuencia'] > desde]
+
+    def suscribir(self, nombre='', desde=None):
+        return self.distribuidor.suscribir(nombre, desde)
+
+    def obtener_dato(self, timeout=0.1):
+        datos = self.obtener_lote_datos(cantidad=1, timeout=timeout)
+        return datos[0] if datos else None
+
+    def obtener_lote_datos(self, cantidad=10, timeout=5):
+        return self._suscripcion.leer_paquetes(max_paquetes=cantidad, timeout=timeout, minimo=cantidad)
+
+    def vaciar_buffer(self):
+        self._suscripcion.saltar_al_final()
+
+    def obtener_estadisticas(self):
+        """
+        Estadísticas del daemon, con el retraso y los descartados de la
+        suscripción de este worker
+
+        Returns:
+            dict: Mismas claves que ArduinoHandler.obtener_estadisticas()
+        """
+        estado = dict(self._actualizar_estado()['estado'])
+        estado['buffer_size'] = self._suscripcion.retraso
+        estado['paquetes_no_leidos'] = self._suscripcion.descartados
+        estado['adquisicion'] = {
+            'daemon': f'{self.canal.direccion[0]}:{self.canal.direccion[1]}',
+            'memoria': self.buffer_datos.nombre,
+            'pid_worker': os.getpid()
+        }
+        return estado
+
+
+class RegistroRemoto(RegistroSensores):
+    """
+    Registro de un worker web: los dispositivos son los del daemon
+
+    Un dispositivo conectado desde otro worker se adjunta aquí la primera
+    vez que se lo pide.
+    """
+
+    def __init__(self, direccion=DIRECCION_CONTROL, clave=None, espera=ESPERA_DAEMON):
+        self.canal = CanalControl(direccion, clave, espera)
+        super().__init__(crear_handler=lambda id_dispositivo, lector: ArduinoRemoto(self.canal, id_dispositivo))
+        self.lector = None
+
+    def obtener(self, id_dispositivo=DISPOSITIVO_POR_DEFECTO, crear=False):
+        if not crear and id_dispositivo not in self.dispositivos:
+            crear = id_dispositivo in self.canal.comando('dispositivos')['dispositivos']
+        return super().obtener(id_dispositivo, crear)
+
+    def ids(self):
+        return self.canal.comando('dispositivos')['dispositivos']
+
+    def obtener_estadisticas(self):
+        return {
+            'dispositivos': {id_dispositivo: self.obtener(id_dispositivo).obtener_estadisticas()
+                             for id_dispositivo in self.ids()},
+            'lector': None
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Daemon de adquisición del sensor')
+    parser.add_argument('--control', default=f'{DIRECCION_CONTROL[0]}:{DIRECCION_CONTROL[1]}',
+                        help='host:puerto del canal de control (solo loopback)')
+    parser.add_argument('--capacidad', type=int, default=CAPACIDAD_POR_DEFECTO,
+                        help='Paquetes retenidos en la memoria compartida')
+    parser.add_argument('--puerto', help='Puerto serial a conectar al iniciar (auto: detectar)')
+    parser.add_argument('--protocolo', choices=['auto', 'binario', 'json'], default='auto')
+    args = parser.parse_args()
+
+    try:
+        daemon = DaemonAdquisicion(direccion_control(args.control), capacidad=args.capacidad)
+    except (ValueError, RuntimeError) as e:
+        parser.error(str(e))
+
+    def terminar(*_):
+        raise SystemExit(0)
+    signal.signal(signal.SIGTERM, terminar)
+
+    try:
+        if args.puerto:
+            daemon.ejecutar({'comando': 'conectar', 'protocolo': args.protocolo,
+                             'puerto': None if args.puerto == 'auto' else args.puerto})
+        daemon.atender()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.cerrar()
+        print("✓ Daemon de adquisición detenido")
+
+
+if __name__ == '__main__':
+    main()
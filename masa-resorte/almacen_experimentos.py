@@ -0,0 +1,790 @@
+"""
+================================================================================
+ALMACÉN EN DISCO DE EXPERIMENTOS (COLUMNAS SOLO-AGREGAR)
+Proyecto: Análisis de Resonancia en Sistema Masa-Resorte
+================================================================================
+
+Los paquetes capturados durante un experimento se escriben en disco a
+medida que llegan, con la misma disposición en columnas que el
+BufferCircular: un archivo binario por campo (más 'n_muestras' y la
+matriz 'muestras'), al que solo se le agregan filas. Cada cierto número de
+filas se abre un segmento nuevo, así ningún archivo crece sin límite y los
+segmentos cerrados ya no se vuelven a tocar.
+
+    resultados/experimentos/<experimento>/
+        experimento.json          índice: metadatos y rango de tiempo por segmento
+        segmento_000000/id.bin, rms.bin, ..., muestras.bin
+        segmento_000001/...
+
+La lectura usa np.memmap sobre esos archivos: analizar o exportar un
+experimento de varias horas no necesita tenerlo en memoria. Las filas se
+vuelcan al sistema operativo tras cada lote (fsync periódico), y si el
+proceso muere a mitad de un segmento, al reabrir el almacén se recortan
+las columnas a la última fila completa y el experimento queda marcado
+como 'interrumpido' en lugar de perderse.
+
+Con varios workers web, la grabación la lleva el proceso que la inició.
+Mientras dura, ese proceso tiene la reserva del sensor: un archivo
+.grabando_<dispositivo> creado en exclusiva, con el experimento y su pid.
+Así cualquier worker ve qué se está grabando, y no puede haber dos
+grabaciones del mismo sensor. Para detener la grabación desde otro worker
+se crea el archivo 'detener' en la carpeta del experimento; el grabador
+lo comprueba en cada lectura.
+
+Funcionalidades:
+- Segmentos rotados por número de filas, columnas crudas tipadas
+- Índice JSON por experimento (escritura atómica) con rango de tiempo
+- Lectura por rango de tiempo y por columnas, sin cargar todo el experimento
+- Grabación en segundo plano desde una suscripción del Distribuidor
+- Estadísticas en línea (estadisticas_en_linea.py) guardadas en el índice
+- Recuperación de experimentos interrumpidos
+- Una grabación por sensor, visible y detenible desde cualquier proceso
+================================================================================
+"""
+
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from buffer_circular import CAMPOS, MUESTRAS_POR_BLOQUE
+from estadisticas_en_linea import EstadisticasEnLinea
+
+
+FILAS_POR_SEGMENTO = 36000        # 1 hora a 10 paquetes/s (~8 MB por segmento)
+INTERVALO_SINCRONIZACION = 5.0    # segundos entre fsync de las columnas abiertas
+LOTE_GRABACION = 256              # paquetes por lectura de la suscripción
+
+ARCHIVO_INDICE = 'experimento.json'
+ARCHIVO_DETENER = 'detener'           # pedido de detención (en la carpeta del experimento)
+PREFIJO_RESERVA = '.grabando_'        # reserva del sensor (en la raíz del almacén)
+ESPERA_DETENCION = 5.0                # segundos que detener() espera a que cierre la grabación
+PATRON_EXPERIMENTO = re.compile(r'^[A-Za-z0-9_-]{1,80}$')
+
+# Columnas de cada segmento: campos del paquete, cuántas muestras trae el
+# bloque y las muestras (una fila de MUESTRAS_POR_BLOQUE por paquete)
+COLUMNAS = {**CAMPOS, 'n_muestras': np.int16, 'muestras': np.float32}
+
+ESTADO_CAPTURANDO = 'capturando'
+ESTADO_TERMINADO = 'terminado'
+ESTADO_INTERRUMPIDO = 'interrumpido'
+
+
+class ExperimentoNoEncontrado(LookupError):
+    """El identificador no corresponde a ningún experimento del almacén"""
+
+
+class GrabacionEnCurso(RuntimeError):
+    """El sensor ya se está grabando (en este u otro proceso)"""
+
+
+def _nombre_segmento(numero):
+    return f'segmento_{numero:06d}'
+
+
+def _escribir_json_atomico(ruta, datos):
+    temporal = f'{ruta}.{threading.get_ident()}.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(datos, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, ruta)
+
+
+def _proceso_vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class Experimento:
+    """
+    Experimento guardado (o en curso) leído desde disco
+    """
+
+    def __init__(self, directorio):
+        """
+        Args:
+            directorio: Carpeta del experimento (con experimento.json)
+        """
+        self.directorio = directorio
+        with open(os.path.join(directorio, ARCHIVO_INDICE), encoding='utf-8') as f:
+            self.indice = json.load(f)
+        self.id = self.indice['id']
+        self.dispositivo = self.indice['dispositivo']
+        self.muestras_por_bloque = self.indice['muestras_por_bloque']
+
+    def _ruta_columna(self, numero, columna):
+        return os.path.join(self.directorio, _nombre_segmento(numero), f'{columna}.bin')
+
+    def _bytes_por_fila(self, columna):
+        ancho = self.muestras_por_bloque if columna == 'muestras' else 1
+        return np.dtype(COLUMNAS[columna]).itemsize * ancho
+
+    def filas_en_disco(self, numero):
+        """
+        Filas completas del segmento según el tamaño de sus archivos
+
+        Las columnas se agregan una tras otra, así que en un segmento
+        abierto (o tras una caída) la fila completa más reciente es la de
+        la columna más corta.
+        """
+        filas = []
+        for columna in COLUMNAS:
+            try:
+                tamano = os.path.getsize(self._ruta_columna(numero, columna))
+            except OSError:
+                return 0
+            filas.append(tamano // self._bytes_por_fila(columna))
+        return int(min(filas))
+
+    def segmentos(self):
+        """
+        Segmentos del experimento con sus filas y rango de tiempo
+
+        Returns:
+            list: dicts con 'numero', 'filas', 't_inicio' y 't_fin'; el
+                segmento abierto se mide en disco
+        """
+        segmentos = [dict(s) for s in self.indice['segmentos']]
+        for segmento in segmentos:
+            if segmento.get('abierto'):
+                segmento['filas'] = self.filas_en_disco(segmento['numero'])
+                if segmento['filas']:
+                    tiempo = self.leer_segmento(segmento['numero'], ['tiempo_local'], segmento['filas'])
+                    segmento['t_inicio'] = float(tiempo['tiempo_local'][0])
+                    segmento['t_fin'] = float(tiempo['tiempo_local'][-1])
+        return segmentos
+
+    @property
+    def filas(self):
+        return sum(s['filas'] for s in self.segmentos())
+
+    def leer_segmento(self, numero, columnas=None, filas=None):
+        """
+        Columnas de un segmento como np.memmap de solo lectura
+
+        Args:
+            numero: Número de segmento
+            columnas: Nombres de columna (None: todas)
+            filas: Filas a exponer (None: las completas en disco)
+
+        Returns:
+            dict: Arreglo por columna
+        """
+        if filas is None:
+            filas = self.filas_en_disco(numero)
+        resultado = {}
+        for columna in columnas or COLUMNAS:
+            forma = (filas, self.muestras_por_bloque) if columna == 'muestras' else (filas,)
+            if filas == 0:
+                resultado[columna] = np.empty(forma, dtype=COLUMNAS[columna])
+            else:
+                resultado[columna] = np.memmap(self._ruta_columna(numero, columna), dtype=COLUMNAS[columna],
+                                               mode='r', shape=forma)
+        return resultado
+
+    def iterar(self, columnas=None, desde=None, hasta=None):
+        """
+        Recorre el experimento segmento a segmento
+
+        Args:
+            columnas: Nombres de columna (None: todas)
+            desde, hasta: Rango de 'tiempo_local' (epoch s, extremos incluidos)
+
+        Yields:
+            dict: Columnas de las filas del segmento dentro del rango
+        """
+        columnas = list(columnas or COLUMNAS)
+        for segmento in self.segmentos():
+            if not segmento['filas']:
+                continue
+            if desde is not None and segmento['t_fin'] < desde:
+                continue
+            if hasta is not None and segmento['t_inicio'] > hasta:
+                continue
+
+            datos = self.leer_segmento(segmento['numero'], set(columnas) | {'tiempo_local'}, segmento['filas'])
+            tiempo = datos['tiempo_local']
+            inicio = 0 if desde is None else int(np.searchsorted(tiempo, desde, side='left'))
+            fin = len(tiempo) if hasta is None else int(np.searchsorted(tiempo, hasta, side='right'))
+            if fin > inicio:
+                yield {columna: datos[columna][inicio:fin] for columna in columnas}
+
+    def leer(self, columnas=None, desde=None, hasta=None):
+        """
+        Columnas del experimento (o de un rango de tiempo) concatenadas
+
+        Returns:
+            dict: Arreglo NumPy por columna
+        """
+        columnas = list(columnas or COLUMNAS)
+        partes = list(self.iterar(columnas, desde, hasta))
+        if not partes:
+            return {columna: self.leer_segmento(0, [columna], 0)[columna] for columna in columnas}
+        return {columna: np.concatenate([p[columna] for p in partes]) for columna in columnas}
+
+    def estadisticas(self):
+        """
+        Agregados en línea del experimento (EstadisticasEnLinea)
+
+        Se leen del índice, donde el grabador los mantiene al día (durante
+        la captura, con hasta INTERVALO_SINCRONIZACION de atraso). Si el
+        índice no los tiene se recorren los segmentos una vez.
+        """
+        guardadas = self.indice.get('estadisticas')
+        if guardadas and (self.indice['estado'] == ESTADO_CAPTURANDO or guardadas['n'] == self.filas):
+            return EstadisticasEnLinea.desde_dict(guardadas)
+        estadisticas = EstadisticasEnLinea()
+        for bloque in self.iterar(estadisticas.campos + ('tiempo_local',)):
+            estadisticas.actualizar(bloque)
+        return estadisticas
+
+    def obtener_estadisticas(self):
+        """
+        Resumen del experimento para listados
+
+        Returns:
+            dict: Metadatos del índice, filas, segmentos y rango de tiempo
+        """
+        segmentos = [s for s in self.segmentos() if s['filas']]
+        tamano = 0
+        for segmento in segmentos:
+            carpeta = os.path.join(self.directorio, _nombre_segmento(segmento['numero']))
+            tamano += sum(e.stat().st_size for e in os.scandir(carpeta))
+        return {
+            **{clave: valor for clave, valor in self.indice.items() if clave not in ('segmentos', 'estadisticas')},
+            'filas': sum(s['filas'] for s in segmentos),
+            'segmentos': len(segmentos),
+            't_inicio': segmentos[0]['t_inicio'] if segmentos else None,
+            't_fin': segmentos[-1]['t_fin'] if segmentos else None,
+            'bytes': tamano
+        }
+
+
+class EscritorExperimento:
+    """
+    Agrega filas a un experimento, rotando segmentos (un solo escritor)
+    """
+
+    def __init__(self, directorio, indice, filas_por_segmento=FILAS_POR_SEGMENTO):
+        self.directorio = directorio
+        self.indice = indice
+        self.filas_por_segmento = filas_por_segmento
+        self.ruta_indice = os.path.join(directorio, ARCHIVO_INDICE)
+
+        self._archivos = {}
+        self._filas_segmento = 0
+        self._t_inicio_segmento = None
+        self._t_fin_segmento = None
+        self._ultima_sincronizacion = time.time()
+        self.filas = 0
+        self.cerrado = False
+        self.lock = threading.Lock()
+        self.estadisticas = EstadisticasEnLinea()
+
+        self._guardar_indice()
+
+    @property
+    def id(self):
+        return self.indice['id']
+
+    def _guardar_indice(self):
+        self.indice['estadisticas'] = self.estadisticas.a_dict()
+        _escribir_json_atomico(self.ruta_indice, self.indice)
+
+    def _abrir_segmento(self):
+        numero = len(self.indice['segmentos'])
+        carpeta = os.path.join(self.directorio, _nombre_segmento(numero))
+        os.makedirs(carpeta, exist_ok=True)
+        self._archivos = {columna: open(os.path.join(carpeta, f'{columna}.bin'), 'ab') for columna in COLUMNAS}
+        self._filas_segmento = 0
+        self._t_inicio_segmento = self._t_fin_segmento = None
+        self.indice['segmentos'].append({'numero': numero, 'filas': 0, 't_inicio': None,
+                                         't_fin': None, 'abierto': True})
+        self._guardar_indice()
+
+    def _cerrar_segmento(self):
+        for archivo in self._archivos.values():
+            archivo.flush()
+            os.fsync(archivo.fileno())
+            archivo.close()
+        self._archivos = {}
+        segmento = self.indice['segmentos'][-1]
+        segmento.update({'filas': self._filas_segmento, 't_inicio': self._t_inicio_segmento,
+                         't_fin': self._t_fin_segmento})
+        segmento.pop('abierto', None)
+
+    def agregar(self, ventana):
+        """
+        Agrega las filas de una ventana del BufferCircular
+
+        Args:
+            ventana: dict con una columna por campo de COLUMNAS (p. ej. el
+                resultado de Suscripcion.leer)
+
+        Returns:
+            int: Filas agregadas
+        """
+        n = len(ventana['id'])
+        if n == 0:
+            return 0
+        with self.lock:
+            if self.cerrado:
+                raise ValueError(f'El experimento {self.id} ya está cerrado')
+
+            hecho = 0
+            rotado = False
+            while hecho < n:
+                if not self._archivos:
+                    self._abrir_segmento()
+                cantidad = min(n - hecho, self.filas_por_segmento - self._filas_segmento)
+                for columna, tipo in COLUMNAS.items():
+                    bloque = ventana[columna][hecho:hecho + cantidad]
+                    self._archivos[columna].write(np.ascontiguousarray(bloque, dtype=tipo).tobytes())
+
+                tiempo = ventana['tiempo_local']
+                if self._t_inicio_segmento is None:
+                    self._t_inicio_segmento = float(tiempo[hecho])
+                self._t_fin_segmento = float(tiempo[hecho + cantidad - 1])
+                self._filas_segmento += cantidad
+                hecho += cantidad
+
+                if self._filas_segmento >= self.filas_por_segmento:
+                    self._cerrar_segmento()
+                    rotado = True
+
+            self.estadisticas.actualizar(ventana)
+            self.filas += n
+            if rotado:
+                self._guardar_indice()
+
+            # Volcar al sistema operativo en cada lote: una caída del proceso
+            # no pierde filas; fsync (y los agregados del índice) acotados
+            # para no frenar la captura
+            for archivo in self._archivos.values():
+                archivo.flush()
+            if time.time() - self._ultima_sincronizacion >= INTERVALO_SINCRONIZACION:
+                for archivo in self._archivos.values():
+                    os.fsync(archivo.fileno())
+                if not rotado:
+                    self._guardar_indice()
+                self._ultima_sincronizacion = time.time()
+
+            return n
+
+    def cerrar(self, estado=ESTADO_TERMINADO, **metadatos):
+        """
+        Cierra el segmento abierto y marca el experimento como terminado
+
+        Args:
+            estado: Estado final del experimento
+            **metadatos: Campos extra para el índice (p. ej. descartados)
+        """
+        with self.lock:
+            if self.cerrado:
+                return
+            if self._archivos:
+                self._cerrar_segmento()
+            self.indice.update(metadatos)
+            self.indice['estado'] = estado
+            self.indice['fin'] = datetime.now().isoformat(timespec='seconds')
+            self.indice.pop('pid', None)
+            self._guardar_indice()
+            self.cerrado = True
+
+
+class Grabacion:
+    """
+    Hilo que copia a disco todo lo que publica un sensor durante un experimento
+    """
+
+    def __init__(self, escritor, fuente, duracion=None, al_terminar=None):
+        """
+        Args:
+            escritor: EscritorExperimento de destino
+            fuente: Objeto con suscribir() (ArduinoHandler o ArduinoRemoto)
+            duracion: Segundos a grabar (None: hasta detener())
+            al_terminar: Se llama con la grabación una vez cerrado el índice
+        """
+        self.escritor = escritor
+        self.suscripcion = fuente.suscribir(f'experimento {escritor.id}')
+        self.fin = time.time() + duracion if duracion else None
+        self.al_terminar = al_terminar
+        self.ruta_detener = os.path.join(escritor.directorio, ARCHIVO_DETENER)
+        self._detener = threading.Event()
+        self.hilo = threading.Thread(target=self._ejecutar, daemon=True)
+        self.hilo.start()
+
+    @property
+    def id(self):
+        return self.escritor.id
+
+    @property
+    def activa(self):
+        return self.hilo.is_alive()
+
+    @property
+    def detencion_solicitada(self):
+        if self._detener.is_set():
+            return True
+        if os.path.exists(self.ruta_detener):
+            self._detener.set()
+            return True
+        return False
+
+    def _ejecutar(self):
+        estado = ESTADO_TERMINADO
+        try:
+            while not self.detencion_solicitada:
+                ventana = self.suscripcion.leer(max_paquetes=LOTE_GRABACION, timeout=0.5)
+                self.escritor.agregar(ventana)
+                if self.fin is not None and time.time() >= self.fin:
+                    break
+            # Lo ya publicado al detener también pertenece al experimento
+            self.escritor.agregar(self.suscripcion.leer())
+        except Exception as e:
+            print(f"✗ Error grabando el experimento {self.id}: {e}")
+            estado = ESTADO_INTERRUMPIDO
+        finally:
+            self.suscripcion.cancelar()
+            self.escritor.cerrar(estado, descartados=self.suscripcion.descartados)
+            try:
+                os.remove(self.ruta_detener)
+            except OSError:
+                pass
+            if self.al_terminar is not None:
+                self.al_terminar(self)
+
+    def detener(self, timeout=5):
+        """
+        Termina la grabación y espera a que el índice quede cerrado
+        """
+        self._detener.set()
+        self.hilo.join(timeout)
+
+    def obtener_estadisticas(self):
+        return {
+            'experimento': self.id,
+            'activa': self.activa,
+            'filas': self.escritor.filas,
+            'descartados': self.suscripcion.descartados,
+            'segundos_restantes': max(0.0, round(self.fin - time.time(), 1)) if self.fin else None
+        }
+
+
+class AlmacenExperimentos:
+    """
+    Carpeta de experimentos con su índice por dispositivo y tiempo
+    """
+
+    def __init__(self, directorio, filas_por_segmento=FILAS_POR_SEGMENTO, recuperar=True):
+        """
+        Args:
+            directorio: Carpeta raíz de los experimentos
+            filas_por_segmento: Filas antes de rotar a un segmento nuevo
+            recuperar: Cerrar los experimentos que quedaron a medio grabar
+        """
+        self.directorio = directorio
+        self.filas_por_segmento = filas_por_segmento
+        self.lock = threading.Lock()
+        self.grabaciones = {}  # Grabaciones que lleva este proceso, por experimento
+        os.makedirs(directorio, exist_ok=True)
+        if recuperar:
+            self.recuperar()
+
+    def _ruta(self, experimento):
+        if not PATRON_EXPERIMENTO.match(experimento):
+            raise ExperimentoNoEncontrado(f'Experimento no válido: {experimento}')
+        return os.path.join(self.directorio, experimento)
+
+    def crear(self, dispositivo, duracion=None, muestras_por_bloque=MUESTRAS_POR_BLOQUE):
+        """
+        Crea un experimento vacío listo para agregar filas
+
+        Returns:
+            EscritorExperimento
+        """
+        base = f"{dispositivo}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        with self.lock:
+            experimento, sufijo = base, 1
+            while os.path.exists(os.path.join(self.directorio, experimento)):
+                sufijo += 1
+                experimento = f'{base}_{sufijo}'
+            directorio = self._ruta(experimento)
+            os.makedirs(directorio)
+
+        indice = {
+            'id': experimento,
+            'dispositivo': dispositivo,
+            'inicio': datetime.now().isoformat(timespec='seconds'),
+            'fin': None,
+            'duracion_solicitada': duracion,
+            'fin_previsto': time.time() + duracion if duracion else None,
+            'estado': ESTADO_CAPTURANDO,
+            'pid': os.getpid(),
+            'muestras_por_bloque': muestras_por_bloque,
+            'columnas': {columna: np.dtype(tipo).str for columna, tipo in COLUMNAS.items()},
+            'segmentos': []
+        }
+        return EscritorExperimento(directorio, indice, self.filas_por_segmento)
+
+    def grabar(self, dispositivo, fuente, duracion=None):
+        """
+        Crea un experimento y empieza a grabar lo que publique `fuente`
+
+        Returns:
+            Grabacion
+
+        Raises:
+            GrabacionEnCurso: Si el sensor ya se está grabando
+        """
+        en_curso = self.en_curso(dispositivo)
+        if en_curso is not None:
+            raise GrabacionEnCurso(f'El sensor {dispositivo} ya se está grabando ({en_curso.id})')
+
+        muestras_por_bloque = fuente.distribuidor.buffer.muestras_por_bloque
+        escritor = self.crear(dispositivo, duracion, muestras_por_bloque)
+        if not self._reservar(dispositivo, escritor.id):
+            # Otro proceso ganó la reserva entre la consulta y la creación
+            shutil.rmtree(escritor.directorio, ignore_errors=True)
+            raise GrabacionEnCurso(f'El sensor {dispositivo} ya se está grabando')
+
+        grabacion = Grabacion(escritor, fuente, duracion, al_terminar=self._liberar)
+        self.grabaciones[grabacion.id] = grabacion
+        return grabacion
+
+    def _ruta_reserva(self, dispositivo):
+        return os.path.join(self.directorio, f'{PREFIJO_RESERVA}{dispositivo}')
+
+    def _leer_reserva(self, dispositivo):
+        try:
+            with open(self._ruta_reserva(dispositivo), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _reserva_vigente(self, reserva):
+        """La reserva es de un proceso vivo que sigue capturando su experimento"""
+        if not reserva or not _proceso_vivo(reserva['pid']):
+            return False
+        try:
+            return self.obtener(reserva['experimento']).indice['estado'] == ESTADO_CAPTURANDO
+        except (ExperimentoNoEncontrado, OSError, ValueError):
+            return False
+
+    def _reservar(self, dispositivo, experimento):
+        """
+        Toma la reserva del sensor (creación exclusiva); una reserva huérfana
+        (proceso muerto o experimento cerrado) se reemplaza
+
+        Returns:
+            bool: False si otro proceso tiene la reserva
+        """
+        ruta = self._ruta_reserva(dispositivo)
+        contenido = json.dumps({'experimento': experimento, 'pid': os.getpid()})
+        for _ in range(2):
+            try:
+                descriptor = os.open(ruta, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            except FileExistsError:
+                reserva = self._leer_reserva(dispositivo)
+                if self._reserva_vigente(reserva):
+                    return False
+                # Solo se borra si nadie la reemplazó mientras tanto
+                if self._leer_reserva(dispositivo) == reserva:
+                    try:
+                        os.remove(ruta)
+                    except FileNotFoundError:
+                        pass
+                continue
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as f:
+                f.write(contenido)
+            return True
+        return False
+
+    def _liberar(self, grabacion):
+        self.grabaciones.pop(grabacion.id, None)
+        reserva = self._leer_reserva(grabacion.escritor.indice['dispositivo'])
+        if reserva and reserva['experimento'] == grabacion.id:
+            try:
+                os.remove(self._ruta_reserva(grabacion.escritor.indice['dispositivo']))
+            except OSError:
+                pass
+
+    def en_curso(self, dispositivo):
+        """
+        Experimento que se está grabando para el sensor (en cualquier proceso), o None
+        """
+        reserva = self._leer_reserva(dispositivo)
+        if not self._reserva_vigente(reserva):
+            return None
+        return self.obtener(reserva['experimento'])
+
+    def grabando(self):
+        """
+        Experimentos en curso de todos los sensores
+
+        Returns:
+            dict: Experimento por dispositivo
+        """
+        resultado = {}
+        for entrada in os.scandir(self.directorio):
+            if entrada.is_file() and entrada.name.startswith(PREFIJO_RESERVA):
+                dispositivo = entrada.name[len(PREFIJO_RESERVA):]
+                experimento = self.en_curso(dispositivo)
+                if experimento is not None:
+                    resultado[dispositivo] = experimento
+        return resultado
+
+    def detener(self, dispositivo, espera=ESPERA_DETENCION):
+        """
+        Pide terminar la grabación en curso del sensor, la lleve este
+        proceso u otro, y espera a que su índice quede cerrado
+
+        Returns:
+            Experimento: El experimento detenido (releído), o None si no
+                había grabación en curso
+        """
+        experimento = self.en_curso(dispositivo)
+        if experimento is None:
+            return None
+
+        grabacion = self.grabaciones.get(experimento.id)
+        if grabacion is not None:
+            grabacion.detener(espera)
+        else:
+            open(os.path.join(experimento.directorio, ARCHIVO_DETENER), 'w').close()
+            limite = time.monotonic() + espera
+            while time.monotonic() < limite:
+                reserva = self._leer_reserva(dispositivo)
+                if not reserva or reserva['experimento'] != experimento.id:
+                    break
+                time.sleep(0.1)
+        return self.obtener(experimento.id)
+
+    def resumen_grabacion(self, experimento):
+        """
+        Estado de la grabación de un experimento, la lleve este proceso u otro
+
+        Returns:
+            dict: Como Grabacion.obtener_estadisticas
+        """
+        grabacion = self.grabaciones.get(experimento.id)
+        if grabacion is not None:
+            return grabacion.obtener_estadisticas()
+        indice = experimento.indice
+        activa = indice['estado'] == ESTADO_CAPTURANDO
+        fin = indice.get('fin_previsto')
+        return {
+            'experimento': experimento.id,
+            'activa': activa,
+            'filas': experimento.filas,
+            'descartados': indice.get('descartados', 0),
+            'segundos_restantes': max(0.0, round(fin - time.time(), 1)) if activa and fin else None
+        }
+
+    def obtener(self, experimento):
+        """
+        Abre un experimento para lectura
+
+        Raises:
+            ExperimentoNoEncontrado: Si no existe
+        """
+        directorio = self._ruta(experimento)
+        if not os.path.exists(os.path.join(directorio, ARCHIVO_INDICE)):
+            raise ExperimentoNoEncontrado(f'Experimento no encontrado: {experimento}')
+        return Experimento(directorio)
+
+    def _experimentos(self):
+        for entrada in os.scandir(self.directorio):
+            if entrada.is_dir() and os.path.exists(os.path.join(entrada.path, ARCHIVO_INDICE)):
+                try:
+                    yield Experimento(entrada.path)
+                except (OSError, ValueError, KeyError):
+                    continue
+
+    def listar(self, dispositivo=None, desde=None, hasta=None):
+        """
+        Índice de experimentos, del más reciente al más antiguo
+
+        Args:
+            dispositivo: Filtrar por sensor
+            desde, hasta: Solo experimentos con datos en ese rango (epoch s)
+
+        Returns:
+            list: Resumen de cada experimento (Experimento.obtener_estadisticas)
+        """
+        resultado = []
+        for experimento in self._experimentos():
+            if dispositivo is not None and experimento.dispositivo != dispositivo:
+                continue
+            resumen = experimento.obtener_estadisticas()
+            if desde is not None and (resumen['t_fin'] is None or resumen['t_fin'] < desde):
+                continue
+            if hasta is not None and (resumen['t_inicio'] is None or resumen['t_inicio'] > hasta):
+                continue
+            resultado.append(resumen)
+        resultado.sort(key=lambda r: r['inicio'], reverse=True)
+        return resultado
+
+    def ultimo(self, dispositivo):
+        """
+        Experimento más reciente de un sensor, o None
+        """
+        experimentos = [e for e in self._experimentos() if e.dispositivo == dispositivo]
+        if not experimentos:
+            return None
+        return max(experimentos, key=lambda e: e.indice['inicio'])
+
+    def eliminar(self, experimento):
+        shutil.rmtree(self.obtener(experimento).directorio)
+
+    def recuperar(self):
+        """
+        Cierra los experimentos cuyo proceso grabador ya no existe
+
+        Recorta cada columna del segmento abierto a la última fila
+        completa y marca el experimento como 'interrumpido'.
+
+        Returns:
+            list: Identificadores recuperados
+        """
+        recuperados = []
+        for experimento in self._experimentos():
+            indice = experimento.indice
+            if indice['estado'] != ESTADO_CAPTURANDO:
+                continue
+            if indice.get('pid') and _proceso_vivo(indice['pid']) and indice['pid'] != os.getpid():
+                continue
+
+            for segmento in indice['segmentos']:
+                if not segmento.pop('abierto', False):
+                    continue
+                filas = experimento.filas_en_disco(segmento['numero'])
+                for columna in COLUMNAS:
+                    ruta = experimento._ruta_columna(segmento['numero'], columna)
+                    if os.path.exists(ruta):
+                        os.truncate(ruta, filas * experimento._bytes_por_fila(columna))
+                segmento['filas'] = filas
+                if filas:
+                    tiempo = experimento.leer_segmento(segmento['numero'], ['tiempo_local'], filas)['tiempo_local']
+                    segmento['t_inicio'], segmento['t_fin'] = float(tiempo[0]), float(tiempo[-1])
+
+            indice['estado'] = ESTADO_INTERRUMPIDO
+            indice.pop('pid', None)
+            # Los agregados del índice pueden ir atrasados: recalcular
+            indice.pop('estadisticas', None)
+            indice['estadisticas'] = experimento.estadisticas().a_dict()
+            _escribir_json_atomico(os.path.join(experimento.directorio, ARCHIVO_INDICE), indice)
+            recuperados.append(experimento.id)
+            print(f"⚠️  Experimento {experimento.id} recuperado tras una interrupción")
+        return recuperados
@@ -0,0 +1,169 @@
+"""
+================================================================================
+ALMACÉN DIRECCIONADO POR CONTENIDO PARA IMÁGENES
+Proyecto: Análisis de Resonancia en Sistema Masa-Resorte
+================================================================================
+
+Guarda las gráficas PNG bajo un hash de los datos que las generaron, para
+servirlas desde una URL estable (/graficas/<hash>.png) que el navegador y
+los proxies pueden cachear indefinidamente: el mismo hash siempre
+corresponde a la misma imagen.
+
+Funcionalidades:
+- Huella SHA-256 de parámetros y arreglos NumPy
+- Memoria LRU acotada con respaldo opcional en disco (también acotado)
+- Escritura atómica de archivos
+================================================================================
+"""
+
+import hashlib
+import os
+import re
+import threading
+
+import numpy as np
+
+from cache_resultados import CacheLRU
+
+
+# Cambiar al modificar las plantillas de renderizado para invalidar URLs
+VERSION_IMAGENES = 'v2'
+
+PATRON_HUELLA = re.compile(r'^[0-9a-f]{32}$')
+
+
+def huella_contenido(*partes):
+    """
+    Calcula la huella de los datos de entrada de una imagen
+
+    Args:
+        *partes: Cadenas, números, tuplas o arreglos NumPy
+
+    Returns:
+        str: 32 caracteres hexadecimales
+    """
+    h = hashlib.sha256(VERSION_IMAGENES.encode())
+    for parte in partes:
+        if isinstance(parte, np.ndarray):
+            h.update(str(parte.dtype).encode())
+            h.update(str(parte.shape).encode())
+            h.update(np.ascontiguousarray(parte).tobytes())
+        else:
+            h.update(repr(parte).encode())
+        h.update(b'\x00')
+    return h.hexdigest()[:32]
+
+
+class AlmacenImagenes:
+    """
+    Almacén de imágenes PNG en memoria (LRU) y en disco
+    """
+
+    def __init__(self, tamano_memoria=64, directorio=None, max_archivos=1000):
+        """
+        Inicializa el almacén
+
+        Args:
+            tamano_memoria: Número máximo de imágenes en memoria
+            directorio: Carpeta para persistir imágenes (None: solo memoria)
+            max_archivos: Número máximo de archivos en disco
+        """
+        self.memoria = CacheLRU(tamano_maximo=tamano_memoria)
+        self.directorio = directorio
+        self.max_archivos = max_archivos
+        self.lock = threading.Lock()
+
+        self._archivos_disco = 0
+        if directorio:
+            if not os.path.exists(directorio):
+                os.makedirs(directorio)
+            self._archivos_disco = self._contar_archivos()
+
+    def _ruta(self, huella):
+        return os.path.join(self.directorio, f'{huella}.png')
+
+    def contiene(self, huella):
+        """
+        Indica si la imagen está disponible (sin contarla como consulta)
+        """
+        if not PATRON_HUELLA.match(huella):
+            return False
+        if huella in self.memoria:
+            return True
+        return bool(self.directorio) and os.path.exists(self._ruta(huella))
+
+    def obtener(self, huella):
+        """
+        Obtiene los bytes PNG de una imagen
+
+        Returns:
+            bytes: Imagen o None si no existe
+        """
+        if not PATRON_HUELLA.match(huella):
+            return None
+
+        datos = self.memoria.obtener(huella)
+        if datos is not None or not self.directorio:
+            return datos
+
+        try:
+            with open(self._ruta(huella), 'rb') as f:
+                datos = f.read()
+        except OSError:
+            return None
+        self.memoria.guardar(huella, datos)
+        return datos
+
+    def guardar(self, huella, datos):
+        """
+        Guarda una imagen en memoria y, si hay directorio, en disco
+        """
+        self.memoria.guardar(huella, datos)
+        if not self.directorio:
+            return
+
+        ruta = self._ruta(huella)
+        temporal = f'{ruta}.{threading.get_ident()}.tmp'
+        # Reescribir una imagen existente no suma un archivo al directorio
+        nuevo = not os.path.exists(ruta)
+        try:
+            with open(temporal, 'wb') as f:
+                f.write(datos)
+            os.replace(temporal, ruta)
+        except OSError as e:
+            print(f"⚠️  No se pudo guardar la imagen {huella}: {e}")
+            return
+        if nuevo:
+            self._recortar_disco()
+
+    def _contar_archivos(self):
+        return sum(1 for e in os.scandir(self.directorio) if e.name.endswith('.png'))
+
+    def _recortar_disco(self):
+        """Elimina los archivos más antiguos si se supera el máximo"""
+        with self.lock:
+            # Conteo incremental: el directorio solo se recorre al desbordar
+            self._archivos_disco += 1
+            if self._archivos_disco <= self.max_archivos:
+                return
+            archivos = [e for e in os.scandir(self.directorio) if e.name.endswith('.png')]
+            archivos.sort(key=lambda e: e.stat().st_mtime)
+            sobrantes = max(0, len(archivos) - self.max_archivos)
+            for entrada in archivos[:sobrantes]:
+                try:
+                    os.remove(entrada.path)
+                except OSError:
+                    pass
+            self._archivos_disco = len(archivos) - sobrantes
+
+    def obtener_estadisticas(self):
+        """
+        Obtiene estadísticas del almacén
+
+        Returns:
+            dict: Estadísticas de la memoria LRU y archivos en disco
+        """
+        stats = self.memoria.obtener_estadisticas()
+        if self.directorio:
+            stats['archivos_disco'] = self._archivos_disco
+        return stats
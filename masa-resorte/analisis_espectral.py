@@ -0,0 +1,311 @@
+"""
+================================================================================
+ANÁLISIS ESPECTRAL: PSD, FRECUENCIA DOMINANTE E IDENTIFICACIÓN DE RESONANCIA
+Proyecto: Análisis de Resonancia en Sistema Masa-Resorte
+================================================================================
+
+Estima la densidad espectral de potencia (PSD) de las muestras del sensor
+con el método de Welch: segmentos con ventana (Hann por defecto), rFFT de
+todos los segmentos a la vez y promedio de los periodogramas. Sobre la PSD
+se buscan los picos y, en el dominante, el ancho de banda de media
+potencia (-3 dB), de donde sale el amortiguamiento medido:
+
+    ζ ≈ (f2 - f1) / (2 · f_n)        Q = 1 / (2ζ)
+
+válido para amortiguamiento bajo (ζ < ~0.1), el caso de interés en
+resonancia.
+
+Dos fuentes de muestras:
+- Paquetes de resumen: cada uno trae 50 muestras tomadas 1 de cada 10 a
+  1000 Hz (FRECUENCIA_MUESTRAS_PAQUETE = 100 Hz, Nyquist 50 Hz); cada
+  paquete es un segmento de Welch independiente
+- Modo crudo: forma de onda continua (FlujoMuestras) a la frecuencia
+  pedida; segmentos solapados al 50 %
+
+La ventana, el tamaño de FFT (rápido para scipy.fft, con relleno de ceros
+para interpolar picos y bordes de media potencia), las frecuencias y la
+escala se calculan una vez por combinación y quedan en caché
+(plan_fft), así que analizar cada ventana entrante cuesta una rFFT por lote.
+
+Funcionalidades:
+- PSD de Welch por lotes acumulables (PromedioPSD) o sobre un flujo (psd_welch)
+- Segmentos con huecos (NaN) descartados
+- Picos con interpolación parabólica, ancho de media potencia, ζ y Q
+- Comparación con la frecuencia natural y el ζ simulados
+================================================================================
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+import scipy.fft
+from scipy.signal import find_peaks, get_window
+
+
+# Muestras de los paquetes de resumen: 1 de cada PASO_MUESTRAS (10) a 1000 Hz
+FRECUENCIA_MUESTRAS_PAQUETE = 100.0
+
+VENTANA = 'hann'
+SOLAPAMIENTO = 0.5          # fracción entre segmentos consecutivos (flujo continuo)
+RESOLUCION_WELCH = 1.0      # Hz por segmento en flujo continuo (fs / muestras por segmento)
+RELLENO_CEROS = 4           # nfft ≈ RELLENO_CEROS · muestras por segmento
+
+N_PICOS = 5
+PROMINENCIA_MINIMA = 0.05   # fracción de la PSD máxima de la banda
+
+# Distancia relativa a la frecuencia natural simulada dentro de la cual el
+# pico dominante se considera resonancia (modelo vs. montaje real)
+TOLERANCIA_RESONANCIA = 0.10
+
+PlanFFT = namedtuple('PlanFFT', ['muestras', 'nfft', 'frecuencia', 'ventana', 'escala',
+                                 'frecuencias', 'resolucion', 'ancho_ventana'])
+
+
+@lru_cache(maxsize=32)
+def plan_fft(muestras, frecuencia, ventana=VENTANA):
+    """
+    Ventana, tamaño de FFT y escala para segmentos de `muestras` a `frecuencia` Hz
+
+    Returns:
+        PlanFFT: con 'escala' por bin (PSD unilateral en V²/Hz),
+            'resolucion' = frecuencia / muestras y 'ancho_ventana' el ancho
+            de media potencia que la ventana sola le da a un tono puro (Hz)
+    """
+    nfft = scipy.fft.next_fast_len(muestras * RELLENO_CEROS, real=True)
+    coeficientes = get_window(ventana, muestras)
+    coeficientes.flags.writeable = False
+
+    frecuencias = np.fft.rfftfreq(nfft, 1.0 / frecuencia)
+    escala = np.full(len(frecuencias), 1.0 / (frecuencia * np.sum(coeficientes**2)))
+    escala[1:nfft // 2 + nfft % 2] *= 2   # unilateral: todo menos DC y Nyquist
+    frecuencias.flags.writeable = escala.flags.writeable = False
+
+    # Lóbulo principal de la ventana, muy rellenado, para medir su -3 dB
+    lobulo = np.abs(scipy.fft.rfft(coeficientes, muestras * 64)) ** 2
+    ancho_bins = 2 * np.argmax(lobulo < lobulo[0] / 2) / 64
+
+    return PlanFFT(muestras, nfft, frecuencia, coeficientes, escala, frecuencias,
+                   frecuencia / muestras, ancho_bins * frecuencia / muestras)
+
+
+class PromedioPSD:
+    """
+    PSD de Welch acumulada por lotes de segmentos de igual longitud
+    """
+
+    def __init__(self, muestras, frecuencia, ventana=VENTANA):
+        """
+        Args:
+            muestras: Muestras por segmento
+            frecuencia: Frecuencia de muestreo (Hz)
+            ventana: Nombre de ventana de scipy.signal.get_window
+        """
+        self.plan = plan_fft(int(muestras), float(frecuencia), ventana)
+        self.suma = np.zeros(len(self.plan.frecuencias))
+        self.segmentos = 0
+        self.descartados = 0
+
+    def agregar(self, segmentos):
+        """
+        Agrega los periodogramas de un lote
+
+        Args:
+            segmentos: Arreglo (n_segmentos, muestras); las filas con NaN
+                (huecos, paquetes incompletos) se descartan
+        """
+        x = np.asarray(segmentos, dtype=float)
+        validos = np.isfinite(x).all(axis=1)
+        self.descartados += int(len(x) - np.count_nonzero(validos))
+        x = x[validos]
+        if len(x) == 0:
+            return
+        x -= x.mean(axis=1, keepdims=True)   # sin continua (offset del sensor)
+        espectro = scipy.fft.rfft(x * self.plan.ventana, self.plan.nfft, axis=1)
+        self.suma += np.sum(espectro.real**2 + espectro.imag**2, axis=0)
+        self.segmentos += len(x)
+
+    def psd(self):
+        """
+        Returns:
+            tuple: (frecuencias, psd) en Hz y V²/Hz (ceros sin segmentos)
+        """
+        return self.plan.frecuencias, self.suma * self.plan.escala / max(self.segmentos, 1)
+
+
+def psd_welch(muestras, frecuencia, resolucion=RESOLUCION_WELCH, solapamiento=SOLAPAMIENTO, ventana=VENTANA):
+    """
+    PSD de Welch de una forma de onda continua
+
+    Args:
+        muestras: Forma de onda (NaN en huecos)
+        frecuencia: Frecuencia de muestreo (Hz)
+        resolucion: Hz por segmento; si la señal es más corta se usa un
+            único segmento con toda la señal
+
+    Returns:
+        PromedioPSD: con psd(), plan, segmentos y descartados
+    """
+    x = np.asarray(muestras, dtype=float)
+    n = max(8, min(len(x), int(round(frecuencia / resolucion))))
+    promedio = PromedioPSD(n, frecuencia, ventana)
+    if len(x) >= n:
+        paso = max(1, int(n * (1 - solapamiento)))
+        promedio.agregar(np.lib.stride_tricks.sliding_window_view(x, n)[::paso])
+    return promedio
+
+
+def psd_paquetes(muestras, frecuencia=FRECUENCIA_MUESTRAS_PAQUETE, promedio=None, ventana=VENTANA):
+    """
+    Agrega las muestras de paquetes de resumen (una fila por paquete)
+
+    Args:
+        muestras: Columna 'muestras' de una ventana del BufferCircular o
+            de un experimento
+        promedio: PromedioPSD a continuar (None: uno nuevo)
+
+    Returns:
+        PromedioPSD
+    """
+    muestras = np.asarray(muestras)
+    if promedio is None:
+        promedio = PromedioPSD(muestras.shape[1], frecuencia, ventana)
+    promedio.agregar(muestras)
+    return promedio
+
+
+def picos_espectrales(frecuencias, psd, n_picos=N_PICOS, f_min=None, f_max=None):
+    """
+    Picos de la PSD ordenados por densidad
+
+    La frecuencia se refina con una parábola sobre log(PSD) en los tres
+    bins del pico.
+
+    Returns:
+        list: dicts con 'frecuencia', 'densidad' e 'indice' (bin)
+    """
+    banda = np.ones(len(frecuencias), dtype=bool)
+    if f_min is not None:
+        banda &= frecuencias >= f_min
+    if f_max is not None:
+        banda &= frecuencias <= f_max
+    desplazamiento = int(np.argmax(banda))
+    valores = psd[banda]
+    if len(valores) < 3 or not np.any(valores > 0):
+        return []
+
+    indices, _ = find_peaks(valores, prominence=PROMINENCIA_MINIMA * np.max(valores))
+    orden = np.argsort(valores[indices])[::-1][:n_picos]
+    df = frecuencias[1] - frecuencias[0]
+
+    picos = []
+    for i in indices[orden] + desplazamiento:
+        izquierda, centro, derecha = np.log(np.maximum(psd[i - 1:i + 2], np.finfo(float).tiny))
+        curvatura = izquierda - 2 * centro + derecha
+        delta = 0.5 * (izquierda - derecha) / curvatura if curvatura < 0 else 0.0
+        picos.append({
+            'frecuencia': float(frecuencias[i] + delta * df),
+            'densidad': float(np.exp(centro - 0.25 * (izquierda - derecha) * delta)),
+            'indice': int(i)
+        })
+    return picos
+
+
+def ancho_media_potencia(frecuencias, psd, indice, densidad=None):
+    """
+    Frecuencias donde la PSD cae a la mitad del pico (-3 dB) a cada lado
+
+    Args:
+        indice: Bin del pico
+        densidad: PSD del pico (None: la del bin); la interpolada de
+            picos_espectrales es menos sensible al ruido de un solo bin
+
+    Returns:
+        tuple: (f1, f2) interpoladas linealmente, o None si el pico no
+            baja a la mitad dentro del espectro
+    """
+    mitad = (psd[indice] if densidad is None else densidad) / 2
+    debajo_izquierda = np.flatnonzero(psd[:indice] < mitad)
+    debajo_derecha = np.flatnonzero(psd[indice + 1:] < mitad)
+    if len(debajo_izquierda) == 0 or len(debajo_derecha) == 0:
+        return None
+
+    def cruce(a, b):
+        return frecuencias[a] + (mitad - psd[a]) * (frecuencias[b] - frecuencias[a]) / (psd[b] - psd[a])
+
+    i = debajo_izquierda[-1]
+    j = debajo_derecha[0] + indice + 1
+    return float(cruce(i, i + 1)), float(cruce(j - 1, j))
+
+
+def identificar_resonancia(promedio, f_natural=None, zeta=None, f_min=None, f_max=None):
+    """
+    Frecuencia dominante, picos y amortiguamiento medido de una PSD
+
+    Args:
+        promedio: PromedioPSD con al menos un segmento
+        f_natural, zeta: Frecuencia natural (Hz) y razón de amortiguamiento
+            simuladas para comparar (opcionales)
+        f_min, f_max: Banda de búsqueda (por defecto desde la resolución
+            hasta Nyquist)
+
+    Returns:
+        dict: 'frecuencia_dominante', 'frecuencia_natural', 'ancho_banda',
+            'factor_amortiguamiento', 'factor_calidad', 'picos', la
+            resolución y, con f_natural, 'simulado' y 'en_resonancia'.
+            None si no hay segmentos
+    """
+    if promedio.segmentos == 0:
+        return None
+    plan = promedio.plan
+    frecuencias, psd = promedio.psd()
+    picos = picos_espectrales(frecuencias, psd, f_min=plan.resolucion if f_min is None else f_min, f_max=f_max)
+
+    resultado = {
+        'frecuencia_dominante': picos[0]['frecuencia'] if picos else None,
+        'frecuencia_natural': None,
+        'ancho_banda': None,
+        'f_inferior': None,
+        'f_superior': None,
+        'factor_amortiguamiento': None,
+        'factor_calidad': None,
+        'limitado_por_resolucion': None,
+        'picos': [{'frecuencia': p['frecuencia'], 'densidad': p['densidad']} for p in picos],
+        'resolucion': plan.resolucion,
+        'frecuencia_muestreo': plan.frecuencia,
+        'segmentos': promedio.segmentos,
+        'segmentos_descartados': promedio.descartados
+    }
+    if not picos:
+        return resultado
+
+    # Modo medido: el pico más cercano a la f_n simulada si se conoce (con
+    # forzamiento fuera de resonancia el dominante es el del motor)
+    modo = picos[0]
+    if f_natural:
+        modo = min(picos, key=lambda p: abs(p['frecuencia'] - f_natural))
+    resultado['frecuencia_natural'] = modo['frecuencia']
+
+    bordes = ancho_media_potencia(frecuencias, psd, modo['indice'], modo['densidad'])
+    if bordes is not None:
+        f1, f2 = bordes
+        ancho = f2 - f1
+        resultado.update({
+            'ancho_banda': ancho,
+            'f_inferior': f1,
+            'f_superior': f2,
+            'factor_amortiguamiento': ancho / (2 * modo['frecuencia']),
+            'factor_calidad': modo['frecuencia'] / ancho,
+            # Un pico tan angosto como la propia ventana solo acota ζ por arriba
+            'limitado_por_resolucion': bool(ancho < 2 * plan.ancho_ventana)
+        })
+
+    if f_natural:
+        tolerancia = max(TOLERANCIA_RESONANCIA * f_natural, plan.resolucion)
+        resultado['simulado'] = {'frecuencia_natural': float(f_natural),
+                                 'factor_amortiguamiento': None if zeta is None else float(zeta)}
+        resultado['desviacion_relativa'] = (modo['frecuencia'] - f_natural) / f_natural
+        resultado['en_resonancia'] = bool(abs(picos[0]['frecuencia'] - f_natural) <= tolerancia)
+        resultado['fuera_de_banda'] = bool(f_natural > plan.frecuencia / 2)
+    return resultado
+
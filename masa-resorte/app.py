@@ -1,27 +1,89 @@
-from flask import Flask, render_template, request, jsonify, send_file, Response
+from flask import (Flask, render_template, request, jsonify, send_file, Response, url_for,
+                   copy_current_request_context)
 import numpy as np
-from scipy.integrate import odeint
-import matplotlib
-matplotlib.use('Agg')  # Para generar gráficos sin interfaz gráfica
-import matplotlib.pyplot as plt
 from datetime import datetime
 import pandas as pd
 import os
-import io
-import base64
 import json
 import time
+import threading
 
 # Importar módulo de comunicación con Arduino
-from serial_handler import ArduinoHandler, listar_puertos_disponibles
+from serial_handler import listar_puertos_disponibles, FRECUENCIA_CRUDO_MIN, FRECUENCIA_CRUDO_MAX
+from registro_sensores import RegistroSensores, DispositivoNoRegistrado, DISPOSITIVO_POR_DEFECTO
+from adquisicion import RegistroRemoto, direccion_control
+from decimacion import serie_json
+from renderizado import PoolRenderizado
+from cache_resultados import CacheLRU, clave_parametros
+from almacen_imagenes import AlmacenImagenes, huella_contenido
+from almacen_experimentos import AlmacenExperimentos, ExperimentoNoEncontrado, GrabacionEnCurso
+from analisis_espectral import PromedioPSD, FRECUENCIA_MUESTRAS_PAQUETE, psd_welch, psd_paquetes, identificar_resonancia
+from exportacion import (FORMATOS, FormatoNoDisponible, bloques_arreglos, bloques_experimento,
+                         comprobar_formato, flujo, tabla)
+from trabajos import ColaTrabajos, ColaLlena, TrabajoNoEncontrado, FINALES, TERMINADO
+from superficie_respuesta import SuperficieRespuesta
+from solver_analitico import resolver_respuesta, respuesta_frecuencia
+from sensibilidad import muestrear, simular_lote, resumen_distribucion
 
 app = Flask(__name__)
 
 # ======================================================================
-# Instancia Global de Arduino Handler
+# Registro de sensores (uno o varios Arduino)
 # ======================================================================
-arduino = ArduinoHandler()
-datos_experimentales = []  # Buffer para datos del experimento físico
+# Las rutas /arduino/... usan el dispositivo por defecto y las rutas
+# /arduino/<dispositivo>/... uno concreto. Con MASA_RESORTE_ADQUISICION=
+# host:puerto los puertos serie los atiende el daemon de adquisición
+# (adquisicion.py) y este proceso solo lee su memoria compartida: así
+# pueden correr varios workers web a la vez
+if os.environ.get('MASA_RESORTE_ADQUISICION'):
+    sensores = RegistroRemoto(direccion_control(os.environ['MASA_RESORTE_ADQUISICION']))
+else:
+    sensores = RegistroSensores()
+arduino = sensores.obtener(DISPOSITIVO_POR_DEFECTO, crear=True)
+
+# Experimentos físicos: se graban en disco mientras se capturan (columnas
+# por segmentos) y el análisis y la exportación los leen de ahí. La
+# grabación en curso de cada sensor está reservada en el almacén, así que
+# todos los workers la ven y cualquiera puede detenerla
+almacen_experimentos = AlmacenExperimentos(os.path.join('resultados', 'experimentos'))
+
+# Pool de procesos para las gráficas PNG (fuera del estado global de pyplot)
+pool_renderizado = PoolRenderizado(max_procesos=min(4, os.cpu_count() or 1))
+TIMEOUT_RENDERIZADO = 30  # segundos
+
+# Ventana de simulación de /calcular
+T_MAX_SIMULACION = 20.0
+N_PUNTOS_SIMULACION = 1000
+
+# Superficie de respuesta precalculada para el modo rápido (se carga o
+# construye en segundo plano; mientras no esté lista se usa el modo exacto)
+superficie = SuperficieRespuesta(n_puntos=N_PUNTOS_SIMULACION)
+threading.Thread(target=superficie.inicializar, daemon=True).start()
+
+# Cachés de /calcular: resultados numéricos y series por separado
+cache_calculos = CacheLRU(tamano_maximo=256)
+cache_series = CacheLRU(tamano_maximo=128)
+
+# Gráficas PNG direccionadas por contenido, servidas en /graficas/<huella>.png
+almacen_imagenes = AlmacenImagenes(tamano_memoria=64, directorio=os.path.join('resultados', 'graficas'))
+
+# Trabajos lentos (análisis de experimentos, exportaciones a Excel o a
+# archivo) en un pool acotado fuera de los hilos de las peticiones; el
+# estado va a disco para consultarlo desde cualquier worker
+cola_trabajos = ColaTrabajos(max_trabajadores=min(4, os.cpu_count() or 1), max_pendientes=32,
+                             retencion=900, directorio=os.path.join('resultados', 'trabajos'))
+MAX_ESPERA_TRABAJO = 10  # segundos que una petición puede esperar a su trabajo
+
+# Puntos por serie en las respuestas en formato datos
+PUNTOS_SERIE_DEFECTO = 400
+
+# Espectro en vivo: segundos analizados y paquetes de resumen por segundo
+SEGUNDOS_ESPECTRO = 2.0
+PAQUETES_POR_SEGUNDO = 10
+
+# Columnas del almacén que lee el análisis para la gráfica (las estadísticas
+# salen de los agregados en línea del experimento)
+COLUMNAS_GRAFICA = ['rms', 'max', 'std', 'crest', 'tiempo_local']
 
 # ======================================================================
 # Funciones de Análisis (importadas del código original)
@@ -39,6 +101,18 @@ def analisis_estadistico(datos, t):
     }
     return stats
 
+# Niveles de riesgo por RMS: se pasa al siguiente nivel al superar cada umbral
+NIVELES_RIESGO = ('ACEPTABLE', 'PRECAUCIÓN', 'ALTO RIESGO')
+UMBRALES_RIESGO_RMS = (0.05, 0.1)
+UMBRAL_ADVERTENCIA_MAX = 0.15
+
+def clasificar_riesgo(rms):
+    """
+    Índice en NIVELES_RIESGO de cada valor RMS (vectorizado; mismos
+    umbrales que evaluar_riesgo)
+    """
+    return np.digitize(rms, UMBRALES_RIESGO_RMS, right=True)
+
 def evaluar_riesgo(rms, max_amp):
     """
     Evalúa el nivel de riesgo según estándares ISO 10816 y 
@@ -47,14 +121,14 @@ def evaluar_riesgo(rms, max_amp):
     # Conversión aproximada de m/s² a voltios del sensor (calibración típica)
     # Ajustar según calibración real del sensor
     
-    if rms > 0.1:
+    if rms > UMBRALES_RIESGO_RMS[1]:
         nivel = "ALTO RIESGO"
         color = "danger"
         descripcion = "⚠️ CRÍTICO: Vibraciones exceden límites seguros. Afectación significativa a la salud física, descanso y bienestar emocional. Requiere intervención inmediata."
         impacto_salud = "Posible daño a la salud: insomnio crónico, estrés elevado, fatiga constante, dolores de cabeza frecuentes, irritabilidad extrema."
         impacto_social = "Deterioro grave de la convivencia: conflictos vecinales, reducción de calidad de vida, afectación del rendimiento laboral/escolar."
         recomendacion = "ACCIÓN URGENTE: Contactar autoridades municipales, presentar este reporte como evidencia, solicitar inspección técnica y medidas de mitigación inmediatas."
-    elif rms > 0.05:
+    elif rms > UMBRALES_RIESGO_RMS[0]:
         nivel = "PRECAUCIÓN"
         color = "warning"
         descripcion = "⚠️ MODERADO: Niveles de vibración en zona de advertencia. Pueden causar molestias significativas y afectación al descanso prolongado."
@@ -73,58 +147,114 @@ def evaluar_riesgo(rms, max_amp):
         'nivel': nivel,
         'color': color,
         'descripcion': descripcion,
-        'advertencia_adicional': max_amp > 0.15,
+        'advertencia_adicional': max_amp > UMBRAL_ADVERTENCIA_MAX,
         'impacto_salud': impacto_salud,
         'impacto_social': impacto_social,
         'recomendacion': recomendacion
     }
 
-def sistema_masa_resorte(y, t, m, k, c, F0, w_fuerza):
-    """Define el sistema de ecuaciones diferenciales de primer orden."""
-    F_externa = F0 * np.cos(w_fuerza * t)
-    x, v = y
-    dvdt = (F_externa - c * v - k * x) / m
-    dxdt = v
-    return [dxdt, dvdt]
-
 def generar_graficas(t, sol_normal, sol_resonancia, aceleracion, w_normal, w_resonancia, f_n):
-    """Genera las gráficas y las devuelve como imágenes base64"""
-    plt.figure(figsize=(15, 8))
-    
-    # Gráfica 1: Vibración Normal
-    plt.subplot(2, 2, 1)
-    plt.plot(t, sol_normal[:, 0], 'b-', linewidth=2)
-    plt.title(f'Vibración Normal\n(f_fuerza = {w_normal/(2*np.pi):.2f} Hz)', fontsize=12, fontweight='bold')
-    plt.xlabel('Tiempo (s)', fontsize=10)
-    plt.ylabel('Desplazamiento (m)', fontsize=10)
-    plt.grid(True, linestyle='--', alpha=0.6)
-    
-    # Gráfica 2: Resonancia
-    plt.subplot(2, 2, 2)
-    plt.plot(t, sol_resonancia[:, 0], 'r-', linewidth=2)
-    plt.title(f'Resonancia\n(f_fuerza ≈ {f_n:.2f} Hz)', fontsize=12, fontweight='bold')
-    plt.xlabel('Tiempo (s)', fontsize=10)
-    plt.ylabel('Desplazamiento (m)', fontsize=10)
-    plt.grid(True, linestyle='--', alpha=0.6)
-    
-    # Gráfica 3: Aceleración durante Resonancia
-    plt.subplot(2, 2, (3, 4))
-    plt.plot(t, aceleracion, 'k-', linewidth=2)
-    plt.title('Aceleración durante Resonancia - Monitoreo de Vibraciones', fontsize=12, fontweight='bold')
-    plt.xlabel('Tiempo (s)', fontsize=10)
-    plt.ylabel('Aceleración (m/s²)', fontsize=10)
-    plt.grid(True, linestyle='--', alpha=0.6)
-    
-    plt.tight_layout()
-    
-    # Convertir a base64
-    buffer = io.BytesIO()
-    plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
-    buffer.seek(0)
-    image_base64 = base64.b64encode(buffer.getvalue()).decode()
-    plt.close()
-    
-    return image_base64
+    """Genera las gráficas en el pool de renderizado y devuelve los bytes PNG"""
+    futuro = pool_renderizado.renderizar_simulacion(t, sol_normal, sol_resonancia, aceleracion,
+                                                    w_normal, w_resonancia, f_n)
+    return futuro.result(timeout=TIMEOUT_RENDERIZADO)
+
+def simular_escenarios(m, k, c, F0):
+    """Simula los escenarios de operación normal y resonancia"""
+    # Cálculos preliminares
+    w_n = np.sqrt(k / m)
+    f_n = w_n / (2 * np.pi)
+    
+    # Parámetros de simulación
+    t = np.linspace(0, T_MAX_SIMULACION, N_PUNTOS_SIMULACION)
+    y0 = [0.0, 0.0]
+    
+    # Simulación de escenarios
+    w_normal = w_n / 2
+    w_resonancia = w_n * 0.999
+    
+    # Solución cerrada (odeint solo como respaldo para casos no cubiertos)
+    sol_normal, _ = resolver_respuesta(t, m, k, c, F0, w_normal, y0)
+    sol_resonancia, aceleracion = resolver_respuesta(t, m, k, c, F0, w_resonancia, y0)
+    
+    return {
+        't': t,
+        'sol_normal': sol_normal,
+        'sol_resonancia': sol_resonancia,
+        'aceleracion': aceleracion,
+        'w_normal': w_normal,
+        'w_resonancia': w_resonancia,
+        'f_n': f_n
+    }
+
+def calcular_resultados(m, k, c, F0, simulacion):
+    """Calcula estadísticas, riesgo y características del sistema"""
+    t = simulacion['t']
+    
+    # Análisis estadístico
+    stats_normal = analisis_estadistico(simulacion['sol_normal'][:, 0], t)
+    stats_resonancia = analisis_estadistico(simulacion['sol_resonancia'][:, 0], t)
+    stats_aceleracion = analisis_estadistico(simulacion['aceleracion'], t)
+    
+    return armar_resultados(m, k, c, F0, stats_normal, stats_resonancia, stats_aceleracion)
+
+def calcular_resultados_rapidos(m, k, c, F0):
+    """
+    Aproxima los resultados interpolando la superficie de respuesta,
+    sin simular. Devuelve None si la superficie no cubre los parámetros.
+    """
+    w_n = np.sqrt(k / m)
+    normal = superficie.estadisticas(m, k, c, F0, w_n / 2, T_MAX_SIMULACION)
+    resonancia = superficie.estadisticas(m, k, c, F0, w_n * 0.999, T_MAX_SIMULACION)
+    if normal is None or resonancia is None:
+        return None
+    
+    resultados = armar_resultados(m, k, c, F0, normal[0], resonancia[0], resonancia[1])
+    resultados['aproximado'] = True
+    resultados['cota_error_relativo'] = superficie.cota_error
+    return resultados
+
+def armar_resultados(m, k, c, F0, stats_normal, stats_resonancia, stats_aceleracion):
+    """Evalúa el riesgo y arma el diccionario de resultados de /calcular"""
+    w_n = np.sqrt(k / m)
+    f_n = w_n / (2 * np.pi)
+    
+    # Evaluación de riesgo
+    riesgo = evaluar_riesgo(stats_resonancia['RMS'], stats_resonancia['Máximo'])
+    
+    # Calcular factor de amortiguamiento
+    factor_amort = c / (2 * np.sqrt(m * k))
+    tipo_amort = "Subamortiguado" if factor_amort < 1 else "Sobreamortiguado" if factor_amort > 1 else "Amortiguamiento Crítico"
+    
+    return {
+        'parametros': {
+            'masa': m,
+            'constante_resorte': k,
+            'amortiguamiento': c,
+            'fuerza': F0,
+            'frecuencia_natural': round(f_n, 2),
+            'frecuencia_angular': round(w_n, 2),
+            'factor_amortiguamiento': round(factor_amort, 3),
+            'tipo_amortiguamiento': tipo_amort
+        },
+        'stats_normal': stats_normal,
+        'stats_resonancia': stats_resonancia,
+        'stats_aceleracion': stats_aceleracion,
+        'riesgo': riesgo,
+        'amplificacion_rms': round(stats_resonancia['RMS'] / stats_normal['RMS'], 1),
+        'amplificacion_max': round(stats_resonancia['Máximo'] / stats_normal['Máximo'], 1)
+    }
+
+def series_graficas(simulacion, n_puntos):
+    """Series decimadas (LTTB) para graficar en el navegador"""
+    t = simulacion['t']
+    return {
+        'normal': serie_json(t, simulacion['sol_normal'][:, 0], n_puntos),
+        'resonancia': serie_json(t, simulacion['sol_resonancia'][:, 0], n_puntos),
+        'aceleracion': serie_json(t, simulacion['aceleracion'], n_puntos),
+        'f_normal': float(simulacion['w_normal'] / (2 * np.pi)),
+        'f_n': float(simulacion['f_n'])
+    }
 
 # ======================================================================
 # Rutas de la aplicación
@@ -148,92 +278,134 @@ def calcular():
         # Validación de parámetros
         if m <= 0 or k <= 0 or c < 0 or F0 <= 0:
             return jsonify({'error': 'Los parámetros deben ser valores positivos'}), 400
+        puntos = request.form.get('puntos', str(PUNTOS_SERIE_DEFECTO))
+        if not puntos.isdigit() or not 3 <= int(puntos) <= N_PUNTOS_SIMULACION:
+            return jsonify({'error': f'puntos debe ser un entero entre 3 y {N_PUNTOS_SIMULACION}'}), 400
+        puntos = int(puntos)
         
-        # Cálculos preliminares
-        w_n = np.sqrt(k / m)
-        f_n = w_n / (2 * np.pi)
-        
-        # Parámetros de simulación
-        t_max = 20.0
-        n_puntos = 1000
-        t = np.linspace(0, t_max, n_puntos)
-        y0 = [0.0, 0.0]
-        
-        # Simulación de escenarios
-        w_normal = w_n / 2
-        w_resonancia = w_n * 0.999
-        
-        sol_normal = odeint(sistema_masa_resorte, y0, t, args=(m, k, c, F0, w_normal))
-        sol_resonancia = odeint(sistema_masa_resorte, y0, t, args=(m, k, c, F0, w_resonancia))
-        
-        # Cálculo de aceleración
-        aceleracion = (F0 * np.cos(w_resonancia * t) - c * sol_resonancia[:, 1] - k * sol_resonancia[:, 0]) / m
-        
-        # Análisis estadístico
-        stats_normal = analisis_estadistico(sol_normal[:, 0], t)
-        stats_resonancia = analisis_estadistico(sol_resonancia[:, 0], t)
-        stats_aceleracion = analisis_estadistico(aceleracion, t)
-        
-        # Evaluación de riesgo
-        riesgo = evaluar_riesgo(stats_resonancia['RMS'], stats_resonancia['Máximo'])
-        
-        # Generar gráficas
-        imagen_graficas = generar_graficas(t, sol_normal, sol_resonancia, aceleracion, 
-                                          w_normal, w_resonancia, f_n)
-        
-        # Calcular factor de amortiguamiento
-        factor_amort = c / (2 * np.sqrt(m * k))
-        tipo_amort = "Subamortiguado" if factor_amort < 1 else "Sobreamortiguado" if factor_amort > 1 else "Amortiguamiento Crítico"
-        
-        # Preparar respuesta
-        resultados = {
-            'parametros': {
-                'masa': m,
-                'constante_resorte': k,
-                'amortiguamiento': c,
-                'fuerza': F0,
-                'frecuencia_natural': round(f_n, 2),
-                'frecuencia_angular': round(w_n, 2),
-                'factor_amortiguamiento': round(factor_amort, 3),
-                'tipo_amortiguamiento': tipo_amort
-            },
-            'stats_normal': stats_normal,
-            'stats_resonancia': stats_resonancia,
-            'stats_aceleracion': stats_aceleracion,
-            'riesgo': riesgo,
-            'imagen_graficas': imagen_graficas,
-            'amplificacion_rms': round(stats_resonancia['RMS'] / stats_normal['RMS'], 1),
-            'amplificacion_max': round(stats_resonancia['Máximo'] / stats_normal['Máximo'], 1)
-        }
+        guardar = request.form.get('guardar_datos') == 'true'
         
-        # Guardar datos si se solicita
-        if request.form.get('guardar_datos') == 'true':
-            exportar_datos(t, sol_normal, sol_resonancia, aceleracion, m, k, c, F0)
+        clave = clave_parametros(m, k, c, F0)
         
-        return jsonify(resultados)
+        # Modo rápido: solo valores numéricos, sin gráficas. Se interpola la
+        # superficie de respuesta; si no cubre los parámetros se usa la
+        # solución analítica exacta (sin renderizar)
+        if request.form.get('modo') == 'rapido' and not guardar:
+            resultados = calcular_resultados_rapidos(m, k, c, F0)
+            if resultados is None:
+                resultados = cache_calculos.obtener(clave)
+                if resultados is None:
+                    resultados = calcular_resultados(*clave, simular_escenarios(*clave))
+                    cache_calculos.guardar(clave, resultados)
+                resultados = dict(resultados, aproximado=False)
+            return jsonify(resultados)
+        
+        # Formato de las gráficas: series decimadas (por defecto) o PNG
+        # (solo para exportar, servido por URL desde el almacén de imágenes)
+        if request.form.get('formato', 'datos') == 'png':
+            huella = huella_contenido('simulacion', clave)
+            url = url_for('imagen_grafica', huella=huella)
+            campo_grafica = 'url_graficas'
+            grafica = url if almacen_imagenes.contiene(huella) else None
+            
+            def generar(sim):
+                almacen_imagenes.guardar(huella, generar_graficas(**sim))
+                return url
+        else:
+            campo_grafica = 'series'
+            grafica = cache_series.obtener(clave + (puntos,))
+            
+            def generar(sim):
+                series = series_graficas(sim, puntos)
+                cache_series.guardar(clave + (puntos,), series)
+                return series
+        
+        # Consultar caché (resultado JSON y gráficas se guardan por separado)
+        resultados = cache_calculos.obtener(clave)
+        
+        simulacion = None
+        if resultados is None or grafica is None:
+            simulacion = simular_escenarios(*clave)
+        
+        if resultados is None:
+            resultados = calcular_resultados(*clave, simulacion)
+            cache_calculos.guardar(clave, resultados)
+        
+        if grafica is None:
+            grafica = generar(simulacion)
         
+        respuesta = dict(resultados, **{campo_grafica: grafica})
+        
+        # Guardar datos si se solicita (Excel en resultados/, como trabajo)
+        if guardar:
+            trabajo = cola_trabajos.enviar('guardar_simulacion', tarea_guardar_simulacion, clave,
+                                           descripcion='Excel de m={:g} k={:g} c={:g} F0={:g}'.format(*clave))
+            respuesta['trabajo'] = estado_trabajo(trabajo.a_dict())
+        
+        return jsonify(respuesta)
+        
+    except ColaLlena:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-def exportar_datos(t, sol_normal, sol_resonancia, aceleracion, m, k, c, F0):
-    """Exporta los datos a archivos Excel"""
-    folder = 'resultados'
-    if not os.path.exists(folder):
-        os.makedirs(folder)
+@app.route('/cache/estado')
+def estado_cache():
+    """Estadísticas de aciertos/fallos de la caché de /calcular"""
+    return jsonify({
+        'resultados': cache_calculos.obtener_estadisticas(),
+        'series': cache_series.obtener_estadisticas(),
+        'imagenes': almacen_imagenes.obtener_estadisticas()
+    })
+
+@app.route('/graficas/<huella>.png')
+def imagen_grafica(huella):
+    """Sirve una gráfica del almacén direccionado por contenido"""
+    # El contenido de una huella nunca cambia: validar sin leer la imagen
+    if huella in request.if_none_match and almacen_imagenes.contiene(huella):
+        respuesta = Response(status=304)
+    else:
+        datos = almacen_imagenes.obtener(huella)
+        if datos is None:
+            return jsonify({'error': 'Imagen no encontrada'}), 404
+        respuesta = Response(datos, mimetype='image/png')
     
-    df = pd.DataFrame({
+    respuesta.set_etag(huella)
+    respuesta.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return respuesta
+
+def columnas_simulacion(t, sol_normal, sol_resonancia, aceleracion):
+    """Columnas exportadas de la simulación (título -> arreglo)"""
+    return {
         'Tiempo': t,
         'Desplazamiento_Normal': sol_normal[:, 0],
         'Velocidad_Normal': sol_normal[:, 1],
         'Desplazamiento_Resonancia': sol_resonancia[:, 0],
         'Velocidad_Resonancia': sol_resonancia[:, 1],
         'Aceleracion_Resonancia': aceleracion
-    })
+    }
+
+def tarea_guardar_simulacion(trabajo, clave):
+    """Trabajo: simula y guarda el Excel de /calcular en resultados/"""
+    trabajo.avanzar(0.1, 'Simulando')
+    sim = simular_escenarios(*clave)
+    trabajo.avanzar(0.3, 'Escribiendo Excel')
+    ruta = exportar_datos(sim['t'], sim['sol_normal'], sim['sol_resonancia'], sim['aceleracion'], *clave)
+    trabajo.archivo_resultado(os.path.basename(ruta), ruta)
+    return {'archivo': ruta}
+
+def exportar_datos(t, sol_normal, sol_resonancia, aceleracion, m, k, c, F0, destino=None):
+    """Exporta los datos a archivos Excel (destino: ruta o archivo; por defecto resultados/)"""
+    if destino is None:
+        folder = 'resultados'
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        fecha = datetime.now().strftime('%Y%m%d_%H%M%S')
+        destino = os.path.join(folder, f'datos_vibracion_{fecha}.xlsx')
     
-    fecha = datetime.now().strftime('%Y%m%d_%H%M%S')
-    excel_file = os.path.join(folder, f'datos_vibracion_{fecha}.xlsx')
+    df = pd.DataFrame(columnas_simulacion(t, sol_normal, sol_resonancia, aceleracion))
     
-    with pd.ExcelWriter(excel_file, engine='openpyxl') as writer:
+    with pd.ExcelWriter(destino, engine='openpyxl') as writer:
         df.to_excel(writer, sheet_name='Datos', index=False)
         
         # Hoja con parámetros
@@ -243,6 +415,166 @@ def exportar_datos(t, sol_normal, sol_resonancia, aceleracion, m, k, c, F0):
             'Valor': [m, k, c, F0]
         })
         df_params.to_excel(writer, sheet_name='Parametros', index=False)
+    return destino
+
+MAX_PUNTOS_BARRIDO = 20000
+MAX_AMORTIGUAMIENTOS_BARRIDO = 50
+# Puntos de la malla (frecuencias × amortiguamientos): cada uno aporta
+# varios floats a la respuesta JSON; 100000 la mantienen en unos pocos MB
+MAX_MALLA_BARRIDO = 100000
+ESCALAS_BARRIDO = ('lineal', 'log')
+
+def _a_lista(arreglo):
+    """Convierte a lista JSON; la resonancia exacta sin amortiguamiento (inf) queda como null"""
+    return np.where(np.isfinite(arreglo), arreglo, None).tolist()
+
+def barrido_frecuencia(m, k, amortiguamientos, F0, f_min, f_max, n_puntos=2000, escala='lineal'):
+    """
+    Calcula la respuesta en frecuencia para una malla de amortiguamientos
+    y frecuencias de excitación en una sola operación con broadcasting
+    """
+    if escala not in ESCALAS_BARRIDO:
+        raise ValueError(f"escala debe ser {' o '.join(ESCALAS_BARRIDO)}")
+    if escala == 'log':
+        frecuencias = np.geomspace(f_min, f_max, n_puntos)
+    else:
+        frecuencias = np.linspace(f_min, f_max, n_puntos)
+
+    c = np.asarray(amortiguamientos, dtype=float)[:, np.newaxis]
+    frf = respuesta_frecuencia(m, k, c, F0, 2 * np.pi * frecuencias)
+
+    # Pico de resonancia por cada amortiguamiento
+    idx_pico = np.argmax(frf['amplitud'], axis=1)
+    amplitud_pico = frf['amplitud'][np.arange(len(idx_pico)), idx_pico]
+
+    return {
+        'frecuencias_hz': frecuencias.tolist(),
+        'amortiguamientos': c[:, 0].tolist(),
+        'factores_amortiguamiento': (c[:, 0] / (2 * np.sqrt(m * k))).tolist(),
+        'amplitud': _a_lista(frf['amplitud']),
+        'fase': frf['fase'].tolist(),
+        'transmisibilidad': _a_lista(frf['transmisibilidad']),
+        'aceleracion_pico': _a_lista(frf['aceleracion_pico']),
+        'picos': [
+            {
+                'frecuencia_hz': float(frecuencias[i]),
+                'amplitud': amplitud,
+                'amplificacion': amplificacion
+            }
+            for i, amplitud, amplificacion in zip(idx_pico, _a_lista(amplitud_pico),
+                                                   _a_lista(amplitud_pico * k / F0))
+        ]
+    }
+
+@app.route('/barrido', methods=['POST'])
+def barrido():
+    """Barrido de frecuencia (FRF) sobre el rango de velocidades del motor"""
+    try:
+        datos = request.get_json(silent=True) or request.form
+        
+        m = float(datos.get('masa', 1.0))
+        k = float(datos.get('constante_resorte', 100.0))
+        F0 = float(datos.get('fuerza', 5.0))
+        amortiguamientos = datos.get('amortiguamiento', 1.0)
+        if not isinstance(amortiguamientos, list):
+            amortiguamientos = [amortiguamientos]
+        amortiguamientos = [float(c) for c in amortiguamientos]
+        
+        f_n = np.sqrt(k / m) / (2 * np.pi)
+        f_min = float(datos.get('f_min', f_n / 10))
+        f_max = float(datos.get('f_max', f_n * 3))
+        n_puntos = int(datos.get('n_puntos', 2000))
+        escala = datos.get('escala', 'lineal')
+        
+        # Validación de parámetros
+        if m <= 0 or k <= 0 or F0 <= 0 or any(c < 0 for c in amortiguamientos):
+            return jsonify({'error': 'Los parámetros deben ser valores positivos'}), 400
+        if f_min <= 0 or f_max <= f_min:
+            return jsonify({'error': 'El rango de frecuencias no es válido'}), 400
+        if not 2 <= n_puntos <= MAX_PUNTOS_BARRIDO:
+            return jsonify({'error': f'n_puntos debe estar entre 2 y {MAX_PUNTOS_BARRIDO}'}), 400
+        if not 1 <= len(amortiguamientos) <= MAX_AMORTIGUAMIENTOS_BARRIDO:
+            return jsonify({'error': f'Se admiten hasta {MAX_AMORTIGUAMIENTOS_BARRIDO} valores de amortiguamiento'}), 400
+        if n_puntos * len(amortiguamientos) > MAX_MALLA_BARRIDO:
+            return jsonify({'error': f'n_puntos × amortiguamientos no puede superar {MAX_MALLA_BARRIDO}'}), 400
+        if escala not in ESCALAS_BARRIDO:
+            return jsonify({'error': f"escala debe ser {' o '.join(ESCALAS_BARRIDO)}"}), 400
+        
+        resultados = barrido_frecuencia(m, k, amortiguamientos, F0, f_min, f_max, n_puntos, escala)
+        resultados['frecuencia_natural'] = round(f_n, 4)
+        
+        return jsonify(resultados)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+MAX_MUESTRAS_SENSIBILIDAD = 20000
+
+@app.route('/sensibilidad', methods=['POST'])
+def sensibilidad():
+    """
+    Análisis de sensibilidad Monte Carlo: propaga las tolerancias de los
+    parámetros a la distribución de RMS, máximo y nivel de riesgo
+    """
+    try:
+        datos = request.get_json(silent=True) or {}
+        
+        n_muestras = int(datos.get('n_muestras', 1000))
+        if not 1 <= n_muestras <= MAX_MUESTRAS_SENSIBILIDAD:
+            return jsonify({'error': f'n_muestras debe estar entre 1 y {MAX_MUESTRAS_SENSIBILIDAD}'}), 400
+        semilla = datos.get('semilla')
+        if semilla is not None and (isinstance(semilla, bool) or not isinstance(semilla, int) or semilla < 0):
+            return jsonify({'error': 'semilla debe ser un entero no negativo'}), 400
+        rng = np.random.default_rng(semilla)
+        
+        try:
+            m = muestrear(datos.get('masa', 1.0), n_muestras, rng)
+            k = muestrear(datos.get('constante_resorte', 100.0), n_muestras, rng)
+            c = muestrear(datos.get('amortiguamiento', 1.0), n_muestras, rng)
+            F0 = muestrear(datos.get('fuerza', 5.0), n_muestras, rng)
+        except (ValueError, KeyError, TypeError) as e:
+            return jsonify({'error': f'Especificación de parámetro no válida: {e}'}), 400
+        
+        # Las colas de las distribuciones pueden producir valores no físicos
+        validas = (m > 0) & (k > 0) & (c >= 0) & (F0 > 0)
+        if not np.any(validas):
+            return jsonify({'error': 'Ninguna muestra tiene parámetros físicamente válidos'}), 400
+        m, k, c, F0 = m[validas], k[validas], c[validas], F0[validas]
+        
+        t = np.linspace(0, T_MAX_SIMULACION, N_PUNTOS_SIMULACION)
+        inicio = time.perf_counter()
+        lote = simular_lote(m, k, c, F0, t)
+        duracion = time.perf_counter() - inicio
+        
+        f_n = np.sqrt(k / m) / (2 * np.pi)
+        zeta = c / (2 * np.sqrt(m * k))
+        amplificacion = lote['max_resonancia'] / np.maximum(lote['max_normal'], 1e-10)
+        
+        # Distribución de los niveles de riesgo de /calcular
+        conteos = np.bincount(clasificar_riesgo(lote['rms_resonancia']), minlength=len(NIVELES_RIESGO))
+        advertencias = int(np.count_nonzero(lote['max_resonancia'] > UMBRAL_ADVERTENCIA_MAX))
+        
+        n_validas = len(m)
+        return jsonify({
+            'muestras': n_validas,
+            'muestras_descartadas': n_muestras - n_validas,
+            'tiempo_calculo_s': round(duracion, 4),
+            'frecuencia_natural': resumen_distribucion(f_n),
+            'factor_amortiguamiento': resumen_distribucion(zeta),
+            'rms_normal': resumen_distribucion(lote['rms_normal']),
+            'rms_resonancia': resumen_distribucion(lote['rms_resonancia']),
+            'max_resonancia': resumen_distribucion(lote['max_resonancia']),
+            'rms_aceleracion': resumen_distribucion(lote['rms_aceleracion']),
+            'amplificacion': resumen_distribucion(amplificacion),
+            'riesgo': {
+                nivel: {'muestras': int(conteo), 'probabilidad': conteo / n_validas}
+                for nivel, conteo in zip(NIVELES_RIESGO, conteos) if conteo
+            },
+            'probabilidad_advertencia': advertencias / n_validas
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
 # ======================================================================
 # RUTAS PARA INTEGRACIÓN CON ARDUINO
@@ -260,18 +592,50 @@ def listar_puertos():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.errorhandler(DispositivoNoRegistrado)
+def dispositivo_no_registrado(e):
+    return jsonify({'success': False, 'error': str(e)}), 404
+
+@app.route('/arduino/dispositivos')
+def listar_dispositivos():
+    """Sensores registrados con sus estadísticas"""
+    try:
+        return jsonify({'success': True, **sensores.obtener_estadisticas()})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/arduino/conectar', methods=['POST'])
-def conectar_arduino():
-    """Conecta con Arduino en el puerto especificado"""
+@app.route('/arduino/<dispositivo>/conectar', methods=['POST'])
+def conectar_arduino(dispositivo=DISPOSITIVO_POR_DEFECTO):
+    """Conecta con Arduino en el puerto especificado (registra el dispositivo)"""
     try:
         puerto = request.json.get('puerto', None)
+        protocolo = request.json.get('protocolo', 'auto')
+        if protocolo not in ('auto', 'binario', 'json'):
+            return jsonify({'success': False, 'error': f'Protocolo no válido: {protocolo}'}), 400
+        # Un puerto solo puede pertenecer a un dispositivo
+        for otro in sensores.ids():
+            handler_otro = sensores.obtener(otro)
+            if (otro != dispositivo and puerto and handler_otro.puerto == puerto
+                    and handler_otro.esta_conectado()):
+                return jsonify({'success': False, 'error': f'{puerto} ya está en uso por {otro}'}), 400
+        try:
+            arduino = sensores.obtener(dispositivo, crear=True)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        if arduino.esta_conectado():
+            return jsonify({'success': False,
+                            'error': f'{dispositivo} ya está conectado a {arduino.puerto}; desconectarlo primero'}), 409
+        arduino.protocolo_preferido = protocolo
         
         if arduino.conectar(puerto):
             arduino.iniciar_captura()
             return jsonify({
                 'success': True,
                 'mensaje': f'Conectado a {arduino.puerto}',
-                'puerto': arduino.puerto
+                'dispositivo': dispositivo,
+                'puerto': arduino.puerto,
+                'protocolo': arduino.protocolo
             })
         else:
             return jsonify({
@@ -283,19 +647,22 @@ def conectar_arduino():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/arduino/desconectar', methods=['POST'])
-def desconectar_arduino():
+@app.route('/arduino/<dispositivo>/desconectar', methods=['POST'])
+def desconectar_arduino(dispositivo=DISPOSITIVO_POR_DEFECTO):
     """Desconecta Arduino"""
+    arduino = sensores.obtener(dispositivo)
     try:
+        detener_grabacion(dispositivo)
         arduino.desconectar()
-        global datos_experimentales
-        datos_experimentales = []
         return jsonify({'success': True, 'mensaje': 'Arduino desconectado'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/arduino/estado')
-def estado_arduino():
+@app.route('/arduino/<dispositivo>/estado')
+def estado_arduino(dispositivo=DISPOSITIVO_POR_DEFECTO):
     """Obtiene el estado de la conexión con Arduino"""
+    arduino = sensores.obtener(dispositivo)
     try:
         stats = arduino.obtener_estadisticas()
         return jsonify({
@@ -305,235 +672,856 @@ def estado_arduino():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/arduino/modo_crudo', methods=['POST'])
+@app.route('/arduino/<dispositivo>/modo_crudo', methods=['POST'])
+def modo_crudo_arduino(dispositivo=DISPOSITIVO_POR_DEFECTO):
+    """Activa o desactiva la transmisión de la forma de onda completa"""
+    arduino = sensores.obtener(dispositivo)
+    try:
+        datos = request.get_json(silent=True) or {}
+        activar = bool(datos.get('activar', True))
+        frecuencia = datos.get('frecuencia', 1000)
+        if isinstance(frecuencia, bool) or not isinstance(frecuencia, int) \
+                or not FRECUENCIA_CRUDO_MIN <= frecuencia <= FRECUENCIA_CRUDO_MAX:
+            return jsonify({'success': False,
+                            'error': f'frecuencia debe ser un entero entre {FRECUENCIA_CRUDO_MIN} '
+                                     f'y {FRECUENCIA_CRUDO_MAX} Hz'}), 400
+        
+        if activar:
+            ok = arduino.iniciar_modo_crudo(frecuencia)
+        else:
+            ok = arduino.detener_modo_crudo()
+        if not ok:
+            return jsonify({
+                'success': False,
+                'error': 'El modo crudo requiere Arduino conectado con protocolo binario'
+            }), 400
+        
+        return jsonify({'success': True, 'modo_crudo': arduino.modo_crudo, 'frecuencia': frecuencia})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/arduino/muestras_crudas')
+@app.route('/arduino/<dispositivo>/muestras_crudas')
+def muestras_crudas_arduino(dispositivo=DISPOSITIVO_POR_DEFECTO):
+    """Últimos segundos de la forma de onda cruda (voltios, null en huecos)"""
+    arduino = sensores.obtener(dispositivo)
+    try:
+        segundos = float(request.args.get('segundos', 1.0))
+        crudas = arduino.obtener_muestras_crudas(segundos=segundos)
+        frecuencia = crudas['frecuencia']
+        if not frecuencia:
+            return jsonify({'success': False, 'error': 'No hay muestras crudas disponibles'}), 400
+        
+        return jsonify({
+            'success': True,
+            'dispositivo': dispositivo,
+            'frecuencia': frecuencia,
+            'indice_inicial': crudas['indice_inicial'],
+            't_inicial': crudas['indice_inicial'] / frecuencia,
+            'muestras': _a_lista(np.round(crudas['muestras'].astype(float), 4))
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/arduino/espectro')
+@app.route('/arduino/<dispositivo>/espectro')
+def espectro_arduino(dispositivo=DISPOSITIVO_POR_DEFECTO):
+    """
+    PSD de Welch y resonancia de los últimos segundos: la forma de onda
+    cruda si el modo crudo está activo, si no las muestras de los paquetes
+    (masa, constante_resorte y amortiguamiento opcionales para comparar)
+    """
+    arduino = sensores.obtener(dispositivo)
+    try:
+        segundos = float(request.args.get('segundos', SEGUNDOS_ESPECTRO))
+        puntos = int(request.args.get('puntos', PUNTOS_SERIE_DEFECTO))
+        f_n, zeta = parametros_simulados(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    try:
+        crudas = arduino.obtener_muestras_crudas(segundos=segundos)
+        if crudas['frecuencia'] and len(crudas['muestras']):
+            promedio = psd_welch(crudas['muestras'], crudas['frecuencia'])
+            fuente = 'crudo'
+        else:
+            ventana = arduino.distribuidor.buffer.ultimos(max(1, int(segundos * PAQUETES_POR_SEGUNDO)))
+            promedio = psd_paquetes(ventana['muestras'])
+            fuente = 'paquetes'
+        
+        espectral = identificar_resonancia(promedio, f_n, zeta)
+        if espectral is None:
+            return jsonify({'success': False, 'error': 'No hay muestras suficientes para el espectro'}), 400
+        
+        return jsonify({
+            'success': True,
+            'dispositivo': dispositivo,
+            'fuente': fuente,
+            **espectral,
+            'psd': serie_psd(promedio, max(puntos, 3))
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+# Opciones del detector de resonancia que se aceptan en la petición
+OPCIONES_DETECTOR = ('umbral', 'ancho_relativo', 'n_bins', 'ventana')
+
+@app.route('/arduino/detector', methods=['GET', 'POST'])
+@app.route('/arduino/<dispositivo>/detector', methods=['GET', 'POST'])
+def detector_arduino(dispositivo=DISPOSITIVO_POR_DEFECTO):
+    """
+    Detector de resonancia en vivo sobre la captura
+    
+    POST lo activa con la f_n esperada ('frecuencia' en Hz, o masa y
+    constante_resorte) y opcionalmente umbral, ancho_relativo, n_bins y
+    ventana; {"activar": false} lo desactiva. GET devuelve su estado y los
+    eventos con secuencia mayor que `desde`. Los eventos también llegan por
+    el stream como eventos SSE 'resonancia'.
+    """
+    arduino = sensores.obtener(dispositivo)
+    if request.method == 'GET':
+        try:
+            desde = int(request.args.get('desde', 0))
+        except ValueError:
+            return jsonify({'success': False, 'error': 'desde debe ser un entero'}), 400
+        try:
+            return jsonify({
+                'success': True,
+                'dispositivo': dispositivo,
+                'detector': arduino.obtener_estadisticas()['detector'],
+                'eventos': arduino.eventos_resonancia(desde)
+            })
+        except Exception as e:
+            return jsonify({'success': False, 'error': str(e)}), 500
+    
+    datos = request.json or {}
+    try:
+        frecuencia = None
+        opciones = {}
+        if bool(datos.get('activar', True)):
+            frecuencia = datos.get('frecuencia')
+            if frecuencia in (None, ''):
+                frecuencia, _ = parametros_simulados(datos)
+                if frecuencia is None:
+                    raise ValueError('Indique la frecuencia esperada o masa y constante_resorte')
+            frecuencia = float(frecuencia)
+            opciones = {clave: datos[clave] for clave in OPCIONES_DETECTOR if datos.get(clave) not in (None, '')}
+        estado = arduino.configurar_detector(frecuencia, **opciones)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+    
+    return jsonify({'success': True, 'dispositivo': dispositivo, 'activo': estado is not None, 'detector': estado})
+
+# Stream SSE por lotes: todos los paquetes pendientes salen en un solo evento
+MAX_LOTE_SSE = 50              # paquetes por evento (por defecto)
+LATENCIA_SSE = 0.1             # segundos máximos que un paquete espera su lote
+INTERVALO_HEARTBEAT_SSE = 15   # segundos sin datos antes de un comentario keep-alive
+
+def parametros_lote(parametros):
+    """
+    max_lote y latencia (s) de un stream a partir de sus parámetros de consulta
+
+    Raises:
+        ValueError: Si max_lote no es entero o latencia_ms no es un número finito
+    """
+    try:
+        max_lote = int(parametros.get('max_lote', MAX_LOTE_SSE))
+        latencia_ms = float(parametros.get('latencia_ms', LATENCIA_SSE * 1000))
+    except (TypeError, ValueError):
+        raise ValueError('max_lote debe ser entero y latencia_ms numérico') from None
+    if not np.isfinite(latencia_ms):
+        raise ValueError('latencia_ms debe ser un número finito')
+    return max(1, min(max_lote, 1000)), max(0.0, min(latencia_ms / 1000, 5.0))
+
+def indice_reanudacion(ultimo_id, buffer):
+    """
+    Índice desde el que reanudar un stream a partir de Last-Event-ID
+    
+    Args:
+        ultimo_id: Valor de Last-Event-ID (o del parámetro equivalente)
+        buffer: BufferCircular del dispositivo
+    
+    Returns:
+        int: Índice absoluto, o None para empezar por los paquetes nuevos
+    """
+    if not ultimo_id or not str(ultimo_id).isdigit():
+        return None
+    desde = int(ultimo_id)
+    # Id de una sesión anterior del servidor: empezar desde ahora
+    return desde if desde <= buffer.escritos else None
+
+def lote_stream(suscripcion, ventana, descartados_previos, dispositivo):
+    """
+    Arma el lote de paquetes de una ventana para SSE o WebSocket
+    
+    Returns:
+        dict: dispositivo, desde, hasta, descartados (desde el lote
+            anterior) y paquetes
+    """
+    return {
+        'dispositivo': dispositivo,
+        'desde': ventana['inicio'],
+        'hasta': ventana['fin'],
+        'descartados': suscripcion.descartados - descartados_previos,
+        'paquetes': suscripcion.buffer.a_paquetes(ventana)
+    }
+
+def evento_sse(lote):
+    """Formatea un lote como evento SSE 'lote' con id = siguiente índice"""
+    return f"id: {lote['hasta']}\nevent: lote\ndata: {json.dumps(lote)}\n\n"
+
+def cursor_eventos(arduino):
+    """
+    Secuencia desde la que un stream nuevo envía eventos de resonancia:
+    solo los nuevos, salvo una resonancia en curso, que se reenvía
+    """
+    eventos = arduino.eventos_resonancia()
+    if not eventos:
+        return 0
+    ultimo = eventos[-1]
+    return ultimo['secuencia'] - 1 if ultimo['tipo'] == 'inicio' else ultimo['secuencia']
+
+def evento_resonancia_sse(evento):
+    """Evento SSE 'resonancia' (sin id: no cambia el punto de reanudación de los lotes)"""
+    return f"event: resonancia\ndata: {json.dumps(evento)}\n\n"
+
 @app.route('/arduino/stream')
-def stream_datos():
-    """Stream de datos en tiempo real usando Server-Sent Events (SSE)"""
+@app.route('/arduino/<dispositivo>/stream')
+def stream_datos(dispositivo=DISPOSITIVO_POR_DEFECTO):
+    """
+    Stream de datos en tiempo real usando Server-Sent Events (SSE)
+    
+    Cada evento 'lote' lleva todos los paquetes pendientes (hasta `max_lote`)
+    y su id es el índice absoluto del siguiente paquete. Al reconectar, el
+    navegador envía ese id en Last-Event-ID y el stream se reanuda desde el
+    buffer sin perder paquetes (si aún están retenidos). Los cambios del
+    detector de resonancia salen como eventos 'resonancia' en cuanto el
+    stream despierta (a lo sumo `latencia` segundos).
+    """
+    arduino = sensores.obtener(dispositivo)
+    try:
+        max_lote, latencia = parametros_lote(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    desde = indice_reanudacion(request.headers.get('Last-Event-ID', request.args.get('ultimo_id')),
+                               arduino.buffer_datos)
+    
+    # Cada cliente tiene su propio cursor: no compite con otras pestañas
+    # ni con /arduino/obtener_datos
+    suscripcion = arduino.suscribir(f'sse {request.remote_addr}', desde=desde)
+    
     def generar_datos():
-        while arduino.esta_conectado():
-            dato = arduino.obtener_dato(timeout=0.5)
-            if dato:
-                yield f"data: {json.dumps(dato)}\n\n"
-            else:
-                # Enviar heartbeat si no hay datos
-                yield f"data: {json.dumps({'heartbeat': True})}\n\n"
-            time.sleep(0.1)
+        try:
+            yield "retry: 2000\n\n"
+            descartados_previos = suscripcion.descartados
+            ultimo_envio = time.monotonic()
+            ultimo_evento = cursor_eventos(arduino)
+            
+            while arduino.esta_conectado():
+                # Espera hasta completar el lote o hasta la latencia máxima
+                ventana = suscripcion.leer(max_paquetes=max_lote, timeout=latencia or None,
+                                           minimo=max_lote)
+                # Los avisos de resonancia salen antes que los datos
+                for evento in arduino.eventos_resonancia(ultimo_evento):
+                    ultimo_evento = evento['secuencia']
+                    ultimo_envio = time.monotonic()
+                    yield evento_resonancia_sse(evento)
+                if ventana['fin'] > ventana['inicio']:
+                    lote = lote_stream(suscripcion, ventana, descartados_previos, dispositivo)
+                    descartados_previos = suscripcion.descartados
+                    ultimo_envio = time.monotonic()
+                    yield evento_sse(lote)
+                elif time.monotonic() - ultimo_envio >= INTERVALO_HEARTBEAT_SSE:
+                    ultimo_envio = time.monotonic()
+                    yield ": heartbeat\n\n"
+                elif not latencia:
+                    time.sleep(0.05)
+        finally:
+            suscripcion.cancelar()
     
-    return Response(generar_datos(), mimetype='text/event-stream')
+    return Response(generar_datos(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/arduino/suscriptores')
+@app.route('/arduino/<dispositivo>/suscriptores')
+def suscriptores_arduino(dispositivo=DISPOSITIVO_POR_DEFECTO):
+    """Retraso, entregados y descartados de cada consumidor del sensor"""
+    arduino = sensores.obtener(dispositivo)
+    try:
+        return jsonify({'success': True, **arduino.distribuidor.obtener_estadisticas()})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+MAX_DURACION_EXPERIMENTO = 7 * 24 * 3600  # segundos (null: hasta detener_experimento)
+
+def detener_grabacion(dispositivo):
+    """Termina la grabación en curso del sensor (de este u otro worker), si la hay"""
+    return almacen_experimentos.detener(dispositivo)
+
+def experimento_solicitado(dispositivo, experimento=None):
+    """Experimento pedido por id o, si no, el en curso o el más reciente del sensor"""
+    if experimento:
+        return almacen_experimentos.obtener(experimento)
+    return almacen_experimentos.en_curso(dispositivo) or almacen_experimentos.ultimo(dispositivo)
+
+@app.errorhandler(ExperimentoNoEncontrado)
+def experimento_no_encontrado(e):
+    return jsonify({'success': False, 'error': str(e)}), 404
 
 @app.route('/arduino/iniciar_experimento', methods=['POST'])
-def iniciar_experimento():
+@app.route('/arduino/<dispositivo>/iniciar_experimento', methods=['POST'])
+def iniciar_experimento(dispositivo=DISPOSITIVO_POR_DEFECTO):
     """Inicia captura de datos experimentales"""
+    arduino = sensores.obtener(dispositivo)
     try:
-        duracion = int(request.json.get('duracion', 30))  # segundos
-        
-        global datos_experimentales
-        datos_experimentales = []
+        duracion = (request.get_json(silent=True) or {}).get('duracion', 30)  # segundos
+        if duracion is not None:
+            if isinstance(duracion, bool) or not isinstance(duracion, (int, float)) \
+                    or not 1 <= duracion <= MAX_DURACION_EXPERIMENTO:
+                return jsonify({'success': False,
+                                'error': f'duracion debe ser null (hasta detener) o un número de segundos '
+                                         f'entre 1 y {MAX_DURACION_EXPERIMENTO}'}), 400
+            duracion = int(duracion)
         
+        detener_grabacion(dispositivo)
         arduino.vaciar_buffer()
+        grabacion = almacen_experimentos.grabar(dispositivo, arduino, duracion)
         
         return jsonify({
             'success': True,
-            'mensaje': f'Experimento iniciado. Capturando por {duracion} segundos',
-            'duracion': duracion
+            'mensaje': (f'Experimento iniciado. Capturando por {duracion} segundos' if duracion
+                        else 'Experimento iniciado. Capturando hasta detener_experimento'),
+            'duracion': duracion,
+            'experimento': grabacion.id
         })
         
+    except GrabacionEnCurso as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/arduino/detener_experimento', methods=['POST'])
+@app.route('/arduino/<dispositivo>/detener_experimento', methods=['POST'])
+def detener_experimento(dispositivo=DISPOSITIVO_POR_DEFECTO):
+    """Termina la captura antes de cumplir la duración"""
+    sensores.obtener(dispositivo)
+    try:
+        experimento = detener_grabacion(dispositivo)
+        if experimento is None:
+            return jsonify({'success': False, 'error': 'No hay un experimento en curso'}), 400
+        return jsonify({'success': True, 'mensaje': 'Experimento detenido',
+                        **almacen_experimentos.resumen_grabacion(experimento)})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/arduino/obtener_datos')
-def obtener_datos_experimento():
+@app.route('/arduino/<dispositivo>/obtener_datos')
+def obtener_datos_experimento(dispositivo=DISPOSITIVO_POR_DEFECTO):
     """Obtiene datos capturados del experimento"""
+    arduino = sensores.obtener(dispositivo)
     try:
         cantidad = int(request.args.get('cantidad', 50))
         datos = arduino.obtener_lote_datos(cantidad=cantidad, timeout=10)
+        for dato in datos:
+            dato['dispositivo'] = dispositivo
         
-        global datos_experimentales
-        datos_experimentales.extend(datos)
+        # La grabación en disco es independiente de este sondeo
+        experimento = almacen_experimentos.en_curso(dispositivo)
         
         return jsonify({
             'success': True,
+            'dispositivo': dispositivo,
             'datos': datos,
-            'total_capturados': len(datos_experimentales)
+            'experimento': experimento.id if experimento else None,
+            'total_capturados': almacen_experimentos.resumen_grabacion(experimento)['filas'] if experimento else 0
         })
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/experimentos')
+def listar_experimentos():
+    """Índice de experimentos guardados (filtros: dispositivo, desde, hasta en epoch s)"""
+    try:
+        desde = request.args.get('desde', type=float)
+        hasta = request.args.get('hasta', type=float)
+        return jsonify({
+            'success': True,
+            'experimentos': almacen_experimentos.listar(request.args.get('dispositivo'), desde, hasta),
+            'grabando': {d: almacen_experimentos.resumen_grabacion(e)
+                         for d, e in almacen_experimentos.grabando().items()}
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/experimentos/<experimento>')
+def detalle_experimento(experimento):
+    """Metadatos y segmentos de un experimento guardado"""
+    try:
+        guardado = almacen_experimentos.obtener(experimento)
+        return jsonify({
+            'success': True,
+            'experimento': guardado.obtener_estadisticas(),
+            'segmentos': guardado.segmentos()
+        })
+    except ExperimentoNoEncontrado:
+        raise
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def estadisticas_experimento(experimento):
+    """Agregados en línea: los del grabador si el experimento se graba en este proceso"""
+    grabacion = almacen_experimentos.grabaciones.get(experimento.id)
+    if grabacion is not None:
+        return grabacion.escritor.estadisticas
+    return experimento.estadisticas()
+
+def resumen_experimental(estadisticas):
+    """Estadísticas por magnitud, riesgo y resonancia a partir de EstadisticasEnLinea"""
+    resumen = estadisticas.resumen()
+    
+    def magnitud(campo, claves=('media', 'max', 'min', 'std', 'p50', 'p90', 'p99')):
+        return {clave: float(resumen[campo][clave]) for clave in claves}
+    
+    stats_experimental = {
+        'RMS': magnitud('rms'),
+        'Amplitud_Maxima': magnitud('max'),
+        'Factor_Cresta': magnitud('crest'),
+        'Desviacion_Estandar': magnitud('std', ('media', 'max', 'min', 'p50', 'p90', 'p99'))
+    }
+    
+    # Evaluar riesgo
+    riesgo = evaluar_riesgo(stats_experimental['RMS']['media'], stats_experimental['Amplitud_Maxima']['max'])
+    
+    # Detectar resonancia
+    en_resonancia = stats_experimental['Factor_Cresta']['media'] > 3.0
+    
+    return stats_experimental, riesgo, en_resonancia
+
+@app.route('/arduino/estadisticas_experimento')
+@app.route('/arduino/<dispositivo>/estadisticas_experimento')
+def estadisticas_experimento_arduino(dispositivo=DISPOSITIVO_POR_DEFECTO):
+    """Estadísticas en línea del experimento en curso (o ?experimento=<id>), sin recorrer los datos"""
+    sensores.obtener(dispositivo)
+    experimento = experimento_solicitado(dispositivo, request.args.get('experimento'))
+    if experimento is None:
+        return jsonify({'success': False, 'error': 'No hay experimentos del sensor'}), 404
+    return respuesta_estadisticas(experimento)
+
+@app.route('/experimentos/<experimento>/estadisticas')
+def estadisticas_experimento_guardado(experimento):
+    """Estadísticas en línea de un experimento guardado"""
+    return respuesta_estadisticas(almacen_experimentos.obtener(experimento))
+
+def respuesta_estadisticas(experimento):
+    try:
+        estadisticas = estadisticas_experimento(experimento)
+        respuesta = {
+            'success': True,
+            'experimento': experimento.id,
+            'estado': experimento.indice['estado'],
+            'num_muestras': estadisticas.n,
+            't_inicio': estadisticas.t_inicio,
+            't_fin': estadisticas.t_fin
+        }
+        if estadisticas.n:
+            stats_experimental, riesgo, en_resonancia = resumen_experimental(estadisticas)
+            respuesta.update(estadisticas=stats_experimental, riesgo=riesgo, en_resonancia=en_resonancia)
+        return jsonify(respuesta)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/arduino/analizar_experimento', methods=['POST'])
-def analizar_experimento():
-    """Analiza datos experimentales capturados"""
+@app.route('/arduino/<dispositivo>/analizar_experimento', methods=['POST'])
+def analizar_experimento(dispositivo=DISPOSITIVO_POR_DEFECTO):
+    """Encola el análisis de los datos experimentales capturados (202 con el trabajo)"""
+    sensores.obtener(dispositivo)
     try:
-        global datos_experimentales
+        experimento = experimento_solicitado(dispositivo, request.json.get('experimento'))
         
-        if not datos_experimentales:
+        if experimento is None or experimento.filas == 0:
             return jsonify({
                 'success': False,
                 'error': 'No hay datos experimentales disponibles'
             }), 400
         
-        # Extraer valores
-        rms_vals = [d.get('rms', 0) for d in datos_experimentales]
-        max_vals = [d.get('max', 0) for d in datos_experimentales]
-        min_vals = [d.get('min', 0) for d in datos_experimentales]
-        std_vals = [d.get('std', 0) for d in datos_experimentales]
-        crest_vals = [d.get('crest', 0) for d in datos_experimentales]
-        
-        # Estadísticas del experimento
-        stats_experimental = {
-            'RMS': {
-                'media': float(np.mean(rms_vals)),
-                'max': float(np.max(rms_vals)),
-                'min': float(np.min(rms_vals)),
-                'std': float(np.std(rms_vals))
-            },
-            'Amplitud_Maxima': {
-                'media': float(np.mean(max_vals)),
-                'max': float(np.max(max_vals)),
-                'min': float(np.min(max_vals)),
-                'std': float(np.std(max_vals))
-            },
-            'Factor_Cresta': {
-                'media': float(np.mean(crest_vals)),
-                'max': float(np.max(crest_vals)),
-                'min': float(np.min(crest_vals)),
-                'std': float(np.std(crest_vals))
-            },
-            'Desviacion_Estandar': {
-                'media': float(np.mean(std_vals)),
-                'max': float(np.max(std_vals)),
-                'min': float(np.min(std_vals))
-            }
-        }
-        
-        # Evaluar riesgo
-        rms_medio = stats_experimental['RMS']['media']
-        max_medio = stats_experimental['Amplitud_Maxima']['max']
-        riesgo = evaluar_riesgo(rms_medio, max_medio)
-        
-        # Detectar resonancia
-        crest_medio = stats_experimental['Factor_Cresta']['media']
-        en_resonancia = crest_medio > 3.0
-        
-        # Generar gráfica
-        imagen_grafica = generar_grafica_experimental(
-            rms_vals, max_vals, crest_vals, std_vals
-        )
+        formato = request.json.get('formato', 'datos')
+        puntos = int(request.json.get('puntos', PUNTOS_SERIE_DEFECTO))
+        guardar_datos = bool(request.json.get('guardar_datos', False))
+        try:
+            simulado = parametros_simulados(request.json)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         
-        # Exportar datos si se solicita
-        if request.json.get('guardar_datos', False):
-            exportar_datos_experimentales(datos_experimentales)
-        
-        return jsonify({
-            'success': True,
-            'estadisticas': stats_experimental,
-            'riesgo': riesgo,
-            'en_resonancia': en_resonancia,
-            'num_muestras': len(datos_experimentales),
-            'imagen_grafica': imagen_grafica
-        })
+        # El trabajo conserva el contexto de la petición para construir URLs
+        trabajo = cola_trabajos.enviar(
+            'analizar_experimento', copy_current_request_context(tarea_analizar_experimento),
+            experimento.id, formato, puntos, guardar_datos, simulado, descripcion=f'Análisis de {experimento.id}')
+        return respuesta_trabajo(trabajo, float(request.json.get('esperar', 0)), experimento=experimento.id)
         
+    except (ExperimentoNoEncontrado, ColaLlena):
+        raise
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
-def generar_grafica_experimental(rms_vals, max_vals, crest_vals, std_vals):
-    """Genera gráfica de datos experimentales"""
-    plt.figure(figsize=(15, 10))
-    
-    # Crear índice de tiempo
-    n_samples = len(rms_vals)
-    tiempo = np.arange(n_samples) * 0.1  # 0.1s entre muestras
-    
-    # Gráfica 1: RMS
-    plt.subplot(2, 2, 1)
-    plt.plot(tiempo, rms_vals, 'b-', linewidth=1.5)
-    plt.title('Valor RMS en Tiempo Real', fontsize=12, fontweight='bold')
-    plt.xlabel('Tiempo (s)')
-    plt.ylabel('RMS (V)')
-    plt.grid(True, alpha=0.3)
-    plt.axhline(y=np.mean(rms_vals), color='r', linestyle='--', label=f'Media: {np.mean(rms_vals):.4f}')
-    plt.legend()
-    
-    # Gráfica 2: Amplitud Máxima
-    plt.subplot(2, 2, 2)
-    plt.plot(tiempo, max_vals, 'r-', linewidth=1.5)
-    plt.title('Amplitud Máxima', fontsize=12, fontweight='bold')
-    plt.xlabel('Tiempo (s)')
-    plt.ylabel('Amplitud (V)')
-    plt.grid(True, alpha=0.3)
-    plt.axhline(y=np.mean(max_vals), color='b', linestyle='--', label=f'Media: {np.mean(max_vals):.4f}')
-    plt.legend()
-    
-    # Gráfica 3: Factor de Cresta
-    plt.subplot(2, 2, 3)
-    plt.plot(tiempo, crest_vals, 'g-', linewidth=1.5)
-    plt.axhline(y=3.0, color='r', linestyle='--', linewidth=2, label='Umbral Resonancia')
-    plt.title('Factor de Cresta (Detección de Resonancia)', fontsize=12, fontweight='bold')
-    plt.xlabel('Tiempo (s)')
-    plt.ylabel('Factor de Cresta')
-    plt.grid(True, alpha=0.3)
-    plt.legend()
-    
-    # Gráfica 4: Histograma RMS
-    plt.subplot(2, 2, 4)
-    plt.hist(rms_vals, bins=30, color='blue', alpha=0.7, edgecolor='black')
-    plt.title('Distribución de Valores RMS', fontsize=12, fontweight='bold')
-    plt.xlabel('RMS (V)')
-    plt.ylabel('Frecuencia')
-    plt.grid(True, alpha=0.3)
-    
-    plt.tight_layout()
-    
-    # Convertir a base64
-    buffer = io.BytesIO()
-    plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
-    buffer.seek(0)
-    image_base64 = base64.b64encode(buffer.getvalue()).decode()
-    plt.close()
-    
-    return image_base64
-
-def exportar_datos_experimentales(datos):
-    """Exporta datos experimentales a Excel"""
-    folder = 'resultados'
-    if not os.path.exists(folder):
-        os.makedirs(folder)
-    
-    # Preparar datos para DataFrame
-    datos_formateados = []
-    for d in datos:
-        datos_formateados.append({
-            'Timestamp': d.get('timestamp_local', ''),
-            'RMS (V)': d.get('rms', 0),
-            'Amplitud_Max (V)': d.get('max', 0),
-            'Amplitud_Min (V)': d.get('min', 0),
-            'Media (V)': d.get('media', 0),
-            'Desv_Estandar (V)': d.get('std', 0),
-            'Factor_Cresta': d.get('crest', 0),
-            'Timestamp_Arduino (ms)': d.get('timestamp', 0)
-        })
+def parametros_simulados(datos):
+    """
+    f_n (Hz) y ζ del modelo si la petición trae masa y constante_resorte
+    
+    Returns:
+        tuple: (f_n, ζ) o (None, None)
+    
+    Raises:
+        ValueError: Parámetros presentes pero no válidos
+    """
+    if datos.get('masa') in (None, '') or datos.get('constante_resorte') in (None, ''):
+        return None, None
+    m = float(datos['masa'])
+    k = float(datos['constante_resorte'])
+    c = float(datos.get('amortiguamiento') or 0.0)
+    if m <= 0 or k <= 0 or c < 0:
+        raise ValueError('Los parámetros deben ser positivos')
+    return float(np.sqrt(k / m) / (2 * np.pi)), float(c / (2 * np.sqrt(m * k)))
+
+def espectro_experimento(experimento):
+    """PSD de Welch de las muestras de todos los paquetes del experimento (un segmento por paquete)"""
+    promedio = PromedioPSD(experimento.muestras_por_bloque, FRECUENCIA_MUESTRAS_PAQUETE)
+    for bloque in bloques_experimento(experimento, ['muestras']):
+        promedio.agregar(bloque['muestras'])
+    return promedio
+
+def serie_psd(promedio, n_puntos):
+    """PSD decimada para graficar (sin el bin de continua)"""
+    frecuencias, psd = promedio.psd()
+    return serie_json(frecuencias[1:], psd[1:], n_puntos, decimales=9)
+
+def tarea_analizar_experimento(trabajo, id_experimento, formato, puntos, guardar_datos, simulado=(None, None)):
+    """Trabajo: estadísticas, espectro, riesgo y gráfica de un experimento del almacén"""
+    experimento = almacen_experimentos.obtener(id_experimento)
+    trabajo.avanzar(0.05, 'Leyendo experimento')
+    columnas = experimento.leer(COLUMNAS_GRAFICA)
+    
+    rms_vals = columnas['rms']
+    max_vals = columnas['max']
+    std_vals = columnas['std']
+    crest_vals = columnas['crest']
+    
+    # Estadísticas, riesgo y resonancia desde los agregados en línea
+    stats_experimental, riesgo, en_resonancia = resumen_experimental(estadisticas_experimento(experimento))
     
-    df = pd.DataFrame(datos_formateados)
+    # Espectro: frecuencia natural y ζ medidos frente a los simulados. Con
+    # f_n del modelo la resonancia se decide por el espectro; sin ella
+    # queda el criterio del factor de cresta
+    trabajo.avanzar(0.2, 'Calculando espectro')
+    f_n, zeta = simulado
+    promedio = espectro_experimento(experimento)
+    espectral = identificar_resonancia(promedio, f_n, zeta)
+    criterio_resonancia = 'factor_cresta'
+    if espectral is not None and espectral['frecuencia_dominante'] is not None and f_n:
+        en_resonancia = espectral['en_resonancia']
+        criterio_resonancia = 'espectral'
+    f_medida = espectral['frecuencia_natural'] if espectral else None
     
-    fecha = datetime.now().strftime('%Y%m%d_%H%M%S')
-    excel_file = os.path.join(folder, f'datos_experimentales_{fecha}.xlsx')
+    # Generar gráfica: series decimadas (por defecto) o PNG para exportar
+    trabajo.avanzar(0.3, 'Generando gráfica')
+    if formato == 'png':
+        frecuencias, psd = promedio.psd()
+        huella = huella_contenido('experimental', rms_vals, max_vals, crest_vals, psd, f_medida, f_n)
+        if not almacen_imagenes.contiene(huella):
+            almacen_imagenes.guardar(huella, generar_grafica_experimental(
+                rms_vals, max_vals, crest_vals, std_vals,
+                (frecuencias, psd, f_medida, f_n) if promedio.segmentos else None
+            ))
+        grafica = {'url_grafica': url_for('imagen_grafica', huella=huella)}
+    else:
+        tiempo = columnas['tiempo_local'] - columnas['tiempo_local'][0]
+        grafica = {'series': series_experimentales(rms_vals, max_vals, crest_vals, max(puntos, 3), tiempo)}
+        if promedio.segmentos:
+            grafica['series'].update(psd=serie_psd(promedio, max(puntos, 3)), f_n_medida=f_medida, f_n_simulada=f_n)
+    
+    # Exportar datos si se solicita
+    if guardar_datos:
+        trabajo.avanzar(0.6, 'Exportando a Excel')
+        ruta = exportar_datos_experimentales(
+            experimento, avance=lambda fraccion, mensaje: trabajo.avanzar(0.6 + 0.4 * fraccion, mensaje))
+        trabajo.archivo_resultado(os.path.basename(ruta), ruta)
     
-    with pd.ExcelWriter(excel_file, engine='openpyxl') as writer:
-        df.to_excel(writer, sheet_name='Datos_Experimentales', index=False)
+    return {
+        'success': True,
+        'experimento': experimento.id,
+        'estadisticas': stats_experimental,
+        'riesgo': riesgo,
+        'en_resonancia': en_resonancia,
+        'criterio_resonancia': criterio_resonancia,
+        'espectro': espectral,
+        'num_muestras': len(rms_vals),
+        **grafica
+    }
+
+def series_experimentales(rms_vals, max_vals, crest_vals, n_puntos, tiempo=None):
+    """Series decimadas (LTTB) e histograma RMS para graficar en el navegador"""
+    if tiempo is None:
+        tiempo = np.arange(len(rms_vals)) * 0.1  # 0.1s entre muestras
+    conteos, bordes = np.histogram(rms_vals, bins=30)
+    return {
+        'rms': serie_json(tiempo, rms_vals, n_puntos),
+        'max': serie_json(tiempo, max_vals, n_puntos),
+        'crest': serie_json(tiempo, crest_vals, n_puntos),
+        'rms_media': float(np.mean(rms_vals)),
+        'max_media': float(np.mean(max_vals)),
+        'umbral_resonancia': 3.0,
+        'histograma_rms': {'conteos': conteos.tolist(), 'bordes': bordes.tolist()}
+    }
+
+def generar_grafica_experimental(rms_vals, max_vals, crest_vals, std_vals, espectro=None):
+    """Genera gráfica de datos experimentales en el pool de renderizado (bytes PNG)"""
+    futuro = pool_renderizado.renderizar_experimental(rms_vals, max_vals, crest_vals, espectro)
+    return futuro.result(timeout=TIMEOUT_RENDERIZADO)
+
+# Columnas exportadas de un experimento: (título, columna del almacén o
+# conversión por bloque). Timestamp en UTC a partir de tiempo_local
+SALIDA_EXPERIMENTO = [
+    ('Timestamp (UTC)', lambda b: (b['tiempo_local'] * 1000).astype(np.int64).astype('datetime64[ms]')),
+    ('RMS (V)', 'rms'),
+    ('Amplitud_Max (V)', 'max'),
+    ('Amplitud_Min (V)', 'min'),
+    ('Media (V)', 'media'),
+    ('Desv_Estandar (V)', 'std'),
+    ('Factor_Cresta', 'crest'),
+    ('Timestamp_Arduino (ms)', 'timestamp'),
+    ('Paquete', 'id')
+]
+COLUMNAS_EXPORTACION = ['tiempo_local', 'rms', 'max', 'min', 'media', 'std', 'crest', 'timestamp', 'id']
+
+MAX_FILAS_EXCEL = 1048575  # límite de filas de una hoja (sin el encabezado)
+
+def exportar_datos_experimentales(experimento, destino=None, avance=None):
+    """
+    Exporta a Excel un experimento del almacén
+
+    Args:
+        destino: Ruta o archivo (None: resultados/datos_experimentales_<id>.xlsx)
+        avance: Función opcional avance(fraccion, mensaje), llamada por bloque
+    """
+    filas = experimento.filas
+    if filas > MAX_FILAS_EXCEL:
+        raise ValueError(f'El experimento tiene {filas} filas y Excel admite {MAX_FILAS_EXCEL}; use CSV o Parquet')
+    
+    if destino is None:
+        folder = 'resultados'
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        destino = os.path.join(folder, f'datos_experimentales_{experimento.id}.xlsx')
+    
+    # Datos por bloques leídos del disco (sin muestras): la memoria no
+    # depende de la duración del experimento
+    escritas = 0
+    suma_rms = 0.0
+    max_amplitud = np.nan
+    tiempo_inicial = tiempo_final = None
+    
+    with pd.ExcelWriter(destino, engine='openpyxl') as writer:
+        for bloque in bloques_experimento(experimento, COLUMNAS_EXPORTACION):
+            df = tabla(bloque, SALIDA_EXPERIMENTO)
+            df.to_excel(writer, sheet_name='Datos_Experimentales', index=False,
+                        header=escritas == 0, startrow=0 if escritas == 0 else escritas + 1)
+            escritas += len(df)
+            suma_rms += float(np.sum(bloque['rms']))
+            max_amplitud = np.fmax(max_amplitud, float(np.max(bloque['max'])))
+            if tiempo_inicial is None:
+                tiempo_inicial = float(bloque['tiempo_local'][0])
+            tiempo_final = float(bloque['tiempo_local'][-1])
+            if avance:
+                avance(escritas / max(filas, 1), f'{escritas} de {filas} filas')
+        
+        if escritas == 0:
+            tabla({}, [(titulo, lambda _: []) for titulo, _ in SALIDA_EXPERIMENTO]).to_excel(
+                writer, sheet_name='Datos_Experimentales', index=False)
         
         # Hoja con estadísticas
         stats_df = pd.DataFrame({
-            'Parámetro': ['Número de muestras', 'Duración total (s)', 
+            'Parámetro': ['Experimento', 'Dispositivo', 'Número de muestras', 'Duración total (s)',
                          'RMS promedio (V)', 'Amplitud máxima (V)'],
             'Valor': [
-                len(datos),
-                len(datos) * 0.1,
-                df['RMS (V)'].mean(),
-                df['Amplitud_Max (V)'].max()
+                experimento.id,
+                experimento.dispositivo,
+                escritas,
+                tiempo_final - tiempo_inicial if escritas else 0.0,
+                suma_rms / escritas if escritas else np.nan,
+                max_amplitud
             ]
         })
         stats_df.to_excel(writer, sheet_name='Estadisticas', index=False)
     
-    print(f"✓ Datos experimentales exportados a {excel_file}")
+    if isinstance(destino, str):
+        print(f"✓ Datos experimentales exportados a {destino}")
+    return destino
+
+# ======================================================================
+# Descargas (CSV/Parquet en flujo; Excel o archivo como trabajo)
+# ======================================================================
+
+def respuesta_descarga(formato, nombre, bloques, salida, excel, filas, tipo):
+    """
+    Respuesta HTTP de descarga
+
+    GET con csv/parquet genera el archivo por bloques mientras se envía.
+    xlsx (escrito con `excel(destino, avance)`) o cualquier formato por
+    POST se encolan como trabajo: la respuesta es 202 con el trabajo y
+    el archivo se descarga luego de /trabajos/<id>/resultado.
+    """
+    if formato != 'xlsx':
+        comprobar_formato(formato)
+    
+    if formato == 'xlsx' or request.method == 'POST':
+        trabajo = cola_trabajos.enviar(tipo, tarea_exportar, formato, nombre, bloques, salida, excel, filas,
+                                       descripcion=f'{nombre}.{FORMATOS.get(formato, ("", formato))[1]}')
+        return respuesta_trabajo(trabajo, request.values.get('esperar', 0, type=float))
+    
+    generador = flujo(formato, bloques, salida)
+    mimetype, extension = FORMATOS[formato]
+    return Response(generador, mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename="{nombre}.{extension}"',
+        'X-Accel-Buffering': 'no'
+    })
+
+def tarea_exportar(trabajo, formato, nombre, bloques, salida, excel, filas):
+    """Trabajo: escribe la exportación en un archivo de la cola"""
+    if formato == 'xlsx':
+        trabajo.avanzar(0, 'Generando Excel')
+        excel(trabajo.archivo_resultado(f'{nombre}.xlsx'), trabajo.avanzar)
+        return {'filas': filas}
+    
+    def contar(bloques):
+        hechas = 0
+        for bloque in bloques:
+            yield bloque
+            hechas += len(next(iter(bloque.values())))
+            trabajo.avanzar(hechas / max(filas, 1), f'{hechas} de {filas} filas')
+    
+    ruta = trabajo.archivo_resultado(f'{nombre}.{FORMATOS[formato][1]}')
+    with open(ruta, 'wb') as f:
+        for parte in flujo(formato, contar(bloques), salida):
+            f.write(parte)
+    return {'filas': filas, 'bytes': os.path.getsize(ruta)}
+
+@app.route('/exportar/simulacion', methods=['GET', 'POST'])
+def exportar_simulacion():
+    """Descarga la simulación de /calcular (mismos parámetros, por query string o formulario)"""
+    try:
+        m = float(request.values.get('masa', 1.0))
+        k = float(request.values.get('constante_resorte', 100.0))
+        c = float(request.values.get('amortiguamiento', 1.0))
+        F0 = float(request.values.get('fuerza', 5.0))
+        formato = request.values.get('formato', 'csv')
+        
+        if m <= 0 or k <= 0 or c < 0 or F0 <= 0:
+            return jsonify({'error': 'Los parámetros deben ser valores positivos'}), 400
+        
+        clave = clave_parametros(m, k, c, F0)
+        sim = simular_escenarios(*clave)
+        columnas = columnas_simulacion(sim['t'], sim['sol_normal'], sim['sol_resonancia'], sim['aceleracion'])
+        nombre = 'datos_vibracion_m{:g}_k{:g}_c{:g}_F{:g}'.format(*clave)
+        return respuesta_descarga(
+            formato, nombre, bloques_arreglos(columnas), [(titulo, titulo) for titulo in columnas],
+            lambda destino, avance: exportar_datos(sim['t'], sim['sol_normal'], sim['sol_resonancia'],
+                                                   sim['aceleracion'], *clave, destino=destino),
+            len(sim['t']), 'exportar_simulacion')
+        
+    except FormatoNoDisponible as e:
+        return jsonify({'error': str(e)}), 400
+    except ColaLlena:
+        raise
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/experimentos/<experimento>/exportar', methods=['GET', 'POST'])
+def exportar_experimento(experimento):
+    """Descarga un experimento del almacén (formato csv, parquet o xlsx; desde/hasta en epoch s)"""
+    try:
+        guardado = almacen_experimentos.obtener(experimento)
+        formato = request.values.get('formato', 'csv')
+        desde = request.values.get('desde', type=float)
+        hasta = request.values.get('hasta', type=float)
+        return respuesta_descarga(
+            formato, f'datos_experimentales_{guardado.id}',
+            bloques_experimento(guardado, COLUMNAS_EXPORTACION, desde, hasta), SALIDA_EXPERIMENTO,
+            lambda destino, avance: exportar_datos_experimentales(guardado, destino, avance),
+            guardado.filas, 'exportar_experimento')
+        
+    except (ExperimentoNoEncontrado, ColaLlena):
+        raise
+    except FormatoNoDisponible as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+# ======================================================================
+# Trabajos en segundo plano
+# ======================================================================
+
+def estado_trabajo(estado):
+    """Estado de un trabajo para el cliente, con sus URLs"""
+    publico = {clave: valor for clave, valor in estado.items() if clave not in ('ruta_archivo', 'pid')}
+    publico['url_estado'] = url_for('consultar_trabajo', id_trabajo=estado['id'])
+    if estado.get('archivo'):
+        publico['url_resultado'] = url_for('resultado_trabajo', id_trabajo=estado['id'])
+    return publico
+
+def respuesta_trabajo(trabajo, esperar=0, **extra):
+    """202 con el trabajo en curso, o 200 si terminó dentro de `esperar` segundos"""
+    estado = trabajo.a_dict()
+    if esperar:
+        estado = cola_trabajos.esperar(trabajo.id, min(esperar, MAX_ESPERA_TRABAJO))
+    codigo = 200 if estado['estado'] in FINALES else 202
+    return jsonify({'success': True, **extra, 'trabajo': estado_trabajo(estado)}), codigo
+
+@app.errorhandler(TrabajoNoEncontrado)
+def trabajo_no_encontrado(e):
+    return jsonify({'success': False, 'error': str(e)}), 404
+
+@app.errorhandler(ColaLlena)
+def cola_llena(e):
+    return jsonify({'success': False, 'error': str(e)}), 503
+
+@app.route('/trabajos')
+def listar_trabajos():
+    """Trabajos retenidos en este proceso y estadísticas de la cola"""
+    return jsonify({
+        'success': True,
+        'trabajos': [estado_trabajo(t) for t in cola_trabajos.listar()],
+        **cola_trabajos.obtener_estadisticas()
+    })
+
+@app.route('/trabajos/<id_trabajo>')
+def consultar_trabajo(id_trabajo):
+    """Estado y progreso de un trabajo (esperar: segundos a esperar que termine)"""
+    esperar = min(request.args.get('esperar', 0, type=float), MAX_ESPERA_TRABAJO)
+    estado = cola_trabajos.esperar(id_trabajo, esperar) if esperar > 0 else cola_trabajos.obtener(id_trabajo)
+    return jsonify({'success': True, 'trabajo': estado_trabajo(estado)})
+
+@app.route('/trabajos/<id_trabajo>', methods=['DELETE'])
+def cancelar_trabajo(id_trabajo):
+    """Cancela un trabajo pendiente o en ejecución"""
+    return jsonify({'success': True, 'trabajo': estado_trabajo(cola_trabajos.cancelar(id_trabajo))})
+
+@app.route('/trabajos/<id_trabajo>/resultado')
+def resultado_trabajo(id_trabajo):
+    """Archivo (o JSON) producido por un trabajo terminado"""
+    estado = cola_trabajos.obtener(id_trabajo)
+    if estado['estado'] != TERMINADO:
+        return jsonify({'success': False, 'error': f"El trabajo está {estado['estado']}",
+                        'trabajo': estado_trabajo(estado)}), 409
+    if not estado.get('archivo'):
+        return jsonify(estado['resultado'])
+    if not os.path.exists(estado['ruta_archivo']):
+        return jsonify({'success': False, 'error': 'El archivo del trabajo ya no existe'}), 404
+    return send_file(os.path.abspath(estado['ruta_archivo']), as_attachment=True,
+                     download_name=estado['archivo'])
 
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
@@ -18,6 +18,12 @@
   - Captura 500 muestras a 1000 Hz (0.5 segundos)
   - Calcula RMS, Amplitud Máxima, Factor de Cresta y Desviación Estándar
   - Envía datos en formato JSON por puerto serial a 115200 baudios
+  - Con el comando "MODO BIN" cambia a tramas binarias compactas (ver
+    protocolo_binario.py); "MODO JSON" vuelve al formato de texto
+  - Con "MODO CRUDO <Hz>" transmite la forma de onda completa: el Timer1
+    dispara el muestreo por interrupción y cada bloque de BLOQUE_CRUDO
+    muestras viaja como trama TIPO_CRUDO sin huecos. "MODO BIN" vuelve a
+    los resúmenes
   ================================================================================
 */
 
@@ -28,11 +34,48 @@ const int BUFFER_SIZE = 500;           // Número de muestras por lectura
 const float VOLTAGE_REF = 5.0;         // Voltaje de referencia Arduino
 const int ADC_RESOLUTION = 1023;       // Resolución ADC de 10 bits
 const unsigned long INTERVALO_ENVIO = 100; // Tiempo entre envíos (ms)
+const int PASO_MUESTRAS = 10;          // Se envía 1 de cada PASO_MUESTRAS muestras
+
+// ============ PROTOCOLO BINARIO ============
+// Trama: A5 5A | version u8 | tipo u8 | secuencia u16 | longitud u16 | payload | CRC16
+// Todos los campos en little-endian (orden nativo del AVR)
+const uint8_t SINCRONIA_1 = 0xA5;
+const uint8_t SINCRONIA_2 = 0x5A;
+const uint8_t VERSION_PROTOCOLO = 1;
+const uint8_t TIPO_RESUMEN = 0x01;
+const uint8_t TIPO_CRUDO = 0x02;
+const int MUESTRAS_ENVIADAS = BUFFER_SIZE / PASO_MUESTRAS;
+const int LARGO_RESUMEN = 4 + 4 + 6 * 4 + 2 + MUESTRAS_ENVIADAS * 2;
+
+// ============ MODO CRUDO ============
+// 50 muestras int16 + 8 B de payload + 10 B de trama = 118 B por bloque:
+// a 115200 baudios el enlace admite hasta ~4800 Hz
+const int BLOQUE_CRUDO = 50;
+const int LARGO_CRUDO = 4 + 2 + 2 + BLOQUE_CRUDO * 2;
+const unsigned int FRECUENCIA_CRUDO_MAX = 4000;
+// Con prescaler 64 el Timer1 (16 bits) llega hasta ~3.8 Hz
+const unsigned int FRECUENCIA_CRUDO_MIN = 4;
 
 // ============ VARIABLES GLOBALES ============
 float samples[BUFFER_SIZE];            // Buffer de muestras
 unsigned long ultimoEnvio = 0;         // Control de tiempo
 int contador = 0;                      // Contador de paquetes enviados
+bool modoBinario = false;              // Formato de envío negociado con el PC
+uint16_t secuencia = 0;                // Secuencia de tramas binarias
+char comando[16];                      // Comando recibido por serial
+byte largoComando = 0;
+uint8_t trama[8 + LARGO_RESUMEN + 2];  // Trama binaria en construcción (la mayor)
+
+// Doble buffer del modo crudo: la interrupción llena uno mientras
+// loop() envía el otro
+bool modoCrudo = false;
+uint16_t frecuenciaCrudo = SAMPLE_RATE;
+volatile int16_t bloquesCrudos[2][BLOQUE_CRUDO];
+volatile uint32_t indiceBloque[2];     // Índice absoluto de la primera muestra
+volatile bool bloqueListo[2] = {false, false};
+volatile uint8_t bloqueActual = 0;
+volatile int posicionBloque = 0;
+volatile uint32_t indiceMuestra = 0;   // Muestras tomadas desde el inicio
 
 // ============ SETUP ============
 void setup() {
@@ -55,6 +98,22 @@ void setup() {
 
 // ============ LOOP PRINCIPAL ============
 void loop() {
+  // Atender comandos del PC (negociación de protocolo)
+  leerComandos();
+  
+  // Modo crudo: solo enviar los bloques que completó la interrupción
+  if (modoCrudo) {
+    // Si ambos están listos, el de bloqueActual es el más antiguo
+    uint8_t primero = bloqueActual;
+    if (bloqueListo[primero]) {
+      enviarBloqueCrudo(primero);
+    }
+    if (bloqueListo[1 - primero]) {
+      enviarBloqueCrudo(1 - primero);
+    }
+    return;
+  }
+  
   unsigned long tiempoActual = millis();
   
   // Verificar si es tiempo de capturar datos
@@ -72,8 +131,12 @@ void loop() {
     float stdDev = calcularDesviacionEstandar(media);
     float crestFactor = (rms > 0.001) ? (maxAmp / rms) : 0;
     
-    // Enviar datos en formato JSON
-    enviarDatos(rms, maxAmp, minAmp, media, stdDev, crestFactor);
+    // Enviar datos en el formato negociado
+    if (modoBinario) {
+      enviarDatosBinario(rms, maxAmp, minAmp, media, stdDev, crestFactor);
+    } else {
+      enviarDatos(rms, maxAmp, minAmp, media, stdDev, crestFactor);
+    }
     
     contador++;
   }
@@ -207,9 +270,9 @@ void enviarDatos(float rms, float maxAmp, float minAmp, float media, float stdDe
   
   // Enviar algunas muestras para visualización (cada 10 muestras)
   Serial.print(",\"samples\":[");
-  for (int i = 0; i < BUFFER_SIZE; i += 10) {
+  for (int i = 0; i < BUFFER_SIZE; i += PASO_MUESTRAS) {
     Serial.print(samples[i], 4);
-    if (i < BUFFER_SIZE - 10) {
+    if (i < BUFFER_SIZE - PASO_MUESTRAS) {
       Serial.print(",");
     }
   }
@@ -218,6 +281,206 @@ void enviarDatos(float rms, float maxAmp, float minAmp, float media, float stdDe
   Serial.println("}");
 }
 
+// ============ PROTOCOLO BINARIO ============
+
+void leerComandos() {
+  /*
+    Lee comandos terminados en '\n' sin bloquear:
+    - "MODO BIN": cambia a tramas binarias
+    - "MODO JSON": vuelve al formato de texto
+    La confirmación se envía siempre como línea JSON, antes del cambio.
+  */
+  while (Serial.available()) {
+    char c = Serial.read();
+    if (c == '\r') continue;
+    if (c != '\n') {
+      if (largoComando < sizeof(comando) - 1) {
+        comando[largoComando++] = c;
+      }
+      continue;
+    }
+    comando[largoComando] = '\0';
+    largoComando = 0;
+    
+    if (strncmp(comando, "MODO CRUDO", 10) == 0) {
+      // Requiere el modo binario ya negociado
+      if (modoBinario) {
+        unsigned int frecuencia = atoi(comando + 10);
+        if (frecuencia == 0) frecuencia = SAMPLE_RATE;
+        iniciarModoCrudo(constrain(frecuencia, FRECUENCIA_CRUDO_MIN, FRECUENCIA_CRUDO_MAX));
+      }
+    } else if (strcmp(comando, "MODO BIN") == 0) {
+      detenerModoCrudo();
+      Serial.println("{\"status\":\"modo\",\"modo\":\"binario\",\"version\":" + String(VERSION_PROTOCOLO) + "}");
+      Serial.flush();
+      modoBinario = true;
+      secuencia = 0;
+    } else if (strcmp(comando, "MODO JSON") == 0) {
+      detenerModoCrudo();
+      modoBinario = false;
+      Serial.println("{\"status\":\"modo\",\"modo\":\"json\"}");
+    }
+  }
+}
+
+uint16_t crc16(const uint8_t* datos, int largo) {
+  /*
+    CRC-16/CCITT (polinomio 0x1021, valor inicial 0xFFFF)
+  */
+  uint16_t crc = 0xFFFF;
+  for (int i = 0; i < largo; i++) {
+    crc ^= (uint16_t)datos[i] << 8;
+    for (int b = 0; b < 8; b++) {
+      crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : (crc << 1);
+    }
+  }
+  return crc;
+}
+
+int escribir(int pos, const void* valor, int largo) {
+  memcpy(trama + pos, valor, largo);
+  return pos + largo;
+}
+
+int iniciarTrama(uint8_t tipo) {
+  /*
+    Escribe la sincronía, versión, tipo y secuencia; devuelve la posición
+    donde empieza el payload (la longitud se completa en cerrarTrama)
+  */
+  int pos = 0;
+  trama[pos++] = SINCRONIA_1;
+  trama[pos++] = SINCRONIA_2;
+  trama[pos++] = VERSION_PROTOCOLO;
+  trama[pos++] = tipo;
+  pos = escribir(pos, &secuencia, 2);
+  return pos + 2;
+}
+
+void cerrarTrama(int pos) {
+  /*
+    Completa la longitud y el CRC y envía la trama
+  */
+  uint16_t largo = pos - 8;
+  escribir(6, &largo, 2);
+  
+  // El CRC cubre desde la versión hasta el final del payload
+  uint16_t crc = crc16(trama + 2, pos - 2);
+  pos = escribir(pos, &crc, 2);
+  
+  Serial.write(trama, pos);
+  secuencia++;
+}
+
+void enviarDatosBinario(float rms, float maxAmp, float minAmp, float media, float stdDev, float crestFactor) {
+  /*
+    Envía el mismo contenido que enviarDatos() como trama TIPO_RESUMEN:
+    144 bytes frente a ~460 del JSON. Las muestras viajan como cuentas
+    ADC int16 y el PC las convierte a voltios.
+  */
+  uint32_t id = contador;
+  uint32_t timestamp = millis();
+  
+  int pos = iniciarTrama(TIPO_RESUMEN);
+  pos = escribir(pos, &id, 4);
+  pos = escribir(pos, &timestamp, 4);
+  pos = escribir(pos, &rms, 4);
+  pos = escribir(pos, &maxAmp, 4);
+  pos = escribir(pos, &minAmp, 4);
+  pos = escribir(pos, &media, 4);
+  pos = escribir(pos, &stdDev, 4);
+  pos = escribir(pos, &crestFactor, 4);
+  uint16_t nMuestras = MUESTRAS_ENVIADAS;
+  pos = escribir(pos, &nMuestras, 2);
+  for (int i = 0; i < BUFFER_SIZE; i += PASO_MUESTRAS) {
+    int16_t cuentas = (int16_t)(samples[i] * (ADC_RESOLUTION / VOLTAGE_REF) + 0.5);
+    pos = escribir(pos, &cuentas, 2);
+  }
+  
+  cerrarTrama(pos);
+}
+
+// ============ MODO CRUDO ============
+
+void iniciarModoCrudo(unsigned int frecuencia) {
+  /*
+    Configura el Timer1 en modo CTC para interrumpir a `frecuencia` Hz
+    (prescaler 8: 2 MHz de reloj del timer; por debajo de 31 Hz OCR1A no
+    cabe en 16 bits y se usa prescaler 64: 250 kHz)
+  */
+  noInterrupts();
+  frecuenciaCrudo = frecuencia;
+  bloqueListo[0] = bloqueListo[1] = false;
+  bloqueActual = 0;
+  posicionBloque = 0;
+  indiceMuestra = 0;
+  
+  TCCR1A = 0;
+  TCNT1 = 0;
+  if ((F_CPU / 8) / frecuencia - 1 <= 0xFFFF) {
+    TCCR1B = (1 << WGM12) | (1 << CS11);
+    OCR1A = (F_CPU / 8) / frecuencia - 1;
+  } else {
+    TCCR1B = (1 << WGM12) | (1 << CS11) | (1 << CS10);
+    OCR1A = (F_CPU / 64) / frecuencia - 1;
+  }
+  TIMSK1 = (1 << OCIE1A);
+  modoCrudo = true;
+  interrupts();
+}
+
+void detenerModoCrudo() {
+  noInterrupts();
+  TIMSK1 = 0;
+  TCCR1B = 0;
+  modoCrudo = false;
+  interrupts();
+}
+
+ISR(TIMER1_COMPA_vect) {
+  /*
+    Toma una muestra por interrupción. Si loop() no alcanzó a enviar el
+    bloque que toca llenar, la muestra se descarta pero el índice avanza:
+    el PC detecta el hueco por el índice de la primera muestra del bloque.
+  */
+  int16_t valor = analogRead(PIEZO_PIN);
+  uint8_t b = bloqueActual;
+  
+  if (!bloqueListo[b]) {
+    if (posicionBloque == 0) {
+      indiceBloque[b] = indiceMuestra;
+    }
+    bloquesCrudos[b][posicionBloque++] = valor;
+    if (posicionBloque == BLOQUE_CRUDO) {
+      bloqueListo[b] = true;
+      bloqueActual = 1 - b;
+      posicionBloque = 0;
+    }
+  }
+  indiceMuestra++;
+}
+
+void enviarBloqueCrudo(uint8_t b) {
+  /*
+    Envía un bloque completo como trama TIPO_CRUDO y lo libera
+  */
+  uint16_t nMuestras = BLOQUE_CRUDO;
+  uint32_t indice = indiceBloque[b];
+  
+  int pos = iniciarTrama(TIPO_CRUDO);
+  pos = escribir(pos, &indice, 4);
+  pos = escribir(pos, &frecuenciaCrudo, 2);
+  pos = escribir(pos, &nMuestras, 2);
+  for (int i = 0; i < BLOQUE_CRUDO; i++) {
+    int16_t cuentas = bloquesCrudos[b][i];
+    pos = escribir(pos, &cuentas, 2);
+  }
+  
+  // El bloque queda libre para la interrupción
+  bloqueListo[b] = false;
+  
+  cerrarTrama(pos);
+}
+
 // ============ NOTAS ADICIONALES ============
 /*
   CALIBRACIÓN:
@@ -0,0 +1,846 @@
+"""
+================================================================================
+ARDUINO SIMULADO (PRUEBAS DE CARGA Y REGRESIÓN)
+Proyecto: Análisis de Resonancia en Sistema Masa-Resorte
+================================================================================
+
+Dispositivo por software que habla exactamente el protocolo de
+arduino_sensor.ino: mensaje de inicio, paquetes JSON de 500 muestras a
+1000 Hz con estadísticas y 50 muestras submuestreadas, comandos "MODO BIN",
+"MODO JSON" y "MODO CRUDO <Hz>", tramas TIPO_RESUMEN y TIPO_CRUDO con su
+secuencia y CRC.
+
+A diferencia de la placa, la frecuencia de paquetes no está limitada por el
+tiempo de captura ni por los 115200 baudios (salvo que se pida), así que
+sirve para medir el parser, las pérdidas y la latencia de extremo a extremo
+muy por encima de 10 paquetes/s, siempre con la misma semilla.
+
+Transportes:
+- En memoria (cualquier SO): ArduinoSimulado.abrir se pasa como
+  `abrir_puerto` a ArduinoHandler; cada apertura reinicia el dispositivo,
+  como el DTR de la placa real
+- Pseudo-terminal (POSIX): abrir_pty() devuelve una ruta /dev/pts/N que se
+  conecta como cualquier puerto serie (también desde la interfaz web)
+
+Funcionalidades:
+- Señales: seno, ruido, o resonancia (respuesta del oscilador forzado en
+  resonancia que crece desde el reposo), con ruido y cuantización del ADC
+- Corrupción de bytes, paquetes omitidos y desconexiones programadas
+- Flujos grabados (grabar) para medir el parser sin tiempo real
+- Límite opcional de baudios para reproducir la saturación del puerto
+- Latencia del detector de resonancia frente a la envolvente real
+
+Uso:
+    python arduino_simulado.py --hz 200 --senal resonancia       # pty
+    python arduino_simulado.py --medir 10 --hz 2000 --protocolo binario
+    python arduino_simulado.py --detectar 5 --crudo 1000
+================================================================================
+"""
+
+import argparse
+import os
+import select
+import socket
+import threading
+import time
+
+import numpy as np
+import serial
+
+from protocolo_binario import (codificar_trama, codificar_resumen, codificar_crudo,
+                               TIPO_RESUMEN, TIPO_CRUDO, VERSION_PROTOCOLO)
+from solver_analitico import respuesta_analitica
+
+
+# Constantes del sketch
+SAMPLE_RATE = 1000
+BUFFER_SIZE = 500
+PASO_MUESTRAS = 10
+VOLTAGE_REF = 5.0
+ADC_RESOLUTION = 1023
+BLOQUE_CRUDO = 50
+FRECUENCIA_CRUDO_MAX = 4000
+FRECUENCIA_CRUDO_MIN = 4
+
+SENALES = ('seno', 'ruido', 'resonancia')
+
+# Paquetes que se generan de una vez si el emisor se atrasa; con más atraso
+# se descartan, como el sketch, que no recupera los envíos perdidos
+MAX_LOTE = 256
+
+
+class PuertoSimulado:
+    """
+    Lado del PC de la conexión en memoria, con la interfaz de serial.Serial
+    que usa ArduinoHandler (read, readline, in_waiting, write, cancel_read...)
+    """
+
+    def __init__(self, conexion, puerto='simulado', baudrate=115200, timeout=1):
+        self._conexion = conexion
+        self._conexion.setblocking(False)
+        self._recibidos = bytearray()
+        self._fin = False
+        # Par de sockets para que cancel_read() despierte un read() bloqueado
+        self._cancelar_lectura, self._cancelar_escritura = socket.socketpair()
+        self._cancelar_lectura.setblocking(False)
+        self.port = puerto
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.is_open = True
+
+    def fileno(self):
+        """Descriptor para selectors (LectorSerial)"""
+        return self._conexion.fileno()
+
+    def _recoger(self):
+        """Pasa al buffer lo que haya en el socket sin bloquear"""
+        while not self._fin:
+            try:
+                datos = self._conexion.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                datos = b''
+            if not datos:
+                self._fin = True
+                return
+            self._recibidos.extend(datos)
+
+    def _esperar(self, completo):
+        """
+        Espera hasta que completo(buffer) sea verdadero, venza el timeout,
+        se cancele la lectura o el dispositivo cierre la conexión
+        """
+        limite = None if self.timeout is None else time.monotonic() + self.timeout
+        while True:
+            self._recoger()
+            if completo(self._recibidos) or self._fin:
+                break
+            restante = None if limite is None else limite - time.monotonic()
+            if restante is not None and restante <= 0:
+                break
+            listos, _, _ = select.select([self._conexion, self._cancelar_lectura], [], [], restante)
+            if self._cancelar_lectura in listos:
+                try:
+                    self._cancelar_lectura.recv(4096)
+                except BlockingIOError:
+                    pass
+                break
+        if self._fin and not self._recibidos:
+            raise serial.SerialException('El dispositivo simulado se desconectó')
+
+    def _tomar(self, n):
+        datos = bytes(self._recibidos[:n])
+        del self._recibidos[:n]
+        return datos
+
+    @property
+    def in_waiting(self):
+        self._recoger()
+        if self._fin and not self._recibidos:
+            raise serial.SerialException('El dispositivo simulado se desconectó')
+        return len(self._recibidos)
+
+    def read(self, size=1):
+        self._esperar(lambda buffer: len(buffer) >= size)
+        return self._tomar(size)
+
+    def readline(self):
+        self._esperar(lambda buffer: b'\n' in buffer)
+        fin = self._recibidos.find(b'\n')
+        return self._tomar(len(self._recibidos) if fin < 0 else fin + 1)
+
+    def write(self, datos):
+        try:
+            return self._conexion.send(datos)
+        except OSError as e:
+            raise serial.SerialException(f'Error de escritura: {e}')
+
+    def flush(self):
+        pass
+
+    def reset_input_buffer(self):
+        self._recoger()
+        self._recibidos.clear()
+
+    def reset_output_buffer(self):
+        pass
+
+    def cancel_read(self):
+        try:
+            self._cancelar_escritura.send(b'\0')
+        except OSError:
+            pass
+
+    def close(self):
+        if self.is_open:
+            self.is_open = False
+            for s in (self._conexion, self._cancelar_lectura, self._cancelar_escritura):
+                s.close()
+
+
+class ArduinoSimulado:
+    """
+    Placa Arduino emulada con el protocolo de arduino_sensor.ino
+    """
+
+    def __init__(self, paquetes_por_segundo=10, senal='seno', frecuencia=25.0, amplitud=1.0,
+                 offset=2.5, ruido=0.01, amortiguamiento=0.02, tasa_corrupcion=0.0,
+                 tasa_perdida=0.0, desconectar_tras=None, retardo_inicio=0.0, baudios=None,
+                 semilla=None, retardo_resonancia=0.0):
+        """
+        Args:
+            paquetes_por_segundo: Paquetes de resumen (JSON o binarios) por segundo
+            senal: 'seno', 'ruido' o 'resonancia'
+            frecuencia: Frecuencia de la señal / natural del sistema (Hz)
+            amplitud: Amplitud (V); en 'resonancia', la del estado estacionario
+            offset: Nivel de continua (V); el ADC solo lee 0-5 V
+            ruido: Desviación estándar del ruido gaussiano (V)
+            amortiguamiento: Razón ζ del sistema en 'resonancia' (fija el
+                tiempo de crecimiento, ~1/(ζ·ω_n))
+            tasa_corrupcion: Probabilidad de alterar un byte de cada paquete
+            tasa_perdida: Probabilidad de omitir un paquete (id y secuencia
+                avanzan igual)
+            desconectar_tras: Segundos tras cada apertura en que el
+                dispositivo cierra la conexión (None: nunca)
+            retardo_inicio: Segundos antes del mensaje de inicio (el sketch
+                espera 2 s)
+            baudios: Limita el caudal a baudios/10 bytes/s (None: sin límite)
+            semilla: Semilla del generador aleatorio
+            retardo_resonancia: Segundos tras cada reinicio en que empieza
+                el forzamiento de 'resonancia' (antes, solo ruido)
+        """
+        if senal not in SENALES:
+            raise ValueError(f"Señal desconocida: {senal} (opciones: {', '.join(SENALES)})")
+        if paquetes_por_segundo <= 0:
+            raise ValueError('paquetes_por_segundo debe ser positivo')
+
+        self.paquetes_por_segundo = paquetes_por_segundo
+        self.senal = senal
+        self.frecuencia = frecuencia
+        self.amplitud = amplitud
+        self.offset = offset
+        self.ruido = ruido
+        self.amortiguamiento = amortiguamiento
+        self.tasa_corrupcion = tasa_corrupcion
+        self.tasa_perdida = tasa_perdida
+        self.desconectar_tras = desconectar_tras
+        self.retardo_inicio = retardo_inicio
+        self.baudios = baudios
+        self.semilla = semilla
+        self.retardo_resonancia = retardo_resonancia
+        self.rng = np.random.default_rng(semilla)
+
+        # Transporte activo
+        self._leer = None
+        self._escribir = None
+        self._descriptor = None
+        self.hilo = None
+        self._detener = threading.Event()
+
+        # Estado del sketch (se reinicia en cada apertura)
+        self.inicio = None           # time.monotonic() del reinicio
+        self.inicio_epoca = None     # time.time() del reinicio, para latencias
+        self.modo_binario = False
+        self.modo_crudo = False
+        self.frecuencia_crudo = SAMPLE_RATE
+        self.contador = 0
+        self.secuencia = 0
+        self._comando = bytearray()
+        self._inicio_crudo = None
+        self._indice_muestra = 0
+
+        # Estadísticas
+        self.aperturas = 0
+        self.paquetes_enviados = 0
+        self.paquetes_omitidos = 0
+        self.paquetes_corrompidos = 0
+        self.bloques_crudos = 0
+        self.bytes_enviados = 0
+        self.esperas_escritura = 0
+        self.comandos = 0
+
+    # ============ TRANSPORTES ============
+
+    def abrir(self, puerto='simulado', baudrate=115200, timeout=1):
+        """
+        Abre una conexión en memoria y reinicia el dispositivo
+
+        Tiene la firma de `abrir_puerto` de ArduinoHandler:
+            ArduinoHandler(abrir_puerto=simulado.abrir).conectar('simulado')
+
+        Returns:
+            PuertoSimulado: Lado del PC de la conexión
+        """
+        self.detener()
+        lado_pc, lado_placa = socket.socketpair()
+        lado_placa.setblocking(False)
+
+        def escribir(datos):
+            try:
+                return lado_placa.send(datos)
+            except (BlockingIOError, InterruptedError):
+                return 0
+            # BrokenPipeError / ConnectionResetError: el PC cerró el puerto
+
+        def leer():
+            try:
+                return lado_placa.recv(4096) or None
+            except (BlockingIOError, InterruptedError):
+                return b''
+            except OSError:
+                return None
+
+        self._iniciar(leer, escribir, lado_placa.fileno(), lado_placa.close)
+        return PuertoSimulado(lado_pc, puerto, baudrate, timeout)
+
+    def abrir_pty(self):
+        """
+        Publica el dispositivo en un pseudo-terminal (solo POSIX)
+
+        Returns:
+            str: Ruta del puerto (p. ej. /dev/pts/3)
+        """
+        import tty
+
+        self.detener()
+        maestro, esclavo = os.openpty()
+        # Sin eco ni traducción de fin de línea; el esclavo queda abierto
+        # para que el PC pueda cerrar y reabrir el puerto sin EIO
+        tty.setraw(esclavo)
+        os.set_blocking(maestro, False)
+
+        def escribir(datos):
+            try:
+                return os.write(maestro, datos)
+            except BlockingIOError:
+                return 0
+
+        def leer():
+            try:
+                return os.read(maestro, 4096) or None
+            except BlockingIOError:
+                return b''
+            except OSError:
+                return None
+
+        def cerrar():
+            os.close(maestro)
+            os.close(esclavo)
+
+        self._iniciar(leer, escribir, maestro, cerrar)
+        return os.ttyname(esclavo)
+
+    def _iniciar(self, leer, escribir, descriptor, cerrar):
+        self._leer = leer
+        self._escribir = escribir
+        self._descriptor = descriptor
+        self.aperturas += 1
+        self._detener = threading.Event()
+        self.hilo = threading.Thread(target=self._ejecutar, args=(self._detener, cerrar),
+                                     daemon=True, name='arduino-simulado')
+        self.hilo.start()
+
+    def desconectar(self):
+        """
+        Simula que se desenchufa la placa: cierra su lado de la conexión
+        (el PC recibe fin de archivo o EIO)
+        """
+        self.detener()
+
+    def detener(self):
+        """Detiene el dispositivo; su hilo cierra el transporte al salir"""
+        self._detener.set()
+        if self.hilo is not None:
+            self.hilo.join(timeout=2)
+
+    # ============ SEÑAL ============
+
+    def senal_en(self, t):
+        """
+        Voltaje en la entrada del ADC en los instantes t (s desde el reinicio),
+        ya cuantizado a 10 bits
+
+        Returns:
+            tuple: (voltios, cuentas_adc) con la forma de t
+        """
+        t = np.asarray(t, dtype=float)
+        w = 2 * np.pi * self.frecuencia
+        if self.senal == 'seno':
+            v = self.amplitud * np.sin(w * t)
+        elif self.senal == 'ruido':
+            v = np.zeros_like(t)
+        else:
+            # Oscilador con m = 1 forzado en su frecuencia natural desde el
+            # reposo; F0 fija la amplitud estacionaria F0 / (c·ω_n)
+            c = 2 * self.amortiguamiento * w
+            x, _, _ = respuesta_analitica(np.maximum(t - self.retardo_resonancia, 0.0), 1.0, w**2, c,
+                                          self.amplitud * c * w, w)
+            v = x
+        v = self.offset + v
+        if self.ruido:
+            v = v + self.rng.normal(0.0, self.ruido, t.shape)
+
+        cuentas = np.clip(np.floor(v * ADC_RESOLUTION / VOLTAGE_REF + 0.5), 0, ADC_RESOLUTION)
+        return cuentas * (VOLTAGE_REF / ADC_RESOLUTION), cuentas.astype(np.int16)
+
+    # ============ BUCLE DEL SKETCH ============
+
+    def _millis(self):
+        return int((time.monotonic() - self.inicio) * 1000) & 0xFFFFFFFF
+
+    def _ejecutar(self, detener, cerrar):
+        try:
+            self._bucle(detener)
+        except OSError:
+            pass
+        finally:
+            # Fin de la sesión: detener(), desconexión programada o el PC
+            # cerró su lado
+            try:
+                cerrar()
+            except OSError:
+                pass
+
+    def _bucle(self, detener):
+        self.inicio = time.monotonic()
+        self.inicio_epoca = time.time()
+        self.modo_binario = False
+        self.modo_crudo = False
+        self.contador = 0
+        self.secuencia = 0
+        self._comando.clear()
+
+        if detener.wait(self.retardo_inicio):
+            return
+        self._enviar_linea('{"status":"Arduino iniciado","sample_rate":%d,"buffer_size":%d}'
+                           % (SAMPLE_RATE, BUFFER_SIZE))
+
+        intervalo = 1.0 / self.paquetes_por_segundo
+        proximo = time.monotonic()
+        fin = None if self.desconectar_tras is None else self.inicio + self.desconectar_tras
+        while not detener.is_set():
+            ahora = time.monotonic()
+            if fin is not None and ahora >= fin:
+                break
+
+            if self.modo_crudo:
+                espera = self._bloques_crudos_pendientes(ahora)
+            else:
+                pendientes = int((ahora - proximo) / intervalo) + 1 if ahora >= proximo else 0
+                if pendientes > MAX_LOTE:
+                    # Atraso excesivo: el sketch simplemente sigue desde ahora
+                    proximo = ahora
+                    pendientes = 1
+                if pendientes:
+                    self._enviar_resumenes(pendientes)
+                    proximo += pendientes * intervalo
+                espera = proximo - time.monotonic()
+
+            # Comandos del PC mientras llega el siguiente envío
+            if fin is not None:
+                espera = min(espera, fin - time.monotonic())
+            if not self._atender_comandos(max(0.0, espera)):
+                break
+
+    def _atender_comandos(self, espera):
+        """
+        Lee comandos terminados en '\\n' (ignora '\\r') durante `espera` s
+
+        Returns:
+            bool: False si el PC cerró la conexión
+        """
+        try:
+            listos, _, _ = select.select([self._descriptor], [], [], espera)
+        except (OSError, ValueError):
+            return False
+        if not listos:
+            return True
+        datos = self._leer()
+        if datos is None:
+            return False
+        for byte in datos:
+            if byte == 0x0D:
+                continue
+            if byte != 0x0A:
+                if len(self._comando) < 31:
+                    self._comando.append(byte)
+                continue
+            comando = self._comando.decode('ascii', errors='ignore')
+            self._comando.clear()
+            self._ejecutar_comando(comando)
+        return True
+
+    def _ejecutar_comando(self, comando):
+        self.comandos += 1
+        if comando.startswith('MODO CRUDO'):
+            # Requiere el modo binario ya negociado
+            if self.modo_binario:
+                try:
+                    frecuencia = int(comando[10:].strip() or 0)
+                except ValueError:
+                    frecuencia = 0
+                self.frecuencia_crudo = min(max(frecuencia or SAMPLE_RATE, FRECUENCIA_CRUDO_MIN),
+                                            FRECUENCIA_CRUDO_MAX)
+                self.modo_crudo = True
+                self._inicio_crudo = time.monotonic()
+                self._indice_muestra = 0
+        elif comando == 'MODO BIN':
+            self.modo_crudo = False
+            self._enviar_linea('{"status":"modo","modo":"binario","version":%d}' % VERSION_PROTOCOLO)
+            self.modo_binario = True
+            self.secuencia = 0
+        elif comando == 'MODO JSON':
+            self.modo_crudo = False
+            self.modo_binario = False
+            self._enviar_linea('{"status":"modo","modo":"json"}')
+
+    def _enviar_resumenes(self, n):
+        """Genera y envía n paquetes de resumen (ventanas de BUFFER_SIZE muestras)"""
+        ahora = time.monotonic() - self.inicio
+        # Cada ventana termina en su instante de envío; todos los paquetes
+        # del lote salen ahora, con el mismo millis()
+        envios = ahora - (n - 1 - np.arange(n)) / self.paquetes_por_segundo
+        self._enviar(self._resumenes(envios, np.full(n, self._millis())))
+
+    def _resumenes(self, envios, millis):
+        """
+        Bytes de los paquetes de resumen cuyas ventanas terminan en `envios`
+        (s desde el reinicio), en el formato del modo actual
+        """
+        n = len(envios)
+        t = envios[:, None] - (BUFFER_SIZE - np.arange(BUFFER_SIZE)) / SAMPLE_RATE
+        voltios, cuentas = self.senal_en(t)
+
+        rms = np.sqrt(np.mean(voltios**2, axis=1))
+        maximo = np.max(np.abs(voltios), axis=1)
+        minimo = np.min(voltios, axis=1)
+        media = np.mean(voltios, axis=1)
+        std = np.std(voltios, axis=1)
+        crest = np.where(rms > 0.001, maximo / np.maximum(rms, 1e-12), 0.0)
+
+        partes = []
+        for i in range(n):
+            if self.modo_binario:
+                payload = codificar_resumen(self.contador, int(millis[i]), rms[i], maximo[i], minimo[i],
+                                            media[i], std[i], crest[i], cuentas[i, ::PASO_MUESTRAS])
+                paquete = codificar_trama(TIPO_RESUMEN, self.secuencia, payload)
+                self.secuencia = (self.secuencia + 1) & 0xFFFF
+            else:
+                muestras = ','.join('%.4f' % v for v in voltios[i, ::PASO_MUESTRAS])
+                paquete = ('{"id":%d,"rms":%.4f,"max":%.4f,"min":%.4f,"media":%.4f,"std":%.4f,'
+                           '"crest":%.4f,"timestamp":%d,"samples":[%s]}\r\n'
+                           % (self.contador, rms[i], maximo[i], minimo[i], media[i], std[i],
+                              crest[i], millis[i], muestras)).encode()
+            self.contador += 1
+            paquete = self._alterar(paquete)
+            if paquete is not None:
+                partes.append(paquete)
+                self.paquetes_enviados += 1
+        return b''.join(partes)
+
+    def grabar(self, n, protocolo='json'):
+        """
+        Flujo de bytes de n paquetes de resumen sin transporte ni reloj real
+        (paquete i enviado en i / paquetes_por_segundo), para medir el
+        parser con datos repetibles
+
+        Args:
+            n: Número de paquetes
+            protocolo: 'json' o 'binario'
+
+        Returns:
+            bytes: Lo que el sketch enviaría después de negociar el protocolo
+        """
+        self.modo_binario = protocolo == 'binario'
+        self.contador = 0
+        self.secuencia = 0
+        envios = BUFFER_SIZE / SAMPLE_RATE + np.arange(n) / self.paquetes_por_segundo
+        return self._resumenes(envios, (envios * 1000).astype(np.int64) & 0xFFFFFFFF)
+
+    def _bloques_crudos_pendientes(self, ahora):
+        """
+        Envía los bloques de BLOQUE_CRUDO muestras ya "muestreados" por el
+        timer y devuelve los segundos hasta que se complete el siguiente
+        """
+        f = self.frecuencia_crudo
+        muestreadas = int((ahora - self._inicio_crudo) * f)
+        completas = muestreadas - muestreadas % BLOQUE_CRUDO
+        n = (completas - self._indice_muestra) // BLOQUE_CRUDO
+        if n > MAX_LOTE:
+            # El ISR sigue contando aunque loop() no alcance a enviar
+            self._indice_muestra = completas - MAX_LOTE * BLOQUE_CRUDO
+            n = MAX_LOTE
+        if n > 0:
+            indices = self._indice_muestra + np.arange(n * BLOQUE_CRUDO)
+            _, cuentas = self.senal_en(self._inicio_crudo - self.inicio + indices / f)
+            partes = []
+            for i in range(n):
+                indice = self._indice_muestra + i * BLOQUE_CRUDO
+                trama = codificar_trama(TIPO_CRUDO, self.secuencia, codificar_crudo(
+                    indice, f, cuentas[i * BLOQUE_CRUDO:(i + 1) * BLOQUE_CRUDO]))
+                self.secuencia = (self.secuencia + 1) & 0xFFFF
+                trama = self._alterar(trama)
+                if trama is not None:
+                    partes.append(trama)
+                    self.bloques_crudos += 1
+            self._indice_muestra += n * BLOQUE_CRUDO
+            self._enviar(b''.join(partes))
+        return (self._indice_muestra + BLOQUE_CRUDO) / f - (time.monotonic() - self._inicio_crudo)
+
+    def _alterar(self, paquete):
+        """Aplica pérdida y corrupción; None si el paquete se omite"""
+        if self.tasa_perdida and self.rng.random() < self.tasa_perdida:
+            self.paquetes_omitidos += 1
+            return None
+        if self.tasa_corrupcion and self.rng.random() < self.tasa_corrupcion:
+            alterado = bytearray(paquete)
+            alterado[self.rng.integers(len(alterado))] ^= int(self.rng.integers(1, 256))
+            self.paquetes_corrompidos += 1
+            return bytes(alterado)
+        return paquete
+
+    def _enviar_linea(self, texto):
+        self._enviar((texto + '\r\n').encode())
+
+    def _enviar(self, datos):
+        """
+        Escribe todo el bloque; si el buffer del PC está lleno espera, como
+        Serial.print() con el buffer de transmisión lleno (el sketch se
+        atrasa pero no pierde bytes)
+        """
+        vista = memoryview(datos)
+        while vista and not self._detener.is_set():
+            escritos = self._escribir(vista)
+            self.bytes_enviados += escritos
+            vista = vista[escritos:]
+            if vista:
+                self.esperas_escritura += 1
+                select.select([], [self._descriptor], [], 0.1)
+        if self.baudios:
+            # 10 bits por byte (8N1): el emisor queda ocupado ese tiempo
+            self._detener.wait(len(datos) * 10 / self.baudios)
+
+    def obtener_estadisticas(self):
+        return {
+            'activo': self.hilo is not None and self.hilo.is_alive(),
+            'aperturas': self.aperturas,
+            'modo': 'crudo' if self.modo_crudo else ('binario' if self.modo_binario else 'json'),
+            'paquetes_enviados': self.paquetes_enviados,
+            'paquetes_omitidos': self.paquetes_omitidos,
+            'paquetes_corrompidos': self.paquetes_corrompidos,
+            'bloques_crudos': self.bloques_crudos,
+            'bytes_enviados': self.bytes_enviados,
+            'esperas_escritura': self.esperas_escritura,
+            'comandos': self.comandos
+        }
+
+
+# ============ MEDICIÓN DE EXTREMO A EXTREMO ============
+
+def medir(simulado, segundos, protocolo='json', crudo=None):
+    """
+    Conecta un ArduinoHandler al simulador (transporte en memoria) y mide
+    paquetes/s, pérdidas, errores y latencia de llegada al buffer
+
+    Args:
+        simulado: ArduinoSimulado
+        segundos: Duración de la medición
+        protocolo: 'json' o 'binario'
+        crudo: Frecuencia del modo crudo (Hz) o None
+
+    Returns:
+        dict: Resultados
+    """
+    import resource
+    from serial_handler import ArduinoHandler
+
+    handler = ArduinoHandler(protocolo=protocolo, abrir_puerto=simulado.abrir, espera_reinicio=0)
+    if not handler.conectar('simulado') or not handler.iniciar_captura():
+        raise RuntimeError('No se pudo conectar con el Arduino simulado')
+    if crudo:
+        handler.iniciar_modo_crudo(crudo)
+
+    def contadores():
+        return (simulado.paquetes_enviados + simulado.bloques_crudos, handler.paquetes_recibidos,
+                handler.paquetes_perdidos, handler.decodificador.errores_crc, simulado.paquetes_omitidos,
+                simulado.paquetes_corrompidos, simulado.esperas_escritura)
+
+    time.sleep(0.5)   # calentamiento
+    desde = handler.buffer_datos.escritos
+    inicio = contadores()
+    uso = resource.getrusage(resource.RUSAGE_SELF)
+    cpu_inicio = uso.ru_utime + uso.ru_stime
+    t_inicio = time.perf_counter()
+
+    time.sleep(segundos)
+
+    t = time.perf_counter() - t_inicio
+    uso = resource.getrusage(resource.RUSAGE_SELF)
+    cpu = (uso.ru_utime + uso.ru_stime - cpu_inicio) / t * 100
+    enviados, recibidos, perdidos, errores_crc, omitidos, corrompidos, esperas = (
+        fin - ini for fin, ini in zip(contadores(), inicio))
+    # Solo los últimos paquetes si la ventana superó la capacidad del anillo
+    ventana = handler.buffer_datos.ventana(desde)
+    stats = handler.obtener_estadisticas()
+    handler.desconectar()
+    simulado.detener()
+
+    resultado = {
+        'paquetes_s_enviados': enviados / t,
+        'paquetes_s_recibidos': recibidos / t,
+        'perdidos': perdidos,
+        'errores_crc': errores_crc,
+        'omitidos': omitidos,
+        'corrompidos': corrompidos,
+        'esperas_escritura': esperas,
+        'cpu': cpu,
+        'latencia_mediana_ms': None,
+        'latencia_p99_ms': None
+    }
+    if crudo:
+        resultado['muestras_crudas'] = stats['flujo_crudo']
+    elif len(ventana['id']):
+        # El timestamp es millis() del simulador al enviar
+        latencias = (ventana['tiempo_local'] - simulado.inicio_epoca) * 1000 - ventana['timestamp']
+        resultado['latencia_mediana_ms'] = float(np.median(latencias))
+        resultado['latencia_p99_ms'] = float(np.percentile(latencias, 99))
+    return resultado
+
+
+def medir_deteccion(simulado, repeticiones=5, crudo=None, umbral=None):
+    """
+    Mide la latencia del detector de resonancia de extremo a extremo
+
+    En cada repetición se reabre la conexión (el simulador se reinicia),
+    se activa el detector en la frecuencia del simulador y, tras
+    `retardo_resonancia` segundos, el sistema empieza a crecer desde el
+    reposo con envolvente A·(1 - e^{-ζωt}). La latencia es el tiempo entre
+    el cruce del umbral por esa envolvente y la emisión del evento.
+
+    Args:
+        simulado: ArduinoSimulado con senal='resonancia' y retardo_resonancia > 0
+        repeticiones: Detecciones a medir
+        crudo: Frecuencia del modo crudo (Hz) o None (paquetes de resumen)
+        umbral: Umbral de amplificación (None: el del detector)
+
+    Returns:
+        dict: Latencias (ms) de cada detección, mediana y máximo
+    """
+    from serial_handler import ArduinoHandler
+
+    if simulado.senal != 'resonancia' or simulado.retardo_resonancia <= 0:
+        raise ValueError("Se requiere senal='resonancia' con retardo_resonancia > 0")
+    w = 2 * np.pi * simulado.frecuencia
+    crecimiento = 1 / (simulado.amortiguamiento * w)
+    opciones = {} if umbral is None else {'umbral': umbral}
+
+    latencias = []
+    procesamiento = []
+    for _ in range(repeticiones):
+        handler = ArduinoHandler(protocolo='binario' if crudo else 'json', abrir_puerto=simulado.abrir,
+                                 espera_reinicio=0)
+        if not handler.conectar('simulado') or not handler.iniciar_captura():
+            raise RuntimeError('No se pudo conectar con el Arduino simulado')
+        try:
+            if crudo:
+                handler.iniciar_modo_crudo(crudo)
+            handler.configurar_detector(simulado.frecuencia, **opciones)
+            limite = time.monotonic() + simulado.retardo_resonancia + 5 * crecimiento + 5
+            eventos = []
+            while not eventos and time.monotonic() < limite:
+                time.sleep(0.01)
+                eventos = [e for e in handler.eventos_resonancia() if e['tipo'] == 'inicio']
+            if not eventos:
+                raise RuntimeError('El detector no registró la resonancia')
+            evento = eventos[0]
+            nivel = evento['linea_base'] * handler.detector.umbral / simulado.amplitud
+            if nivel >= 1:
+                raise RuntimeError('El umbral supera la amplitud estacionaria del simulador')
+            t_cruce = simulado.retardo_resonancia - np.log(1 - nivel) * crecimiento
+            latencias.append((evento['tiempo'] - (simulado.inicio_epoca + t_cruce)) * 1000)
+            procesamiento.append(evento['latencia_ms'])
+        finally:
+            handler.desconectar()
+    simulado.detener()
+
+    return {
+        'latencias_ms': latencias,
+        'latencia_mediana_ms': float(np.median(latencias)),
+        'latencia_max_ms': float(np.max(latencias)),
+        'procesamiento_mediana_ms': float(np.median(procesamiento))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hz', type=float, default=10, help='Paquetes de resumen por segundo')
+    parser.add_argument('--senal', choices=SENALES, default='seno')
+    parser.add_argument('--frecuencia', type=float, default=25.0, help='Frecuencia de la señal (Hz)')
+    parser.add_argument('--amplitud', type=float, default=1.0, help='Amplitud (V)')
+    parser.add_argument('--ruido', type=float, default=0.01, help='Ruido gaussiano (V)')
+    parser.add_argument('--corrupcion', type=float, default=0.0, help='Probabilidad de corromper un paquete')
+    parser.add_argument('--perdida', type=float, default=0.0, help='Probabilidad de omitir un paquete')
+    parser.add_argument('--desconectar-tras', type=float, default=None, help='Segundos hasta desconectarse')
+    parser.add_argument('--baudios', type=int, default=None, help='Limitar el caudal como un puerto real')
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--medir', type=float, default=None, metavar='SEGUNDOS',
+                        help='Medir un ArduinoHandler conectado en memoria en vez de abrir un pty')
+    parser.add_argument('--protocolo', choices=['json', 'binario'], default='json')
+    parser.add_argument('--crudo', type=int, default=None, metavar='HZ', help='Medir el modo crudo')
+    parser.add_argument('--detectar', type=int, default=None, metavar='N',
+                        help='Medir N veces la latencia del detector de resonancia')
+    args = parser.parse_args()
+
+    if args.detectar:
+        simulado = ArduinoSimulado(paquetes_por_segundo=args.hz, senal='resonancia', frecuencia=args.frecuencia,
+                                   amplitud=args.amplitud, ruido=args.ruido, semilla=args.semilla,
+                                   retardo_resonancia=2.0)
+        r = medir_deteccion(simulado, args.detectar, args.crudo)
+        fuente = f'crudo a {args.crudo} Hz' if args.crudo else f'paquetes a {args.hz:g}/s'
+        print(f"Detector de resonancia en {args.frecuencia:g} Hz ({fuente}), {args.detectar} detecciones")
+        print(f"  Latencia desde el cruce real: mediana {r['latencia_mediana_ms']:.0f} ms, "
+              f"máxima {r['latencia_max_ms']:.0f} ms")
+        print(f"  Muestra -> evento:           mediana {r['procesamiento_mediana_ms']:.1f} ms")
+        return
+
+    simulado = ArduinoSimulado(paquetes_por_segundo=args.hz, senal=args.senal, frecuencia=args.frecuencia,
+                               amplitud=args.amplitud, ruido=args.ruido, tasa_corrupcion=args.corrupcion,
+                               tasa_perdida=args.perdida, desconectar_tras=args.desconectar_tras,
+                               baudios=args.baudios, semilla=args.semilla,
+                               retardo_inicio=0.0 if args.medir else 2.0)
+
+    if args.medir:
+        protocolo = 'binario' if args.crudo else args.protocolo
+        r = medir(simulado, args.medir, protocolo, args.crudo)
+        print(f"{args.hz:g} paquetes/s ({protocolo}{', crudo a %d Hz' % args.crudo if args.crudo else ''}) "
+              f"durante {args.medir:g} s")
+        print(f"  Enviados / recibidos:   {r['paquetes_s_enviados']:.0f} / {r['paquetes_s_recibidos']:.0f} por s")
+        print(f"  Perdidos (detectados):  {r['perdidos']}  (omitidos {r['omitidos']}, "
+              f"corrompidos {r['corrompidos']}, errores CRC {r['errores_crc']})")
+        print(f"  Esperas del emisor:     {r['esperas_escritura']} (PC más lento que el simulador)")
+        print(f"  CPU del proceso:        {r['cpu']:.1f}%")
+        if r['latencia_mediana_ms'] is not None:
+            print(f"  Latencia:               mediana {r['latencia_mediana_ms']:.1f} ms, "
+                  f"p99 {r['latencia_p99_ms']:.1f} ms")
+        if args.crudo:
+            flujo = r['muestras_crudas']
+            print(f"  Muestras crudas:        {flujo['muestras_recibidas']} recibidas, "
+                  f"{flujo['muestras_perdidas']} perdidas")
+        return
+
+    puerto = simulado.abrir_pty()
+    print(f"🤖 Arduino simulado en {puerto} ({args.senal}, {args.hz:g} paquetes/s)")
+    print("   Conéctalo desde la interfaz web o con ArduinoHandler().conectar(puerto). Ctrl+C para salir.")
+    try:
+        while simulado.hilo is not None and simulado.hilo.is_alive():
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulado.detener()
+        print(f"\n📊 {simulado.obtener_estadisticas()}")
+
+
+if __name__ == '__main__':
+    main()
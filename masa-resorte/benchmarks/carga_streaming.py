@@ -0,0 +1,206 @@
+"""
+================================================================================
+PRUEBA DE CARGA DEL STREAMING (SSE / WEBSOCKET)
+Proyecto: Análisis de Resonancia en Sistema Masa-Resorte
+================================================================================
+
+Abre N clientes SSE (y opcionalmente WebSocket) contra el servidor ASGI
+(servidor_async) o el servidor de desarrollo de Flask, con un Arduino
+emulado sobre un pseudo-terminal que publica paquetes JSON a la frecuencia
+indicada. Mide cuántas conexiones quedan abiertas, cuántos paquetes recibe
+cada cliente, los hilos del servidor y la latencia de /calcular durante la
+carga.
+
+Uso (Linux/macOS, requiere un límite de descriptores mayor que N):
+    python benchmarks/carga_streaming.py --clientes 500 --segundos 10
+    python benchmarks/carga_streaming.py --servidor flask --clientes 100
+================================================================================
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import tty
+
+import numpy as np
+import serial
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+def preparar_dispositivo(handler, hz):
+    """Conecta el handler a un pty y escribe paquetes JSON a `hz` por segundo"""
+    maestro, esclavo = os.openpty()
+    tty.setraw(esclavo)
+    handler.serial_conn = serial.Serial(os.ttyname(esclavo), 115200, timeout=1)
+    handler.conectado = True
+    handler.puerto = os.ttyname(esclavo)
+    handler.iniciar_captura()
+
+    detener = threading.Event()
+
+    def escribir():
+        i = 0
+        while not detener.is_set():
+            paquete = {'id': i, 'rms': 0.05, 'max': 0.12, 'min': 0.0, 'media': 0.03,
+                       'std': 0.02, 'crest': 2.4, 'timestamp': i * 1000 // hz,
+                       'samples': [0.0312] * 50}
+            os.write(maestro, (json.dumps(paquete) + '\n').encode())
+            i += 1
+            detener.wait(1 / hz)
+
+    threading.Thread(target=escribir, daemon=True).start()
+    return detener
+
+
+def iniciar_servidor(tipo, puerto):
+    """Arranca el servidor elegido en un hilo; devuelve el módulo app"""
+    if tipo == 'async':
+        import uvicorn
+        import servidor_async
+        config = uvicorn.Config(servidor_async.aplicacion, host='127.0.0.1', port=puerto,
+                                log_level='warning', backlog=4096)
+        servidor = uvicorn.Server(config)
+        threading.Thread(target=servidor.run, daemon=True).start()
+        while not servidor.started:
+            time.sleep(0.05)
+        return servidor_async.aplicacion_flask
+
+    from werkzeug.serving import make_server
+    import app as modulo_app
+    servidor = make_server('127.0.0.1', puerto, modulo_app.app, threaded=True)
+    servidor.socket.listen(4096)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return modulo_app
+
+
+async def cliente_sse(puerto, recibidos, conectados, fin):
+    """Cliente SSE mínimo: cuenta los paquetes de los eventos 'lote'"""
+    try:
+        lector, escritor = await asyncio.open_connection('127.0.0.1', puerto)
+    except OSError:
+        return
+    escritor.write(b'GET /arduino/stream HTTP/1.1\r\nHost: localhost\r\nAccept: text/event-stream\r\n\r\n')
+    await escritor.drain()
+    paquetes = 0
+    try:
+        linea = await asyncio.wait_for(lector.readline(), 30)
+        if b'200' not in linea:
+            return
+        conectados.append(fin - time.monotonic())
+        while time.monotonic() < fin:
+            linea = await asyncio.wait_for(lector.readline(), max(0.1, fin - time.monotonic()))
+            if not linea:
+                break
+            # Con transfer-encoding chunked, las líneas de tamaño se ignoran
+            if linea.startswith(b'data: '):
+                paquetes += len(json.loads(linea[6:])['paquetes'])
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        recibidos.append(paquetes)
+        escritor.close()
+
+
+async def cliente_ws(puerto, recibidos, conectados, fin):
+    import websockets
+    paquetes = 0
+    try:
+        async with websockets.connect(f'ws://127.0.0.1:{puerto}/arduino/ws', open_timeout=30) as ws:
+            conectados.append(fin - time.monotonic())
+            while time.monotonic() < fin:
+                mensaje = json.loads(await asyncio.wait_for(ws.recv(), max(0.1, fin - time.monotonic())))
+                if mensaje.get('tipo') == 'lote':
+                    paquetes += len(mensaje['paquetes'])
+    except (asyncio.TimeoutError, OSError, Exception):
+        pass
+    finally:
+        recibidos.append(paquetes)
+
+
+async def medir_calcular(puerto, fin, latencias):
+    """Peticiones periódicas a /calcular (modo rápido) durante la carga"""
+    cuerpo = b'masa=1&constante_resorte=100&amortiguamiento=0.5&fuerza=5&modo=rapido'
+    while time.monotonic() < fin - 1:
+        inicio = time.perf_counter()
+        try:
+            lector, escritor = await asyncio.open_connection('127.0.0.1', puerto)
+            escritor.write(b'POST /calcular HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n'
+                           b'Content-Type: application/x-www-form-urlencoded\r\n'
+                           b'Content-Length: ' + str(len(cuerpo)).encode() + b'\r\n\r\n' + cuerpo)
+            await escritor.drain()
+            respuesta = await asyncio.wait_for(lector.read(), 10)
+            escritor.close()
+            if b' 200 ' in respuesta.split(b'\r\n', 1)[0]:
+                latencias.append(time.perf_counter() - inicio)
+        except (OSError, asyncio.TimeoutError):
+            pass
+        await asyncio.sleep(0.5)
+
+
+async def ejecutar(args):
+    fin = time.monotonic() + args.segundos
+    recibidos, conectados, latencias = [], [], []
+    tareas = []
+    for i in range(args.clientes):
+        tareas.append(asyncio.create_task(cliente_sse(args.puerto, recibidos, conectados, fin)))
+        if i % 50 == 49:
+            await asyncio.sleep(0.05)
+    for _ in range(args.websockets):
+        tareas.append(asyncio.create_task(cliente_ws(args.puerto, recibidos, conectados, fin)))
+    tareas.append(asyncio.create_task(medir_calcular(args.puerto, fin, latencias)))
+
+    await asyncio.sleep(2)
+    hilos = threading.active_count()
+    await asyncio.gather(*tareas)
+    return recibidos, conectados, latencias, hilos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--servidor', choices=['async', 'flask'], default='async')
+    parser.add_argument('--clientes', type=int, default=500, help='Clientes SSE')
+    parser.add_argument('--websockets', type=int, default=0, help='Clientes WebSocket (solo async)')
+    parser.add_argument('--segundos', type=float, default=10)
+    parser.add_argument('--hz', type=int, default=10, help='Paquetes por segundo del Arduino emulado')
+    parser.add_argument('--puerto', type=int, default=5077)
+    args = parser.parse_args()
+
+    limite, maximo = resource.getrlimit(resource.RLIMIT_NOFILE)
+    necesarios = 3 * (args.clientes + args.websockets) + 100
+    if limite < necesarios:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(necesarios, maximo), maximo))
+
+    modulo_app = iniciar_servidor(args.servidor, args.puerto)
+    detener = preparar_dispositivo(modulo_app.arduino, args.hz)
+    hilos_base = threading.active_count()
+
+    recibidos, conectados, latencias, hilos = asyncio.run(ejecutar(args))
+    detener.set()
+
+    # Paquetes esperados según el tiempo que cada cliente estuvo conectado
+    esperados = args.hz * np.median(conectados) if conectados else 0
+    recibidos = np.array(recibidos)
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"Servidor: {args.servidor}  |  clientes: {args.clientes} SSE + {args.websockets} WS  |  "
+          f"{args.hz} paquetes/s durante {args.segundos:.0f} s")
+    print(f"  Conexiones aceptadas:      {len(conectados)} / {args.clientes + args.websockets}")
+    print(f"  Paquetes por cliente:      mediana {np.median(recibidos):.0f}, mínimo {recibidos.min()} "
+          f"(≈{esperados:.0f} esperados)")
+    print(f"  Clientes con ≥90% datos:   {int(np.sum(recibidos >= 0.9 * esperados))}")
+    print(f"  Hilos del proceso:         {hilos} (antes de los clientes: {hilos_base})")
+    print(f"  RSS máximo:                {rss_mb:.0f} MB")
+    if latencias:
+        print(f"  /calcular durante la carga: mediana {np.median(latencias) * 1000:.0f} ms, "
+              f"máx {np.max(latencias) * 1000:.0f} ms ({len(latencias)} peticiones)")
+    else:
+        print("  /calcular durante la carga: sin respuestas")
+
+
+if __name__ == '__main__':
+    main()
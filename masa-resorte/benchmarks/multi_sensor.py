@@ -0,0 +1,150 @@
+"""
+================================================================================
+PRUEBA DE RENDIMIENTO: VARIAS PLACAS A LA VEZ
+Proyecto: Análisis de Resonancia en Sistema Masa-Resorte
+================================================================================
+
+Emula N placas Arduino sobre pseudo-terminales (un proceso aparte escribe
+los paquetes, así su CPU no se cuenta) y las lee con el RegistroSensores:
+con el LectorSerial compartido (un hilo con selectors) o con un hilo de
+lectura por puerto. Mide paquetes/s agregados, paquetes perdidos, CPU del
+proceso lector, hilos y latencia de llegada al buffer.
+
+Uso (Linux/macOS):
+    python benchmarks/multi_sensor.py --placas 8 --hz 100 --segundos 10
+    python benchmarks/multi_sensor.py --placas 16 --protocolo binario --modo selector
+================================================================================
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import threading
+import time
+import tty
+
+import numpy as np
+import serial
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from protocolo_binario import codificar_trama, codificar_resumen, TIPO_RESUMEN
+from registro_sensores import RegistroSensores
+
+MASCARA_MS = 0xFFFFFFFF   # el timestamp binario es u32
+
+
+def _paquete(protocolo, i):
+    """Paquete con el instante de envío (ms) como timestamp"""
+    ahora = int(time.time() * 1000) & MASCARA_MS
+    if protocolo == 'binario':
+        return codificar_trama(TIPO_RESUMEN, i, codificar_resumen(
+            i, ahora, 0.05, 0.12, 0.0, 0.03, 0.02, 2.4, [6] * 50))
+    return (json.dumps({'id': i, 'rms': 0.05, 'max': 0.12, 'min': 0.0, 'media': 0.03,
+                        'std': 0.02, 'crest': 2.4, 'timestamp': ahora,
+                        'samples': [0.0293] * 50}) + '\n').encode()
+
+
+def emular_placas(maestros, hz, protocolo, detener):
+    """Proceso emisor: un paquete por placa cada 1/hz segundos"""
+    i = 0
+    proximo = time.monotonic()
+    while not detener.is_set():
+        for maestro in maestros:
+            os.write(maestro, _paquete(protocolo, i))
+        i += 1
+        proximo += 1 / hz
+        time.sleep(max(0.0, proximo - time.monotonic()))
+
+
+def medir(modo, placas, hz, segundos, protocolo):
+    pares = [os.openpty() for _ in range(placas)]
+    for _, esclavo in pares:
+        tty.setraw(esclavo)
+
+    registro = RegistroSensores()
+    if modo == 'hilos':
+        registro.lector = None
+    handlers = []
+    for n, (_, esclavo) in enumerate(pares):
+        handler = registro.obtener(f'placa{n}', crear=True)
+        handler.serial_conn = serial.Serial(os.ttyname(esclavo), 115200, timeout=1)
+        handler.puerto = os.ttyname(esclavo)
+        handler.protocolo = protocolo
+        handler.conectado = True
+        handlers.append(handler)
+
+    hilos_base = threading.active_count()
+    for handler in handlers:
+        handler.iniciar_captura()
+
+    detener = multiprocessing.Event()
+    emisor = multiprocessing.Process(target=emular_placas,
+                                     args=([m for m, _ in pares], hz, protocolo, detener), daemon=True)
+    emisor.start()
+
+    time.sleep(1.0)   # calentamiento
+    inicio_escritos = [h.buffer_datos.escritos for h in handlers]
+    uso = resource.getrusage(resource.RUSAGE_SELF)
+    cpu_inicio = uso.ru_utime + uso.ru_stime
+    t_inicio = time.perf_counter()
+    hilos = threading.active_count() - hilos_base
+
+    time.sleep(segundos)
+
+    t = time.perf_counter() - t_inicio
+    uso = resource.getrusage(resource.RUSAGE_SELF)
+    cpu = (uso.ru_utime + uso.ru_stime - cpu_inicio) / t * 100
+    recibidos = [h.buffer_datos.escritos - e for h, e in zip(handlers, inicio_escritos)]
+
+    latencias = []
+    for handler, desde in zip(handlers, inicio_escritos):
+        ventana = handler.buffer_datos.ventana(desde)
+        llegada = (ventana['tiempo_local'] * 1000).astype(np.int64) & MASCARA_MS
+        latencias.append((llegada - ventana['timestamp']) & MASCARA_MS)
+    latencias = np.concatenate(latencias)
+
+    detener.set()
+    emisor.join(timeout=2)
+    registro.desconectar_todos()
+    for maestro, esclavo in pares:
+        os.close(maestro)
+        os.close(esclavo)
+
+    perdidos = sum(h.paquetes_perdidos for h in handlers)
+    return {
+        'modo': modo,
+        'paquetes_s': sum(recibidos) / t,
+        'esperados_s': placas * hz,
+        'perdidos': perdidos,
+        'cpu': cpu,
+        'hilos': hilos,
+        'latencia_mediana_ms': float(np.median(latencias)),
+        'latencia_p99_ms': float(np.percentile(latencias, 99))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--placas', type=int, default=8)
+    parser.add_argument('--hz', type=int, default=100, help='Paquetes por segundo de cada placa')
+    parser.add_argument('--segundos', type=float, default=10)
+    parser.add_argument('--protocolo', choices=['json', 'binario'], default='json')
+    parser.add_argument('--modo', choices=['selector', 'hilos', 'ambos'], default='ambos')
+    args = parser.parse_args()
+
+    modos = ['selector', 'hilos'] if args.modo == 'ambos' else [args.modo]
+    print(f"{args.placas} placas × {args.hz} paquetes/s ({args.protocolo}) durante {args.segundos:.0f} s")
+    print(f"{'modo':<10}{'paquetes/s':>12}{'esperados':>11}{'perdidos':>10}{'CPU %':>8}"
+          f"{'hilos':>7}{'lat. med':>10}{'lat. p99':>10}")
+    for modo in modos:
+        r = medir(modo, args.placas, args.hz, args.segundos, args.protocolo)
+        print(f"{r['modo']:<10}{r['paquetes_s']:>12.0f}{r['esperados_s']:>11}{r['perdidos']:>10}"
+              f"{r['cpu']:>8.1f}{r['hilos']:>7}{r['latencia_mediana_ms']:>8.1f}ms{r['latencia_p99_ms']:>8.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
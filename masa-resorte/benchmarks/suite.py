@@ -0,0 +1,535 @@
+"""
+================================================================================
+SUITE DE RENDIMIENTO CON LÍNEA BASE
+Proyecto: Análisis de Resonancia en Sistema Masa-Resorte
+================================================================================
+
+Mide sin hardware ni red los caminos críticos de la aplicación y compara
+los tiempos con una línea base guardada, para detectar regresiones antes
+de que lleguen a los bancos de prueba:
+
+- calcular: /calcular etapa por etapa (simulación, estadísticas, series
+  LTTB, JSON, modo rápido, PNG) y la petición completa con y sin caché
+- solver: sistema_masa_resorte con odeint sobre una malla de parámetros,
+  frente a la solución analítica en lote sobre la misma malla
+- parser: ArduinoHandler.leer_dato y consumir sobre flujos grabados con el
+  Arduino simulado (JSON y binario)
+- sse: reparto de lotes a N clientes (un JSON por cliente como en Flask, o
+  la caché compartida de servidor_async)
+- exportar: exportar_datos y exportar_datos_experimentales (Excel) con
+  tamaños crecientes, y las descargas CSV/Parquet en flujo
+- analisis: actualización de las estadísticas en línea por lote de
+  paquetes, su resumen (O(1) en las filas) y el recorrido completo que
+  lo reemplaza cuando el índice no tiene agregados; espectro (Welch,
+  picos y ζ) de cada ventana entrante y de un experimento completo
+
+Cada caso guarda mediana y mínimo de varias repeticiones. Los resultados
+se escriben en JSON; con --comparar, un caso cuyo tiempo mínimo por unidad
+(paquete, cliente, fila...) supera el de la línea base en más de
+--tolerancia cuenta como regresión y el proceso termina con código 1. El
+mínimo es el menos sensible a la carga de otros procesos, y por unidad
+los modos rápido y completo son comparables. Tras cada caso se mide una
+carga fija de calibración; el cociente se corrige por la velocidad
+relativa de la máquina en ese momento (frecuencia variable, vecinos en
+una VM). Aun así la línea base depende de la máquina: regenerarla con
+--guardar-base en el equipo de referencia.
+
+Uso:
+    python benchmarks/suite.py                          # compara con linea_base.json
+    python benchmarks/suite.py --rapido --solo parser,sse
+    python benchmarks/suite.py --salida resultados.json --guardar-base
+================================================================================
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import socket
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(DIRECTORIO, '..'))
+
+LINEA_BASE = os.path.join(DIRECTORIO, 'linea_base.json')
+TOLERANCIA = 0.50
+
+GRUPOS = ('calcular', 'solver', 'parser', 'sse', 'exportar', 'analisis')
+
+# Parámetros de referencia de /calcular
+PARAMETROS = (1.0, 100.0, 0.5, 5.0)
+
+
+def cronometrar(funcion, repeticiones, unidades=1, unidad='llamada', preparar=None, calentar=True):
+    """
+    Mide una función varias veces
+
+    Args:
+        funcion: callable(estado) a medir
+        repeticiones: Número de mediciones
+        unidades: Elementos procesados por llamada (paquetes, clientes, filas)
+        unidad: Nombre de esos elementos
+        preparar: callable() -> estado, fuera del tiempo medido
+        calentar: Hacer una llamada sin medir antes de empezar
+
+    Returns:
+        dict: mediana_s, minimo_s, repeticiones, unidades, unidad y
+            por_segundo (unidades / mediana)
+    """
+    if calentar:
+        funcion(preparar() if preparar else None)
+    tiempos = []
+    for _ in range(repeticiones):
+        estado = preparar() if preparar else None
+        inicio = time.perf_counter()
+        funcion(estado)
+        tiempos.append(time.perf_counter() - inicio)
+    mediana = float(np.median(tiempos))
+    return {
+        'mediana_s': mediana,
+        'minimo_s': float(np.min(tiempos)),
+        'repeticiones': repeticiones,
+        'unidades': unidades,
+        'unidad': unidad,
+        'por_segundo': unidades / mediana if mediana > 0 else None
+    }
+
+
+def _carga_calibracion(_):
+    """Trabajo fijo mixto (intérprete + NumPy) para medir la velocidad de la máquina"""
+    total = 0
+    for i in range(20000):
+        total += i * i % 7
+    np.sort(np.random.default_rng(0).random(20000))
+    return total
+
+
+def calibrar():
+    return cronometrar(_carga_calibracion, 5)['minimo_s']
+
+
+# ============ CASOS ============
+
+def casos_calcular(modulo_app, rapido):
+    m, k, c, F0 = PARAMETROS
+    repeticiones = 10 if rapido else 30
+    simulacion = modulo_app.simular_escenarios(m, k, c, F0)
+    resultados = modulo_app.calcular_resultados(m, k, c, F0, simulacion)
+    series = modulo_app.series_graficas(simulacion, modulo_app.PUNTOS_SERIE_DEFECTO)
+    modulo_app.superficie.inicializar()
+
+    yield 'calcular.simular_escenarios', cronometrar(
+        lambda _: modulo_app.simular_escenarios(m, k, c, F0), repeticiones)
+    yield 'calcular.estadisticas', cronometrar(
+        lambda _: modulo_app.calcular_resultados(m, k, c, F0, simulacion), repeticiones)
+    yield 'calcular.series_lttb', cronometrar(
+        lambda _: modulo_app.series_graficas(simulacion, modulo_app.PUNTOS_SERIE_DEFECTO), repeticiones)
+    yield 'calcular.json', cronometrar(
+        lambda _: modulo_app.app.json.dumps(dict(resultados, series=series)), repeticiones)
+    yield 'calcular.rapido', cronometrar(
+        lambda _: modulo_app.calcular_resultados_rapidos(m, k, c, F0), repeticiones)
+    yield 'calcular.png', cronometrar(
+        lambda _: modulo_app.generar_graficas(**simulacion), 3 if rapido else 5)
+
+    cliente = modulo_app.app.test_client()
+    formulario = {'masa': m, 'constante_resorte': k, 'amortiguamiento': c, 'fuerza': F0}
+
+    def peticion(_):
+        respuesta = cliente.post('/calcular', data=formulario)
+        assert respuesta.status_code == 200, respuesta.get_data(as_text=True)
+
+    def vaciar_caches():
+        modulo_app.cache_calculos.limpiar()
+        modulo_app.cache_series.limpiar()
+
+    yield 'calcular.peticion_sin_cache', cronometrar(peticion, repeticiones, preparar=vaciar_caches)
+    yield 'calcular.peticion_con_cache', cronometrar(peticion, repeticiones)
+
+
+def casos_solver(rapido):
+    from scipy.integrate import odeint
+    from solver_analitico import sistema_masa_resorte, respuesta_analitica
+
+    m, k, _, F0 = PARAMETROS
+    t = np.linspace(0, 20.0, 1000)
+    w_n = np.sqrt(k / m)
+    amortiguamientos = np.linspace(0.1, 5.0, 8)
+    frecuencias = w_n * np.linspace(0.5, 1.5, 8)
+    n = len(amortiguamientos) * len(frecuencias)
+
+    def malla_odeint(_):
+        for c in amortiguamientos:
+            for w in frecuencias:
+                odeint(sistema_masa_resorte, [0.0, 0.0], t, args=(m, k, c, F0, w))
+
+    def malla_analitica(_):
+        respuesta_analitica(t, m, k, amortiguamientos[:, None, None], F0, frecuencias[None, :, None])
+
+    yield f'solver.odeint_malla_{n}', cronometrar(malla_odeint, 3 if rapido else 5, n, 'sistema')
+    yield f'solver.analitico_malla_{n}', cronometrar(malla_analitica, 10 if rapido else 30, n, 'sistema')
+
+
+def casos_parser(rapido):
+    from arduino_simulado import ArduinoSimulado, PuertoSimulado
+    from serial_handler import ArduinoHandler
+
+    n = 2000 if rapido else 10000
+    trozo = 4096   # bytes por lectura, como un read(in_waiting) típico
+
+    for protocolo in ('json', 'binario'):
+        flujo = ArduinoSimulado(paquetes_por_segundo=100, semilla=0).grabar(n, protocolo)
+
+        def nuevo_handler():
+            handler = ArduinoHandler(protocolo=protocolo)
+            handler.protocolo = protocolo
+            handler.conectado = True
+            return handler
+
+        def preparar_leer_dato():
+            # Puerto en memoria sobre un socket: el mismo read(in_waiting)
+            # que con un puerto real, sin el byte a byte de loop://
+            lado_pc, lado_placa = socket.socketpair()
+            handler = nuevo_handler()
+            handler.serial_conn = PuertoSimulado(lado_pc, timeout=0)
+            return handler, lado_placa
+
+        def leer_dato(estado):
+            handler, lado_placa = estado
+            recibidos = 0
+            for inicio in range(0, len(flujo), trozo):
+                lado_placa.sendall(flujo[inicio:inicio + trozo])
+                while handler.leer_dato() is not None:
+                    recibidos += 1
+            handler.serial_conn.close()
+            lado_placa.close()
+            assert recibidos == n, f'{recibidos} de {n} paquetes'
+
+        def consumir(handler):
+            for inicio in range(0, len(flujo), trozo):
+                handler.consumir(flujo[inicio:inicio + trozo])
+            assert handler.paquetes_recibidos == n
+
+        repeticiones = 3 if rapido else 5
+        yield f'parser.leer_dato.{protocolo}', cronometrar(
+            leer_dato, repeticiones, n, 'paquete', preparar=preparar_leer_dato)
+        yield f'parser.consumir.{protocolo}', cronometrar(
+            consumir, repeticiones, n, 'paquete', preparar=nuevo_handler)
+
+
+def casos_sse(rapido):
+    from app import lote_stream, evento_sse
+    from arduino_simulado import ArduinoSimulado
+    from buffer_circular import BufferCircular
+    from distribuidor import Distribuidor
+    import servidor_async
+
+    # Paquetes reales del sketch simulado, ya parseados
+    lineas = ArduinoSimulado(semilla=0).grabar(500).decode().splitlines()
+    paquetes = [dict(json.loads(linea), tiempo_local=time.time()) for linea in lineas]
+    por_ronda = 10   # paquetes nuevos entre dos lotes (1 s a 10 paquetes/s)
+
+    for n_clientes in ((10, 100) if rapido else (10, 100, 1000)):
+        for variante in ('flask', 'async'):
+            def preparar():
+                buffer = BufferCircular()
+                distribuidor = Distribuidor(buffer)
+                suscripciones = [distribuidor.suscribir(f'cliente {i}') for i in range(n_clientes)]
+                for paquete in paquetes[:por_ronda]:
+                    buffer.escribir(paquete)
+                servidor_async.cache_lotes.limpiar()
+                return suscripciones
+
+            def ronda(suscripciones):
+                for suscripcion in suscripciones:
+                    ventana = suscripcion.leer(max_paquetes=servidor_async.MAX_LOTE_SSE)
+                    if variante == 'flask':
+                        evento_sse(lote_stream(suscripcion, ventana, 0, 'principal'))
+                    else:
+                        servidor_async._serializar_lote('principal', suscripcion, ventana, 0, 'sse')
+
+            yield f'sse.{variante}.{n_clientes}_clientes', cronometrar(
+                ronda, 5 if rapido else 15, n_clientes, 'cliente', preparar=preparar)
+
+
+def casos_exportar(modulo_app, rapido):
+    from almacen_experimentos import AlmacenExperimentos
+    from buffer_circular import MUESTRAS_POR_BLOQUE
+    from exportacion import bloques_experimento, flujo
+
+    m, k, c, F0 = PARAMETROS
+    anterior = os.getcwd()
+    directorio = tempfile.mkdtemp(prefix='bench_exportar_')
+    os.chdir(directorio)   # las funciones escriben en ./resultados
+    try:
+        for n in ((1000, 10000) if rapido else (1000, 10000, 50000)):
+            t = np.linspace(0, 20.0, n)
+            sol_normal, _ = modulo_app.resolver_respuesta(t, m, k, c, F0, 5.0)
+            sol_resonancia, aceleracion = modulo_app.resolver_respuesta(t, m, k, c, F0, 9.99)
+            yield f'exportar.simulacion.{n}_filas', cronometrar(
+                lambda _: modulo_app.exportar_datos(t, sol_normal, sol_resonancia, aceleracion, m, k, c, F0),
+                1 if n > 10000 else 3, n, 'fila', calentar=n <= 1000)
+
+        rng = np.random.default_rng(0)
+        almacen = AlmacenExperimentos(os.path.join(directorio, 'experimentos'))
+        for n in ((1000, 10000) if rapido else (1000, 10000, 30000)):
+            rms = rng.uniform(0.1, 1.0, n)
+            escritor = almacen.crear('bench')
+            escritor.agregar({'id': np.arange(n), 'timestamp': np.arange(n) * 100, 'rms': rms,
+                              'max': rms * 1.4, 'min': np.zeros(n), 'media': rms * 0.9,
+                              'std': np.full(n, 0.1), 'crest': np.full(n, 1.4),
+                              'tiempo_local': 1.7e9 + np.arange(n) * 0.1,
+                              'n_muestras': np.zeros(n, dtype=np.int16),
+                              'muestras': np.zeros((n, MUESTRAS_POR_BLOQUE), dtype=np.float32)})
+            escritor.cerrar()
+            experimento = almacen.obtener(escritor.id)
+            yield f'exportar.experimental.{n}_filas', cronometrar(
+                lambda _: _silenciado(modulo_app.exportar_datos_experimentales, experimento),
+                1 if n > 10000 else 3, n, 'fila', calentar=n <= 1000)
+
+            # Descargas en flujo del mismo experimento (bytes consumidos sin guardar)
+            for formato in ('csv', 'parquet'):
+                yield f'exportar.flujo_{formato}.{n}_filas', cronometrar(
+                    lambda _: sum(len(parte) for parte in flujo(
+                        formato, bloques_experimento(experimento, modulo_app.COLUMNAS_EXPORTACION),
+                        modulo_app.SALIDA_EXPERIMENTO)),
+                    3, n, 'fila', calentar=n <= 1000)
+    finally:
+        os.chdir(anterior)
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+def casos_analisis(modulo_app, rapido):
+    from almacen_experimentos import AlmacenExperimentos, LOTE_GRABACION
+    from buffer_circular import MUESTRAS_POR_BLOQUE
+    from estadisticas_en_linea import EstadisticasEnLinea
+
+    rng = np.random.default_rng(0)
+
+    def ventana(n):
+        rms = rng.gamma(2.0, 0.3, n)
+        return {'id': np.arange(n), 'timestamp': np.arange(n) * 100, 'rms': rms, 'max': rms * 1.4,
+                'min': -rms * 1.4, 'media': rms * 0.1, 'std': rms * 0.9, 'crest': rng.normal(1.5, 0.3, n),
+                'tiempo_local': 1.7e9 + np.arange(n) * 0.1,
+                'n_muestras': np.zeros(n, dtype=np.int16),
+                'muestras': np.zeros((n, MUESTRAS_POR_BLOQUE), dtype=np.float32)}
+
+    # Un lote como los que lee la grabación de su suscripción
+    lote = ventana(LOTE_GRABACION)
+    yield f'analisis.actualizar.lote_{LOTE_GRABACION}', cronometrar(
+        lambda estadisticas: estadisticas.actualizar(lote), 20 if rapido else 100, LOTE_GRABACION, 'paquete',
+        preparar=EstadisticasEnLinea)
+
+    # Espectro de cada ventana entrante: 1 s de paquetes de resumen y 2 s
+    # de forma de onda cruda a 1 kHz, con identificación de resonancia
+    from analisis_espectral import identificar_resonancia, psd_paquetes, psd_welch
+    paquetes = ventana(10)
+    paquetes['muestras'][:] = rng.normal(size=paquetes['muestras'].shape)
+    yield 'analisis.espectro.paquetes_1s', cronometrar(
+        lambda _: identificar_resonancia(psd_paquetes(paquetes['muestras']), 12.0, 0.02), 50 if rapido else 200)
+    crudas = rng.normal(size=2000)
+    yield 'analisis.espectro.crudo_2s_1khz', cronometrar(
+        lambda _: identificar_resonancia(psd_welch(crudas, 1000.0), 12.0, 0.02), 50 if rapido else 200)
+
+    # Detector de resonancia: un bloque crudo de 50 muestras (DFT deslizante)
+    # y un paquete de resumen, con la ventana ya llena
+    from detector_resonancia import DetectorResonancia
+    t = np.arange(1000) / 1000.0
+    senal = 2.5 + 0.01 * rng.normal(size=t.shape)
+    detector = DetectorResonancia(25.0)
+    cursor = [0]
+
+    def bloque_crudo(_):
+        inicio = cursor[0]
+        detector.agregar_muestras(inicio, 1000, senal[inicio % 1000:inicio % 1000 + 50])
+        cursor[0] += 50
+
+    for _ in range(10):
+        bloque_crudo(None)
+    yield 'analisis.detector.bloque_crudo_50', cronometrar(bloque_crudo, 200 if rapido else 1000, 50, 'muestra')
+    yield 'analisis.detector.paquete', cronometrar(
+        lambda _: detector.agregar_paquete(senal[:50], llegada=0.0), 200 if rapido else 1000, 1, 'paquete')
+
+    directorio = tempfile.mkdtemp(prefix='bench_analisis_')
+    try:
+        almacen = AlmacenExperimentos(directorio)
+        for n in ((10000,) if rapido else (10000, 100000)):
+            escritor = almacen.crear('bench')
+            escritor.agregar(ventana(n))
+            escritor.cerrar()
+            experimento = almacen.obtener(escritor.id)
+            yield f'analisis.resumen.{n}_filas', cronometrar(
+                lambda _: experimento.estadisticas().resumen(), 10 if rapido else 30)
+
+            def recorrido(_):
+                experimento.indice.pop('estadisticas', None)
+                return experimento.estadisticas().resumen()
+
+            yield f'analisis.recorrido.{n}_filas', cronometrar(recorrido, 3 if rapido else 5, n, 'fila')
+
+            yield f'analisis.espectro.experimento.{n}_filas', cronometrar(
+                lambda _: identificar_resonancia(modulo_app.espectro_experimento(experimento)),
+                3 if rapido else 5, n, 'fila')
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+def _silenciado(funcion, *args):
+    """Llama sin los mensajes de progreso de la función"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return funcion(*args)
+
+
+def ejecutar(grupos, rapido):
+    """
+    Ejecuta los grupos pedidos
+
+    Returns:
+        dict: {nombre_caso: medición}
+    """
+    modulo_app = None
+    if {'calcular', 'exportar', 'sse', 'analisis'} & set(grupos):
+        import app as modulo_app
+
+    generadores = {
+        'calcular': lambda: casos_calcular(modulo_app, rapido),
+        'solver': lambda: casos_solver(rapido),
+        'parser': lambda: casos_parser(rapido),
+        'sse': lambda: casos_sse(rapido),
+        'exportar': lambda: casos_exportar(modulo_app, rapido),
+        'analisis': lambda: casos_analisis(modulo_app, rapido)
+    }
+    casos = {}
+    for grupo in grupos:
+        for nombre, medicion in generadores[grupo]():
+            medicion['calibracion_s'] = calibrar()
+            casos[nombre] = medicion
+            print(f"  {nombre:<40}{_formato_tiempo(medicion['mediana_s']):>12}"
+                  f"{_formato_rendimiento(medicion):>22}", flush=True)
+    if modulo_app is not None:
+        modulo_app.pool_renderizado.cerrar()
+    return casos
+
+
+# ============ LÍNEA BASE ============
+
+def _por_unidad(medicion):
+    return medicion['minimo_s'] / medicion['unidades']
+
+
+def comparar(casos, linea_base, tolerancia, normalizar=True):
+    """
+    Compara el tiempo mínimo por unidad con el de la línea base
+
+    Args:
+        normalizar: Corregir el cociente por el de la calibración medida
+            junto a cada caso
+
+    Returns:
+        list: (nombre, tiempo, tiempo_base, cociente, estado) con estado
+            'regresión', 'mejora', 'igual' o 'nuevo'
+    """
+    filas = []
+    for nombre, medicion in casos.items():
+        base = linea_base.get('casos', {}).get(nombre)
+        if base is None:
+            filas.append((nombre, _por_unidad(medicion), None, None, 'nuevo'))
+            continue
+        cociente = _por_unidad(medicion) / _por_unidad(base)
+        if normalizar and medicion.get('calibracion_s') and base.get('calibracion_s'):
+            cociente /= medicion['calibracion_s'] / base['calibracion_s']
+        if cociente > 1 + tolerancia:
+            estado = 'regresión'
+        elif cociente < 1 / (1 + tolerancia):
+            estado = 'mejora'
+        else:
+            estado = 'igual'
+        filas.append((nombre, _por_unidad(medicion), _por_unidad(base), cociente, estado))
+    return filas
+
+
+def _formato_tiempo(segundos):
+    if segundos < 1e-3:
+        return f'{segundos * 1e6:.1f} µs'
+    if segundos < 1:
+        return f'{segundos * 1e3:.2f} ms'
+    return f'{segundos:.2f} s'
+
+
+def _formato_rendimiento(medicion):
+    if medicion['unidades'] == 1 or not medicion['por_segundo']:
+        return ''
+    return f"{medicion['por_segundo']:,.0f} {medicion['unidad']}s/s"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--solo', default=','.join(GRUPOS),
+                        help=f"Grupos separados por comas ({', '.join(GRUPOS)})")
+    parser.add_argument('--rapido', action='store_true', help='Tamaños y repeticiones reducidos')
+    parser.add_argument('--salida', help='Archivo JSON con los resultados')
+    parser.add_argument('--comparar', default=LINEA_BASE, help='Línea base con la que comparar')
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA,
+                        help='Aumento relativo de la mediana que cuenta como regresión')
+    parser.add_argument('--sin-calibrar', action='store_true',
+                        help='Comparar tiempos crudos, sin corregir por la velocidad de la máquina')
+    parser.add_argument('--guardar-base', action='store_true', help='Guardar los resultados como línea base')
+    args = parser.parse_args()
+
+    grupos = [g.strip() for g in args.solo.split(',') if g.strip()]
+    desconocidos = set(grupos) - set(GRUPOS)
+    if desconocidos:
+        parser.error(f"Grupos desconocidos: {', '.join(sorted(desconocidos))}")
+
+    print(f"Suite de rendimiento ({'rápida' if args.rapido else 'completa'}): {', '.join(grupos)}")
+    casos = ejecutar(grupos, args.rapido)
+    resultado = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'maquina': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'sistema': platform.platform(),
+            'procesador': platform.processor() or platform.machine(),
+            'cpus': os.cpu_count()
+        },
+        'rapido': args.rapido,
+        'casos': casos
+    }
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+        print(f"\n✓ Resultados en {args.salida}")
+
+    regresiones = 0
+    if args.comparar and os.path.exists(args.comparar) and not args.guardar_base:
+        with open(args.comparar, encoding='utf-8') as f:
+            linea_base = json.load(f)
+        print(f"\nComparación con {os.path.relpath(args.comparar)} ({linea_base.get('fecha', '?')}, "
+              f"tolerancia {args.tolerancia:.0%})")
+        print(f"  {'caso':<42}{'mín/unidad':>12}{'base':>12}")
+        filas = comparar(casos, linea_base, args.tolerancia, normalizar=not args.sin_calibrar)
+        for nombre, tiempo, base, cociente, estado in filas:
+            detalle = '' if base is None else f"{_formato_tiempo(base):>12}{cociente:>8.2f}×"
+            marca = '✗' if estado == 'regresión' else '✓'
+            print(f"  {marca} {nombre:<40}{_formato_tiempo(tiempo):>12}{detalle:<20}  {estado}")
+            regresiones += estado == 'regresión'
+        print(f"\n{regresiones} regresiones" if regresiones else "\nSin regresiones")
+
+    if args.guardar_base:
+        with open(LINEA_BASE, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+        print(f"\n✓ Línea base guardada en {os.path.relpath(LINEA_BASE)}")
+
+    sys.exit(1 if regresiones else 0)
+
+
+if __name__ == '__main__':
+    main()
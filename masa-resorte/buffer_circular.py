@@ -0,0 +1,337 @@
+"""
+================================================================================
+BUFFER CIRCULAR COLUMNAR PARA DATOS DEL SENSOR
+Proyecto: Análisis de Resonancia en Sistema Masa-Resorte
+================================================================================
+
+Reemplaza la cola de diccionarios por arreglos NumPy preasignados: uno por
+campo del paquete y una matriz para las muestras de cada bloque. La memoria
+es fija y las lecturas por ventana son rebanadas, no listas reconstruidas.
+
+Cada fila se escribe dos veces (en i y en i + capacidad): así cualquier
+ventana de hasta `capacidad` paquetes es una vista contigua, sin copias,
+aunque cruce el final del anillo.
+
+Concurrencia: un único productor (el hilo de captura) escribe la fila y
+después publica el contador `escritos`; los lectores solo leen filas
+publicadas y no toman ningún lock. Una vista sigue siendo válida mientras
+el productor no dé una vuelta completa al anillo sobre ella.
+
+Todas las columnas y el contador viven en un único bloque de memoria, así
+que el mismo anillo puede colocarse en multiprocessing.shared_memory
+(BufferCompartido): el daemon de adquisición escribe y cada proceso web
+se adjunta en solo lectura.
+
+Funcionalidades:
+- Columnas tipadas por campo (id, rms, max, ...) y bloque de muestras
+- Ventanas por índice absoluto como vistas sin copia
+- Contador explícito de paquetes sobrescritos
+- Espera eficiente de nuevos paquetes (threading.Condition)
+- Versión en memoria compartida entre procesos
+================================================================================
+"""
+
+import threading
+import time
+from datetime import datetime
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+
+# Campos numéricos del paquete del sketch y su tipo
+CAMPOS = {
+    'id': np.int64,
+    'timestamp': np.int64,        # ms del Arduino
+    'rms': np.float64,
+    'max': np.float64,
+    'min': np.float64,
+    'media': np.float64,
+    'std': np.float64,
+    'crest': np.float64,
+    'tiempo_local': np.float64    # epoch (s) de recepción en el PC
+}
+
+CAPACIDAD_POR_DEFECTO = 3000     # 5 minutos a 10 paquetes/s
+MUESTRAS_POR_BLOQUE = 50
+
+# Encabezado del bloque de memoria (int64): firma, capacidad, muestras por
+# bloque y contador de paquetes escritos
+ENCABEZADO = ['firma', 'capacidad', 'muestras_por_bloque', 'escritos']
+FIRMA = 0x4D415341524553    # 'MASARES'
+POSICION_ESCRITOS = ENCABEZADO.index('escritos')
+
+# Pausa entre consultas del contador cuando el productor está en otro proceso
+INTERVALO_SONDEO = 0.005
+
+
+def disposicion_memoria(capacidad, muestras_por_bloque):
+    """
+    Ubicación de cada arreglo dentro del bloque de memoria del anillo
+
+    Returns:
+        tuple: (lista de (nombre, dtype, forma, desplazamiento), bytes totales)
+    """
+    arreglos = [('encabezado', np.int64, (len(ENCABEZADO),))]
+    arreglos += [(campo, tipo, (2 * capacidad,)) for campo, tipo in CAMPOS.items()]
+    arreglos += [('n_muestras', np.int16, (2 * capacidad,)),
+                 ('muestras', np.float32, (2 * capacidad, muestras_por_bloque))]
+
+    disposicion = []
+    desplazamiento = 0
+    for nombre, tipo, forma in arreglos:
+        disposicion.append((nombre, tipo, forma, desplazamiento))
+        tamano = np.dtype(tipo).itemsize * int(np.prod(forma))
+        desplazamiento += -(-tamano // 8) * 8    # alinear a 8 bytes
+    return disposicion, desplazamiento
+
+
+class BufferCircular:
+    """
+    Anillo preasignado de paquetes en columnas NumPy
+    """
+
+    def __init__(self, capacidad=CAPACIDAD_POR_DEFECTO, muestras_por_bloque=MUESTRAS_POR_BLOQUE,
+                 memoria=None, inicializar=True):
+        """
+        Inicializa el buffer
+
+        Args:
+            capacidad: Número de paquetes retenidos
+            muestras_por_bloque: Muestras guardadas por paquete (el resto se recorta)
+            memoria: Bloque de bytes donde ubicar el anillo (None: uno propio)
+            inicializar: False para adjuntarse a un anillo ya inicializado
+        """
+        self.capacidad = capacidad
+        self.muestras_por_bloque = muestras_por_bloque
+
+        disposicion, tamano = disposicion_memoria(capacidad, muestras_por_bloque)
+        if memoria is None:
+            memoria = bytearray(tamano)
+        arreglos = {nombre: np.ndarray(forma, dtype=tipo, buffer=memoria, offset=desplazamiento)
+                    for nombre, tipo, forma, desplazamiento in disposicion}
+
+        self._encabezado = arreglos.pop('encabezado')
+        self.n_muestras = arreglos.pop('n_muestras')
+        self.muestras = arreglos.pop('muestras')
+        self.columnas = arreglos
+        self.condicion = threading.Condition()
+
+        if inicializar:
+            self.muestras[:] = np.nan
+            self._encabezado[:] = [FIRMA, capacidad, muestras_por_bloque, 0]
+
+    @property
+    def escritos(self):
+        """Índice absoluto del próximo paquete; solo lo modifica el productor"""
+        return int(self._encabezado[POSICION_ESCRITOS])
+
+    @escritos.setter
+    def escritos(self, valor):
+        self._encabezado[POSICION_ESCRITOS] = valor
+
+    @property
+    def primero_disponible(self):
+        """Índice absoluto del paquete más antiguo aún retenido"""
+        return max(0, self.escritos - self.capacidad)
+
+    @property
+    def sobrescritos(self):
+        """Paquetes expulsados del anillo por falta de capacidad"""
+        return self.primero_disponible
+
+    def escribir(self, paquete):
+        """
+        Agrega un paquete (solo desde el hilo productor)
+
+        Args:
+            paquete: dict con los campos de CAMPOS y 'samples'; los campos
+                ausentes quedan en 0 y 'tiempo_local' en el instante actual
+        """
+        fila = self.escritos % self.capacidad
+        espejo = fila + self.capacidad
+
+        for campo, columna in self.columnas.items():
+            valor = paquete.get(campo, 0)
+            columna[fila] = valor
+            columna[espejo] = valor
+        if 'tiempo_local' not in paquete:
+            ahora = datetime.now().timestamp()
+            self.columnas['tiempo_local'][fila] = ahora
+            self.columnas['tiempo_local'][espejo] = ahora
+
+        muestras = paquete.get('samples') or []
+        n = min(len(muestras), self.muestras_por_bloque)
+        self.muestras[fila, :n] = muestras[:n]
+        self.muestras[fila, n:] = np.nan
+        self.muestras[espejo] = self.muestras[fila]
+        self.n_muestras[fila] = self.n_muestras[espejo] = n
+
+        # Publicar la fila después de escribirla
+        self.escritos += 1
+        with self.condicion:
+            self.condicion.notify_all()
+
+    def esperar(self, indice, timeout=None):
+        """
+        Espera hasta que exista el paquete de índice absoluto `indice`
+
+        Returns:
+            bool: True si el paquete ya fue escrito
+        """
+        if self.escritos > indice:
+            return True
+        with self.condicion:
+            return self.condicion.wait_for(lambda: self.escritos > indice, timeout)
+
+    def ventana(self, inicio=None, fin=None):
+        """
+        Vista sin copia de los paquetes [inicio, fin) por índice absoluto
+
+        Los límites se recortan a lo retenido: si `inicio` ya fue
+        sobrescrito, la ventana empieza en el paquete más antiguo.
+
+        Returns:
+            dict: Vistas por campo, 'muestras', 'n_muestras', e 'inicio' y
+                'fin' efectivos
+        """
+        escritos = self.escritos
+        fin = escritos if fin is None else min(fin, escritos)
+        inicio = self.primero_disponible if inicio is None else max(inicio, escritos - self.capacidad, 0)
+        inicio = min(inicio, fin)
+
+        desde = inicio % self.capacidad
+        hasta = desde + (fin - inicio)
+        ventana = {campo: columna[desde:hasta] for campo, columna in self.columnas.items()}
+        ventana['muestras'] = self.muestras[desde:hasta]
+        ventana['n_muestras'] = self.n_muestras[desde:hasta]
+        ventana['inicio'] = inicio
+        ventana['fin'] = fin
+        return ventana
+
+    def ultimos(self, n):
+        """
+        Vista de los n paquetes más recientes
+        """
+        return self.ventana(self.escritos - n)
+
+    def __len__(self):
+        return self.escritos - self.primero_disponible
+
+    @staticmethod
+    def a_paquetes(ventana):
+        """
+        Convierte una ventana a la lista de diccionarios del paquete JSON
+
+        Returns:
+            list: Un dict por paquete (con 'timestamp_local' como texto)
+        """
+        columnas = {campo: ventana[campo].tolist() for campo in CAMPOS}
+        muestras = ventana['muestras']
+        paquetes = []
+        for i, n in enumerate(ventana['n_muestras'].tolist()):
+            paquete = {campo: columnas[campo][i] for campo in CAMPOS if campo != 'tiempo_local'}
+            paquete['samples'] = np.round(muestras[i, :n].astype(float), 4).tolist()
+            paquete['timestamp_local'] = datetime.fromtimestamp(
+                columnas['tiempo_local'][i]).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+            paquetes.append(paquete)
+        return paquetes
+
+    def obtener_estadisticas(self):
+        """
+        Obtiene estadísticas del buffer
+
+        Returns:
+            dict: Capacidad, paquetes escritos, retenidos y sobrescritos
+        """
+        return {
+            'capacidad': self.capacidad,
+            'escritos': self.escritos,
+            'retenidos': len(self),
+            'sobrescritos': self.sobrescritos,
+            'bytes': int(sum(c.nbytes for c in self.columnas.values())
+                         + self.muestras.nbytes + self.n_muestras.nbytes)
+        }
+
+
+class BufferCompartido(BufferCircular):
+    """
+    BufferCircular ubicado en multiprocessing.shared_memory
+
+    El proceso que lo crea es el único productor. Los demás se adjuntan por
+    nombre en solo lectura; como la Condition no cruza procesos, esperan
+    nuevos paquetes consultando el contador cada INTERVALO_SONDEO segundos.
+    """
+
+    def __init__(self, memoria, propietario, **kwargs):
+        self.memoria = memoria
+        self.nombre = memoria.name
+        self.propietario = propietario
+        super().__init__(memoria=memoria.buf, inicializar=propietario, **kwargs)
+
+        if not propietario:
+            for arreglo in [self._encabezado, self.n_muestras, self.muestras, *self.columnas.values()]:
+                arreglo.flags.writeable = False
+
+    @classmethod
+    def crear(cls, capacidad=CAPACIDAD_POR_DEFECTO, muestras_por_bloque=MUESTRAS_POR_BLOQUE, nombre=None):
+        """
+        Crea el bloque compartido (en el proceso productor)
+
+        Args:
+            capacidad: Número de paquetes retenidos
+            muestras_por_bloque: Muestras guardadas por paquete
+            nombre: Nombre del bloque (None: uno único generado por el sistema)
+        """
+        _, tamano = disposicion_memoria(capacidad, muestras_por_bloque)
+        memoria = shared_memory.SharedMemory(name=nombre, create=True, size=tamano)
+        return cls(memoria, propietario=True, capacidad=capacidad, muestras_por_bloque=muestras_por_bloque)
+
+    @classmethod
+    def adjuntar(cls, nombre):
+        """
+        Se adjunta en solo lectura a un bloque creado por otro proceso
+
+        Raises:
+            FileNotFoundError: Si no existe un bloque con ese nombre
+            ValueError: Si el bloque no contiene un anillo
+        """
+        try:
+            memoria = shared_memory.SharedMemory(name=nombre, track=False)
+        except TypeError:
+            # Python < 3.13: evitar que el resource_tracker de este proceso
+            # elimine el bloque del productor al terminar
+            memoria = shared_memory.SharedMemory(name=nombre)
+            resource_tracker.unregister(memoria._name, 'shared_memory')
+
+        encabezado = np.ndarray((len(ENCABEZADO),), dtype=np.int64, buffer=memoria.buf)
+        firma, capacidad, muestras_por_bloque = (int(v) for v in encabezado[:3])
+        del encabezado
+        if firma != FIRMA:
+            memoria.close()
+            raise ValueError(f'El bloque {nombre} no contiene un buffer circular')
+        return cls(memoria, propietario=False, capacidad=capacidad, muestras_por_bloque=muestras_por_bloque)
+
+    def esperar(self, indice, timeout=None):
+        if self.propietario or self.escritos > indice:
+            return super().esperar(indice, timeout)
+        limite = None if timeout is None else time.monotonic() + timeout
+        while self.escritos <= indice:
+            if limite is not None and time.monotonic() >= limite:
+                return False
+            time.sleep(INTERVALO_SONDEO)
+        return True
+
+    def cerrar(self):
+        """
+        Libera el bloque en este proceso (y lo elimina si es el propietario)
+        """
+        self._encabezado = self.n_muestras = self.muestras = None
+        self.columnas = {}
+        try:
+            self.memoria.close()
+        except BufferError:
+            # Aún hay ventanas en uso; el mapeo se libera al terminar el proceso
+            pass
+        if self.propietario:
+            self.memoria.unlink()
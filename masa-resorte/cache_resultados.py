@@ -0,0 +1,112 @@
+"""
+================================================================================
+CACHÉ LRU DE RESULTADOS
+Proyecto: Análisis de Resonancia en Sistema Masa-Resorte
+================================================================================
+
+Caché en memoria, de tamaño acotado y thread-safe, para reutilizar
+resultados de cálculos que se repiten con los mismos parámetros físicos.
+
+Funcionalidades:
+- Expulsión del elemento usado menos recientemente (LRU)
+- Contadores de aciertos, fallos y expulsiones
+- Normalización de claves a partir de parámetros float
+================================================================================
+"""
+
+import threading
+from collections import OrderedDict
+
+
+def clave_parametros(*valores, digitos=12):
+    """
+    Normaliza parámetros numéricos para usarlos como clave de caché
+
+    Redondea a `digitos` cifras significativas para que valores como
+    1.0, "1" y 1.0000000000001 produzcan la misma clave.
+
+    Returns:
+        tuple: Tupla de floats normalizados
+    """
+    return tuple(float(f'{float(v):.{digitos}g}') for v in valores)
+
+
+class CacheLRU:
+    """
+    Caché LRU acotada con estadísticas de uso
+    """
+
+    def __init__(self, tamano_maximo=128):
+        """
+        Inicializa la caché
+
+        Args:
+            tamano_maximo: Número máximo de entradas antes de expulsar
+        """
+        self.tamano_maximo = tamano_maximo
+        self._datos = OrderedDict()
+        self.lock = threading.Lock()
+
+        # Estadísticas
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+
+    def obtener(self, clave):
+        """
+        Obtiene un valor de la caché
+
+        Returns:
+            Valor almacenado o None si la clave no existe
+        """
+        with self.lock:
+            try:
+                valor = self._datos[clave]
+            except KeyError:
+                self.fallos += 1
+                return None
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+
+    def guardar(self, clave, valor):
+        """
+        Guarda un valor, expulsando el menos reciente si la caché está llena
+        """
+        with self.lock:
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.tamano_maximo:
+                self._datos.popitem(last=False)
+                self.expulsiones += 1
+
+    def limpiar(self):
+        """
+        Vacía la caché sin reiniciar las estadísticas
+        """
+        with self.lock:
+            self._datos.clear()
+
+    def __len__(self):
+        return len(self._datos)
+
+    def __contains__(self, clave):
+        return clave in self._datos
+
+    def obtener_estadisticas(self):
+        """
+        Obtiene estadísticas de uso de la caché
+
+        Returns:
+            dict: Tamaño, aciertos, fallos, expulsiones y tasa de aciertos
+        """
+        with self.lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'tamano': len(self._datos),
+                'tamano_maximo': self.tamano_maximo,
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'expulsiones': self.expulsiones,
+                'tasa_aciertos': (self.aciertos / max(1, consultas)) * 100
+            }
@@ -0,0 +1,81 @@
+"""
+================================================================================
+DECIMACIÓN DE SERIES PARA VISUALIZACIÓN
+Proyecto: Análisis de Resonancia en Sistema Masa-Resorte
+================================================================================
+
+Reduce series temporales a un número objetivo de puntos conservando su
+forma visual (picos, envolventes), para enviarlas como JSON y graficarlas
+en el navegador en lugar de renderizar imágenes PNG en el servidor.
+
+Funcionalidades:
+- Largest-Triangle-Three-Buckets (LTTB)
+- Serialización compacta de series a listas JSON
+================================================================================
+"""
+
+import numpy as np
+
+
+def lttb(x, y, n_objetivo):
+    """
+    Decima una serie con el algoritmo Largest-Triangle-Three-Buckets
+
+    Conserva el primer y el último punto y, de cada bucket intermedio, el
+    punto que forma el triángulo de mayor área con el punto elegido en el
+    bucket anterior y el promedio del bucket siguiente.
+
+    Args:
+        x: Abscisas (monótonas crecientes)
+        y: Ordenadas
+        n_objetivo: Número de puntos de salida (>= 3)
+
+    Returns:
+        tuple: (x_decimado, y_decimado)
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+
+    if n_objetivo >= n or n_objetivo < 3:
+        return x, y
+
+    # Límites de los n_objetivo - 2 buckets interiores
+    limites = np.floor(np.linspace(1, n - 1, n_objetivo - 1)).astype(int)
+
+    # Promedio de cada bucket (para el "tercer vértice" del triángulo)
+    sumas_x = np.add.reduceat(x[1:n - 1], limites[:-1] - 1)
+    sumas_y = np.add.reduceat(y[1:n - 1], limites[:-1] - 1)
+    conteos = np.diff(limites)
+    promedios_x = np.append(sumas_x / conteos, x[-1])
+    promedios_y = np.append(sumas_y / conteos, y[-1])
+
+    indices = np.empty(n_objetivo, dtype=int)
+    indices[0] = 0
+    indices[-1] = n - 1
+    ax, ay = x[0], y[0]
+
+    for i in range(n_objetivo - 2):
+        inicio, fin = limites[i], limites[i + 1]
+        cx, cy = promedios_x[i + 1], promedios_y[i + 1]
+        bx, by = x[inicio:fin], y[inicio:fin]
+        areas = np.abs((ax - cx) * (by - ay) - (ax - bx) * (cy - ay))
+        elegido = inicio + int(np.argmax(areas))
+        indices[i + 1] = elegido
+        ax, ay = x[elegido], y[elegido]
+
+    return x[indices], y[indices]
+
+
+def serie_json(x, y, n_objetivo, decimales=6):
+    """
+    Decima una serie y la convierte a listas para la respuesta JSON
+
+    Returns:
+        dict: {'x': [...], 'y': [...]} con a lo sumo n_objetivo puntos
+    """
+    x_dec, y_dec = lttb(x, y, n_objetivo)
+    return {
+        'x': np.round(x_dec, decimales).tolist(),
+        'y': [float(f'{v:.{decimales}g}') for v in y_dec]
+    }
@@ -0,0 +1,417 @@
+"""
+================================================================================
+DETECTOR DE RESONANCIA EN LÍNEA
+Proyecto: Análisis de Resonancia en Sistema Masa-Resorte
+================================================================================
+
+Vigila la captura en vivo y avisa en cuanto el sistema entra en resonancia,
+sin esperar a detener el experimento y analizarlo.
+
+Se siguen unos pocos bins de frecuencia alrededor de la f_n esperada
+(f_n · (1 ± ancho_relativo)):
+
+- Forma de onda cruda (modo crudo): DFT deslizante sobre una ventana de N
+  muestras. Cada muestra nueva suma su término y resta el de la muestra
+  que sale de la ventana, así que el costo por muestra es O(bins),
+  independiente de N. Los bloques se procesan vectorizados (suma
+  acumulada) y se obtiene el valor en cada muestra, de modo que el cruce
+  del umbral se ubica en la muestra exacta. La continua de la ventana se
+  descuenta en forma cerrada y la suma se recalcula de cero cada
+  RECALCULO ventanas para que el error de redondeo no se acumule.
+- Paquetes de resumen (50 muestras a 100 Hz): DFT directa de los bins
+  sobre las muestras de cada paquete (el equivalente de Goertzel para
+  pocos bins).
+
+Amplificación = amplitud en la banda / línea base. La línea base es una
+media exponencial lenta de la amplitud en la banda mientras la banda no
+domina la señal (no aprende del pico resonante que crece) y nunca baja de
+AMPLITUD_MINIMA. Hay resonancia cuando la amplificación supera el umbral
+y la banda concentra al menos FRACCION_BANDA de la potencia AC (el RMS de
+la ventana); termina, con histéresis, cuando cae por debajo de
+HISTERESIS veces esos valores. También se reporta la tendencia del RMS
+(V/s) del último segundo.
+
+Cada cambio de estado genera un evento con número de secuencia, que los
+streams envían a los clientes. La latencia de cada detección se mide
+desde la adquisición estimada de la muestra que cruzó el umbral hasta la
+emisión del evento; la ventana añade además un retardo propio de ~N/2
+muestras al seguir una envolvente que crece.
+
+Funcionalidades:
+- DFT deslizante O(1) por muestra sobre el flujo crudo
+- DFT por paquete sobre las muestras de los resúmenes
+- Línea base adaptativa, umbral con histéresis y tendencia del RMS
+- Eventos de inicio y fin de resonancia con su latencia de detección
+================================================================================
+"""
+
+import itertools
+import math
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from analisis_espectral import FRECUENCIA_MUESTRAS_PAQUETE
+
+
+# Banda vigilada: N_BINS bins repartidos en f_n · (1 ± ANCHO_RELATIVO)
+N_BINS = 5
+ANCHO_RELATIVO = 0.10
+MAX_BINS = 32
+
+# Ventana de la DFT deslizante: al menos CICLOS_MINIMOS periodos de f_n
+VENTANA_DETECCION = 0.2   # s
+CICLOS_MINIMOS = 4
+
+# Criterios de resonancia
+UMBRAL_AMPLIFICACION = 3.0
+FRACCION_BANDA = 0.5       # potencia en la banda / potencia AC de la ventana
+HISTERESIS = 0.7           # fin de la resonancia: por debajo de 0.7 veces los criterios
+
+# Línea base: media exponencial de CONSTANTE_BASE segundos, con piso de
+# ~4 cuentas del ADC para que el ruido de cuantización no dispare alarmas
+CONSTANTE_BASE = 10.0      # s
+AMPLITUD_MINIMA = 0.02     # V
+
+SEGUNDOS_TENDENCIA = 1.0   # ventana de la tendencia del RMS
+RECALCULO = 64             # ventanas entre recálculos exactos de la DFT deslizante
+MIN_MUESTRAS_PAQUETE = 8
+MAX_EVENTOS = 100
+
+# Secuencia de eventos del proceso: sigue creciendo al reconfigurar un
+# detector, así un cliente no confunde eventos nuevos con ya recibidos
+_secuencias = itertools.count(1)
+
+
+class DetectorResonancia:
+    """
+    Detector de resonancia alrededor de una frecuencia natural esperada
+    """
+
+    def __init__(self, frecuencia, umbral=UMBRAL_AMPLIFICACION, ancho_relativo=ANCHO_RELATIVO,
+                 n_bins=N_BINS, ventana=VENTANA_DETECCION, id_dispositivo=None):
+        """
+        Args:
+            frecuencia: f_n esperada (Hz)
+            umbral: Amplificación sobre la línea base que indica resonancia
+            ancho_relativo: Semiancho de la banda vigilada, relativo a f_n
+            n_bins: Bins de la banda
+            ventana: Duración mínima de la ventana deslizante (s)
+            id_dispositivo: Sensor al que pertenecen los eventos
+
+        Raises:
+            ValueError: Parámetros fuera de rango
+        """
+        frecuencia = float(frecuencia)
+        umbral = float(umbral)
+        ancho_relativo = float(ancho_relativo)
+        n_bins = int(n_bins)
+        ventana = float(ventana)
+        if not frecuencia > 0:
+            raise ValueError('La frecuencia esperada debe ser positiva')
+        if not umbral > 1:
+            raise ValueError('El umbral de amplificación debe ser mayor que 1')
+        if not 0 <= ancho_relativo < 0.5:
+            raise ValueError('ancho_relativo debe estar entre 0 y 0.5')
+        if not 1 <= n_bins <= MAX_BINS:
+            raise ValueError(f'n_bins debe estar entre 1 y {MAX_BINS}')
+        if not ventana > 0:
+            raise ValueError('La ventana debe ser positiva')
+
+        self.frecuencia = frecuencia
+        self.umbral = umbral
+        self.frecuencias = frecuencia * (1 + np.linspace(-ancho_relativo, ancho_relativo, n_bins))
+        self.ventana = max(ventana, CICLOS_MINIMOS / frecuencia)
+        self.id_dispositivo = id_dispositivo
+        self.lock = threading.Lock()
+
+        # Estado de la detección
+        self.linea_base = AMPLITUD_MINIMA
+        self.en_resonancia = False
+        self.actual = None
+        self._tendencia = deque()
+        self._eventos = deque(maxlen=MAX_EVENTOS)
+        self.latencias = deque(maxlen=MAX_EVENTOS)
+
+        # DFT deslizante (se dimensiona con la frecuencia del primer bloque)
+        self.frecuencia_muestreo = None
+        self.n = None
+        self._siguiente = None
+
+        # DFT de los paquetes de resumen: matriz por número de muestras
+        self._matrices_paquete = {}
+        self._llegada_paquete = None
+
+        # Métricas
+        self.muestras_procesadas = 0
+        self.paquetes_procesados = 0
+        self.segundos_proceso = 0.0
+
+    # ============ FORMA DE ONDA CRUDA ============
+
+    def _iniciar_deslizante(self, frecuencia_muestreo, indice):
+        """Dimensiona la ventana y la vacía (la detección espera a llenarla)"""
+        self.frecuencia_muestreo = frecuencia_muestreo
+        self._siguiente = indice
+        if self.frecuencias[-1] >= frecuencia_muestreo / 2:
+            # Banda por encima de Nyquist: no hay nada que vigilar
+            self.n = None
+            return
+        n = max(2, int(round(self.ventana * frecuencia_muestreo)))
+        self.n = n
+        self._w = 2 * np.pi * self.frecuencias / frecuencia_muestreo
+        self._giro = np.exp(1j * self._w * n)
+        # Σ e^{-jωm} sobre la ventana que termina en n = e^{-jωn} · Σ_l e^{jωl}
+        self._geometrica = np.exp(1j * np.outer(self._w, np.arange(n))).sum(axis=1)
+        self._anillo = np.zeros(n)
+        self._s = np.zeros(len(self._w), dtype=complex)
+        self._suma = 0.0
+        self._suma2 = 0.0
+        self._origen = indice     # índice absoluto con fase cero
+        self._llenas = 0
+        self._desde_recalculo = 0
+
+    def agregar_muestras(self, indice, frecuencia_muestreo, muestras, llegada=None):
+        """
+        Procesa un bloque contiguo de la forma de onda cruda
+
+        Args:
+            indice: Índice absoluto de la primera muestra
+            frecuencia_muestreo: Hz
+            muestras: Voltios
+            llegada: time.time() de la recepción del bloque (None: ahora)
+        """
+        inicio = time.perf_counter()
+        llegada = time.time() if llegada is None else llegada
+        x = np.asarray(muestras, dtype=float)
+        with self.lock:
+            if frecuencia_muestreo != self.frecuencia_muestreo or indice != self._siguiente:
+                # Primer bloque, otra frecuencia o un hueco: la ventana vuelve a llenarse
+                self._iniciar_deslizante(frecuencia_muestreo, indice)
+            fin = indice + len(x)
+            if self.n is not None:
+                for desde in range(0, len(x), self.n):
+                    self._bloque_deslizante(indice + desde, x[desde:desde + self.n], fin, llegada)
+            self._siguiente = fin
+            self.muestras_procesadas += len(x)
+            self.segundos_proceso += time.perf_counter() - inicio
+
+    def _bloque_deslizante(self, indice, x, fin, llegada):
+        """Avanza la DFT deslizante muestra a muestra (hasta N muestras)"""
+        n = self.n
+        m = np.arange(len(x)) + (indice - self._origen)
+        posiciones = m % n
+        salientes = self._anillo[posiciones]     # ceros mientras la ventana se llena
+        self._anillo[posiciones] = x
+
+        fasores = np.exp(-1j * np.outer(self._w, m))
+        s = self._s[:, None] + np.cumsum(fasores * (x - salientes * self._giro[:, None]), axis=1)
+        suma = self._suma + np.cumsum(x - salientes)
+        suma2 = self._suma2 + np.cumsum(x * x - salientes * salientes)
+        self._s, self._suma, self._suma2 = s[:, -1], suma[-1], suma2[-1]
+
+        llenas = self._llenas + np.arange(1, len(x) + 1)
+        self._llenas = min(n, int(llenas[-1]))
+        self._desde_recalculo += len(x)
+        if self._desde_recalculo >= RECALCULO * n:
+            self._recalcular(int(m[-1]))
+
+        validas = np.flatnonzero(llenas >= n)
+        if len(validas) == 0:
+            return
+        v = validas[0]
+        media = suma[v:] / n
+        amplitudes = 2 * np.abs(s[:, v:] - media * fasores[:, v:] * self._geometrica[:, None]) / n
+        rms2 = np.maximum(suma2[v:] / n - media * media, 0.0)
+        indices = indice + np.arange(v, len(x))
+        # Adquisición estimada: la última muestra del bloque llegó en `llegada`
+        adquisicion = llegada - (fin - 1 - indices) / self.frecuencia_muestreo
+        self._evaluar('crudo', amplitudes, rms2, indices, indices / self.frecuencia_muestreo,
+                      adquisicion, len(indices) / self.frecuencia_muestreo)
+
+    def _recalcular(self, m_ultimo):
+        """
+        DFT exacta de la ventana actual, con el origen de fase desplazado
+        un múltiplo de N (las posiciones del anillo no cambian)
+        """
+        n = self.n
+        desplazamiento = (m_ultimo // n) * n
+        self._origen += desplazamiento
+        m = np.arange(m_ultimo - n + 1, m_ultimo + 1) - desplazamiento
+        x = self._anillo[m % n]
+        self._s = np.exp(-1j * np.outer(self._w, m)) @ x
+        self._suma = float(x.sum())
+        self._suma2 = float(x @ x)
+        self._desde_recalculo = 0
+
+    # ============ PAQUETES DE RESUMEN ============
+
+    def _matriz_paquete(self, n, frecuencia_muestreo):
+        clave = (n, frecuencia_muestreo)
+        if clave not in self._matrices_paquete:
+            if self.frecuencias[-1] >= frecuencia_muestreo / 2:
+                self._matrices_paquete[clave] = None
+            else:
+                t = np.arange(n) / frecuencia_muestreo
+                self._matrices_paquete[clave] = np.exp(-2j * np.pi * np.outer(self.frecuencias, t))
+        return self._matrices_paquete[clave]
+
+    def agregar_paquete(self, muestras, llegada=None, indice=None, t_muestra=None,
+                        frecuencia_muestreo=FRECUENCIA_MUESTRAS_PAQUETE):
+        """
+        Procesa las muestras de un paquete de resumen
+
+        Args:
+            muestras: Muestras del paquete (voltios)
+            llegada: time.time() de la recepción (None: ahora)
+            indice: id del paquete
+            t_muestra: Instante del paquete en el reloj del sensor (s)
+            frecuencia_muestreo: Frecuencia de las muestras del paquete
+        """
+        if muestras is None:
+            return
+        llegada = time.time() if llegada is None else llegada
+        x = np.asarray(muestras, dtype=float)
+        x = x[np.isfinite(x)]
+        if len(x) < MIN_MUESTRAS_PAQUETE:
+            return
+        with self.lock:
+            matriz = self._matriz_paquete(len(x), frecuencia_muestreo)
+            previa, self._llegada_paquete = self._llegada_paquete, llegada
+            self.paquetes_procesados += 1
+            if matriz is None:
+                return
+            x = x - x.mean()
+            amplitudes = 2 * np.abs(matriz @ x)[:, None] / len(x)
+            duracion = min(max(llegada - previa, 0.0), 1.0) if previa is not None else 0.0
+            self._evaluar('paquetes', amplitudes, np.array([x @ x / len(x)]),
+                          np.array([self.paquetes_procesados if indice is None else indice]),
+                          np.array([llegada if t_muestra is None else t_muestra]),
+                          np.array([llegada]), duracion)
+
+    # ============ DETECCIÓN ============
+
+    def _evaluar(self, fuente, amplitudes, rms2, indices, t_muestra, adquisicion, duracion):
+        """
+        Aplica los criterios a cada muestra (o paquete) evaluada
+
+        Args:
+            amplitudes: (bins, n) amplitud de cada bin
+            rms2: (n,) potencia AC de la ventana
+            duracion: Segundos que representan las n evaluaciones (línea base)
+        """
+        columnas = np.arange(amplitudes.shape[1])
+        bins = np.argmax(amplitudes, axis=0)
+        banda = amplitudes[bins, columnas]
+        fraccion = np.minimum(1.0, banda * banda / 2 / np.maximum(rms2, 1e-12))
+
+        # Tendencia del RMS en el último segundo (cada fuente tiene su reloj)
+        if self.actual is not None and self.actual['fuente'] != fuente:
+            self._tendencia.clear()
+        rms = float(np.sqrt(rms2[-1]))
+        self._tendencia.append((float(t_muestra[-1]), rms))
+        while self._tendencia[-1][0] - self._tendencia[0][0] > SEGUNDOS_TENDENCIA:
+            self._tendencia.popleft()
+        t0, rms0 = self._tendencia[0]
+        dt = self._tendencia[-1][0] - t0
+        tendencia = (rms - rms0) / dt if dt > 0 else 0.0
+
+        base = max(self.linea_base, AMPLITUD_MINIMA)
+        amplificacion = banda / base
+        supera = (amplificacion >= self.umbral) & (fraccion >= FRACCION_BANDA)
+        sostiene = (amplificacion >= self.umbral * HISTERESIS) & (fraccion >= FRACCION_BANDA * HISTERESIS)
+
+        i = 0
+        while i < len(banda):
+            cambios = np.flatnonzero(~sostiene[i:] if self.en_resonancia else supera[i:])
+            if len(cambios) == 0:
+                break
+            i += int(cambios[0])
+            self.en_resonancia = not self.en_resonancia
+            self._emitir('inicio' if self.en_resonancia else 'fin', fuente, {
+                'frecuencia': float(self.frecuencias[bins[i]]),
+                'amplitud': float(banda[i]),
+                'linea_base': base,
+                'amplificacion': float(amplificacion[i]),
+                'fraccion_banda': float(fraccion[i]),
+                'rms': float(np.sqrt(rms2[i])),
+                'tendencia_rms': tendencia,
+                'indice': int(indices[i]),
+                't_muestra': float(t_muestra[i])
+            }, float(adquisicion[i]))
+            i += 1
+
+        # La línea base aprende del fondo, no del pico que crece en la banda
+        if not self.en_resonancia and duracion > 0:
+            fondo = banda[fraccion < FRACCION_BANDA]
+            if len(fondo):
+                alfa = 1 - math.exp(-duracion / CONSTANTE_BASE)
+                self.linea_base = max(AMPLITUD_MINIMA, self.linea_base + alfa * (float(fondo.mean()) - self.linea_base))
+
+        self.actual = {
+            'fuente': fuente,
+            'frecuencia': float(self.frecuencias[bins[-1]]),
+            'amplitud': float(banda[-1]),
+            'amplificacion': float(amplificacion[-1]),
+            'fraccion_banda': float(fraccion[-1]),
+            'rms': rms,
+            'tendencia_rms': tendencia,
+            't_muestra': float(t_muestra[-1])
+        }
+
+    def _emitir(self, tipo, fuente, valores, adquisicion):
+        ahora = time.time()
+        latencia = (ahora - adquisicion) * 1000
+        if tipo == 'inicio':
+            self.latencias.append(latencia)
+        self._eventos.append({
+            'secuencia': next(_secuencias),
+            'tipo': tipo,
+            'dispositivo': self.id_dispositivo,
+            'fuente': fuente,
+            'frecuencia_esperada': self.frecuencia,
+            **valores,
+            'tiempo': ahora,
+            'latencia_ms': latencia
+        })
+
+    # ============ CONSULTAS ============
+
+    def eventos(self, desde=0):
+        """
+        Eventos retenidos con secuencia mayor que `desde`
+
+        Returns:
+            list: dicts con 'secuencia', 'tipo' ('inicio' o 'fin'),
+                'amplificacion', 'frecuencia', 'latencia_ms', ...
+        """
+        with self.lock:
+            return [evento for evento in self._eventos if evento['secuencia'] > desde]
+
+    def obtener_estadisticas(self):
+        with self.lock:
+            latencias = np.array(self.latencias)
+            return {
+                'frecuencia_esperada': self.frecuencia,
+                'frecuencias_bins': self.frecuencias.tolist(),
+                'umbral': self.umbral,
+                'ventana_s': self.ventana,
+                'retardo_ventana_ms': self.ventana / 2 * 1000,
+                'frecuencia_muestreo': self.frecuencia_muestreo,
+                'en_resonancia': self.en_resonancia,
+                'linea_base': self.linea_base,
+                'actual': self.actual,
+                'eventos': len(self._eventos),
+                'ultimo_evento': self._eventos[-1] if self._eventos else None,
+                'latencia_ms': {
+                    'n': len(latencias),
+                    'mediana': float(np.median(latencias)) if len(latencias) else None,
+                    'max': float(latencias.max()) if len(latencias) else None
+                },
+                'muestras_procesadas': self.muestras_procesadas,
+                'paquetes_procesados': self.paquetes_procesados,
+                'us_por_muestra': (self.segundos_proceso * 1e6 / self.muestras_procesadas
+                                   if self.muestras_procesadas else None)
+            }
@@ -0,0 +1,174 @@
+"""
+================================================================================
+DISTRIBUIDOR DE DATOS DEL SENSOR (PUBLICACIÓN / SUSCRIPCIÓN)
+Proyecto: Análisis de Resonancia en Sistema Masa-Resorte
+================================================================================
+
+Varios consumidores (pestañas con /arduino/stream, pantallas de la sala de
+control, la captura de experimentos) leen el mismo sensor. Sacar paquetes
+de una cola compartida los reparte entre ellos; en su lugar, cada
+suscripción tiene su propio cursor sobre el BufferCircular y todos ven
+todos los paquetes.
+
+Un consumidor lento no frena a nadie: el productor nunca espera, y si el
+anillo sobrescribe paquetes que una suscripción no alcanzó a leer, esa
+suscripción salta al más antiguo retenido y cuenta los descartados.
+
+Funcionalidades:
+- Cursor independiente por suscriptor
+- Métricas de retraso, entregados y descartados por suscriptor
+- Lecturas por lote como ventanas del buffer (sin copias)
+================================================================================
+"""
+
+import itertools
+import threading
+import time
+
+from buffer_circular import BufferCircular
+
+
+class Suscripcion:
+    """
+    Cursor de un consumidor sobre el buffer compartido
+    """
+
+    def __init__(self, distribuidor, id_suscripcion, nombre, desde):
+        self.distribuidor = distribuidor
+        self.buffer = distribuidor.buffer
+        self.id = id_suscripcion
+        self.nombre = nombre
+        self.cursor = desde
+        self.lock = threading.Lock()
+
+        # Métricas
+        self.entregados = 0
+        self.descartados = 0
+        self.creada = time.time()
+        self.ultima_lectura = None
+
+    @property
+    def retraso(self):
+        """Paquetes publicados que esta suscripción aún no leyó"""
+        return self.buffer.escritos - max(self.cursor, self.buffer.primero_disponible)
+
+    def _avanzar_sobre_sobrescritos(self):
+        primero = self.buffer.primero_disponible
+        if self.cursor < primero:
+            self.descartados += primero - self.cursor
+            self.cursor = primero
+
+    def leer(self, max_paquetes=None, timeout=None, minimo=1):
+        """
+        Lee los paquetes pendientes como una ventana del buffer
+
+        Args:
+            max_paquetes: Máximo de paquetes a devolver (None: todos)
+            timeout: Segundos a esperar si hay menos de `minimo` pendientes
+            minimo: Paquetes que se esperan antes de devolver
+
+        Returns:
+            dict: Ventana del buffer (ver BufferCircular.ventana); puede
+                estar vacía si venció el timeout
+        """
+        # La espera va fuera del lock: saltar_al_final() (vaciar_buffer) no
+        # debe quedar bloqueado por un lector que espera datos
+        if timeout:
+            with self.lock:
+                self._avanzar_sobre_sobrescritos()
+                esperado = self.cursor + minimo - 1
+            self.buffer.esperar(esperado, timeout)
+
+        with self.lock:
+            self._avanzar_sobre_sobrescritos()
+            fin = None if max_paquetes is None else self.cursor + max_paquetes
+            ventana = self.buffer.ventana(self.cursor, fin)
+            self.cursor = ventana['fin']
+            self.entregados += ventana['fin'] - ventana['inicio']
+            self.ultima_lectura = time.time()
+            return ventana
+
+    def leer_paquetes(self, max_paquetes=None, timeout=None, minimo=1):
+        """
+        Como leer(), pero devuelve la lista de diccionarios del paquete JSON
+        """
+        return BufferCircular.a_paquetes(self.leer(max_paquetes, timeout, minimo))
+
+    def saltar_al_final(self):
+        """
+        Descarta lo pendiente: la próxima lectura empieza en el siguiente paquete
+        """
+        with self.lock:
+            self.cursor = self.buffer.escritos
+
+    def cancelar(self):
+        """
+        Elimina la suscripción del distribuidor
+        """
+        self.distribuidor.cancelar(self)
+
+    def obtener_estadisticas(self):
+        return {
+            'id': self.id,
+            'nombre': self.nombre,
+            'cursor': self.cursor,
+            'retraso': self.retraso,
+            'entregados': self.entregados,
+            'descartados': self.descartados,
+            'segundos_activa': round(time.time() - self.creada, 1),
+            'segundos_sin_leer': (round(time.time() - self.ultima_lectura, 1)
+                                  if self.ultima_lectura else None)
+        }
+
+
+class Distribuidor:
+    """
+    Registro de suscripciones sobre un BufferCircular
+    """
+
+    def __init__(self, buffer):
+        """
+        Args:
+            buffer: BufferCircular compartido (un único productor)
+        """
+        self.buffer = buffer
+        self.suscripciones = {}
+        self.lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def suscribir(self, nombre='', desde=None):
+        """
+        Crea una suscripción
+
+        Args:
+            nombre: Etiqueta para las métricas (p. ej. 'sse 127.0.0.1')
+            desde: Índice absoluto del primer paquete a leer (None: solo
+                los paquetes que lleguen a partir de ahora)
+
+        Returns:
+            Suscripcion
+        """
+        if desde is None:
+            desde = self.buffer.escritos
+        with self.lock:
+            suscripcion = Suscripcion(self, next(self._ids), nombre, desde)
+            self.suscripciones[suscripcion.id] = suscripcion
+        return suscripcion
+
+    def cancelar(self, suscripcion):
+        with self.lock:
+            self.suscripciones.pop(suscripcion.id, None)
+
+    def obtener_estadisticas(self):
+        """
+        Obtiene las métricas de todas las suscripciones
+
+        Returns:
+            dict: Paquetes publicados y lista de suscriptores
+        """
+        with self.lock:
+            suscripciones = list(self.suscripciones.values())
+        return {
+            'publicados': self.buffer.escritos,
+            'suscriptores': [s.obtener_estadisticas() for s in suscripciones]
+        }
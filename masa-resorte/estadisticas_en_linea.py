@@ -0,0 +1,302 @@
+"""
+================================================================================
+ESTADÍSTICAS EN LÍNEA DE LOS PAQUETES DEL SENSOR
+Proyecto: Análisis de Resonancia en Sistema Masa-Resorte
+================================================================================
+
+Agregados que se actualizan a medida que llegan los paquetes, para que
+consultar las estadísticas de un experimento no recorra sus datos:
+
+- Media y varianza de Welford, combinadas por lotes con la fórmula de
+  Chan (numéricamente estable, sin guardar los valores), más mínimo y
+  máximo.
+- Bosquejo de cuantiles con error relativo acotado (al estilo DDSketch):
+  histograma de cubetas logarítmicas, de modo que cualquier cuantil
+  estimado está a menos de `precision` (1 %) del valor real. Memoria
+  acotada (las cubetas más pequeñas se fusionan al exceder el máximo) y
+  combinable entre bosquejos.
+
+Ambos se serializan a dict para guardarse en el índice del experimento.
+
+Funcionalidades:
+- Actualización vectorizada por lote (una ventana del BufferCircular)
+- Combinación de agregados parciales
+- Resumen O(1): n, media, std, mín, máx y percentiles por campo
+================================================================================
+"""
+
+import math
+import threading
+
+import numpy as np
+
+
+# Campos del paquete con agregados
+CAMPOS_ESTADISTICAS = ('rms', 'max', 'min', 'std', 'crest')
+PERCENTILES = (50, 90, 99)
+
+PRECISION_CUANTILES = 0.01
+MAX_CUBETAS = 2048
+VALOR_MINIMO = 1e-9   # |x| menor cuenta como cero en el bosquejo
+
+
+class Welford:
+    """
+    Media, varianza, mínimo y máximo en línea
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.media = 0.0
+        self.m2 = 0.0
+        self.minimo = math.inf
+        self.maximo = -math.inf
+
+    def actualizar(self, valores):
+        """
+        Agrega un lote de valores (los no finitos se ignoran)
+        """
+        x = np.asarray(valores, dtype=float).ravel()
+        x = x[np.isfinite(x)]
+        if len(x) == 0:
+            return
+        media = float(np.mean(x))
+        self._combinar(len(x), media, float(np.sum((x - media) ** 2)), float(np.min(x)), float(np.max(x)))
+
+    def combinar(self, otro):
+        """
+        Incorpora los agregados de otro Welford
+        """
+        if otro.n:
+            self._combinar(otro.n, otro.media, otro.m2, otro.minimo, otro.maximo)
+
+    def _combinar(self, n, media, m2, minimo, maximo):
+        total = self.n + n
+        delta = media - self.media
+        self.media += delta * n / total
+        self.m2 += m2 + delta * delta * self.n * n / total
+        self.n = total
+        self.minimo = min(self.minimo, minimo)
+        self.maximo = max(self.maximo, maximo)
+
+    @property
+    def varianza(self):
+        """Varianza poblacional (como np.var)"""
+        return self.m2 / self.n if self.n else math.nan
+
+    @property
+    def desviacion(self):
+        return math.sqrt(self.varianza) if self.n else math.nan
+
+    def a_dict(self):
+        return {'n': self.n, 'media': self.media, 'm2': self.m2,
+                'minimo': self.minimo if self.n else None, 'maximo': self.maximo if self.n else None}
+
+    @classmethod
+    def desde_dict(cls, datos):
+        welford = cls()
+        welford.n = datos['n']
+        welford.media = datos['media']
+        welford.m2 = datos['m2']
+        if welford.n:
+            welford.minimo = datos['minimo']
+            welford.maximo = datos['maximo']
+        return welford
+
+
+class BosquejoCuantiles:
+    """
+    Cuantiles aproximados con error relativo acotado
+    """
+
+    def __init__(self, precision=PRECISION_CUANTILES, max_cubetas=MAX_CUBETAS):
+        """
+        Args:
+            precision: Error relativo máximo de los cuantiles estimados
+            max_cubetas: Cubetas retenidas por signo antes de fusionar
+        """
+        self.precision = precision
+        self.max_cubetas = max_cubetas
+        self.gamma = (1 + precision) / (1 - precision)
+        self._ln_gamma = math.log(self.gamma)
+        self.positivos = {}   # índice de cubeta -> conteo
+        self.negativos = {}   # (por magnitud)
+        self.ceros = 0
+        self.n = 0
+
+    def actualizar(self, valores):
+        """
+        Agrega un lote de valores (los no finitos se ignoran)
+        """
+        x = np.asarray(valores, dtype=float).ravel()
+        x = x[np.isfinite(x)]
+        if len(x) == 0:
+            return
+        self.n += len(x)
+        self.ceros += int(np.count_nonzero(np.abs(x) < VALOR_MINIMO))
+        for cubetas, magnitudes in ((self.positivos, x[x >= VALOR_MINIMO]),
+                                    (self.negativos, -x[x <= -VALOR_MINIMO])):
+            if len(magnitudes) == 0:
+                continue
+            indices = np.ceil(np.log(magnitudes) / self._ln_gamma).astype(np.int64)
+            unicos, conteos = np.unique(indices, return_counts=True)
+            for indice, conteo in zip(unicos.tolist(), conteos.tolist()):
+                cubetas[indice] = cubetas.get(indice, 0) + conteo
+            self._acotar(cubetas)
+
+    def _acotar(self, cubetas):
+        """Fusiona las cubetas de menor magnitud si se excede el máximo"""
+        exceso = len(cubetas) - self.max_cubetas
+        if exceso <= 0:
+            return
+        indices = sorted(cubetas)
+        destino = indices[exceso]
+        for indice in indices[:exceso]:
+            cubetas[destino] += cubetas.pop(indice)
+
+    def combinar(self, otro):
+        """
+        Incorpora otro bosquejo (misma precisión)
+        """
+        if otro.precision != self.precision:
+            raise ValueError('Solo se combinan bosquejos de igual precisión')
+        for propias, ajenas in ((self.positivos, otro.positivos), (self.negativos, otro.negativos)):
+            for indice, conteo in ajenas.items():
+                propias[indice] = propias.get(indice, 0) + conteo
+            self._acotar(propias)
+        self.ceros += otro.ceros
+        self.n += otro.n
+
+    def _valor(self, indice):
+        return 2 * self.gamma ** indice / (self.gamma + 1)
+
+    def cuantil(self, q):
+        """
+        Valor estimado del cuantil q (0 a 1)
+
+        Returns:
+            float: NaN si el bosquejo está vacío
+        """
+        if self.n == 0:
+            return math.nan
+        rango = q * (self.n - 1)
+        acumulado = 0
+        for indice in sorted(self.negativos, reverse=True):
+            acumulado += self.negativos[indice]
+            if acumulado > rango:
+                return -self._valor(indice)
+        acumulado += self.ceros
+        if acumulado > rango:
+            return 0.0
+        for indice in sorted(self.positivos):
+            acumulado += self.positivos[indice]
+            if acumulado > rango:
+                return self._valor(indice)
+        return self._valor(max(self.positivos)) if self.positivos else 0.0
+
+    def a_dict(self):
+        return {'precision': self.precision, 'n': self.n, 'ceros': self.ceros,
+                'positivos': sorted(self.positivos.items()), 'negativos': sorted(self.negativos.items())}
+
+    @classmethod
+    def desde_dict(cls, datos, max_cubetas=MAX_CUBETAS):
+        bosquejo = cls(datos['precision'], max_cubetas)
+        bosquejo.n = datos['n']
+        bosquejo.ceros = datos['ceros']
+        bosquejo.positivos = {int(i): c for i, c in datos['positivos']}
+        bosquejo.negativos = {int(i): c for i, c in datos['negativos']}
+        return bosquejo
+
+
+class EstadisticasEnLinea:
+    """
+    Welford y bosquejo de cuantiles por campo del paquete
+    """
+
+    def __init__(self, campos=CAMPOS_ESTADISTICAS, precision=PRECISION_CUANTILES):
+        self.campos = tuple(campos)
+        self.precision = precision
+        self.momentos = {campo: Welford() for campo in self.campos}
+        self.cuantiles = {campo: BosquejoCuantiles(precision) for campo in self.campos}
+        self.n = 0
+        self.t_inicio = None
+        self.t_fin = None
+        self.lock = threading.Lock()
+
+    def actualizar(self, ventana):
+        """
+        Agrega un lote de paquetes
+
+        Args:
+            ventana: dict con una columna por campo (p. ej. una ventana del
+                BufferCircular); 'tiempo_local' opcional
+        """
+        n = len(ventana[self.campos[0]])
+        if n == 0:
+            return
+        with self.lock:
+            for campo in self.campos:
+                self.momentos[campo].actualizar(ventana[campo])
+                self.cuantiles[campo].actualizar(ventana[campo])
+            self.n += n
+            tiempo = ventana.get('tiempo_local')
+            if tiempo is not None and len(tiempo):
+                if self.t_inicio is None:
+                    self.t_inicio = float(tiempo[0])
+                self.t_fin = float(tiempo[-1])
+
+    def combinar(self, otro):
+        """
+        Incorpora los agregados de otro objeto (paquetes posteriores)
+        """
+        with self.lock:
+            for campo in self.campos:
+                self.momentos[campo].combinar(otro.momentos[campo])
+                self.cuantiles[campo].combinar(otro.cuantiles[campo])
+            self.n += otro.n
+            if self.t_inicio is None:
+                self.t_inicio = otro.t_inicio
+            if otro.t_fin is not None:
+                self.t_fin = otro.t_fin
+
+    def resumen(self, percentiles=PERCENTILES):
+        """
+        Estadísticas por campo, sin recorrer los datos
+
+        Returns:
+            dict: {campo: {'n', 'media', 'std', 'min', 'max', 'p50', ...}}
+        """
+        with self.lock:
+            resumen = {}
+            for campo in self.campos:
+                momentos = self.momentos[campo]
+                resumen[campo] = {
+                    'n': momentos.n,
+                    'media': momentos.media if momentos.n else math.nan,
+                    'std': momentos.desviacion,
+                    'min': momentos.minimo if momentos.n else math.nan,
+                    'max': momentos.maximo if momentos.n else math.nan,
+                    **{f'p{p:g}': self.cuantiles[campo].cuantil(p / 100) for p in percentiles}
+                }
+            return resumen
+
+    def a_dict(self):
+        with self.lock:
+            return {
+                'n': self.n,
+                't_inicio': self.t_inicio,
+                't_fin': self.t_fin,
+                'precision': self.precision,
+                'momentos': {campo: m.a_dict() for campo, m in self.momentos.items()},
+                'cuantiles': {campo: c.a_dict() for campo, c in self.cuantiles.items()}
+            }
+
+    @classmethod
+    def desde_dict(cls, datos):
+        estadisticas = cls(tuple(datos['momentos']), datos['precision'])
+        estadisticas.n = datos['n']
+        estadisticas.t_inicio = datos['t_inicio']
+        estadisticas.t_fin = datos['t_fin']
+        estadisticas.momentos = {campo: Welford.desde_dict(m) for campo, m in datos['momentos'].items()}
+        estadisticas.cuantiles = {campo: BosquejoCuantiles.desde_dict(c) for campo, c in datos['cuantiles'].items()}
+        return estadisticas
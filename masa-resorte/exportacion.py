@@ -0,0 +1,194 @@
+"""
+================================================================================
+EXPORTACIÓN EN FLUJO (CSV / PARQUET)
+Proyecto: Análisis de Resonancia en Sistema Masa-Resorte
+================================================================================
+
+Convierte columnas NumPy (de la simulación en memoria o de un experimento
+del almacén en disco) en bytes CSV o Parquet bloque a bloque, para
+devolverlos como respuesta HTTP por partes. Solo un bloque de filas está
+en memoria a la vez y no se escribe ningún archivo temporal; la descarga
+empieza antes de que termine la conversión.
+
+Parquet requiere pyarrow (importado solo al usarlo). Cada bloque es un
+row group y el pie del archivo se emite al final.
+
+Funcionalidades:
+- Bloques de filas desde arreglos en memoria o desde Experimento.iterar
+- Columnas de salida con título y conversión por bloque
+- Generadores de bytes CSV y Parquet para flask.Response o para un
+  archivo escrito por la cola de trabajos
+================================================================================
+"""
+
+import io
+
+import numpy as np
+import pandas as pd
+
+
+FILAS_POR_BLOQUE = 10000
+
+# Decimales en CSV: 9 cifras significativas sobran para el ADC de 10 bits y
+# la simulación, y formatean más rápido que la representación exacta
+# (Parquet conserva los float64 sin pérdida)
+FORMATO_DECIMAL = '%.9g'
+
+# Formato -> (tipo MIME, extensión)
+FORMATOS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet')
+}
+
+
+class FormatoNoDisponible(ValueError):
+    """Formato desconocido o sin la dependencia que lo escribe"""
+
+
+def bloques_arreglos(columnas, filas_por_bloque=FILAS_POR_BLOQUE):
+    """
+    Parte columnas en memoria en bloques de filas (vistas, sin copias)
+
+    Args:
+        columnas: dict de arreglos NumPy de igual longitud
+
+    Yields:
+        dict: Rebanada de cada columna
+    """
+    n = len(next(iter(columnas.values()))) if columnas else 0
+    for inicio in range(0, n, filas_por_bloque):
+        yield {nombre: arreglo[inicio:inicio + filas_por_bloque] for nombre, arreglo in columnas.items()}
+
+
+def bloques_experimento(experimento, columnas, desde=None, hasta=None, filas_por_bloque=FILAS_POR_BLOQUE):
+    """
+    Recorre un experimento del almacén en bloques de filas
+
+    Los segmentos se leen con np.memmap: cada bloque toca solo sus páginas.
+
+    Yields:
+        dict: Rebanada de cada columna pedida
+    """
+    for segmento in experimento.iterar(columnas, desde, hasta):
+        yield from bloques_arreglos(segmento, filas_por_bloque)
+
+
+def tabla(bloque, salida):
+    """
+    DataFrame de un bloque con las columnas de salida
+
+    Args:
+        bloque: dict de arreglos
+        salida: Lista de (título, columna) donde columna es el nombre en
+            el bloque o una función bloque -> arreglo
+
+    Returns:
+        pd.DataFrame
+    """
+    return pd.DataFrame({titulo: (columna(bloque) if callable(columna) else np.asarray(bloque[columna]))
+                         for titulo, columna in salida})
+
+
+def flujo_csv(bloques, salida):
+    """
+    Genera el CSV (UTF-8, encabezado en la primera línea) bloque a bloque
+
+    Yields:
+        bytes
+    """
+    yield (','.join(titulo for titulo, _ in salida) + '\n').encode('utf-8')
+    for bloque in bloques:
+        yield tabla(bloque, salida).to_csv(header=False, index=False, float_format=FORMATO_DECIMAL).encode('utf-8')
+
+
+class _Sumidero(io.RawIOBase):
+    """Archivo de solo escritura cuyos bytes se retiran después de cada row group"""
+
+    def __init__(self):
+        self.partes = []
+        self.posicion = 0
+
+    def writable(self):
+        return True
+
+    def write(self, datos):
+        datos = bytes(datos)
+        self.partes.append(datos)
+        self.posicion += len(datos)
+        return len(datos)
+
+    def tell(self):
+        return self.posicion
+
+    def retirar(self):
+        datos = b''.join(self.partes)
+        self.partes = []
+        return datos
+
+
+def flujo_parquet(bloques, salida):
+    """
+    Genera el Parquet bloque a bloque (un row group por bloque)
+
+    Yields:
+        bytes
+
+    Raises:
+        FormatoNoDisponible: Si pyarrow no está instalado
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise FormatoNoDisponible('Exportar a Parquet requiere pyarrow (pip install pyarrow)')
+
+    return _generar_parquet(pa, pq, bloques, salida)
+
+
+def _generar_parquet(pa, pq, bloques, salida):
+    sumidero = _Sumidero()
+    escritor = None
+    for bloque in bloques:
+        datos = pa.Table.from_pandas(tabla(bloque, salida), preserve_index=False)
+        if escritor is None:
+            escritor = pq.ParquetWriter(sumidero, datos.schema, compression='snappy')
+        escritor.write_table(datos)
+        yield sumidero.retirar()
+    if escritor is None:
+        # Sin filas: archivo válido con el esquema de un bloque vacío
+        vacio = tabla({}, [(titulo, lambda _: np.empty(0)) for titulo, _ in salida])
+        escritor = pq.ParquetWriter(sumidero, pa.Table.from_pandas(vacio, preserve_index=False).schema)
+    escritor.close()
+    yield sumidero.retirar()
+
+
+def comprobar_formato(formato):
+    """
+    Verifica que el formato exista y tenga su dependencia instalada
+
+    Raises:
+        FormatoNoDisponible
+    """
+    if formato not in FORMATOS:
+        raise FormatoNoDisponible(f"Formato no soportado: {formato} (use {', '.join(FORMATOS)} o xlsx)")
+    if formato == 'parquet':
+        flujo_parquet(iter(()), [])
+
+
+def flujo(formato, bloques, salida):
+    """
+    Generador de bytes del formato pedido
+
+    Args:
+        formato: 'csv' o 'parquet'
+        bloques: Iterable de dicts de arreglos (bloques_arreglos,
+            bloques_experimento)
+        salida: Columnas de salida (ver tabla)
+
+    Raises:
+        FormatoNoDisponible: Formato desconocido o sin dependencia
+    """
+    comprobar_formato(formato)
+    if formato == 'csv':
+        return flujo_csv(bloques, salida)
+    return flujo_parquet(bloques, salida)
@@ -0,0 +1,254 @@
+"""
+================================================================================
+PROTOCOLO BINARIO DE TRAMAS SERIALES
+Proyecto: Análisis de Resonancia en Sistema Masa-Resorte
+================================================================================
+
+Formato compacto que reemplaza al JSON ASCII entre Arduino y el PC. A
+115200 baudios el texto ocupa ~3 veces más bytes que los mismos valores
+en binario; con tramas binarias caben más paquetes y muestras por segundo.
+
+Trama (little-endian):
+
+    +------+---------+------+-----------+----------+---------+-------+
+    | A5 5A| version | tipo | secuencia | longitud | payload | CRC16 |
+    |  2 B |   u8    |  u8  |    u16    |   u16    |  N B    |  u16  |
+    +------+---------+------+-----------+----------+---------+-------+
+
+El CRC-16/CCITT (polinomio 0x1021, valor inicial 0xFFFF) cubre desde la
+versión hasta el final del payload.
+
+Funcionalidades:
+- Codificación de tramas (para pruebas y dispositivos simulados)
+- Decodificador incremental con resincronización y verificación de CRC
+- Decodificación vectorizada de lotes de paquetes con numpy.frombuffer
+================================================================================
+"""
+
+import binascii
+import struct
+
+import numpy as np
+
+
+SINCRONIA = b'\xa5\x5a'
+VERSION_PROTOCOLO = 1
+
+# Tipos de trama
+TIPO_RESUMEN = 0x01   # Estadísticas de un bloque + muestras submuestreadas
+TIPO_CRUDO = 0x02     # Bloque contiguo de muestras ADC a frecuencia completa
+
+ENCABEZADO = struct.Struct('<2sBBHH')
+CRC = struct.Struct('<H')
+MAX_PAYLOAD = 4096
+
+# Payload de TIPO_RESUMEN: id, timestamp (ms), rms, max, min, media, std,
+# crest y número de muestras; luego las muestras como cuentas ADC int16
+RESUMEN = struct.Struct('<II6fH')
+CAMPOS_RESUMEN = ['id', 'timestamp', 'rms', 'max', 'min', 'media', 'std', 'crest']
+
+# Payload de TIPO_CRUDO: índice absoluto de la primera muestra, frecuencia
+# de muestreo (Hz) y número de muestras; luego las muestras int16
+CRUDO = struct.Struct('<IHH')
+
+# Conversión de cuentas ADC (10 bits, referencia 5 V) a voltios
+ESCALA_VOLTIOS = 5.0 / 1023
+
+
+def crc16(datos, valor_inicial=0xFFFF):
+    """
+    CRC-16/CCITT de los datos (misma variante que calcula el sketch)
+    """
+    return binascii.crc_hqx(datos, valor_inicial)
+
+
+def codificar_trama(tipo, secuencia, payload):
+    """
+    Construye una trama completa
+
+    Args:
+        tipo: Tipo de trama (TIPO_*)
+        secuencia: Número de secuencia (módulo 2^16)
+        payload: Bytes del contenido
+
+    Returns:
+        bytes: Trama lista para enviar
+    """
+    encabezado = ENCABEZADO.pack(SINCRONIA, VERSION_PROTOCOLO, tipo, secuencia & 0xFFFF, len(payload))
+    cuerpo = encabezado[2:] + bytes(payload)
+    return SINCRONIA + cuerpo + CRC.pack(crc16(cuerpo))
+
+
+def codificar_resumen(id_paquete, timestamp, rms, maximo, minimo, media, std, crest, muestras_adc):
+    """
+    Construye el payload de una trama TIPO_RESUMEN
+
+    Returns:
+        bytes: Payload
+    """
+    muestras = np.asarray(muestras_adc, dtype='<i2')
+    return RESUMEN.pack(id_paquete, timestamp, rms, maximo, minimo, media, std, crest,
+                        len(muestras)) + muestras.tobytes()
+
+
+def codificar_crudo(indice, frecuencia, muestras_adc):
+    """
+    Construye el payload de una trama TIPO_CRUDO
+
+    Returns:
+        bytes: Payload
+    """
+    muestras = np.asarray(muestras_adc, dtype='<i2')
+    return CRUDO.pack(indice & 0xFFFFFFFF, frecuencia, len(muestras)) + muestras.tobytes()
+
+
+def _dtype_resumen(n_muestras):
+    """Tipo estructurado de un payload TIPO_RESUMEN con n muestras"""
+    return np.dtype([
+        ('id', '<u4'), ('timestamp', '<u4'),
+        ('rms', '<f4'), ('max', '<f4'), ('min', '<f4'),
+        ('media', '<f4'), ('std', '<f4'), ('crest', '<f4'),
+        ('n_muestras', '<u2'), ('muestras', '<i2', (n_muestras,))
+    ])
+
+
+def decodificar_resumenes(payloads):
+    """
+    Decodifica un lote de payloads TIPO_RESUMEN
+
+    Los payloads de igual longitud se concatenan y se interpretan con una
+    sola llamada a numpy.frombuffer sobre un tipo estructurado.
+
+    Args:
+        payloads: Lista de bytes
+
+    Returns:
+        list: Diccionarios con las mismas claves que el paquete JSON
+            ('samples' en voltios), en el orden de entrada
+    """
+    por_longitud = {}
+    for i, payload in enumerate(payloads):
+        por_longitud.setdefault(len(payload), []).append(i)
+
+    paquetes = [None] * len(payloads)
+    for longitud, indices in por_longitud.items():
+        n_muestras = (longitud - RESUMEN.size) // 2
+        if n_muestras < 0 or RESUMEN.size + 2 * n_muestras != longitud:
+            continue
+        registros = np.frombuffer(b''.join(payloads[i] for i in indices), dtype=_dtype_resumen(n_muestras))
+
+        columnas = {campo: registros[campo].tolist() for campo in CAMPOS_RESUMEN}
+        muestras = (registros['muestras'] * ESCALA_VOLTIOS).round(4).tolist()
+        for fila, i in enumerate(indices):
+            paquete = {campo: columnas[campo][fila] for campo in CAMPOS_RESUMEN}
+            paquete['samples'] = muestras[fila]
+            paquetes[i] = paquete
+
+    return [p for p in paquetes if p is not None]
+
+
+def decodificar_crudos(payloads):
+    """
+    Decodifica un lote de payloads TIPO_CRUDO
+
+    Args:
+        payloads: Lista de bytes (en orden de llegada)
+
+    Returns:
+        list: Tuplas (indice, frecuencia, muestras_adc) con las muestras
+            como arreglo int16; bloques consecutivos de igual longitud se
+            interpretan con una sola llamada a numpy.frombuffer
+    """
+    bloques = []
+    inicio = 0
+    while inicio < len(payloads):
+        # Tramo de payloads consecutivos con la misma longitud
+        longitud = len(payloads[inicio])
+        fin = inicio + 1
+        while fin < len(payloads) and len(payloads[fin]) == longitud:
+            fin += 1
+
+        n_muestras = (longitud - CRUDO.size) // 2
+        if n_muestras >= 0 and CRUDO.size + 2 * n_muestras == longitud:
+            registros = np.frombuffer(b''.join(payloads[inicio:fin]), dtype=np.dtype([
+                ('indice', '<u4'), ('frecuencia', '<u2'), ('n_muestras', '<u2'),
+                ('muestras', '<i2', (n_muestras,))
+            ]))
+            for registro in registros:
+                bloques.append((int(registro['indice']), int(registro['frecuencia']), registro['muestras']))
+        inicio = fin
+
+    return bloques
+
+
+class DecodificadorTramas:
+    """
+    Separa y valida tramas a partir de bytes recibidos en trozos arbitrarios
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+        # Estadísticas
+        self.tramas_validas = 0
+        self.errores_crc = 0
+        self.bytes_descartados = 0
+
+    def alimentar(self, datos):
+        """
+        Agrega bytes recibidos y extrae las tramas completas
+
+        Args:
+            datos: Bytes leídos del puerto (pueden cortar tramas a la mitad)
+
+        Returns:
+            list: Tuplas (tipo, secuencia, payload) de las tramas válidas
+        """
+        self._buffer.extend(datos)
+        buffer = self._buffer
+        tramas = []
+        posicion = 0
+
+        while True:
+            inicio = buffer.find(SINCRONIA, posicion)
+            if inicio < 0:
+                # Conservar un posible primer byte de sincronía al final
+                fin = max(posicion, len(buffer) - 1)
+                self.bytes_descartados += fin - posicion
+                posicion = fin
+                break
+            self.bytes_descartados += inicio - posicion
+            posicion = inicio
+
+            if len(buffer) - inicio < ENCABEZADO.size:
+                break
+            _, version, tipo, secuencia, longitud = ENCABEZADO.unpack_from(buffer, inicio)
+            if version != VERSION_PROTOCOLO or longitud > MAX_PAYLOAD:
+                # Falsa sincronía: buscar la siguiente
+                posicion = inicio + 1
+                self.bytes_descartados += 1
+                continue
+
+            fin = inicio + ENCABEZADO.size + longitud + CRC.size
+            if len(buffer) < fin:
+                break
+
+            cuerpo = bytes(buffer[inicio + 2:fin - CRC.size])
+            if crc16(cuerpo) != CRC.unpack_from(buffer, fin - CRC.size)[0]:
+                self.errores_crc += 1
+                posicion = inicio + 1
+                self.bytes_descartados += 1
+                continue
+
+            tramas.append((tipo, secuencia, cuerpo[ENCABEZADO.size - 2:]))
+            self.tramas_validas += 1
+            posicion = fin
+
+        del buffer[:posicion]
+        return tramas
+
+    def reiniciar(self):
+        """
+        Descarta los bytes pendientes (p. ej. al cambiar de protocolo)
+        """
+        self._buffer.clear()
@@ -0,0 +1,260 @@
+"""
+================================================================================
+REGISTRO DE SENSORES (VARIOS ARDUINO A LA VEZ)
+Proyecto: Análisis de Resonancia en Sistema Masa-Resorte
+================================================================================
+
+Los bancos de prueba tienen varios sensores piezoeléctricos, cada uno en su
+propia placa. El registro guarda un ArduinoHandler por identificador de
+dispositivo, cada uno con su BufferCircular y su Distribuidor, y las rutas
+/arduino/<dispositivo>/... eligen el sensor.
+
+Lectura: en POSIX un único hilo (LectorSerial) atiende todos los puertos
+con selectors. Duerme en select() hasta que algún puerto tiene bytes y lee
+de ese puerto lo acumulado; el número de hilos no crece con las placas. En
+Windows los puertos COM no admiten select() y cada handler conserva su
+propio hilo de lectura bloqueante (que tampoco hace sondeo).
+
+Funcionalidades:
+- Dispositivos por identificador, creados al conectarlos
+- Un hilo selector para todos los puertos (POSIX)
+- Conexión en paralelo de varias placas
+- Estadísticas por dispositivo y del lector compartido
+================================================================================
+"""
+
+import os
+import re
+import selectors
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from serial_handler import ArduinoHandler
+
+
+DISPOSITIVO_POR_DEFECTO = 'principal'
+MAX_DISPOSITIVOS = 32
+PATRON_DISPOSITIVO = re.compile(r'^[A-Za-z0-9_-]{1,32}$')
+
+
+class DispositivoNoRegistrado(LookupError):
+    """El identificador no corresponde a ningún dispositivo del registro"""
+
+
+class LectorSerial:
+    """
+    Un solo hilo que lee de todos los puertos registrados con selectors
+    """
+
+    def __init__(self):
+        self.selector = selectors.DefaultSelector()
+        self._descriptores = {}
+        self._timeouts = {}  # timeout original de cada puerto registrado
+        self.lock = threading.Lock()
+        self.hilo = None
+
+        # Par de sockets para despertar el select() al agregar o quitar puertos
+        self._senal_lectura, self._senal_escritura = socket.socketpair()
+        self._senal_lectura.setblocking(False)
+        self.selector.register(self._senal_lectura, selectors.EVENT_READ, None)
+
+        # Estadísticas
+        self.despertares = 0
+        self.bytes_leidos = 0
+        self.errores = 0
+
+    @staticmethod
+    def disponible():
+        """select() sobre puertos serie solo funciona en POSIX"""
+        return os.name == 'posix'
+
+    def agregar(self, handler):
+        """
+        Empieza a leer el puerto de un handler conectado
+
+        Mientras está registrado, el puerto queda en modo no bloqueante
+        (timeout=0): un despertar en falso no detiene al hilo que atiende
+        a todas las placas durante el timeout serial.
+        """
+        with self.lock:
+            conexion = handler.serial_conn
+            descriptor = conexion.fileno()
+            self.selector.register(descriptor, selectors.EVENT_READ, handler)
+            self._descriptores[handler] = descriptor
+            self._timeouts[handler] = (conexion, conexion.timeout)
+            conexion.timeout = 0
+            if self.hilo is None:
+                self.hilo = threading.Thread(target=self._bucle, daemon=True, name='lector-serial')
+                self.hilo.start()
+        self._despertar()
+
+    def quitar(self, handler):
+        """
+        Deja de leer el puerto de un handler (antes de cerrarlo)
+        """
+        with self.lock:
+            descriptor = self._descriptores.pop(handler, None)
+            if descriptor is not None:
+                try:
+                    self.selector.unregister(descriptor)
+                except (KeyError, ValueError):
+                    pass
+            conexion, timeout = self._timeouts.pop(handler, (None, None))
+            if conexion is not None and conexion.is_open:
+                conexion.timeout = timeout
+        self._despertar()
+
+    def _despertar(self):
+        try:
+            self._senal_escritura.send(b'\0')
+        except BlockingIOError:
+            pass
+
+    def _bucle(self):
+        while True:
+            with self.lock:
+                if not self._descriptores:
+                    # Sin puertos: el hilo termina y agregar() lo recrea
+                    self.hilo = None
+                    return
+
+            for clave, _ in self.selector.select(timeout=1.0):
+                if clave.data is None:
+                    try:
+                        self._senal_lectura.recv(4096)
+                    except BlockingIOError:
+                        pass
+                    continue
+                self.despertares += 1
+                self._leer(clave.data)
+
+    def _leer(self, handler):
+        """Lee todo lo acumulado en un puerto listo y lo entrega al handler"""
+        if not handler.capturando:
+            return
+        try:
+            # Con timeout=0 no bloquea; un puerto cerrado (listo pero sin
+            # datos) lanza SerialException
+            conexion = handler.serial_conn
+            datos = conexion.read(conexion.in_waiting or 1)
+        except Exception as e:
+            # Placa desconectada: sacar el puerto para no despertar en falso
+            self.errores += 1
+            print(f"✗ Error de lectura en {handler.id_dispositivo}: {e}")
+            self.quitar(handler)
+            handler.capturando = False
+            handler.conectado = False
+            return
+
+        if datos:
+            self.bytes_leidos += len(datos)
+            try:
+                handler.consumir(datos)
+            except Exception as e:
+                self.errores += 1
+                print(f"Error procesando datos de {handler.id_dispositivo}: {e}")
+
+    def obtener_estadisticas(self):
+        return {
+            'puertos': len(self._descriptores),
+            'hilo_activo': self.hilo is not None,
+            'despertares': self.despertares,
+            'bytes_leidos': self.bytes_leidos,
+            'errores': self.errores
+        }
+
+
+class RegistroSensores:
+    """
+    Dispositivos por identificador, con un lector compartido
+    """
+
+    def __init__(self, crear_handler=None):
+        """
+        Args:
+            crear_handler: callable(id_dispositivo, lector) -> handler; por
+                defecto un ArduinoHandler leído por el LectorSerial común
+        """
+        self.lector = LectorSerial() if LectorSerial.disponible() else None
+        self.crear_handler = crear_handler or self._crear_handler
+        self.dispositivos = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _crear_handler(id_dispositivo, lector):
+        return ArduinoHandler(id_dispositivo=id_dispositivo, lector=lector)
+
+    def obtener(self, id_dispositivo=DISPOSITIVO_POR_DEFECTO, crear=False):
+        """
+        Handler de un dispositivo
+
+        Args:
+            id_dispositivo: Identificador (letras, dígitos, '_' o '-')
+            crear: True para registrarlo si aún no existe
+
+        Returns:
+            ArduinoHandler (o equivalente con la misma interfaz)
+
+        Raises:
+            DispositivoNoRegistrado: Si no existe y crear es False
+            ValueError: Si el identificador no es válido o se alcanzó
+                MAX_DISPOSITIVOS
+        """
+        with self.lock:
+            handler = self.dispositivos.get(id_dispositivo)
+            if handler is not None:
+                return handler
+            if not crear:
+                raise DispositivoNoRegistrado(f'Dispositivo no registrado: {id_dispositivo}')
+            if not PATRON_DISPOSITIVO.match(str(id_dispositivo)):
+                raise ValueError(f'Identificador de dispositivo no válido: {id_dispositivo}')
+            if len(self.dispositivos) >= MAX_DISPOSITIVOS:
+                raise ValueError(f'Máximo de {MAX_DISPOSITIVOS} dispositivos alcanzado')
+
+            handler = self.crear_handler(id_dispositivo, self.lector)
+            self.dispositivos[id_dispositivo] = handler
+            return handler
+
+    def ids(self):
+        with self.lock:
+            return list(self.dispositivos)
+
+    def conectar_varios(self, puertos, protocolo='auto'):
+        """
+        Conecta varias placas en paralelo (cada conexión espera el reinicio
+        del Arduino, ~2.5 s) e inicia su captura
+
+        Args:
+            puertos: dict {id_dispositivo: puerto}
+            protocolo: 'auto', 'binario' o 'json'
+
+        Returns:
+            dict: {id_dispositivo: True si quedó conectado}
+        """
+        def conectar(id_dispositivo, puerto):
+            handler = self.obtener(id_dispositivo, crear=True)
+            handler.protocolo_preferido = protocolo
+            return bool(handler.conectar(puerto) and handler.iniciar_captura())
+
+        with ThreadPoolExecutor(max_workers=max(1, min(len(puertos), 8))) as pool:
+            futuros = {id_dispositivo: pool.submit(conectar, id_dispositivo, puerto)
+                       for id_dispositivo, puerto in puertos.items()}
+        return {id_dispositivo: futuro.result() for id_dispositivo, futuro in futuros.items()}
+
+    def desconectar_todos(self):
+        for id_dispositivo in self.ids():
+            self.dispositivos[id_dispositivo].desconectar()
+
+    def obtener_estadisticas(self):
+        """
+        Estadísticas de todos los dispositivos
+
+        Returns:
+            dict: 'dispositivos' (por id) y 'lector' (None sin LectorSerial)
+        """
+        return {
+            'dispositivos': {id_dispositivo: self.dispositivos[id_dispositivo].obtener_estadisticas()
+                             for id_dispositivo in self.ids()},
+            'lector': self.lector.obtener_estadisticas() if self.lector else None
+        }
@@ -0,0 +1,235 @@
+"""
+================================================================================
+POOL DE RENDERIZADO DE GRÁFICAS
+Proyecto: Análisis de Resonancia en Sistema Masa-Resorte
+================================================================================
+
+Renderiza las gráficas PNG fuera del hilo de la petición HTTP, en un pool
+de procesos. Cada proceso tiene su propio estado de matplotlib (sin la
+máquina de estados global de pyplot) y conserva plantillas de Figure/Axes
+ya construidas: en cada renderizado solo se actualizan los datos de las
+líneas, los títulos y los límites de los ejes.
+
+Funcionalidades:
+- Pool de procesos creado bajo demanda (aislado del GIL del servidor)
+- Plantillas reutilizables de las figuras de simulación y experimento
+  (esta con la PSD de analisis_espectral.py)
+- Resultados como futuros con los bytes PNG
+================================================================================
+"""
+
+import io
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+# Plantillas del proceso de trabajo (una por tipo de figura)
+_plantillas = {}
+
+
+def _crear_plantilla_simulacion():
+    """Figura de /calcular: normal, resonancia y aceleración"""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    figura = Figure(figsize=(15, 8))
+    FigureCanvasAgg(figura)
+    rejilla = figura.add_gridspec(2, 2)
+    ejes = [figura.add_subplot(rejilla[0, 0]), figura.add_subplot(rejilla[0, 1]),
+            figura.add_subplot(rejilla[1, :])]
+
+    lineas = [ejes[0].plot([], [], 'b-', linewidth=2)[0],
+              ejes[1].plot([], [], 'r-', linewidth=2)[0],
+              ejes[2].plot([], [], 'k-', linewidth=2)[0]]
+
+    ejes[2].set_title('Aceleración durante Resonancia - Monitoreo de Vibraciones', fontsize=12, fontweight='bold')
+    for eje, etiqueta_y in zip(ejes, ['Desplazamiento (m)', 'Desplazamiento (m)', 'Aceleración (m/s²)']):
+        eje.set_xlabel('Tiempo (s)', fontsize=10)
+        eje.set_ylabel(etiqueta_y, fontsize=10)
+        eje.grid(True, linestyle='--', alpha=0.6)
+
+    # Títulos de ejemplo para que tight_layout reserve su espacio
+    ejes[0].set_title('Vibración Normal\n(f_fuerza = 0.00 Hz)', fontsize=12, fontweight='bold')
+    ejes[1].set_title('Resonancia\n(f_fuerza ≈ 0.00 Hz)', fontsize=12, fontweight='bold')
+    figura.tight_layout()
+
+    return {'figura': figura, 'ejes': ejes, 'lineas': lineas}
+
+
+def _crear_plantilla_experimental():
+    """Figura de /arduino/analizar_experimento: RMS, máximo, cresta, histograma y PSD"""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    figura = Figure(figsize=(15, 14))
+    FigureCanvasAgg(figura)
+    rejilla = figura.add_gridspec(3, 2)
+    ejes = [figura.add_subplot(rejilla[i // 2, i % 2]) for i in range(4)] + [figura.add_subplot(rejilla[2, :])]
+
+    lineas = [ejes[0].plot([], [], 'b-', linewidth=1.5)[0],
+              ejes[1].plot([], [], 'r-', linewidth=1.5)[0],
+              ejes[2].plot([], [], 'g-', linewidth=1.5)[0],
+              ejes[4].semilogy([], [], 'k-', linewidth=1.5)[0]]
+    medias = [ejes[0].axhline(y=0, color='r', linestyle='--', label='Media'),
+              ejes[1].axhline(y=0, color='b', linestyle='--', label='Media')]
+    ejes[2].axhline(y=3.0, color='r', linestyle='--', linewidth=2, label='Umbral Resonancia')
+    histograma = ejes[3].stairs([0.0], [0.0, 1.0], fill=True, color='blue', alpha=0.7, edgecolor='black')
+    frecuencias = [ejes[4].axvline(x=0, color='r', linestyle='--', linewidth=2),
+                   ejes[4].axvline(x=0, color='b', linestyle=':', linewidth=2)]
+
+    titulos = ['Valor RMS en Tiempo Real', 'Amplitud Máxima',
+               'Factor de Cresta (Detección de Resonancia)', 'Distribución de Valores RMS',
+               'Densidad Espectral de Potencia (Welch)']
+    etiquetas = [('Tiempo (s)', 'RMS (V)'), ('Tiempo (s)', 'Amplitud (V)'),
+                 ('Tiempo (s)', 'Factor de Cresta'), ('RMS (V)', 'Frecuencia'),
+                 ('Frecuencia (Hz)', 'PSD (V²/Hz)')]
+    for eje, titulo, (etiqueta_x, etiqueta_y) in zip(ejes, titulos, etiquetas):
+        eje.set_title(titulo, fontsize=12, fontweight='bold')
+        eje.set_xlabel(etiqueta_x)
+        eje.set_ylabel(etiqueta_y)
+        eje.grid(True, alpha=0.3)
+    ejes[2].legend()
+    figura.tight_layout()
+
+    return {'figura': figura, 'ejes': ejes, 'lineas': lineas, 'medias': medias, 'histograma': histograma,
+            'frecuencias': frecuencias}
+
+
+def _plantilla(nombre):
+    """Obtiene (o construye una sola vez por proceso) una plantilla"""
+    if nombre not in _plantillas:
+        constructores = {
+            'simulacion': _crear_plantilla_simulacion,
+            'experimental': _crear_plantilla_experimental
+        }
+        _plantillas[nombre] = constructores[nombre]()
+    return _plantillas[nombre]
+
+
+def _a_png(figura):
+    """Serializa la figura a bytes PNG"""
+    buffer = io.BytesIO()
+    figura.savefig(buffer, format='png', dpi=100)
+    return buffer.getvalue()
+
+
+def _reescalar(eje):
+    """Recalcula los límites del eje a partir de los datos actuales"""
+    eje.relim()
+    eje.autoscale_view()
+
+
+def _renderizar_simulacion(t, x_normal, x_resonancia, aceleracion, f_normal, f_n):
+    """Tarea del proceso de trabajo: gráfica de /calcular"""
+    plantilla = _plantilla('simulacion')
+    ejes, lineas = plantilla['ejes'], plantilla['lineas']
+
+    for linea, y in zip(lineas, (x_normal, x_resonancia, aceleracion)):
+        linea.set_data(t, y)
+    ejes[0].set_title(f'Vibración Normal\n(f_fuerza = {f_normal:.2f} Hz)', fontsize=12, fontweight='bold')
+    ejes[1].set_title(f'Resonancia\n(f_fuerza ≈ {f_n:.2f} Hz)', fontsize=12, fontweight='bold')
+    for eje in ejes:
+        _reescalar(eje)
+
+    return _a_png(plantilla['figura'])
+
+
+def _renderizar_experimental(rms_vals, max_vals, crest_vals, espectro=None):
+    """Tarea del proceso de trabajo: gráfica del experimento"""
+    plantilla = _plantilla('experimental')
+    ejes, lineas, medias = plantilla['ejes'], plantilla['lineas'], plantilla['medias']
+
+    tiempo = np.arange(len(rms_vals)) * 0.1  # 0.1s entre muestras
+    for linea, y in zip(lineas, (rms_vals, max_vals, crest_vals)):
+        linea.set_data(tiempo, y)
+
+    # PSD sin el bin de continua; líneas verticales solo si hay frecuencia
+    frecuencias, psd, f_medida, f_simulada = espectro or (np.empty(0), np.empty(0), None, None)
+    lineas[3].set_data(frecuencias[1:], psd[1:])
+    for linea, nombre, f in zip(plantilla['frecuencias'], ('f_n medida', 'f_n simulada'), (f_medida, f_simulada)):
+        linea.set_visible(f is not None)
+        linea.set_xdata([f or 0.0, f or 0.0])
+        linea.set_label(f'{nombre}: {f:.2f} Hz' if f is not None else '_oculta')
+    ejes[4].legend()
+
+    for eje, media, valores in zip(ejes, medias, (rms_vals, max_vals)):
+        promedio = float(np.mean(valores))
+        media.set_ydata([promedio, promedio])
+        media.set_label(f'Media: {promedio:.4f}')
+        eje.legend()
+
+    conteos, bordes = np.histogram(rms_vals, bins=30)
+    plantilla['histograma'].set_data(conteos, bordes)
+
+    for eje in ejes:
+        _reescalar(eje)
+
+    return _a_png(plantilla['figura'])
+
+
+def _inicializar_trabajador():
+    """Prepara matplotlib y las plantillas al arrancar cada proceso"""
+    import matplotlib
+    matplotlib.use('Agg')
+    for nombre in ('simulacion', 'experimental'):
+        _plantilla(nombre)
+
+
+class PoolRenderizado:
+    """
+    Pool de procesos para renderizar gráficas PNG en paralelo
+    """
+
+    def __init__(self, max_procesos=2):
+        """
+        Inicializa el pool (los procesos se crean en el primer uso)
+
+        Args:
+            max_procesos: Número de procesos de renderizado
+        """
+        self.max_procesos = max_procesos
+        self._ejecutor = None
+        self.lock = threading.Lock()
+
+    def _obtener_ejecutor(self):
+        with self.lock:
+            if self._ejecutor is None:
+                self._ejecutor = ProcessPoolExecutor(max_workers=self.max_procesos,
+                                                     initializer=_inicializar_trabajador)
+            return self._ejecutor
+
+    def renderizar_simulacion(self, t, sol_normal, sol_resonancia, aceleracion, w_normal, w_resonancia, f_n):
+        """
+        Encola la gráfica de /calcular
+
+        Returns:
+            Future: Resuelve a los bytes PNG
+        """
+        return self._obtener_ejecutor().submit(
+            _renderizar_simulacion, t, sol_normal[:, 0], sol_resonancia[:, 0], aceleracion,
+            w_normal / (2 * np.pi), f_n)
+
+    def renderizar_experimental(self, rms_vals, max_vals, crest_vals, espectro=None):
+        """
+        Encola la gráfica del experimento
+
+        Args:
+            espectro: (frecuencias, psd, f_n medida, f_n simulada) o None
+
+        Returns:
+            Future: Resuelve a los bytes PNG
+        """
+        return self._obtener_ejecutor().submit(
+            _renderizar_experimental, np.asarray(rms_vals, dtype=float),
+            np.asarray(max_vals, dtype=float), np.asarray(crest_vals, dtype=float), espectro)
+
+    def cerrar(self):
+        """
+        Detiene los procesos de renderizado
+        """
+        with self.lock:
+            if self._ejecutor is not None:
+                self._ejecutor.shutdown(wait=True)
+                self._ejecutor = None
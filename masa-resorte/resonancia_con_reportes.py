@@ -1,10 +1,11 @@
 import numpy as np
-from scipy.integrate import odeint
 import matplotlib.pyplot as plt
 from datetime import datetime
 import pandas as pd
 import os
 
+from solver_analitico import resolver_respuesta
+
 # ======================================================================
 # 1. Funciones de Análisis y Reportes
 # ======================================================================
@@ -231,11 +232,9 @@ def main():
     w_normal = w_n / 2
     w_resonancia = w_n * 0.999
 
-    sol_normal = odeint(sistema_masa_resorte, y0, t, args=(m, k, c, F0, w_normal))
-    sol_resonancia = odeint(sistema_masa_resorte, y0, t, args=(m, k, c, F0, w_resonancia))
-
-    # Cálculo de aceleración
-    aceleracion = (F0 * np.cos(w_resonancia * t) - c * sol_resonancia[:, 1] - k * sol_resonancia[:, 0]) / m
+    # Solución cerrada (odeint solo como respaldo para casos no cubiertos)
+    sol_normal, _ = resolver_respuesta(t, m, k, c, F0, w_normal, y0)
+    sol_resonancia, aceleracion = resolver_respuesta(t, m, k, c, F0, w_resonancia, y0)
 
     # Análisis estadístico
     parametros = {
@@ -0,0 +1,137 @@
+"""
+================================================================================
+ANÁLISIS DE SENSIBILIDAD MONTE CARLO
+Proyecto: Análisis de Resonancia en Sistema Masa-Resorte
+================================================================================
+
+Propaga la incertidumbre de los parámetros físicos (tolerancias de masa,
+resorte, amortiguador y fuerza) a las estadísticas de /calcular. Las
+muestras se resuelven en lote con la solución analítica vectorizada: con
+parámetros físicos (m, k > 0, c >= 0) y las frecuencias de excitación de
+/calcular (0.5 y 0.999 · ω_n) siempre tiene solución cerrada, así que no
+hace falta un camino numérico.
+
+Funcionalidades:
+- Distribuciones fija, normal, uniforme y lognormal por parámetro
+- Simulación por bloques para acotar la memoria
+- Percentiles e histogramas de RMS, máximo y amplificación
+================================================================================
+"""
+
+import numpy as np
+
+from solver_analitico import respuesta_analitica, mascara_cubierta, estadisticas_lote
+
+
+# Muestras por bloque de la simulación vectorizada (bloque x n_puntos floats)
+TAMANO_BLOQUE = 500
+
+PERCENTILES = [5, 25, 50, 75, 95]
+
+
+def muestrear(especificacion, n, rng):
+    """
+    Genera muestras de un parámetro
+
+    Args:
+        especificacion: Número (valor fijo) o dict con 'distribucion'
+            ('fija', 'normal', 'uniforme', 'lognormal') y sus parámetros:
+            'valor'; 'media' y 'desviacion'; 'min' y 'max'
+        n: Número de muestras
+        rng: Generador numpy.random.Generator
+
+    Returns:
+        numpy.ndarray: Muestras con forma (n,)
+    """
+    if not isinstance(especificacion, dict):
+        return np.full(n, float(especificacion))
+
+    distribucion = especificacion.get('distribucion', 'fija')
+    if distribucion == 'fija':
+        return np.full(n, float(especificacion['valor']))
+    if distribucion == 'normal':
+        return rng.normal(float(especificacion['media']), float(especificacion['desviacion']), n)
+    if distribucion == 'uniforme':
+        return rng.uniform(float(especificacion['min']), float(especificacion['max']), n)
+    if distribucion == 'lognormal':
+        # Parametrizada por media y desviación de la variable (no del logaritmo)
+        media = float(especificacion['media'])
+        desviacion = float(especificacion['desviacion'])
+        sigma2 = np.log1p((desviacion / media)**2)
+        return rng.lognormal(np.log(media) - sigma2 / 2, np.sqrt(sigma2), n)
+
+    raise ValueError(f'Distribución desconocida: {distribucion}')
+
+
+def _estadisticas_bloque(x_normal, x_resonancia, aceleracion):
+    """RMS y máximo de un bloque de series"""
+    normal = estadisticas_lote(x_normal)
+    resonancia = estadisticas_lote(x_resonancia)
+    acel = estadisticas_lote(aceleracion)
+    return {
+        'rms_normal': normal['RMS'],
+        'max_normal': normal['Máximo'],
+        'rms_resonancia': resonancia['RMS'],
+        'max_resonancia': resonancia['Máximo'],
+        'rms_aceleracion': acel['RMS'],
+        'max_aceleracion': acel['Máximo']
+    }
+
+
+def simular_lote(m, k, c, F0, t):
+    """
+    Simula los escenarios normal y resonancia de /calcular para un lote
+
+    Args:
+        m, k, c, F0: Arreglos (n,) de parámetros
+        t: Vector de tiempo
+
+    Returns:
+        dict: Arreglos (n,) de RMS y máximo por escenario
+
+    Raises:
+        ValueError: Si alguna muestra no tiene solución cerrada (parámetros
+            no físicos)
+    """
+    n = len(m)
+    w_n = np.sqrt(k / m)
+    w_normal = w_n / 2
+    w_resonancia = w_n * 0.999
+
+    claves = ['rms_normal', 'max_normal', 'rms_resonancia', 'max_resonancia',
+              'rms_aceleracion', 'max_aceleracion']
+    resultado = {clave: np.empty(n) for clave in claves}
+
+    cubiertos = mascara_cubierta(m, k, c, w_normal) & mascara_cubierta(m, k, c, w_resonancia)
+    if not np.all(cubiertos):
+        raise ValueError('Hay muestras con parámetros no físicos (se requiere m > 0, k > 0 y c >= 0)')
+
+    # Bloques de muestras contra el vector t
+    for inicio in range(0, n, TAMANO_BLOQUE):
+        idx = np.arange(inicio, min(inicio + TAMANO_BLOQUE, n))
+        p = [arr[idx, np.newaxis] for arr in (m, k, c, F0)]
+        x_normal, _, _ = respuesta_analitica(t, *p, w_normal[idx, np.newaxis])
+        x_resonancia, _, aceleracion = respuesta_analitica(t, *p, w_resonancia[idx, np.newaxis])
+        for clave, valores in _estadisticas_bloque(x_normal, x_resonancia, aceleracion).items():
+            resultado[clave][idx] = valores
+
+    return resultado
+
+
+def resumen_distribucion(valores, bins=30):
+    """
+    Resume una distribución de muestras
+
+    Returns:
+        dict: Media, desviación, percentiles e histograma
+    """
+    valores = np.asarray(valores, dtype=float)
+    conteos, bordes = np.histogram(valores, bins=bins)
+    return {
+        'media': float(np.mean(valores)),
+        'std': float(np.std(valores)),
+        'min': float(np.min(valores)),
+        'max': float(np.max(valores)),
+        'percentiles': {f'p{p}': float(v) for p, v in zip(PERCENTILES, np.percentile(valores, PERCENTILES))},
+        'histograma': {'conteos': conteos.tolist(), 'bordes': bordes.tolist()}
+    }
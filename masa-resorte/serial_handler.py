@@ -9,8 +9,12 @@ datos del sensor piezoeléctrico en tiempo real.
 
 Funcionalidades:
 - Detección automática de puerto COM en Windows
-- Lectura continua de datos JSON desde Arduino
-- Buffer thread-safe para datos en tiempo real
+- Lectura continua de datos desde Arduino (tramas binarias o JSON)
+- Negociación del protocolo binario al conectar, con JSON como respaldo
+- Modo crudo: forma de onda completa en un flujo contiguo NumPy
+- Detector de resonancia en línea sobre la captura (eventos en vivo)
+- Lectura bloqueante (sin sondeo) con separación incremental de paquetes
+- Buffer circular columnar (NumPy) para datos en tiempo real
 - Manejo robusto de errores y reconexión
 ================================================================================
 """
@@ -19,9 +23,182 @@ import serial
 import serial.tools.list_ports
 import json
 import threading
-import queue
 import time
-from datetime import datetime
+from collections import deque
+
+import numpy as np
+
+from buffer_circular import BufferCircular
+from distribuidor import Distribuidor
+from detector_resonancia import DetectorResonancia
+from protocolo_binario import (DecodificadorTramas, decodificar_resumenes, decodificar_crudos,
+                               TIPO_RESUMEN, TIPO_CRUDO, ESCALA_VOLTIOS)
+
+
+# Tiempo máximo de espera de la confirmación del modo binario (s)
+TIMEOUT_NEGOCIACION = 1.5
+
+# Al abrir el puerto el Arduino se reinicia (DTR) y tarda ~2 s en arrancar
+ESPERA_REINICIO = 2.0
+
+# Segundos de forma de onda cruda que se conservan en memoria
+SEGUNDOS_FLUJO_CRUDO = 60
+
+# Resúmenes derivados del modo crudo: 10 por segundo sobre ventanas de
+# 500 muestras, como los que calcula el sketch
+RESUMENES_POR_SEGUNDO = 10
+VENTANA_RESUMEN = 500
+PASO_MUESTRAS_RESUMEN = 10
+
+# Frecuencias de muestreo del modo crudo que admite el sketch (Timer1 de
+# 16 bits con prescaler 64 abajo; ancho del enlace a 115200 baudios arriba)
+FRECUENCIA_CRUDO_MIN = 4
+FRECUENCIA_CRUDO_MAX = 4000
+
+# Saltos de secuencia mayores se toman como reinicio o desorden, no como
+# pérdida (la secuencia es de 16 bits)
+MAX_SALTO_SECUENCIA = 0x8000
+
+
+class SeparadorLineas:
+    """
+    Separa líneas de texto a partir de bytes recibidos en trozos arbitrarios
+    """
+    
+    def __init__(self, max_linea=8192):
+        """
+        Args:
+            max_linea: Longitud máxima de una línea; el exceso se descarta
+        """
+        self.max_linea = max_linea
+        self._parcial = bytearray()
+        self.lineas_descartadas = 0
+    
+    def alimentar(self, datos):
+        """
+        Agrega bytes y devuelve las líneas completas (sin espacios finales)
+        
+        Returns:
+            list: Cadenas de las líneas terminadas en '\\n'
+        """
+        self._parcial.extend(datos)
+        fin = self._parcial.rfind(b'\n')
+        if fin < 0:
+            if len(self._parcial) > self.max_linea:
+                self._parcial.clear()
+                self.lineas_descartadas += 1
+            return []
+        
+        completas = bytes(self._parcial[:fin])
+        del self._parcial[:fin + 1]
+        return [linea.decode('utf-8', errors='ignore').strip() for linea in completas.split(b'\n')]
+    
+    def reiniciar(self):
+        self._parcial.clear()
+
+
+class FlujoMuestras:
+    """
+    Forma de onda cruda en un buffer circular NumPy con reloj de muestreo
+
+    Cada muestra tiene un índice absoluto (el contador del sketch); su
+    instante es indice / frecuencia. Los huecos (bloques perdidos) se
+    rellenan con NaN para que el índice siga siendo el tiempo.
+    """
+    
+    def __init__(self, segundos=SEGUNDOS_FLUJO_CRUDO):
+        """
+        Args:
+            segundos: Duración retenida; la capacidad se fija al conocer la frecuencia
+        """
+        self.segundos = segundos
+        self.frecuencia = None
+        self.datos = np.empty(0, dtype=np.float32)
+        self.indice_siguiente = None   # Índice absoluto de la próxima muestra
+        self.muestras_recibidas = 0
+        self.muestras_perdidas = 0
+        self.lock = threading.Lock()
+    
+    def _reiniciar(self, frecuencia, indice):
+        self.frecuencia = frecuencia
+        self.datos = np.full(max(1, int(self.segundos * frecuencia)), np.nan, dtype=np.float32)
+        self.indice_siguiente = indice
+    
+    def _escribir(self, indice, valores):
+        """Copia valores en las posiciones circulares de indice en adelante"""
+        capacidad = len(self.datos)
+        if len(valores) > capacidad:
+            indice += len(valores) - capacidad
+            valores = valores[-capacidad:]
+        inicio = indice % capacidad
+        primera = min(len(valores), capacidad - inicio)
+        self.datos[inicio:inicio + primera] = valores[:primera]
+        self.datos[:len(valores) - primera] = valores[primera:]
+    
+    def agregar(self, indice, frecuencia, muestras_adc):
+        """
+        Agrega un bloque de muestras
+        
+        Args:
+            indice: Índice absoluto de la primera muestra
+            frecuencia: Frecuencia de muestreo (Hz)
+            muestras_adc: Cuentas ADC int16
+        """
+        with self.lock:
+            if (self.frecuencia != frecuencia or self.indice_siguiente is None
+                    or indice < self.indice_siguiente):
+                # Nueva sesión de muestreo (o reinicio del sketch)
+                self._reiniciar(frecuencia, indice)
+            
+            hueco = indice - self.indice_siguiente
+            if hueco > 0:
+                relleno = min(hueco, len(self.datos))
+                self._escribir(indice - relleno, np.full(relleno, np.nan, dtype=np.float32))
+                self.muestras_perdidas += hueco
+            
+            self._escribir(indice, np.asarray(muestras_adc, dtype=np.float32) * np.float32(ESCALA_VOLTIOS))
+            self.indice_siguiente = indice + len(muestras_adc)
+            self.muestras_recibidas += len(muestras_adc)
+    
+    def ventana(self, fin, n):
+        """
+        Copia contigua de las n muestras anteriores al índice absoluto fin
+        
+        Returns:
+            numpy.ndarray: Muestras en voltios (NaN en huecos); puede ser
+                más corta si el buffer no retiene tanto
+        """
+        with self.lock:
+            if self.indice_siguiente is None:
+                return np.empty(0, dtype=np.float32)
+            capacidad = len(self.datos)
+            inicio = max(fin - n, self.indice_siguiente - capacidad, 0)
+            fin = min(fin, self.indice_siguiente)
+            if fin <= inicio:
+                return np.empty(0, dtype=np.float32)
+            posiciones = np.arange(inicio, fin) % capacidad
+            return self.datos[posiciones]
+    
+    def ultimas(self, n):
+        """
+        Obtiene las n muestras más recientes
+        
+        Returns:
+            tuple: (indice_inicial, muestras)
+        """
+        with self.lock:
+            fin = self.indice_siguiente or 0
+        muestras = self.ventana(fin, n)
+        return fin - len(muestras), muestras
+    
+    def obtener_estadisticas(self):
+        return {
+            'frecuencia': self.frecuencia,
+            'indice_siguiente': self.indice_siguiente,
+            'muestras_recibidas': self.muestras_recibidas,
+            'muestras_perdidas': self.muestras_perdidas,
+            'capacidad': len(self.datos)
+        }
 
 
 class ArduinoHandler:
@@ -29,22 +206,60 @@ class ArduinoHandler:
     Manejador de comunicación serial con Arduino
     """
     
-    def __init__(self, baudrate=115200, timeout=1):
+    def __init__(self, baudrate=115200, timeout=1, protocolo='auto', buffer=None,
+                 id_dispositivo=None, lector=None, abrir_puerto=None,
+                 espera_reinicio=ESPERA_REINICIO):
         """
         Inicializa el manejador de Arduino
         
         Args:
             baudrate: Velocidad de comunicación (default: 115200)
             timeout: Timeout para lectura serial (default: 1 segundo)
+            protocolo: 'auto' (binario si el sketch lo admite), 'binario' o 'json'
+            buffer: BufferCircular donde escribir los paquetes (p. ej. un
+                BufferCompartido del daemon de adquisición); None crea uno
+            id_dispositivo: Identificador del sensor en un RegistroSensores
+            lector: LectorSerial compartido que atiende este puerto junto
+                con otros (None: un hilo de captura propio)
+            abrir_puerto: callable(puerto, baudrate, timeout) que devuelve un
+                objeto con la interfaz de serial.Serial (p. ej.
+                ArduinoSimulado.abrir); None abre un puerto serie real
+            espera_reinicio: Segundos de espera tras abrir el puerto
         """
+        self.id_dispositivo = id_dispositivo
+        self.lector = lector
         self.baudrate = baudrate
         self.timeout = timeout
+        self.protocolo_preferido = protocolo
+        self.protocolo = 'json'
         self.puerto = None
+        self.abrir_puerto = abrir_puerto or abrir_puerto_serial
+        self.espera_reinicio = espera_reinicio
         self.serial_conn = None
         self.conectado = False
         
-        # Buffer thread-safe para datos
-        self.buffer_datos = queue.Queue(maxsize=1000)
+        # Estado del protocolo binario
+        self.decodificador = DecodificadorTramas()
+        self.separador = SeparadorLineas()
+        self._pendientes = deque()
+        self._ultima_secuencia = None
+        
+        # Modo crudo
+        self.modo_crudo = False
+        self.flujo = FlujoMuestras()
+        self._proximo_resumen = None
+        self._contador_resumenes = 0
+        
+        # Detector de resonancia (None: desactivado); lo alimenta el hilo de captura
+        self.detector = None
+        
+        # Buffer circular columnar: el hilo de captura es el único productor
+        self.buffer_datos = buffer if buffer is not None else BufferCircular()
+        
+        # Cada consumidor lee con su propia suscripción; obtener_dato() y
+        # obtener_lote_datos() usan una suscripción interna
+        self.distribuidor = Distribuidor(self.buffer_datos)
+        self._suscripcion = self.distribuidor.suscribir('obtener_dato', desde=0)
         
         # Control de hilos
         self.hilo_lectura = None
@@ -54,6 +269,8 @@ class ArduinoHandler:
         # Estadísticas
         self.paquetes_recibidos = 0
         self.paquetes_perdidos = 0
+        self.tramas_duplicadas = 0
+        self.reinicios_secuencia = 0
         self.ultimo_timestamp = 0
     
     def detectar_arduino(self):
@@ -98,6 +315,11 @@ class ArduinoHandler:
         Returns:
             bool: True si la conexión fue exitosa, False en caso contrario
         """
+        # Reconectar sin cerrar dejaría al lector con el descriptor viejo
+        # y la captura (ya activa) nunca leería el puerto nuevo
+        if self.serial_conn is not None and self.serial_conn.is_open:
+            self.desconectar()
+        
         try:
             # Detectar puerto si no se especifica
             if puerto is None:
@@ -109,17 +331,10 @@ class ArduinoHandler:
             
             # Intentar conexión
             print(f"\n🔌 Conectando a {puerto} a {self.baudrate} baudios...")
-            self.serial_conn = serial.Serial(
-                port=puerto,
-                baudrate=self.baudrate,
-                timeout=self.timeout,
-                bytesize=serial.EIGHTBITS,
-                parity=serial.PARITY_NONE,
-                stopbits=serial.STOPBITS_ONE
-            )
+            self.serial_conn = self.abrir_puerto(puerto, self.baudrate, self.timeout)
             
             # Esperar inicialización de Arduino
-            time.sleep(2)
+            time.sleep(self.espera_reinicio)
             
             # Limpiar buffer
             self.serial_conn.reset_input_buffer()
@@ -134,6 +349,17 @@ class ArduinoHandler:
                 linea = self.serial_conn.readline().decode('utf-8', errors='ignore').strip()
                 print(f"📡 Arduino dice: {linea}")
             
+            # Negociar el protocolo binario (sketches antiguos solo hablan JSON)
+            self.protocolo = 'json'
+            if self.protocolo_preferido != 'json':
+                if self._negociar_binario():
+                    self.protocolo = 'binario'
+                elif self.protocolo_preferido == 'binario':
+                    print("✗ El sketch no admite el protocolo binario")
+                    self.desconectar()
+                    return False
+            print(f"📦 Protocolo: {self.protocolo}")
+            
             return True
             
         except serial.SerialException as e:
@@ -145,6 +371,33 @@ class ArduinoHandler:
             self.conectado = False
             return False
     
+    def _negociar_binario(self):
+        """
+        Solicita al sketch el modo binario y espera su confirmación
+        
+        Returns:
+            bool: True si el sketch confirmó el modo binario
+        """
+        self.serial_conn.write(b'MODO BIN\n')
+        self.serial_conn.flush()
+        
+        limite = time.time() + TIMEOUT_NEGOCIACION
+        while time.time() < limite:
+            linea = self.serial_conn.readline().decode('utf-8', errors='ignore').strip()
+            # Los paquetes JSON que sigan llegando antes de la confirmación se descartan
+            if linea.startswith('{') and '"modo"' in linea:
+                try:
+                    respuesta = json.loads(linea)
+                except json.JSONDecodeError:
+                    continue
+                if respuesta.get('modo') == 'binario':
+                    self.decodificador.reiniciar()
+                    self.separador.reiniciar()
+                    self._pendientes.clear()
+                    self._ultima_secuencia = None
+                    return True
+        return False
+    
     def desconectar(self):
         """
         Cierra la conexión serial de forma segura
@@ -158,66 +411,295 @@ class ArduinoHandler:
     
     def leer_dato(self):
         """
-        Lee un paquete JSON desde Arduino
+        Lee un paquete desde Arduino (binario o JSON según lo negociado)
+        
+        No bloquea: procesa los bytes ya recibidos y devuelve el siguiente
+        paquete completo, si lo hay.
         
         Returns:
-            dict: Datos parseados o None si hay error
+            dict: Datos parseados o None si no hay un paquete completo
         """
         try:
-            if not self.serial_conn or not self.serial_conn.is_open:
-                return None
-            
-            if self.serial_conn.in_waiting:
-                linea = self.serial_conn.readline().decode('utf-8', errors='ignore').strip()
-                
-                # Parsear JSON
-                if linea.startswith('{') and linea.endswith('}'):
-                    dato = json.loads(linea)
-                    
-                    # Agregar timestamp local
-                    dato['timestamp_local'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-                    
-                    self.paquetes_recibidos += 1
-                    return dato
-                    
-        except json.JSONDecodeError:
-            self.paquetes_perdidos += 1
-            return None
+            if not self._pendientes and self.serial_conn and self.serial_conn.is_open:
+                if self.serial_conn.in_waiting:
+                    self._procesar_bytes(self.serial_conn.read(self.serial_conn.in_waiting))
         except Exception as e:
             print(f"Error en lectura: {e}")
+        
+        return self._pendientes.popleft() if self._pendientes else None
+    
+    def _leer_bloque(self):
+        """
+        Espera datos del puerto sin sondeo activo
+        
+        read() bloquea en el descriptor (select en POSIX, evento de
+        overlapped I/O en Windows) hasta que llega al menos un byte o vence
+        el timeout; luego se recoge de una vez todo lo que haya en el buffer.
+        
+        Returns:
+            bytes: Datos leídos (vacío si venció el timeout)
+        """
+        datos = self.serial_conn.read(1)
+        if datos:
+            pendientes = self.serial_conn.in_waiting
+            if pendientes:
+                datos += self.serial_conn.read(pendientes)
+        return datos
+    
+    def _procesar_bytes(self, datos):
+        """
+        Separa los paquetes completos de un trozo de bytes y los deja en
+        la cola de pendientes (los paquetes partidos quedan en el separador)
+        """
+        if self.protocolo == 'binario':
+            self._procesar_tramas(self.decodificador.alimentar(datos))
+            return
+        
+        for linea in self.separador.alimentar(datos):
+            # Parsear JSON
+            if not (linea.startswith('{') and linea.endswith('}')):
+                continue
+            try:
+                dato = json.loads(linea)
+            except json.JSONDecodeError:
+                self.paquetes_perdidos += 1
+                continue
+            if 'status' in dato:
+                # Mensajes de estado del sketch, no son paquetes de datos
+                continue
+            
+            # Agregar instante de recepción local
+            dato['tiempo_local'] = time.time()
+            
+            self.paquetes_recibidos += 1
+            self._pendientes.append(dato)
+    
+    def _procesar_tramas(self, tramas):
+        """
+        Decodifica en lote las tramas binarias completas
+        """
+        # Las tramas con CRC inválido se detectan como saltos de secuencia
+        resumenes = []
+        crudos = []
+        for tipo, secuencia, payload in tramas:
+            self._registrar_secuencia(secuencia)
+            if tipo == TIPO_RESUMEN:
+                resumenes.append(payload)
+            elif tipo == TIPO_CRUDO:
+                crudos.append(payload)
+        
+        llegada = time.time()
+        detector = self.detector
+        bloques = decodificar_crudos(crudos)
+        for indice, frecuencia, muestras in bloques:
+            self.flujo.agregar(indice, frecuencia, muestras)
+            if detector is not None:
+                detector.agregar_muestras(indice, frecuencia, muestras * ESCALA_VOLTIOS, llegada)
+        self.paquetes_recibidos += len(crudos)
+        if bloques:
+            self._pendientes.extend(self._resumenes_crudos(bloques[0][0]))
+        
+        tiempo_local = time.time()
+        for dato in decodificar_resumenes(resumenes):
+            dato['tiempo_local'] = tiempo_local
+            self._pendientes.append(dato)
+        self.paquetes_recibidos += len(resumenes)
+    
+    def _resumenes_crudos(self, indice_lote):
+        """
+        Deriva del flujo crudo los paquetes de resumen que espera el resto de
+        la aplicación (mismas claves que el paquete JSON del sketch)
+        
+        Args:
+            indice_lote: Índice de la primera muestra recién agregada
+        """
+        flujo = self.flujo
+        paso = max(1, flujo.frecuencia // RESUMENES_POR_SEGUNDO)
+        if self._proximo_resumen is None or self._proximo_resumen > flujo.indice_siguiente:
+            self._proximo_resumen = indice_lote
+        
+        paquetes = []
+        tiempo_local = time.time()
+        while self._proximo_resumen + paso <= flujo.indice_siguiente:
+            self._proximo_resumen += paso
+            muestras = flujo.ventana(self._proximo_resumen, VENTANA_RESUMEN)
+            muestras = muestras[np.isfinite(muestras)].astype(float)
+            if len(muestras) == 0:
+                continue
+            
+            rms = float(np.sqrt(np.mean(muestras**2)))
+            maximo = float(np.max(np.abs(muestras)))
+            paquetes.append({
+                'id': self._contador_resumenes,
+                'rms': rms,
+                'max': maximo,
+                'min': float(np.min(muestras)),
+                'media': float(np.mean(muestras)),
+                'std': float(np.std(muestras)),
+                'crest': maximo / rms if rms > 0.001 else 0.0,
+                'timestamp': int(self._proximo_resumen * 1000 // flujo.frecuencia),
+                'samples': np.round(muestras[::PASO_MUESTRAS_RESUMEN], 4).tolist(),
+                'origen': 'crudo',
+                'tiempo_local': tiempo_local
+            })
+            self._contador_resumenes += 1
+        return paquetes
+    
+    def iniciar_modo_crudo(self, frecuencia=1000):
+        """
+        Pide al sketch la forma de onda completa (requiere protocolo binario)
+        
+        Args:
+            frecuencia: Frecuencia de muestreo en Hz (FRECUENCIA_CRUDO_MIN a
+                FRECUENCIA_CRUDO_MAX)
+            
+        Returns:
+            bool: True si se envió la orden
+            
+        Raises:
+            ValueError: Si la frecuencia está fuera de rango
+        """
+        if not FRECUENCIA_CRUDO_MIN <= frecuencia <= FRECUENCIA_CRUDO_MAX:
+            raise ValueError(f'La frecuencia del modo crudo debe estar entre '
+                             f'{FRECUENCIA_CRUDO_MIN} y {FRECUENCIA_CRUDO_MAX} Hz')
+        if not self.esta_conectado() or self.protocolo != 'binario':
+            return False
+        with self.lock:
+            self.serial_conn.write(f'MODO CRUDO {int(frecuencia)}\n'.encode())
+            self.serial_conn.flush()
+        self.modo_crudo = True
+        self._proximo_resumen = None
+        return True
+    
+    def detener_modo_crudo(self):
+        """
+        Vuelve a los paquetes de resumen del sketch
+        
+        Returns:
+            bool: True si se envió la orden
+        """
+        if not self.esta_conectado() or self.protocolo != 'binario':
+            return False
+        with self.lock:
+            self.serial_conn.write(b'MODO BIN\n')
+            self.serial_conn.flush()
+        self.modo_crudo = False
+        return True
+    
+    def obtener_muestras_crudas(self, n=None, segundos=None):
+        """
+        Obtiene las muestras crudas más recientes
+        
+        Args:
+            n: Número de muestras
+            segundos: Alternativa a n, en segundos de forma de onda
+        
+        Returns:
+            dict: frecuencia, indice_inicial y muestras (voltios, NaN en huecos)
+        """
+        if segundos is not None:
+            n = int(segundos * (self.flujo.frecuencia or 0))
+        indice_inicial, muestras = self.flujo.ultimas(n)
+        return {
+            'frecuencia': self.flujo.frecuencia,
+            'indice_inicial': indice_inicial,
+            'muestras': muestras
+        }
+    
+    def configurar_detector(self, frecuencia=None, **opciones):
+        """
+        Activa (o reemplaza) el detector de resonancia de la captura
+        
+        Args:
+            frecuencia: f_n esperada en Hz; None desactiva el detector
+            **opciones: umbral, ancho_relativo, n_bins, ventana (ver
+                DetectorResonancia)
+        
+        Returns:
+            dict: Estado del detector, o None si quedó desactivado
+        
+        Raises:
+            ValueError: Parámetros del detector no válidos
+        """
+        if frecuencia is None:
+            self.detector = None
             return None
+        self.detector = DetectorResonancia(frecuencia, id_dispositivo=self.id_dispositivo, **opciones)
+        return self.detector.obtener_estadisticas()
+    
+    def eventos_resonancia(self, desde=0):
+        """
+        Eventos del detector con secuencia mayor que `desde`
         
-        return None
+        Returns:
+            list: Eventos de inicio/fin de resonancia (vacía sin detector)
+        """
+        detector = self.detector
+        return detector.eventos(desde) if detector is not None else []
+    
+    def _registrar_secuencia(self, secuencia):
+        """
+        Cuenta como perdidas las tramas que faltan en la secuencia
+        
+        Una trama repetida (salto 0) no cuenta, y un salto mayor que
+        MAX_SALTO_SECUENCIA se toma como reinicio del sketch o trama
+        desordenada: la secuencia se vuelve a sincronizar sin sumar pérdidas.
+        """
+        if self._ultima_secuencia is not None:
+            salto = (secuencia - self._ultima_secuencia) & 0xFFFF
+            if salto == 0:
+                self.tramas_duplicadas += 1
+                return
+            if salto > MAX_SALTO_SECUENCIA:
+                self.reinicios_secuencia += 1
+            else:
+                self.paquetes_perdidos += salto - 1
+        self._ultima_secuencia = secuencia
     
     def _captura_continua(self):
         """
         Función interna para captura continua en hilo separado
+        
+        El hilo duerme dentro de read() mientras no llegan datos: sin
+        sondeo de in_waiting ni pausas fijas entre lecturas.
         """
         print("▶ Captura iniciada en segundo plano")
         
         while self.capturando:
             try:
-                dato = self.leer_dato()
-                
-                if dato:
-                    # Agregar al buffer si no está lleno
-                    try:
-                        self.buffer_datos.put_nowait(dato)
-                    except queue.Full:
-                        # Buffer lleno, descartar dato más antiguo
-                        try:
-                            self.buffer_datos.get_nowait()
-                            self.buffer_datos.put_nowait(dato)
-                        except:
-                            pass
-                
-                # Pequeña pausa para no saturar CPU
-                time.sleep(0.001)
-                
+                datos = self._leer_bloque()
+                if datos:
+                    self.consumir(datos)
+            except serial.SerialException as e:
+                # Placa desconectada: reintentar solo repetiría el error
+                if self.capturando:
+                    print(f"✗ Error de lectura: {e}")
+                    self.capturando = False
+                    self.conectado = False
+                break
             except Exception as e:
+                if not self.capturando:
+                    break
                 print(f"Error en captura continua: {e}")
                 time.sleep(0.1)
     
+    def consumir(self, datos):
+        """
+        Procesa bytes recibidos y publica los paquetes completos en el buffer
+        (desde el hilo de captura propio o desde el LectorSerial)
+        """
+        self._procesar_bytes(datos)
+        
+        # Al llenarse, el anillo sobrescribe los paquetes más antiguos
+        detector = self.detector
+        while self._pendientes:
+            dato = self._pendientes.popleft()
+            if detector is not None and dato.get('origen') != 'crudo':
+                # Los resúmenes derivados del modo crudo ya pasaron por el detector como muestras
+                detector.agregar_paquete(dato.get('samples'), dato['tiempo_local'], dato.get('id'),
+                                         dato['timestamp'] / 1000 if 'timestamp' in dato else None)
+            self.buffer_datos.escribir(dato)
+    
     def iniciar_captura(self):
         """
         Inicia la captura continua de datos en un hilo separado
@@ -234,6 +716,9 @@ class ArduinoHandler:
             return True
         
         self.capturando = True
+        if self.lector is not None:
+            self.lector.agregar(self)
+            return True
         self.hilo_lectura = threading.Thread(target=self._captura_continua, daemon=True)
         self.hilo_lectura.start()
         
@@ -245,10 +730,33 @@ class ArduinoHandler:
         """
         if self.capturando:
             self.capturando = False
+            if self.lector is not None:
+                self.lector.quitar(self)
+                print("⏸ Captura detenida")
+                return
+            # Despertar al hilo si está bloqueado en read()
+            if self.serial_conn and hasattr(self.serial_conn, 'cancel_read'):
+                try:
+                    self.serial_conn.cancel_read()
+                except Exception:
+                    pass
             if self.hilo_lectura:
                 self.hilo_lectura.join(timeout=2)
             print("⏸ Captura detenida")
     
+    def suscribir(self, nombre='', desde=None):
+        """
+        Crea una suscripción propia a los datos del sensor
+        
+        Args:
+            nombre: Etiqueta para las métricas
+            desde: Índice absoluto del primer paquete (None: solo nuevos)
+            
+        Returns:
+            Suscripcion: Cursor independiente sobre el buffer
+        """
+        return self.distribuidor.suscribir(nombre, desde)
+    
     def obtener_dato(self, timeout=0.1):
         """
         Obtiene el siguiente dato del buffer
@@ -259,15 +767,16 @@ class ArduinoHandler:
         Returns:
             dict: Dato del sensor o None si no hay datos disponibles
         """
-        try:
-            return self.buffer_datos.get(timeout=timeout)
-        except queue.Empty:
-            return None
+        datos = self.obtener_lote_datos(cantidad=1, timeout=timeout)
+        return datos[0] if datos else None
     
     def obtener_lote_datos(self, cantidad=10, timeout=5):
         """
         Obtiene un lote de datos del buffer
         
+        Espera hasta `cantidad` paquetes nuevos (o hasta el timeout) y los
+        lee de una sola ventana del anillo.
+        
         Args:
             cantidad: Número de datos a obtener
             timeout: Tiempo máximo total de espera
@@ -275,25 +784,13 @@ class ArduinoHandler:
         Returns:
             list: Lista de datos capturados
         """
-        datos = []
-        tiempo_inicio = time.time()
-        
-        while len(datos) < cantidad and (time.time() - tiempo_inicio) < timeout:
-            dato = self.obtener_dato(timeout=0.1)
-            if dato:
-                datos.append(dato)
-        
-        return datos
+        return self._suscripcion.leer_paquetes(max_paquetes=cantidad, timeout=timeout, minimo=cantidad)
     
     def vaciar_buffer(self):
         """
-        Vacía el buffer de datos
+        Descarta los datos aún no leídos con obtener_dato()
         """
-        while not self.buffer_datos.empty():
-            try:
-                self.buffer_datos.get_nowait()
-            except queue.Empty:
-                break
+        self._suscripcion.saltar_al_final()
     
     def obtener_estadisticas(self):
         """
@@ -303,12 +800,22 @@ class ArduinoHandler:
             dict: Estadísticas de conexión y captura
         """
         return {
+            'dispositivo': self.id_dispositivo,
             'conectado': self.conectado,
             'puerto': self.puerto,
+            'protocolo': self.protocolo,
+            'errores_crc': self.decodificador.errores_crc,
+            'modo_crudo': self.modo_crudo,
+            'flujo_crudo': self.flujo.obtener_estadisticas(),
+            'detector': self.detector.obtener_estadisticas() if self.detector is not None else None,
             'capturando': self.capturando,
             'paquetes_recibidos': self.paquetes_recibidos,
             'paquetes_perdidos': self.paquetes_perdidos,
-            'buffer_size': self.buffer_datos.qsize(),
+            'tramas_duplicadas': self.tramas_duplicadas,
+            'reinicios_secuencia': self.reinicios_secuencia,
+            'buffer_size': self._suscripcion.retraso,
+            'buffer': self.buffer_datos.obtener_estadisticas(),
+            'paquetes_no_leidos': self._suscripcion.descartados,
             'tasa_perdida': (self.paquetes_perdidos / max(1, self.paquetes_recibidos + self.paquetes_perdidos)) * 100
         }
     
@@ -324,6 +831,23 @@ class ArduinoHandler:
 
 # ============ FUNCIONES DE UTILIDAD ============
 
+def abrir_puerto_serial(puerto, baudrate, timeout):
+    """
+    Abre un puerto serie real (8N1)
+    
+    Returns:
+        serial.Serial: Puerto abierto
+    """
+    return serial.Serial(
+        port=puerto,
+        baudrate=baudrate,
+        timeout=timeout,
+        bytesize=serial.EIGHTBITS,
+        parity=serial.PARITY_NONE,
+        stopbits=serial.STOPBITS_ONE
+    )
+
+
 def listar_puertos_disponibles():
     """
     Lista todos los puertos COM disponibles en Windows
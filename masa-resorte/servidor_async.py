@@ -0,0 +1,290 @@
+"""
+================================================================================
+SERVIDOR ASÍNCRONO (ASGI) PARA STREAMING
+Proyecto: Análisis de Resonancia en Sistema Masa-Resorte
+================================================================================
+
+Con el servidor de desarrollo de Flask cada conexión a /arduino/stream
+ocupa un hilo del sistema mientras dure. Este modo sirve el streaming y el
+estado desde un único event loop de asyncio (Starlette + Uvicorn), de modo
+que cientos de pantallas conectadas cuestan unas pocas corrutinas. El resto
+de rutas de app.py (cálculo, barrido, exportación, ...) se montan tal cual
+sobre un adaptador WSGI y siguen disponibles en el mismo puerto.
+
+Ambos modos comparten el mismo registro de sensores (app.sensores): los
+clientes asíncronos se suscriben al mismo distribuidor que los de Flask.
+
+Uso:
+    uvicorn servidor_async:aplicacion --port 5000
+
+Funcionalidades:
+- /arduino/stream: SSE por lotes con Last-Event-ID (mismo formato que Flask)
+- /arduino/ws: canal WebSocket con los mismos lotes
+- Avisos del detector de resonancia en ambos canales
+- /arduino/estado y /arduino/suscriptores sin pasar por hilos WSGI
+- Las mismas rutas por dispositivo: /arduino/<dispositivo>/stream, ...
+- Un hilo puente por dispositivo despierta a todos sus clientes
+- Los clientes al día comparten el mismo lote ya serializado
+================================================================================
+"""
+
+import asyncio
+import json
+import threading
+import time
+
+from starlette.applications import Starlette
+from starlette.middleware.wsgi import WSGIMiddleware
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Mount, Route, WebSocketRoute
+from starlette.websockets import WebSocketDisconnect
+
+import app as aplicacion_flask
+from app import (sensores, indice_reanudacion, parametros_lote, lote_stream, evento_sse, cursor_eventos,
+                 evento_resonancia_sse, INTERVALO_HEARTBEAT_SSE)
+from cache_resultados import CacheLRU
+from registro_sensores import DispositivoNoRegistrado, DISPOSITIVO_POR_DEFECTO
+
+
+class NotificadorAsync:
+    """
+    Puente entre el hilo de captura y el event loop
+
+    Un único hilo espera nuevos paquetes en el BufferCircular y despierta a
+    todas las corrutinas en espera; ningún cliente ocupa un hilo propio.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self._loop = None
+        self._evento = None
+        self._hilo = None
+        self._activo = False
+
+    def iniciar(self):
+        self._loop = asyncio.get_running_loop()
+        self._evento = asyncio.Event()
+        self._activo = True
+        self._hilo = threading.Thread(target=self._vigilar, daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        self._activo = False
+
+    def _vigilar(self):
+        visto = self.buffer.escritos
+        while self._activo:
+            if self.buffer.esperar(visto, timeout=1.0):
+                visto = self.buffer.escritos
+                self._loop.call_soon_threadsafe(self._despertar)
+
+    def _despertar(self):
+        # Cada espera usa el evento vigente; se reemplaza tras dispararlo
+        evento, self._evento = self._evento, asyncio.Event()
+        evento.set()
+
+    async def esperar(self, indice, timeout):
+        """
+        Espera (sin bloquear el loop) a que exista el paquete `indice`
+
+        Returns:
+            bool: True si el paquete ya fue escrito
+        """
+        limite = time.monotonic() + timeout
+        while self.buffer.escritos <= indice:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                return False
+            try:
+                await asyncio.wait_for(self._evento.wait(), restante)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+
+# Un notificador por dispositivo, creado con su primer cliente
+notificadores = {}
+
+
+def notificador_de(dispositivo, arduino):
+    notificador = notificadores.get(dispositivo)
+    if notificador is None:
+        notificador = NotificadorAsync(arduino.buffer_datos)
+        notificador.iniciar()
+        notificadores[dispositivo] = notificador
+    return notificador
+
+
+def detener_notificadores():
+    for notificador in notificadores.values():
+        notificador.detener()
+
+
+# Lotes serializados por (formato, dispositivo, desde, hasta): los clientes
+# que van al día reciben la misma ventana y no la vuelven a convertir a JSON
+cache_lotes = CacheLRU(tamano_maximo=256)
+
+
+def _serializar_lote(dispositivo, suscripcion, ventana, descartados_previos, formato):
+    """Evento SSE o mensaje WebSocket de una ventana"""
+    clave = None
+    if suscripcion.descartados == descartados_previos:
+        clave = (formato, dispositivo, ventana['inicio'], ventana['fin'])
+        texto = cache_lotes.obtener(clave)
+        if texto is not None:
+            return texto
+
+    lote = lote_stream(suscripcion, ventana, descartados_previos, dispositivo)
+    texto = evento_sse(lote) if formato == 'sse' else json.dumps({'tipo': 'lote', **lote})
+    if clave is not None:
+        cache_lotes.guardar(clave, texto)
+    return texto
+
+
+async def _siguiente_lote(notificador, suscripcion, max_lote, latencia, espera_maxima):
+    """
+    Espera el primer paquete pendiente (hasta `espera_maxima`) y luego hasta
+    `latencia` segundos a que se complete el lote
+
+    Returns:
+        dict: Ventana del buffer (vacía si no llegó nada)
+    """
+    if await notificador.esperar(suscripcion.cursor, espera_maxima) and latencia:
+        await notificador.esperar(suscripcion.cursor + max_lote - 1, latencia)
+    return suscripcion.leer(max_paquetes=max_lote)
+
+
+async def stream_datos(request):
+    """SSE por lotes; mismo protocolo que la ruta Flask /arduino/stream"""
+    dispositivo = request.path_params.get('dispositivo', DISPOSITIVO_POR_DEFECTO)
+    arduino = sensores.obtener(dispositivo)
+    try:
+        max_lote, latencia = parametros_lote(request.query_params)
+    except ValueError as e:
+        return JSONResponse({'success': False, 'error': str(e)}, status_code=400)
+    notificador = notificador_de(dispositivo, arduino)
+    desde = indice_reanudacion(request.headers.get('last-event-id', request.query_params.get('ultimo_id')),
+                               arduino.buffer_datos)
+    suscripcion = arduino.suscribir(f'sse-async {request.client.host if request.client else ""}', desde=desde)
+
+    async def generar_datos():
+        try:
+            yield "retry: 2000\n\n"
+            descartados_previos = suscripcion.descartados
+            ultimo_evento = cursor_eventos(arduino)
+            while arduino.esta_conectado():
+                ventana = await _siguiente_lote(notificador, suscripcion, max_lote, latencia,
+                                                INTERVALO_HEARTBEAT_SSE)
+                for evento in arduino.eventos_resonancia(ultimo_evento):
+                    ultimo_evento = evento['secuencia']
+                    yield evento_resonancia_sse(evento)
+                if ventana['fin'] > ventana['inicio']:
+                    evento = _serializar_lote(dispositivo, suscripcion, ventana, descartados_previos, 'sse')
+                    descartados_previos = suscripcion.descartados
+                    yield evento
+                else:
+                    yield ": heartbeat\n\n"
+        finally:
+            suscripcion.cancelar()
+
+    return StreamingResponse(generar_datos(), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+async def canal_websocket(websocket):
+    """
+    Canal WebSocket: envía {'tipo': 'lote', ...} con el mismo contenido que
+    los eventos SSE y {'tipo': 'resonancia', 'evento': ...} con los del
+    detector. El cliente puede pedir la reanudación con ?desde=<id>.
+    """
+    dispositivo = websocket.path_params.get('dispositivo', DISPOSITIVO_POR_DEFECTO)
+    try:
+        arduino = sensores.obtener(dispositivo)
+    except DispositivoNoRegistrado:
+        await websocket.close(code=4404)
+        return
+    try:
+        max_lote, latencia = parametros_lote(websocket.query_params)
+    except ValueError:
+        await websocket.close(code=4400)
+        return
+    notificador = notificador_de(dispositivo, arduino)
+
+    await websocket.accept()
+    desde = indice_reanudacion(websocket.query_params.get('desde'), arduino.buffer_datos)
+    suscripcion = arduino.suscribir(f'ws {websocket.client.host if websocket.client else ""}', desde=desde)
+
+    # La recepción corre aparte solo para detectar el cierre del cliente
+    cerrado = asyncio.Event()
+
+    async def recibir():
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            cerrado.set()
+
+    receptor = asyncio.create_task(recibir())
+    try:
+        descartados_previos = suscripcion.descartados
+        ultimo_evento = cursor_eventos(arduino)
+        while not cerrado.is_set() and arduino.esta_conectado():
+            ventana = await _siguiente_lote(notificador, suscripcion, max_lote, latencia,
+                                            INTERVALO_HEARTBEAT_SSE)
+            for evento in arduino.eventos_resonancia(ultimo_evento):
+                ultimo_evento = evento['secuencia']
+                await websocket.send_text(json.dumps({'tipo': 'resonancia', 'evento': evento}))
+            if ventana['fin'] > ventana['inicio']:
+                mensaje = _serializar_lote(dispositivo, suscripcion, ventana, descartados_previos, 'ws')
+                descartados_previos = suscripcion.descartados
+                await websocket.send_text(mensaje)
+            else:
+                await websocket.send_text('{"tipo": "heartbeat"}')
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        receptor.cancel()
+        suscripcion.cancelar()
+        if not cerrado.is_set():
+            await websocket.close()
+
+
+async def estado_arduino(request):
+    """Estado de la conexión (sin ocupar un hilo WSGI)"""
+    arduino = sensores.obtener(request.path_params.get('dispositivo', DISPOSITIVO_POR_DEFECTO))
+    return JSONResponse({'success': True, 'estado': arduino.obtener_estadisticas()})
+
+
+async def suscriptores_arduino(request):
+    """Métricas por consumidor del sensor"""
+    arduino = sensores.obtener(request.path_params.get('dispositivo', DISPOSITIVO_POR_DEFECTO))
+    return JSONResponse({'success': True, **arduino.distribuidor.obtener_estadisticas()})
+
+
+async def dispositivo_no_registrado(request, exc):
+    return JSONResponse({'success': False, 'error': str(exc)}, status_code=404)
+
+
+aplicacion = Starlette(
+    routes=[
+        Route('/arduino/stream', stream_datos),
+        Route('/arduino/{dispositivo}/stream', stream_datos),
+        WebSocketRoute('/arduino/ws', canal_websocket),
+        WebSocketRoute('/arduino/{dispositivo}/ws', canal_websocket),
+        Route('/arduino/estado', estado_arduino),
+        Route('/arduino/{dispositivo}/estado', estado_arduino),
+        Route('/arduino/suscriptores', suscriptores_arduino),
+        Route('/arduino/{dispositivo}/suscriptores', suscriptores_arduino),
+        # Rutas numéricas, archivos estáticos y el resto de la API de Flask
+        Mount('/', WSGIMiddleware(aplicacion_flask.app))
+    ],
+    exception_handlers={DispositivoNoRegistrado: dispositivo_no_registrado},
+    on_shutdown=[detener_notificadores]
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(aplicacion, host='127.0.0.1', port=5000)
@@ -0,0 +1,228 @@
+"""
+================================================================================
+SOLUCIÓN ANALÍTICA DEL OSCILADOR LINEAL FORZADO
+Proyecto: Análisis de Resonancia en Sistema Masa-Resorte
+================================================================================
+
+Este módulo resuelve en forma cerrada la ecuación
+
+    m·x'' + c·x' + k·x = F0·cos(w·t)
+
+para los tres regímenes de amortiguamiento (subamortiguado, crítico y
+sobreamortiguado). La respuesta completa (transitorio + estado estacionario)
+se evalúa en una sola pasada vectorizada de NumPy, sin integración numérica.
+
+Funcionalidades:
+- Desplazamiento, velocidad y aceleración exactos x(t), v(t), a(t)
+- Parámetros con broadcasting (lotes de m, k, c, F0, w contra el vector t)
+- Respaldo con odeint para los casos no cubiertos (resonancia sin
+  amortiguamiento, donde la respuesta crece linealmente)
+================================================================================
+"""
+
+import numpy as np
+from scipy.integrate import odeint
+
+
+# Tolerancia en ζ para tratar el sistema como críticamente amortiguado.
+# Cerca de ζ = 1 las fórmulas sub/sobreamortiguadas pierden precisión por
+# cancelación; la expresión crítica tiene error O(|ζ - 1|).
+TOLERANCIA_CRITICO = 1e-6
+
+
+def sistema_masa_resorte(y, t, m, k, c, F0, w_fuerza):
+    """Define el sistema de ecuaciones diferenciales de primer orden."""
+    F_externa = F0 * np.cos(w_fuerza * t)
+    x, v = y
+    dvdt = (F_externa - c * v - k * x) / m
+    dxdt = v
+    return [dxdt, dvdt]
+
+
+def mascara_cubierta(m, k, c, w_fuerza):
+    """
+    Indica, elemento a elemento, si la solución cerrada es válida
+
+    El único caso lineal no cubierto es la resonancia exacta sin
+    amortiguamiento (c = 0 y w = w_n), donde la amplitud estacionaria
+    no existe.
+
+    Returns:
+        numpy.ndarray: Arreglo booleano con la forma del lote
+    """
+    m, k, c, w = (np.asarray(p, dtype=float) for p in (m, k, c, w_fuerza))
+    denominador = (k - m * w**2)**2 + (c * w)**2
+    return (denominador > 0) & (m > 0) & (k > 0) & (c >= 0)
+
+
+def cubierto_analiticamente(m, k, c, F0, w_fuerza):
+    """
+    Indica si la solución cerrada es válida para los parámetros dados
+
+    Returns:
+        bool: True si todos los elementos del lote tienen solución cerrada
+    """
+    return bool(np.all(mascara_cubierta(m, k, c, w_fuerza)))
+
+
+def respuesta_analitica(t, m, k, c, F0, w_fuerza, x0=0.0, v0=0.0):
+    """
+    Evalúa la respuesta exacta del oscilador forzado
+
+    Todos los parámetros admiten broadcasting contra `t`. Para evaluar un
+    lote de N sistemas sobre n instantes, pasar parámetros con forma (N, 1)
+    y `t` con forma (n,); el resultado tendrá forma (N, n).
+
+    Args:
+        t: Instantes de evaluación (s)
+        m, k, c: Masa (kg), rigidez (N/m) y amortiguamiento (N·s/m)
+        F0: Amplitud de la fuerza (N)
+        w_fuerza: Frecuencia angular de la fuerza (rad/s)
+        x0, v0: Condiciones iniciales
+
+    Returns:
+        tuple: (x, v, a) desplazamiento, velocidad y aceleración
+    """
+    t = np.asarray(t, dtype=float)
+    m, k, c, F0, w, x0, v0 = (np.asarray(p, dtype=float) for p in (m, k, c, F0, w_fuerza, x0, v0))
+
+    w_n = np.sqrt(k / m)
+    zeta = c / (2 * np.sqrt(m * k))
+    sigma = zeta * w_n
+
+    # Estado estacionario: x_p = A·cos(wt) + B·sin(wt)
+    rigidez_dinamica = k - m * w**2
+    denominador = rigidez_dinamica**2 + (c * w)**2
+    A = F0 * rigidez_dinamica / denominador
+    B = F0 * c * w / denominador
+
+    coseno = np.cos(w * t)
+    seno = np.sin(w * t)
+    x = A * coseno + B * seno
+    v = w * (B * coseno - A * seno)
+
+    # Transitorio: condiciones iniciales de la solución homogénea
+    xh0 = x0 - A
+    vh0 = v0 - B * w
+
+    forma = np.broadcast_shapes(t.shape, zeta.shape, xh0.shape, vh0.shape)
+    x_h = np.zeros(forma)
+    v_h = np.zeros(forma)
+
+    critico = np.abs(zeta - 1) < TOLERANCIA_CRITICO
+    sub = (zeta < 1) & ~critico
+    sobre = (zeta > 1) & ~critico
+
+    if np.any(sub):
+        w_d = w_n * np.sqrt(np.where(sub, 1 - zeta**2, 1.0))
+        C1 = xh0
+        C2 = (vh0 + sigma * xh0) / w_d
+        envolvente = np.exp(-sigma * t)
+        cos_d = np.cos(w_d * t)
+        sin_d = np.sin(w_d * t)
+        x_sub = envolvente * (C1 * cos_d + C2 * sin_d)
+        v_sub = envolvente * ((w_d * C2 - sigma * C1) * cos_d - (w_d * C1 + sigma * C2) * sin_d)
+        x_h = np.where(sub, x_sub, x_h)
+        v_h = np.where(sub, v_sub, v_h)
+
+    if np.any(critico):
+        C1 = xh0
+        C2 = vh0 + w_n * xh0
+        envolvente = np.exp(-w_n * t)
+        x_crit = (C1 + C2 * t) * envolvente
+        v_crit = (C2 - w_n * (C1 + C2 * t)) * envolvente
+        x_h = np.where(critico, x_crit, x_h)
+        v_h = np.where(critico, v_crit, v_h)
+
+    if np.any(sobre):
+        # Valores de relleno con ζ > 1 fuera de la máscara para evitar overflow
+        zeta_sobre = np.where(sobre, zeta, 2.0)
+        raiz = w_n * np.sqrt(zeta_sobre**2 - 1)
+        r1 = -zeta_sobre * w_n + raiz
+        r2 = -zeta_sobre * w_n - raiz
+        C2 = (vh0 - r1 * xh0) / (r2 - r1)
+        C1 = xh0 - C2
+        e1 = np.exp(r1 * t)
+        e2 = np.exp(r2 * t)
+        x_h = np.where(sobre, C1 * e1 + C2 * e2, x_h)
+        v_h = np.where(sobre, r1 * C1 * e1 + r2 * C2 * e2, v_h)
+
+    x = x + x_h
+    v = v + v_h
+    a = (F0 * coseno - c * v - k * x) / m
+
+    return x, v, a
+
+
+def resolver_respuesta(t, m, k, c, F0, w_fuerza, y0=(0.0, 0.0)):
+    """
+    Resuelve el sistema con la solución cerrada, o con odeint si no aplica
+
+    Args:
+        t: Vector de tiempo (s)
+        m, k, c, F0, w_fuerza: Parámetros escalares del sistema
+        y0: Condiciones iniciales (x0, v0)
+
+    Returns:
+        tuple: (sol, aceleracion) con `sol` de forma (n, 2) como odeint
+    """
+    t = np.asarray(t, dtype=float)
+
+    if cubierto_analiticamente(m, k, c, F0, w_fuerza):
+        x, v, aceleracion = respuesta_analitica(t, m, k, c, F0, w_fuerza, y0[0], y0[1])
+        return np.column_stack((x, v)), aceleracion
+
+    sol = odeint(sistema_masa_resorte, list(y0), t, args=(m, k, c, F0, w_fuerza))
+    aceleracion = (F0 * np.cos(w_fuerza * t) - c * sol[:, 1] - k * sol[:, 0]) / m
+    return sol, aceleracion
+
+
+def respuesta_frecuencia(m, k, c, F0, w_fuerza):
+    """
+    Respuesta en estado estacionario (FRF) con broadcasting completo
+
+    Para un barrido de N amortiguamientos por M frecuencias, pasar `c` con
+    forma (N, 1) y `w_fuerza` con forma (M,); todas las salidas tendrán
+    forma (N, M).
+
+    Returns:
+        dict: amplitud (m), fase (rad, atraso respecto a la fuerza),
+        transmisibilidad (fuerza transmitida / F0) y aceleración pico (m/s²)
+    """
+    m, k, c, F0, w = (np.asarray(p, dtype=float) for p in (m, k, c, F0, w_fuerza))
+
+    rigidez_dinamica = k - m * w**2
+    amortiguacion = c * w
+    modulo = np.hypot(rigidez_dinamica, amortiguacion)
+
+    with np.errstate(divide='ignore'):
+        amplitud = F0 / modulo
+        transmisibilidad = np.hypot(k, amortiguacion) / modulo
+
+    return {
+        'amplitud': amplitud,
+        'fase': np.arctan2(amortiguacion, rigidez_dinamica),
+        'transmisibilidad': transmisibilidad,
+        'aceleracion_pico': amplitud * w**2
+    }
+
+
+def estadisticas_lote(serie):
+    """
+    Versión vectorizada de analisis_estadistico() sobre el último eje
+
+    Returns:
+        dict: Mismas claves que analisis_estadistico(), con arreglos de la
+        forma del lote en lugar de escalares
+    """
+    absoluto = np.abs(serie)
+    rms = np.sqrt(np.mean(serie**2, axis=-1))
+    maximo = np.max(absoluto, axis=-1)
+    return {
+        'RMS': rms,
+        'Máximo': maximo,
+        'Mínimo': np.min(absoluto, axis=-1),
+        'Media': np.mean(absoluto, axis=-1),
+        'Desviación Estándar': np.std(serie, axis=-1),
+        'Factor de Cresta': maximo / rms
+    }
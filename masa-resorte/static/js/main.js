@@ -25,7 +25,7 @@ document.addEventListener('DOMContentLoaded', function() {
 
         // Recopilar datos del formulario
         const formData = new FormData(form);
-        formData.append('guardar_datos', document.getElementById('guardar_datos').checked);
+        formData.delete('guardar_datos');
 
         try {
             const response = await fetch('/calcular', {
@@ -43,38 +43,24 @@ document.addEventListener('DOMContentLoaded', function() {
             loading.style.display = 'none';
             results.style.display = 'block';
 
-            // Actualizar características del sistema
-            document.getElementById('frecuencia_natural').textContent = data.parametros.frecuencia_natural.toFixed(2);
-            document.getElementById('frecuencia_angular').textContent = data.parametros.frecuencia_angular.toFixed(2);
-            document.getElementById('factor_amortiguamiento').textContent = data.parametros.factor_amortiguamiento.toFixed(3);
-            document.getElementById('tipo_amortiguamiento').textContent = data.parametros.tipo_amortiguamiento;
-
-            // Actualizar evaluación de riesgo
-            const riesgoAlert = document.getElementById('riesgoAlert');
-            riesgoAlert.className = 'alert alert-' + data.riesgo.color;
-            document.getElementById('nivelRiesgo').textContent = data.riesgo.nivel;
-            document.getElementById('descripcionRiesgo').textContent = data.riesgo.descripcion;
-            
-            if (data.riesgo.advertencia_adicional) {
-                document.getElementById('advertenciaAdicional').style.display = 'block';
-            } else {
-                document.getElementById('advertenciaAdicional').style.display = 'none';
-            }
+            actualizarResultadosNumericos(data);
+            document.getElementById('indicadorAproximado').style.display = 'none';
 
-            // Actualizar análisis comparativo
-            document.getElementById('rms_normal').textContent = data.stats_normal.RMS.toFixed(4) + ' m';
-            document.getElementById('max_normal').textContent = data.stats_normal['Máximo'].toFixed(4) + ' m';
-            document.getElementById('rms_resonancia').textContent = data.stats_resonancia.RMS.toFixed(4) + ' m';
-            document.getElementById('max_resonancia').textContent = data.stats_resonancia['Máximo'].toFixed(4) + ' m';
-            document.getElementById('amplificacion').textContent = data.amplificacion_rms + 'x';
-
-            // Actualizar análisis de aceleración
-            document.getElementById('acel_rms').textContent = data.stats_aceleracion.RMS.toFixed(4);
-            document.getElementById('acel_max').textContent = data.stats_aceleracion['Máximo'].toFixed(4);
-            document.getElementById('acel_cresta').textContent = data.stats_aceleracion['Factor de Cresta'].toFixed(2);
+            // Descarga de los datos en CSV (generada en flujo por el servidor)
+            if (document.getElementById('guardar_datos').checked) {
+                const parametros = new URLSearchParams({ formato: 'csv' });
+                ['masa', 'constante_resorte', 'amortiguamiento', 'fuerza'].forEach(campo => {
+                    parametros.set(campo, formData.get(campo));
+                });
+                descargar('/exportar/simulacion?' + parametros);
+            }
 
             // Actualizar gráficas
-            document.getElementById('graficas').src = 'data:image/png;base64,' + data.imagen_graficas;
+            if (data.series) {
+                mostrarGraficasSimulacion(data.series);
+            } else {
+                mostrarImagenGraficas(data.url_graficas);
+            }
 
         } catch (err) {
             loading.style.display = 'none';
@@ -83,6 +69,322 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     });
 
+    // Actualiza los valores numéricos de /calcular (modo exacto o rápido)
+    function actualizarResultadosNumericos(data) {
+        // Actualizar características del sistema
+        document.getElementById('frecuencia_natural').textContent = data.parametros.frecuencia_natural.toFixed(2);
+        document.getElementById('frecuencia_angular').textContent = data.parametros.frecuencia_angular.toFixed(2);
+        document.getElementById('factor_amortiguamiento').textContent = data.parametros.factor_amortiguamiento.toFixed(3);
+        document.getElementById('tipo_amortiguamiento').textContent = data.parametros.tipo_amortiguamiento;
+
+        // Actualizar evaluación de riesgo
+        const riesgoAlert = document.getElementById('riesgoAlert');
+        riesgoAlert.className = 'alert alert-' + data.riesgo.color;
+        document.getElementById('nivelRiesgo').textContent = data.riesgo.nivel;
+        document.getElementById('descripcionRiesgo').textContent = data.riesgo.descripcion;
+        
+        if (data.riesgo.advertencia_adicional) {
+            document.getElementById('advertenciaAdicional').style.display = 'block';
+        } else {
+            document.getElementById('advertenciaAdicional').style.display = 'none';
+        }
+
+        // Actualizar análisis comparativo
+        document.getElementById('rms_normal').textContent = data.stats_normal.RMS.toFixed(4) + ' m';
+        document.getElementById('max_normal').textContent = data.stats_normal['Máximo'].toFixed(4) + ' m';
+        document.getElementById('rms_resonancia').textContent = data.stats_resonancia.RMS.toFixed(4) + ' m';
+        document.getElementById('max_resonancia').textContent = data.stats_resonancia['Máximo'].toFixed(4) + ' m';
+        document.getElementById('amplificacion').textContent = data.amplificacion_rms + 'x';
+
+        // Actualizar análisis de aceleración
+        document.getElementById('acel_rms').textContent = data.stats_aceleracion.RMS.toFixed(4);
+        document.getElementById('acel_max').textContent = data.stats_aceleracion['Máximo'].toFixed(4);
+        document.getElementById('acel_cresta').textContent = data.stats_aceleracion['Factor de Cresta'].toFixed(2);
+    }
+
+    // Modo rápido: resultados aproximados mientras el usuario escribe,
+    // sin simulación en el servidor (superficie de respuesta interpolada)
+    let temporizadorRapido = null;
+    let solicitudRapida = 0;
+
+    form.addEventListener('input', function() {
+        clearTimeout(temporizadorRapido);
+        temporizadorRapido = setTimeout(calcularRapido, 200);
+    });
+
+    async function calcularRapido() {
+        if (!form.checkValidity()) return;
+
+        const formData = new FormData(form);
+        formData.append('modo', 'rapido');
+        formData.append('guardar_datos', false);
+        const idSolicitud = ++solicitudRapida;
+
+        try {
+            const response = await fetch('/calcular', {
+                method: 'POST',
+                body: formData
+            });
+            const data = await response.json();
+
+            // Ignorar respuestas con error o ya superadas por otra solicitud
+            if (!response.ok || idSolicitud !== solicitudRapida) return;
+
+            resultsPanel.style.display = 'block';
+            loading.style.display = 'none';
+            error.style.display = 'none';
+            results.style.display = 'block';
+
+            actualizarResultadosNumericos(data);
+
+            const indicador = document.getElementById('indicadorAproximado');
+            if (data.aproximado) {
+                const cota = Math.max(data.cota_error_relativo.desplazamiento.RMS,
+                                      data.cota_error_relativo.desplazamiento['Máximo']);
+                indicador.textContent = `≈ Resultados aproximados (error ≤ ${(cota * 100).toFixed(1)}%). `;
+            } else {
+                indicador.textContent = '';
+            }
+            indicador.textContent += 'Presiona "Calcular Análisis" para actualizar las gráficas.';
+            indicador.style.display = 'block';
+        } catch (err) {
+            console.error('Error en cálculo rápido:', err);
+        }
+    }
+
+    // ========================================================================
+    // GRÁFICAS EN EL NAVEGADOR (series decimadas enviadas por el servidor)
+    // ========================================================================
+
+    const contenedorGraficas = document.getElementById('graficasCanvas');
+    const imagenGraficas = document.getElementById('graficas');
+
+    function mostrarImagenGraficas(url) {
+        contenedorGraficas.innerHTML = '';
+        imagenGraficas.style.display = 'block';
+        imagenGraficas.src = url;
+    }
+
+    function mostrarGraficasSimulacion(series) {
+        renderizarPaneles([
+            {
+                titulo: `Vibración Normal (f_fuerza = ${series.f_normal.toFixed(2)} Hz)`,
+                etiquetaX: 'Tiempo (s)', etiquetaY: 'Desplazamiento (m)',
+                series: [{ datos: series.normal, color: '#2563eb' }]
+            },
+            {
+                titulo: `Resonancia (f_fuerza ≈ ${series.f_n.toFixed(2)} Hz)`,
+                etiquetaX: 'Tiempo (s)', etiquetaY: 'Desplazamiento (m)',
+                series: [{ datos: series.resonancia, color: '#dc2626' }]
+            },
+            {
+                titulo: 'Aceleración durante Resonancia - Monitoreo de Vibraciones',
+                etiquetaX: 'Tiempo (s)', etiquetaY: 'Aceleración (m/s²)',
+                series: [{ datos: series.aceleracion, color: '#111827' }],
+                ancho: 'completo'
+            }
+        ]);
+    }
+
+    function mostrarGraficasExperimentales(series) {
+        const histograma = series.histograma_rms;
+        const paneles = [
+            {
+                titulo: 'Valor RMS en Tiempo Real',
+                etiquetaX: 'Tiempo (s)', etiquetaY: 'RMS (V)',
+                series: [{ datos: series.rms, color: '#2563eb' }],
+                lineasH: [{ y: series.rms_media, color: '#dc2626', etiqueta: `Media: ${series.rms_media.toFixed(4)}` }]
+            },
+            {
+                titulo: 'Amplitud Máxima',
+                etiquetaX: 'Tiempo (s)', etiquetaY: 'Amplitud (V)',
+                series: [{ datos: series.max, color: '#dc2626' }],
+                lineasH: [{ y: series.max_media, color: '#2563eb', etiqueta: `Media: ${series.max_media.toFixed(4)}` }]
+            },
+            {
+                titulo: 'Factor de Cresta (Detección de Resonancia)',
+                etiquetaX: 'Tiempo (s)', etiquetaY: 'Factor de Cresta',
+                series: [{ datos: series.crest, color: '#16a34a' }],
+                lineasH: [{ y: series.umbral_resonancia, color: '#dc2626', etiqueta: 'Umbral Resonancia' }]
+            },
+            {
+                titulo: 'Distribución de Valores RMS',
+                etiquetaX: 'RMS (V)', etiquetaY: 'Frecuencia',
+                barras: { bordes: histograma.bordes, conteos: histograma.conteos, color: 'rgba(37, 99, 235, 0.7)' }
+            }
+        ];
+        if (series.psd) {
+            const lineasV = [];
+            if (series.f_n_medida !== null) {
+                lineasV.push({ x: series.f_n_medida, color: '#dc2626', etiqueta: `f_n medida: ${series.f_n_medida.toFixed(2)} Hz` });
+            }
+            if (series.f_n_simulada !== null && series.f_n_simulada !== undefined) {
+                lineasV.push({ x: series.f_n_simulada, color: '#2563eb', etiqueta: `f_n simulada: ${series.f_n_simulada.toFixed(2)} Hz` });
+            }
+            paneles.push({
+                titulo: 'Densidad Espectral de Potencia (Welch)',
+                etiquetaX: 'Frecuencia (Hz)', etiquetaY: 'PSD (V²/Hz)',
+                series: [{ datos: series.psd, color: '#111827' }],
+                lineasV: lineasV,
+                ancho: 'completo'
+            });
+        }
+        renderizarPaneles(paneles);
+    }
+
+    function renderizarPaneles(paneles) {
+        imagenGraficas.style.display = 'none';
+        contenedorGraficas.innerHTML = '';
+
+        paneles.forEach(panel => {
+            const lienzo = document.createElement('canvas');
+            lienzo.className = panel.ancho === 'completo' ? 'grafica grafica-completa' : 'grafica';
+            contenedorGraficas.appendChild(lienzo);
+
+            // Ajustar resolución a la densidad de píxeles de la pantalla
+            const escala = window.devicePixelRatio || 1;
+            const ancho = lienzo.clientWidth || 400;
+            const alto = 260;
+            lienzo.width = ancho * escala;
+            lienzo.height = alto * escala;
+            lienzo.style.height = alto + 'px';
+
+            const contexto = lienzo.getContext('2d');
+            contexto.scale(escala, escala);
+            dibujarPanel(contexto, ancho, alto, panel);
+        });
+    }
+
+    function dibujarPanel(c, ancho, alto, panel) {
+        const margen = { izq: 60, der: 15, sup: 30, inf: 40 };
+        const areaAncho = ancho - margen.izq - margen.der;
+        const areaAlto = alto - margen.sup - margen.inf;
+
+        // Rango de los ejes
+        let xMin = Infinity, xMax = -Infinity, yMin = Infinity, yMax = -Infinity;
+        (panel.series || []).forEach(s => {
+            s.datos.x.forEach(v => { xMin = Math.min(xMin, v); xMax = Math.max(xMax, v); });
+            s.datos.y.forEach(v => { yMin = Math.min(yMin, v); yMax = Math.max(yMax, v); });
+        });
+        (panel.lineasH || []).forEach(l => { yMin = Math.min(yMin, l.y); yMax = Math.max(yMax, l.y); });
+        if (panel.barras) {
+            xMin = panel.barras.bordes[0];
+            xMax = panel.barras.bordes[panel.barras.bordes.length - 1];
+            yMin = 0;
+            yMax = Math.max(...panel.barras.conteos);
+        }
+        if (xMax === xMin) { xMax = xMin + 1; }
+        if (yMax === yMin) { yMax = yMin + 1; }
+        const holgura = (yMax - yMin) * 0.05;
+        yMax += holgura;
+        if (!panel.barras) { yMin -= holgura; }
+
+        const px = x => margen.izq + (x - xMin) / (xMax - xMin) * areaAncho;
+        const py = y => margen.sup + (1 - (y - yMin) / (yMax - yMin)) * areaAlto;
+
+        // Fondo y grid
+        c.fillStyle = '#ffffff';
+        c.fillRect(0, 0, ancho, alto);
+        c.strokeStyle = '#e5e7eb';
+        c.lineWidth = 1;
+        c.setLineDash([4, 4]);
+        c.fillStyle = '#4b5563';
+        c.font = '10px Arial';
+        for (let i = 0; i <= 5; i++) {
+            const y = margen.sup + areaAlto * i / 5;
+            c.beginPath();
+            c.moveTo(margen.izq, y);
+            c.lineTo(margen.izq + areaAncho, y);
+            c.stroke();
+            c.textAlign = 'right';
+            c.fillText(formatearNumero(yMax - (yMax - yMin) * i / 5), margen.izq - 5, y + 3);
+
+            const x = margen.izq + areaAncho * i / 5;
+            c.textAlign = 'center';
+            c.fillText(formatearNumero(xMin + (xMax - xMin) * i / 5), x, margen.sup + areaAlto + 14);
+        }
+        c.setLineDash([]);
+
+        // Barras (histograma)
+        if (panel.barras) {
+            c.fillStyle = panel.barras.color;
+            c.strokeStyle = '#000000';
+            panel.barras.conteos.forEach((conteo, i) => {
+                const x0 = px(panel.barras.bordes[i]);
+                const x1 = px(panel.barras.bordes[i + 1]);
+                c.fillRect(x0, py(conteo), x1 - x0, py(0) - py(conteo));
+                c.strokeRect(x0, py(conteo), x1 - x0, py(0) - py(conteo));
+            });
+        }
+
+        // Series
+        (panel.series || []).forEach(s => {
+            c.strokeStyle = s.color;
+            c.lineWidth = 1.5;
+            c.beginPath();
+            s.datos.x.forEach((x, i) => {
+                if (i === 0) {
+                    c.moveTo(px(x), py(s.datos.y[i]));
+                } else {
+                    c.lineTo(px(x), py(s.datos.y[i]));
+                }
+            });
+            c.stroke();
+        });
+
+        // Líneas horizontales de referencia
+        (panel.lineasH || []).forEach(l => {
+            c.strokeStyle = l.color;
+            c.lineWidth = 1.5;
+            c.setLineDash([6, 4]);
+            c.beginPath();
+            c.moveTo(margen.izq, py(l.y));
+            c.lineTo(margen.izq + areaAncho, py(l.y));
+            c.stroke();
+            c.setLineDash([]);
+            c.fillStyle = l.color;
+            c.textAlign = 'right';
+            c.fillText(l.etiqueta, margen.izq + areaAncho - 4, py(l.y) - 4);
+        });
+
+        // Líneas verticales de referencia (frecuencias)
+        (panel.lineasV || []).forEach((l, i) => {
+            if (l.x < xMin || l.x > xMax) return;
+            c.strokeStyle = l.color;
+            c.lineWidth = 1.5;
+            c.setLineDash([6, 4]);
+            c.beginPath();
+            c.moveTo(px(l.x), margen.sup);
+            c.lineTo(px(l.x), margen.sup + areaAlto);
+            c.stroke();
+            c.setLineDash([]);
+            c.fillStyle = l.color;
+            c.textAlign = 'left';
+            c.fillText(l.etiqueta, px(l.x) + 4, margen.sup + 12 + i * 12);
+        });
+
+        // Título y etiquetas de ejes
+        c.fillStyle = '#111827';
+        c.textAlign = 'center';
+        c.font = 'bold 12px Arial';
+        c.fillText(panel.titulo, margen.izq + areaAncho / 2, 18);
+        c.font = '10px Arial';
+        c.fillText(panel.etiquetaX, margen.izq + areaAncho / 2, alto - 8);
+        c.save();
+        c.translate(12, margen.sup + areaAlto / 2);
+        c.rotate(-Math.PI / 2);
+        c.fillText(panel.etiquetaY, 0, 0);
+        c.restore();
+    }
+
+    function formatearNumero(valor) {
+        const absoluto = Math.abs(valor);
+        if (absoluto !== 0 && (absoluto < 0.01 || absoluto >= 10000)) {
+            return valor.toExponential(1);
+        }
+        return Number(valor.toFixed(3)).toString();
+    }
+
     // Restablecer valores por defecto
     btnRestablecer.addEventListener('click', function() {
         document.getElementById('masa').value = '1.0';
@@ -141,6 +443,7 @@ document.addEventListener('DOMContentLoaded', function() {
     let eventSource = null;
     let experimentoActivo = false;
     let datosCapturados = [];
+    let experimentoId = null;
     let miniChart = null;
     let chartData = {
         rms: [],
@@ -246,6 +549,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 
                 // Iniciar stream de datos
                 iniciarStream();
+                activarDetector();
             } else {
                 alert('Error: ' + data.error);
                 btnConectar.disabled = false;
@@ -286,18 +590,34 @@ document.addEventListener('DOMContentLoaded', function() {
     function iniciarStream() {
         eventSource = new EventSource('/arduino/stream');
 
-        eventSource.onmessage = function(event) {
+        // Cada evento trae un lote de paquetes; al reconectar, el navegador
+        // envía Last-Event-ID y el servidor reenvía lo que faltó
+        eventSource.addEventListener('lote', function(event) {
             try {
-                const dato = JSON.parse(event.data);
+                const lote = JSON.parse(event.data);
                 
-                if (!dato.heartbeat) {
-                    actualizarMonitor(dato);
-                    datosCapturados.push(dato);
+                if (lote.descartados > 0) {
+                    console.warn(`Stream: ${lote.descartados} paquetes ya no estaban en el buffer`);
                 }
+                const ultimo = lote.paquetes.length - 1;
+                lote.paquetes.forEach((dato, i) => {
+                    datosCapturados.push(dato);
+                    // Redibujar una sola vez por lote
+                    actualizarMonitor(dato, i === ultimo);
+                });
             } catch (err) {
-                console.error('Error al procesar dato:', err);
+                console.error('Error al procesar lote:', err);
             }
-        };
+        });
+
+        // Avisos del detector de resonancia, en cuanto se detectan
+        eventSource.addEventListener('resonancia', function(event) {
+            try {
+                mostrarAvisoResonancia(JSON.parse(event.data));
+            } catch (err) {
+                console.error('Error al procesar aviso de resonancia:', err);
+            }
+        });
 
         eventSource.onerror = function(err) {
             console.error('Error en stream:', err);
@@ -307,6 +627,37 @@ document.addEventListener('DOMContentLoaded', function() {
         };
     }
 
+    async function activarDetector() {
+        // Vigila la f_n del modelo del formulario durante la captura
+        try {
+            const response = await fetch('/arduino/detector', {
+                method: 'POST',
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify({
+                    masa: form.masa.value,
+                    constante_resorte: form.constante_resorte.value
+                })
+            });
+            const data = await response.json();
+            if (!data.success) {
+                console.warn('Detector de resonancia no disponible:', data.error);
+            }
+        } catch (err) {
+            console.warn('Detector de resonancia no disponible:', err.message);
+        }
+    }
+
+    function mostrarAvisoResonancia(evento) {
+        const aviso = document.getElementById('alertaResonancia');
+        if (evento.tipo === 'inicio') {
+            aviso.textContent = `⚠️ Resonancia en ${evento.frecuencia.toFixed(2)} Hz: amplitud ` +
+                `${evento.amplificacion.toFixed(1)}× la línea base. Reduzca la velocidad del motor.`;
+            aviso.style.display = 'block';
+        } else {
+            aviso.style.display = 'none';
+        }
+    }
+
     async function iniciarExperimento() {
         const duracion = parseInt(duracionCaptura.value);
         
@@ -328,16 +679,18 @@ document.addEventListener('DOMContentLoaded', function() {
             
             if (data.success) {
                 console.log('Experimento iniciado:', data.mensaje);
+                experimentoId = data.experimento;
                 
                 // Timer visual
                 let tiempoRestante = duracion;
                 const timer = setInterval(() => {
                     tiempoRestante--;
                     statusText.textContent = `Capturando... ${tiempoRestante}s`;
+                    mostrarEstadisticasCaptura(tiempoRestante);
                     
                     if (tiempoRestante <= 0 || !experimentoActivo) {
                         clearInterval(timer);
-                        detenerExperimento();
+                        detenerExperimento(tiempoRestante > 0);
                     }
                 }, 1000);
             }
@@ -347,7 +700,25 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
-    function detenerExperimento() {
+    async function mostrarEstadisticasCaptura(tiempoRestante) {
+        // Agregados en línea del servidor: consulta O(1), apta para cada segundo
+        try {
+            const response = await fetch(`/arduino/estadisticas_experimento?experimento=${experimentoId}`);
+            const data = await response.json();
+            if (data.success && data.estadisticas && experimentoActivo) {
+                statusText.textContent = `Capturando... ${tiempoRestante}s - ${data.num_muestras} paquetes, ` +
+                    `RMS medio ${data.estadisticas.RMS.media.toFixed(3)} V (p99 ${data.estadisticas.RMS.p99.toFixed(3)} V)`;
+            }
+        } catch (err) {
+            console.warn('Estadísticas no disponibles:', err.message);
+        }
+    }
+
+    function detenerExperimento(antesDeTiempo = true) {
+        if (experimentoActivo && antesDeTiempo) {
+            // La grabación en disco sigue en el servidor hasta que se detenga
+            fetch('/arduino/detener_experimento', { method: 'POST' }).catch(() => {});
+        }
         experimentoActivo = false;
         btnDetenerExperimento.style.display = 'none';
         btnIniciarExperimento.style.display = 'block';
@@ -373,21 +744,29 @@ document.addEventListener('DOMContentLoaded', function() {
                 method: 'POST',
                 headers: {'Content-Type': 'application/json'},
                 body: JSON.stringify({ 
-                    guardar_datos: true
+                    experimento: experimentoId,
+                    // Modelo con el que comparar la frecuencia natural y ζ medidos
+                    masa: form.masa.value,
+                    constante_resorte: form.constante_resorte.value,
+                    amortiguamiento: form.amortiguamiento.value
                 })
             });
 
             const data = await response.json();
 
-            if (data.success) {
-                loading.style.display = 'none';
-                results.style.display = 'block';
-
-                // Actualizar resultados experimentales
-                actualizarResultadosExperimentales(data);
-            } else {
+            if (!data.success) {
                 throw new Error(data.error);
             }
+
+            // El análisis corre como trabajo en el servidor: consultar hasta que termine
+            const trabajo = await esperarTrabajo(data.trabajo);
+
+            loading.style.display = 'none';
+            results.style.display = 'block';
+
+            // Actualizar resultados experimentales
+            actualizarResultadosExperimentales(trabajo.resultado);
+            descargar(`/experimentos/${data.experimento}/exportar?formato=csv`);
         } catch (err) {
             loading.style.display = 'none';
             error.style.display = 'block';
@@ -395,7 +774,7 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
-    function actualizarMonitor(dato) {
+    function actualizarMonitor(dato, dibujar = true) {
         // Actualizar valores numéricos
         document.getElementById('monitor-rms').textContent = dato.rms?.toFixed(4) || '0.0000';
         document.getElementById('monitor-max').textContent = dato.max?.toFixed(4) || '0.0000';
@@ -415,7 +794,9 @@ document.addEventListener('DOMContentLoaded', function() {
         }
 
         // Dibujar gráfica
-        dibujarMiniGrafica();
+        if (dibujar) {
+            dibujarMiniGrafica();
+        }
     }
 
     function dibujarMiniGrafica() {
@@ -481,6 +862,7 @@ document.addEventListener('DOMContentLoaded', function() {
         document.getElementById('monitor-max').textContent = '0.0000';
         document.getElementById('monitor-crest').textContent = '0.00';
         document.getElementById('monitor-samples').textContent = '0';
+        document.getElementById('alertaResonancia').style.display = 'none';
     }
 
     function actualizarEstadoConexion(conectado, mensaje) {
@@ -494,12 +876,51 @@ document.addEventListener('DOMContentLoaded', function() {
         statusText.textContent = mensaje;
     }
 
+    async function esperarTrabajo(trabajo) {
+        while (trabajo.estado === 'pendiente' || trabajo.estado === 'ejecutando') {
+            await new Promise(resolver => setTimeout(resolver, 500));
+            const data = await (await fetch(trabajo.url_estado)).json();
+            if (!data.success) {
+                throw new Error(data.error);
+            }
+            trabajo = data.trabajo;
+        }
+        if (trabajo.estado !== 'terminado') {
+            throw new Error(trabajo.error || `Trabajo ${trabajo.estado}`);
+        }
+        return trabajo;
+    }
+
+    function descargar(url) {
+        const enlace = document.createElement('a');
+        enlace.href = url;
+        enlace.download = '';
+        document.body.appendChild(enlace);
+        enlace.click();
+        enlace.remove();
+    }
+
     function actualizarResultadosExperimentales(data) {
-        // Actualizar características del sistema con datos experimentales
-        document.getElementById('frecuencia_natural').textContent = 'Medido';
-        document.getElementById('frecuencia_angular').textContent = 'Experimental';
-        document.getElementById('factor_amortiguamiento').textContent = '-';
-        document.getElementById('tipo_amortiguamiento').textContent = 'Datos Reales';
+        // Actualizar características del sistema con datos experimentales:
+        // frecuencia natural y ζ medidos en el espectro junto a los simulados
+        const espectro = data.espectro || {};
+        const simulado = espectro.simulado || {};
+        const conSimulado = (medido, valorSimulado, decimales, unidad = '') => {
+            if (medido === null || medido === undefined) return '-';
+            let texto = medido.toFixed(decimales) + unidad;
+            if (valorSimulado !== null && valorSimulado !== undefined) {
+                texto += ` (sim. ${valorSimulado.toFixed(decimales)}${unidad})`;
+            }
+            return texto;
+        };
+        document.getElementById('frecuencia_natural').textContent =
+            conSimulado(espectro.frecuencia_natural, simulado.frecuencia_natural, 2, ' Hz');
+        document.getElementById('frecuencia_angular').textContent = espectro.frecuencia_natural
+            ? (2 * Math.PI * espectro.frecuencia_natural).toFixed(2) + ' rad/s' : 'Experimental';
+        document.getElementById('factor_amortiguamiento').textContent =
+            conSimulado(espectro.factor_amortiguamiento, simulado.factor_amortiguamiento, 3) +
+            (espectro.limitado_por_resolucion ? ' (cota superior)' : '');
+        document.getElementById('tipo_amortiguamiento').textContent = 'Datos Reales (espectro)';
 
         // Actualizar evaluación de riesgo
         const riesgoAlert = document.getElementById('riesgoAlert');
@@ -520,13 +941,20 @@ document.addEventListener('DOMContentLoaded', function() {
         // Indicador de resonancia
         if (data.en_resonancia) {
             document.getElementById('advertenciaAdicional').style.display = 'block';
-            document.getElementById('advertenciaAdicional').innerHTML = 
-                '🔔 <strong>RESONANCIA DETECTADA</strong>: Factor de cresta elevado (' + 
-                stats.Factor_Cresta.media.toFixed(2) + ')';
+            document.getElementById('advertenciaAdicional').innerHTML = data.criterio_resonancia === 'espectral'
+                ? '🔔 <strong>RESONANCIA DETECTADA</strong>: Frecuencia dominante ' +
+                  espectro.frecuencia_dominante.toFixed(2) + ' Hz junto a f_n = ' +
+                  simulado.frecuencia_natural.toFixed(2) + ' Hz'
+                : '🔔 <strong>RESONANCIA DETECTADA</strong>: Factor de cresta elevado (' +
+                  stats.Factor_Cresta.media.toFixed(2) + ')';
         }
 
         // Gráficas
-        document.getElementById('graficas').src = 'data:image/png;base64,' + data.imagen_grafica;
+        if (data.series) {
+            mostrarGraficasExperimentales(data.series);
+        } else {
+            mostrarImagenGraficas(data.url_grafica);
+        }
 
         // Scroll a resultados
         resultsPanel.scrollIntoView({ behavior: 'smooth' });
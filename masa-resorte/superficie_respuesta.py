@@ -0,0 +1,253 @@
+"""
+================================================================================
+SUPERFICIE DE RESPUESTA ADIMENSIONAL PRECALCULADA
+Proyecto: Análisis de Resonancia en Sistema Masa-Resorte
+================================================================================
+
+Las estadísticas de /calcular se pueden expresar en forma adimensional:
+
+    x(t) / (F0/k)  y  a(t) / (F0/m)
+
+dependen solo del factor de amortiguamiento ζ = c/(2√(mk)), de la razón
+de frecuencias r = w/w_n y del número de ciclos naturales que caben en la
+ventana simulada (w_n·t_max/2π), para un número fijo de muestras.
+
+Este módulo tabula esas estadísticas sobre una malla (ζ, r, ciclos) con la
+solución analítica y responde por interpolación, con una cota de error
+medida al construir la tabla. La tabla se guarda en disco para no
+reconstruirla en cada arranque.
+
+Funcionalidades:
+- Construcción vectorizada de la tabla por lotes
+- Interpolación en espacio logarítmico (leyes de potencia → lineales)
+- Cota de error relativo por estadística, medida contra la solución exacta
+- Persistencia en formato .npz con versión de la malla
+================================================================================
+"""
+
+import os
+import threading
+
+import numpy as np
+from scipy.interpolate import RegularGridInterpolator
+
+from solver_analitico import respuesta_analitica, estadisticas_lote
+
+
+VERSION_TABLA = 1
+
+ESTADISTICAS = ['RMS', 'Máximo', 'Mínimo', 'Media', 'Desviación Estándar', 'Factor de Cresta']
+
+# Malla de la tabla. Solo se responde en razones r que sean nodos de la
+# malla (entre ellas 0.5 y 0.999, los escenarios de /calcular): interpolar
+# en r a través del pico de resonancia tendría errores grandes con ζ bajo.
+# Los ciclos se limitan a [3, 60]: con menos, el máximo depende de la fase
+# en que termina la ventana; con más, del aliasing de las 1000 muestras.
+MALLA_ZETA = np.geomspace(1e-3, 10.0, 33)
+MALLA_R = np.unique(np.concatenate((np.linspace(0.05, 3.0, 60), [0.5, 0.999])))
+MALLA_CICLOS = np.geomspace(3.0, 60.0, 25)
+
+RUTA_POR_DEFECTO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'superficie_respuesta.npz')
+
+
+def _estadisticas_lote(serie):
+    """Estadísticas apiladas en el orden de ESTADISTICAS"""
+    stats = estadisticas_lote(serie)
+    return np.stack([stats[nombre] for nombre in ESTADISTICAS])
+
+
+def _simular_adimensional(zeta, r, ciclos, n_puntos):
+    """
+    Simula sistemas con m = k = F0 = 1 (w_n = 1) con broadcasting
+
+    Returns:
+        tuple: (stats_x, stats_a) con forma (6, *forma_lote)
+    """
+    u = np.linspace(0.0, 1.0, n_puntos)
+    tau = (2 * np.pi * np.asarray(ciclos))[..., np.newaxis] * u
+    x, _, a = respuesta_analitica(tau, 1.0, 1.0, (2 * np.asarray(zeta))[..., np.newaxis], 1.0,
+                                  np.asarray(r)[..., np.newaxis])
+    return _estadisticas_lote(x), _estadisticas_lote(a)
+
+
+class SuperficieRespuesta:
+    """
+    Tabla precalculada de estadísticas adimensionales con interpolación
+    """
+
+    def __init__(self, ruta=RUTA_POR_DEFECTO, n_puntos=1000):
+        """
+        Inicializa la superficie (sin construirla)
+
+        Args:
+            ruta: Archivo .npz donde se guarda la tabla
+            n_puntos: Número de muestras de la ventana simulada
+        """
+        self.ruta = ruta
+        self.n_puntos = n_puntos
+        self.lista = False
+        self.cota_error = {}
+        self._interpoladores = None
+        self.lock = threading.Lock()
+
+    def inicializar(self):
+        """
+        Carga la tabla desde disco o la construye y la guarda
+
+        Returns:
+            bool: True si la superficie quedó lista para consultas
+        """
+        with self.lock:
+            if self.lista:
+                return True
+            if not self._cargar():
+                self._construir()
+                self._guardar()
+            self.lista = True
+            return True
+
+    def _construir(self):
+        """Construye la tabla fila por fila de ζ para acotar la memoria"""
+        forma = (len(MALLA_ZETA), len(MALLA_R), len(MALLA_CICLOS))
+        tabla_x = np.empty((len(ESTADISTICAS),) + forma)
+        tabla_a = np.empty((len(ESTADISTICAS),) + forma)
+
+        r = MALLA_R[:, np.newaxis]
+        ciclos = MALLA_CICLOS[np.newaxis, :]
+        for i, zeta in enumerate(MALLA_ZETA):
+            tabla_x[:, i], tabla_a[:, i] = _simular_adimensional(zeta, r, ciclos, self.n_puntos)
+
+        self._tablas = (tabla_x, tabla_a)
+        self._crear_interpoladores()
+        self.cota_error = self._medir_error()
+
+    def _crear_interpoladores(self):
+        """Interpoladores lineales en (log ζ, r, log ciclos) sobre log(valor)"""
+        ejes = (np.log(MALLA_ZETA), MALLA_R, np.log(MALLA_CICLOS))
+        self._interpoladores = []
+        for tabla in self._tablas:
+            valores = np.array(tabla)
+            positivos = [j for j, nombre in enumerate(ESTADISTICAS) if nombre != 'Mínimo']
+            valores[positivos] = np.log(np.maximum(valores[positivos], 1e-300))
+            valores = np.moveaxis(valores, 0, -1)
+            self._interpoladores.append(RegularGridInterpolator(ejes, valores))
+
+    def _interpolar(self, zeta, r, ciclos):
+        """Interpola ambas tablas en coordenadas adimensionales"""
+        punto = np.column_stack((np.log(np.atleast_1d(zeta)), np.atleast_1d(r),
+                                 np.log(np.atleast_1d(ciclos))))
+        resultado = []
+        for interpolador in self._interpoladores:
+            valores = interpolador(punto).T
+            for j, nombre in enumerate(ESTADISTICAS):
+                if nombre != 'Mínimo':
+                    valores[j] = np.exp(valores[j])
+            resultado.append(valores)
+        return resultado
+
+    def _medir_error(self, n_muestras=2000, semilla=0):
+        """
+        Mide el error relativo máximo de la interpolación contra la solución
+        exacta en puntos aleatorios (ζ y ciclos continuos, r en los nodos)
+        """
+        rng = np.random.default_rng(semilla)
+        zeta = np.exp(rng.uniform(np.log(MALLA_ZETA[0]), np.log(MALLA_ZETA[-1]), n_muestras))
+        r = rng.choice(MALLA_R, n_muestras)
+        ciclos = np.exp(rng.uniform(np.log(MALLA_CICLOS[0]), np.log(MALLA_CICLOS[-1]), n_muestras))
+
+        cota = {}
+        exactos = _simular_adimensional(zeta, r, ciclos, self.n_puntos)
+        for variable, exacto, aprox in zip(('desplazamiento', 'aceleracion'), exactos,
+                                           self._interpolar(zeta, r, ciclos)):
+            escala_max = exacto[ESTADISTICAS.index('Máximo')]
+            cota[variable] = {}
+            for j, nombre in enumerate(ESTADISTICAS):
+                # El mínimo puede ser cero: se mide respecto al máximo
+                referencia = escala_max if nombre == 'Mínimo' else np.abs(exacto[j])
+                error = np.abs(aprox[j] - exacto[j]) / np.maximum(referencia, 1e-300)
+                cota[variable][nombre] = float(np.max(error))
+        return cota
+
+    def _guardar(self):
+        """Guarda la tabla en disco (errores de escritura no son fatales)"""
+        try:
+            np.savez_compressed(
+                self.ruta, version=VERSION_TABLA, n_puntos=self.n_puntos,
+                zeta=MALLA_ZETA, r=MALLA_R, ciclos=MALLA_CICLOS,
+                tabla_x=self._tablas[0], tabla_a=self._tablas[1],
+                cota_x=[self.cota_error['desplazamiento'][n] for n in ESTADISTICAS],
+                cota_a=[self.cota_error['aceleracion'][n] for n in ESTADISTICAS])
+        except OSError as e:
+            print(f"⚠️  No se pudo guardar la superficie de respuesta: {e}")
+
+    def _cargar(self):
+        """
+        Carga la tabla desde disco si existe y coincide con la malla actual
+
+        Returns:
+            bool: True si se cargó correctamente
+        """
+        if not os.path.exists(self.ruta):
+            return False
+        try:
+            with np.load(self.ruta) as datos:
+                if (int(datos['version']) != VERSION_TABLA or int(datos['n_puntos']) != self.n_puntos
+                        or not np.array_equal(datos['zeta'], MALLA_ZETA)
+                        or not np.array_equal(datos['r'], MALLA_R)
+                        or not np.array_equal(datos['ciclos'], MALLA_CICLOS)):
+                    return False
+                self._tablas = (datos['tabla_x'], datos['tabla_a'])
+                self.cota_error = {
+                    'desplazamiento': dict(zip(ESTADISTICAS, datos['cota_x'].tolist())),
+                    'aceleracion': dict(zip(ESTADISTICAS, datos['cota_a'].tolist()))
+                }
+        except (OSError, KeyError, ValueError) as e:
+            print(f"⚠️  Superficie de respuesta inválida, se reconstruye: {e}")
+            return False
+        self._crear_interpoladores()
+        return True
+
+    def estadisticas(self, m, k, c, F0, w_fuerza, t_max):
+        """
+        Estadísticas aproximadas de desplazamiento y aceleración
+
+        Args:
+            m, k, c, F0: Parámetros físicos del sistema
+            w_fuerza: Frecuencia angular de la fuerza (rad/s)
+            t_max: Duración de la ventana simulada (s)
+
+        Returns:
+            tuple: (stats_x, stats_a) como en analisis_estadistico(), o None
+            si la superficie no está lista, el punto cae fuera de la malla o
+            r no es un nodo de la malla
+        """
+        if not self.lista:
+            return None
+
+        w_n = np.sqrt(k / m)
+        zeta = c / (2 * np.sqrt(m * k))
+        r = w_fuerza / w_n
+        ciclos = w_n * t_max / (2 * np.pi)
+
+        if not (MALLA_ZETA[0] <= zeta <= MALLA_ZETA[-1] and MALLA_CICLOS[0] <= ciclos <= MALLA_CICLOS[-1]):
+            return None
+
+        # Ajustar r al nodo exacto (la cota de error solo vale en los nodos)
+        nodo = np.argmin(np.abs(MALLA_R - r))
+        if abs(MALLA_R[nodo] - r) > 1e-9:
+            return None
+        r = MALLA_R[nodo]
+
+        adim_x, adim_a = self._interpolar(zeta, r, ciclos)
+        escala_x = F0 / k
+        escala_a = F0 / m
+
+        stats_x = {}
+        stats_a = {}
+        for j, nombre in enumerate(ESTADISTICAS):
+            # El factor de cresta es adimensional: no se escala
+            factor_x = 1.0 if nombre == 'Factor de Cresta' else escala_x
+            factor_a = 1.0 if nombre == 'Factor de Cresta' else escala_a
+            stats_x[nombre] = float(adim_x[j, 0] * factor_x)
+            stats_a[nombre] = float(adim_a[j, 0] * factor_a)
+        return stats_x, stats_a
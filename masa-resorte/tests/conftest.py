@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Los módulos del proyecto son planos (sin paquete): importarlos por nombre
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,232 @@
+"""
+================================================================================
+PRUEBAS DE REGRESIÓN: ArduinoHandler CONTRA EL ARDUINO SIMULADO
+Proyecto: Análisis de Resonancia en Sistema Masa-Resorte
+================================================================================
+
+El simulador genera los bytes exactos del sketch (siempre con la misma
+semilla) y el ArduinoHandler los procesa como si vinieran del puerto:
+resincronización de tramas binarias, conteo de pérdidas por secuencia,
+duplicados y reinicios, y reensamblado de los bloques del modo crudo.
+================================================================================
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from arduino_simulado import ArduinoSimulado, BLOQUE_CRUDO
+from protocolo_binario import (DecodificadorTramas, codificar_trama, codificar_crudo,
+                               TIPO_RESUMEN, TIPO_CRUDO)
+from serial_handler import ArduinoHandler
+
+
+def handler_binario():
+    """ArduinoHandler sin puerto, con el protocolo binario ya negociado"""
+    handler = ArduinoHandler(protocolo='binario')
+    handler.protocolo = 'binario'
+    return handler
+
+
+def alimentar(handler, datos, trozo=37):
+    """Entrega los bytes en trozos arbitrarios, como llegan del puerto"""
+    for inicio in range(0, len(datos), trozo):
+        handler.consumir(datos[inicio:inicio + trozo])
+
+
+def ids_publicados(handler):
+    return handler.buffer_datos.ventana(0)['id'].tolist()
+
+
+def no_detectables(ids, n):
+    """Paquetes faltantes antes de la primera trama o tras la última recibida
+    (sin tramas vecinas, la secuencia no puede revelarlos)"""
+    return ids[0] + (n - 1 - ids[-1])
+
+
+def tramas_simuladas(n, **opciones):
+    """Payloads de n paquetes de resumen del simulador"""
+    flujo = ArduinoSimulado(semilla=0, **opciones).grabar(n, 'binario')
+    return [payload for _, _, payload in DecodificadorTramas().alimentar(flujo)]
+
+
+def con_secuencias(payloads, secuencias):
+    return b''.join(codificar_trama(TIPO_RESUMEN, secuencia, payload)
+                    for payload, secuencia in zip(payloads, secuencias))
+
+
+# ============ RESINCRONIZACIÓN ============
+
+def test_flujo_limpio_sin_perdidas():
+    handler = handler_binario()
+    alimentar(handler, ArduinoSimulado(semilla=0).grabar(100, 'binario'), trozo=1)
+
+    assert handler.paquetes_recibidos == 100
+    assert handler.paquetes_perdidos == 0
+    assert ids_publicados(handler) == list(range(100))
+
+
+def test_resincroniza_tras_trama_corrupta_y_basura():
+    payloads = tramas_simuladas(20)
+    tramas = [codificar_trama(TIPO_RESUMEN, i, p) for i, p in enumerate(payloads)]
+    # Un byte del payload de la trama 5 alterado (CRC inválido) y ruido
+    # entre las tramas 10 y 11, con una falsa sincronía incluida
+    corrupta = bytearray(tramas[5])
+    corrupta[20] ^= 0xFF
+    tramas[5] = bytes(corrupta)
+    tramas[10] += b'\x00\xa5\x5a\x07basura'
+
+    handler = handler_binario()
+    alimentar(handler, b''.join(tramas))
+
+    assert handler.decodificador.errores_crc >= 1
+    assert handler.paquetes_recibidos == 19
+    assert handler.paquetes_perdidos == 1
+    assert ids_publicados(handler) == [i for i in range(20) if i != 5]
+
+
+def test_corrupcion_aleatoria_se_cuenta_como_perdida():
+    n = 300
+    simulado = ArduinoSimulado(semilla=3, tasa_corrupcion=0.1)
+    handler = handler_binario()
+    alimentar(handler, simulado.grabar(n, 'binario'), trozo=64)
+
+    ids = ids_publicados(handler)
+    assert simulado.paquetes_corrompidos > 0
+    assert handler.paquetes_perdidos == simulado.paquetes_corrompidos - no_detectables(ids, n)
+    assert handler.paquetes_recibidos == n - simulado.paquetes_corrompidos
+    assert ids == sorted(set(ids))
+
+
+# ============ SECUENCIA ============
+
+def test_huecos_de_secuencia_cuentan_paquetes_omitidos():
+    n = 300
+    simulado = ArduinoSimulado(semilla=1, tasa_perdida=0.2)
+    handler = handler_binario()
+    alimentar(handler, simulado.grabar(n, 'binario'))
+
+    ids = ids_publicados(handler)
+    assert simulado.paquetes_omitidos > 0
+    assert handler.paquetes_perdidos == simulado.paquetes_omitidos - no_detectables(ids, n)
+
+
+def test_trama_duplicada_no_es_perdida():
+    payloads = tramas_simuladas(4)
+    handler = handler_binario()
+    alimentar(handler, con_secuencias([payloads[0], payloads[1], payloads[1], payloads[2], payloads[3]],
+                                      [0, 1, 1, 2, 3]))
+
+    assert handler.tramas_duplicadas == 1
+    assert handler.paquetes_perdidos == 0
+    assert handler.reinicios_secuencia == 0
+
+
+def test_reinicio_del_sketch_no_es_perdida():
+    # Dos grabaciones seguidas: la segunda vuelve a la secuencia 0, como
+    # tras un reinicio de la placa
+    simulado = ArduinoSimulado(semilla=0)
+    handler = handler_binario()
+    alimentar(handler, simulado.grabar(30, 'binario') + simulado.grabar(30, 'binario'))
+
+    assert handler.paquetes_recibidos == 60
+    assert handler.reinicios_secuencia == 1
+    assert handler.paquetes_perdidos == 0
+
+
+def test_vuelta_de_la_secuencia_de_16_bits():
+    payloads = tramas_simuladas(6)
+    handler = handler_binario()
+    alimentar(handler, con_secuencias(payloads, [0xFFFD, 0xFFFE, 0xFFFF, 0, 2, 3]))
+
+    assert handler.paquetes_perdidos == 1
+    assert handler.reinicios_secuencia == 0
+    assert handler.tramas_duplicadas == 0
+
+
+# ============ MODO CRUDO ============
+
+def bloques_crudos(simulado, frecuencia, indices_bloque):
+    tramas = []
+    # La secuencia sigue al bloque: un bloque omitido es también un hueco de secuencia
+    for bloque in indices_bloque:
+        indice = bloque * BLOQUE_CRUDO
+        _, cuentas = simulado.senal_en((indice + np.arange(BLOQUE_CRUDO)) / frecuencia)
+        tramas.append(codificar_trama(TIPO_CRUDO, bloque, codificar_crudo(indice, frecuencia, cuentas)))
+    return tramas
+
+
+def test_reensambla_bloques_crudos_partidos():
+    simulado = ArduinoSimulado(semilla=0, ruido=0.0)
+    frecuencia = 1000
+    handler = handler_binario()
+    alimentar(handler, b''.join(bloques_crudos(simulado, frecuencia, range(10))), trozo=7)
+
+    crudas = handler.obtener_muestras_crudas(n=10 * BLOQUE_CRUDO)
+    esperado, _ = simulado.senal_en(np.arange(10 * BLOQUE_CRUDO) / frecuencia)
+    assert crudas['frecuencia'] == frecuencia
+    assert crudas['indice_inicial'] == 0
+    np.testing.assert_allclose(crudas['muestras'], esperado, atol=1e-5)
+    assert handler.flujo.muestras_perdidas == 0
+    assert handler.paquetes_perdidos == 0
+
+
+def test_bloque_crudo_perdido_queda_como_hueco():
+    simulado = ArduinoSimulado(semilla=0, ruido=0.0)
+    handler = handler_binario()
+    alimentar(handler, b''.join(bloques_crudos(simulado, 1000, [0, 1, 3, 4])))
+
+    muestras = handler.obtener_muestras_crudas(n=5 * BLOQUE_CRUDO)['muestras']
+    assert len(muestras) == 5 * BLOQUE_CRUDO
+    assert np.isnan(muestras[2 * BLOQUE_CRUDO:3 * BLOQUE_CRUDO]).all()
+    assert np.isfinite(np.delete(muestras, np.s_[2 * BLOQUE_CRUDO:3 * BLOQUE_CRUDO])).all()
+    assert handler.flujo.muestras_perdidas == BLOQUE_CRUDO
+    assert handler.paquetes_perdidos == 1
+
+
+@pytest.mark.parametrize('protocolo', ['json', 'binario'])
+def test_captura_por_el_transporte_en_memoria(protocolo):
+    simulado = ArduinoSimulado(paquetes_por_segundo=200, semilla=0)
+    handler = ArduinoHandler(protocolo=protocolo, abrir_puerto=simulado.abrir, espera_reinicio=0)
+    try:
+        assert handler.conectar('simulado')
+        assert handler.protocolo == protocolo
+        assert handler.iniciar_captura()
+        time.sleep(0.5)
+    finally:
+        handler.desconectar()
+        simulado.detener()
+
+    ids = ids_publicados(handler)
+    assert len(ids) > 20
+    assert ids == list(range(ids[0], ids[0] + len(ids)))
+    assert handler.paquetes_perdidos == 0
+
+
+def test_modo_crudo_por_el_transporte_en_memoria():
+    simulado = ArduinoSimulado(semilla=0, ruido=0.0, frecuencia=25.0)
+    handler = ArduinoHandler(protocolo='binario', abrir_puerto=simulado.abrir, espera_reinicio=0)
+    try:
+        assert handler.conectar('simulado')
+        assert handler.iniciar_captura()
+        assert handler.iniciar_modo_crudo(1000)
+        time.sleep(1.0)
+        crudas = handler.obtener_muestras_crudas(segundos=0.5)
+    finally:
+        handler.desconectar()
+        simulado.detener()
+
+    muestras = crudas['muestras']
+    assert crudas['frecuencia'] == 1000
+    assert len(muestras) == 500
+    assert np.isfinite(muestras).all()
+    assert handler.flujo.muestras_perdidas == 0
+    # El seno de 25 Hz del simulador sobrevive al reensamblado
+    espectro = np.abs(np.fft.rfft(muestras - muestras.mean()))
+    assert np.fft.rfftfreq(len(muestras), 1 / 1000)[np.argmax(espectro)] == pytest.approx(25.0, abs=2.0)
+
+
+def test_frecuencia_cruda_fuera_de_rango():
+    with pytest.raises(ValueError):
+        handler_binario().iniciar_modo_crudo(1)
@@ -0,0 +1,422 @@
+"""
+================================================================================
+COLA DE TRABAJOS EN SEGUNDO PLANO
+Proyecto: Análisis de Resonancia en Sistema Masa-Resorte
+================================================================================
+
+Las operaciones lentas (análisis de experimentos, exportaciones a Excel o
+a archivo) se envían a un pool acotado de hilos y la petición HTTP
+responde enseguida con el identificador del trabajo; el cliente consulta
+después su estado y progreso y descarga el resultado.
+
+Cada trabajo recibe un objeto Trabajo para informar su avance; al hacerlo
+se comprueba si fue cancelado (cancelación cooperativa: un trabajo
+pendiente se cancela de inmediato, uno en ejecución en su siguiente
+avance). Los trabajos terminados se conservan un tiempo acotado y en
+número acotado; al expulsarlos se borran sus archivos.
+
+Con directorio, el estado de cada trabajo se refleja en
+<directorio>/<id>.json: cualquier proceso web (varios workers de uvicorn)
+puede consultar un trabajo lanzado por otro y pedir su cancelación con
+un archivo <id>.cancelar.
+
+Funcionalidades:
+- Pool de hilos acotado y límite de trabajos pendientes
+- Estado, progreso y mensaje por trabajo; espera con timeout
+- Resultados JSON o archivo descargable
+- Retención por tiempo y por número con expulsión
+- Cancelación de trabajos pendientes y en ejecución
+================================================================================
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+PENDIENTE = 'pendiente'
+EJECUTANDO = 'ejecutando'
+TERMINADO = 'terminado'
+ERROR = 'error'
+CANCELADO = 'cancelado'
+FINALES = (TERMINADO, ERROR, CANCELADO)
+
+PATRON_TRABAJO = re.compile(r'^[0-9a-f]{32}$')
+
+# Mínimo entre escrituras del estado en disco por avances de progreso
+INTERVALO_PERSISTENCIA = 0.5
+INTERVALO_SONDEO = 0.1
+
+
+def _proceso_vivo(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ColaLlena(RuntimeError):
+    """Se alcanzó el máximo de trabajos pendientes"""
+
+
+class TrabajoNoEncontrado(LookupError):
+    """El identificador no corresponde a ningún trabajo retenido"""
+
+
+class TrabajoCancelado(Exception):
+    """Se pidió cancelar el trabajo en curso"""
+
+
+class Trabajo:
+    """
+    Estado de un trabajo y canal de avance para la función que lo ejecuta
+    """
+
+    def __init__(self, cola, tipo, descripcion=''):
+        self.cola = cola
+        self.id = uuid.uuid4().hex
+        self.tipo = tipo
+        self.descripcion = descripcion
+        self.estado = PENDIENTE
+        self.progreso = 0.0
+        self.mensaje = ''
+        self.resultado = None
+        self.error = None
+        self.archivo = None
+        self.nombre_archivo = None
+        self.creado = time.time()
+        self.iniciado = None
+        self.terminado = None
+        self.futuro = None
+        self._cancelar = threading.Event()
+        self._terminado = threading.Event()
+        self._ultima_persistencia = 0.0
+
+    @property
+    def cancelacion_solicitada(self):
+        if self._cancelar.is_set():
+            return True
+        if self.cola.directorio and os.path.exists(self.cola._ruta(self.id, 'cancelar')):
+            self._cancelar.set()
+            return True
+        return False
+
+    def avanzar(self, progreso, mensaje=None):
+        """
+        Informa el avance (0 a 1) desde la función del trabajo
+
+        Raises:
+            TrabajoCancelado: Si se pidió cancelar el trabajo
+        """
+        if self.cancelacion_solicitada:
+            raise TrabajoCancelado()
+        self.progreso = min(max(float(progreso), 0.0), 1.0)
+        if mensaje is not None:
+            self.mensaje = mensaje
+        if time.time() - self._ultima_persistencia >= INTERVALO_PERSISTENCIA:
+            self.cola._persistir(self)
+
+    def archivo_resultado(self, nombre, ruta=None):
+        """
+        Declara el archivo que produce el trabajo
+
+        Args:
+            nombre: Nombre de descarga
+            ruta: Dónde está el archivo (None: en el directorio de la cola,
+                y se borra al expulsar el trabajo)
+
+        Returns:
+            str: Ruta donde escribir el archivo
+        """
+        if ruta is None:
+            if not self.cola.directorio:
+                raise ValueError('La cola no tiene directorio para archivos de resultado')
+            extension = os.path.splitext(nombre)[1]
+            ruta = self.cola._ruta(self.id, extension.lstrip('.') or 'bin')
+        self.archivo = ruta
+        self.nombre_archivo = nombre
+        return ruta
+
+    @property
+    def finalizado(self):
+        return self.estado in FINALES
+
+    def a_dict(self):
+        return {
+            'id': self.id,
+            'tipo': self.tipo,
+            'descripcion': self.descripcion,
+            'estado': self.estado,
+            'progreso': round(self.progreso, 3),
+            'mensaje': self.mensaje,
+            'resultado': self.resultado,
+            'error': self.error,
+            'archivo': self.nombre_archivo if self.archivo else None,
+            'ruta_archivo': self.archivo,
+            'creado': self.creado,
+            'iniciado': self.iniciado,
+            'terminado': self.terminado,
+            'pid': os.getpid()
+        }
+
+
+class ColaTrabajos:
+    """
+    Pool acotado de hilos con registro de trabajos
+    """
+
+    def __init__(self, max_trabajadores=2, max_pendientes=32, retencion=900, max_retenidos=100,
+                 directorio=None):
+        """
+        Inicializa la cola
+
+        Args:
+            max_trabajadores: Trabajos ejecutándose a la vez
+            max_pendientes: Trabajos en espera antes de rechazar con ColaLlena
+            retencion: Segundos que se conserva un trabajo terminado
+            max_retenidos: Trabajos terminados conservados como máximo
+            directorio: Carpeta para el estado y los archivos de resultado
+                (None: solo memoria, sin archivos)
+        """
+        self.max_trabajadores = max_trabajadores
+        self.max_pendientes = max_pendientes
+        self.retencion = retencion
+        self.max_retenidos = max_retenidos
+        self.directorio = directorio
+        self.trabajos = {}
+        self.lock = threading.Lock()
+        self._ejecutor = ThreadPoolExecutor(max_workers=max_trabajadores, thread_name_prefix='trabajo')
+
+        # Métricas
+        self.enviados = 0
+        self.rechazados = 0
+        self.expulsados = 0
+
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+            self._limpiar_disco()
+
+    def _ruta(self, id_trabajo, extension):
+        return os.path.join(self.directorio, f'{id_trabajo}.{extension}')
+
+    def _persistir(self, trabajo):
+        if not self.directorio:
+            return
+        trabajo._ultima_persistencia = time.time()
+        ruta = self._ruta(trabajo.id, 'json')
+        temporal = f'{ruta}.{threading.get_ident()}.tmp'
+        try:
+            with open(temporal, 'w', encoding='utf-8') as f:
+                json.dump(trabajo.a_dict(), f)
+            os.replace(temporal, ruta)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"⚠️  No se pudo guardar el estado del trabajo {trabajo.id}: {e}")
+
+    def enviar(self, tipo, funcion, *args, descripcion='', **kwargs):
+        """
+        Encola un trabajo
+
+        Args:
+            tipo: Etiqueta del trabajo (p. ej. 'analizar_experimento')
+            funcion: Se llama como funcion(trabajo, *args, **kwargs); su
+                retorno (JSON serializable) queda en 'resultado'
+
+        Returns:
+            Trabajo
+
+        Raises:
+            ColaLlena: Si ya hay max_pendientes trabajos esperando
+        """
+        self._expulsar()
+        with self.lock:
+            pendientes = sum(1 for t in self.trabajos.values() if t.estado == PENDIENTE)
+            if pendientes >= self.max_pendientes:
+                self.rechazados += 1
+                raise ColaLlena(f'Hay {pendientes} trabajos pendientes; intente más tarde')
+            trabajo = Trabajo(self, tipo, descripcion)
+            self.trabajos[trabajo.id] = trabajo
+            self.enviados += 1
+        self._persistir(trabajo)
+        trabajo.futuro = self._ejecutor.submit(self._ejecutar, trabajo, funcion, args, kwargs)
+        return trabajo
+
+    def _ejecutar(self, trabajo, funcion, args, kwargs):
+        if trabajo.cancelacion_solicitada:
+            self._finalizar(trabajo, CANCELADO)
+            return
+        trabajo.estado = EJECUTANDO
+        trabajo.iniciado = time.time()
+        self._persistir(trabajo)
+        try:
+            trabajo.resultado = funcion(trabajo, *args, **kwargs)
+        except TrabajoCancelado:
+            self._finalizar(trabajo, CANCELADO)
+        except Exception as e:
+            trabajo.error = str(e)
+            self._finalizar(trabajo, ERROR)
+        else:
+            trabajo.progreso = 1.0
+            self._finalizar(trabajo, TERMINADO)
+
+    def _finalizar(self, trabajo, estado):
+        trabajo.estado = estado
+        trabajo.terminado = time.time()
+        self._persistir(trabajo)
+        trabajo._terminado.set()
+
+    def _desde_disco(self, id_trabajo):
+        if not self.directorio:
+            return None
+        try:
+            with open(self._ruta(id_trabajo, 'json'), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def obtener(self, id_trabajo):
+        """
+        Estado de un trabajo (de este proceso o, con directorio, de otro)
+
+        Returns:
+            dict: Ver Trabajo.a_dict
+
+        Raises:
+            TrabajoNoEncontrado: Si no existe o ya fue expulsado
+        """
+        if not PATRON_TRABAJO.match(id_trabajo or ''):
+            raise TrabajoNoEncontrado(f'Trabajo no válido: {id_trabajo}')
+        trabajo = self.trabajos.get(id_trabajo)
+        if trabajo is not None:
+            return trabajo.a_dict()
+        estado = self._desde_disco(id_trabajo)
+        if estado is None:
+            raise TrabajoNoEncontrado(f'Trabajo no encontrado: {id_trabajo}')
+        if estado['estado'] not in FINALES and not _proceso_vivo(estado.get('pid')):
+            estado.update(estado=ERROR, error='El proceso que ejecutaba el trabajo terminó')
+        return estado
+
+    def esperar(self, id_trabajo, timeout=None):
+        """
+        Espera a que el trabajo termine (o venza el timeout)
+
+        Returns:
+            dict: Estado del trabajo
+        """
+        trabajo = self.trabajos.get(id_trabajo)
+        if trabajo is not None:
+            trabajo._terminado.wait(timeout)
+            return trabajo.a_dict()
+
+        limite = None if timeout is None else time.time() + timeout
+        estado = self.obtener(id_trabajo)
+        while estado['estado'] not in FINALES and (limite is None or time.time() < limite):
+            time.sleep(INTERVALO_SONDEO)
+            estado = self.obtener(id_trabajo)
+        return estado
+
+    def cancelar(self, id_trabajo):
+        """
+        Cancela un trabajo pendiente o pide detener uno en ejecución
+
+        Returns:
+            dict: Estado del trabajo tras la solicitud
+        """
+        estado = self.obtener(id_trabajo)
+        if estado['estado'] in FINALES:
+            return estado
+
+        trabajo = self.trabajos.get(id_trabajo)
+        if trabajo is None:
+            # Trabajo de otro proceso: lo detecta en su siguiente avance
+            open(self._ruta(id_trabajo, 'cancelar'), 'w').close()
+            return estado
+
+        trabajo._cancelar.set()
+        if trabajo.futuro is not None and trabajo.futuro.cancel():
+            self._finalizar(trabajo, CANCELADO)
+        return trabajo.a_dict()
+
+    def _borrar_archivos(self, trabajo_o_id, ruta_archivo=None):
+        if not self.directorio:
+            return
+        id_trabajo = getattr(trabajo_o_id, 'id', trabajo_o_id)
+        rutas = [self._ruta(id_trabajo, 'json'), self._ruta(id_trabajo, 'cancelar')]
+        # Solo se borran los archivos de resultado que viven en la cola
+        if ruta_archivo and os.path.dirname(os.path.abspath(ruta_archivo)) == os.path.abspath(self.directorio):
+            rutas.append(ruta_archivo)
+        for ruta in rutas:
+            try:
+                os.remove(ruta)
+            except OSError:
+                pass
+
+    def _expulsar(self):
+        """Elimina los trabajos terminados vencidos o que exceden el máximo"""
+        ahora = time.time()
+        with self.lock:
+            terminados = sorted((t for t in self.trabajos.values() if t.finalizado), key=lambda t: t.terminado)
+            sobrantes = max(0, len(terminados) - self.max_retenidos)
+            expulsar = [t for i, t in enumerate(terminados)
+                        if i < sobrantes or ahora - t.terminado > self.retencion]
+            for trabajo in expulsar:
+                del self.trabajos[trabajo.id]
+        for trabajo in expulsar:
+            self._borrar_archivos(trabajo, trabajo.archivo)
+        self.expulsados += len(expulsar)
+
+    def _limpiar_disco(self):
+        """Borra los estados y archivos vencidos que dejaron otros procesos"""
+        ahora = time.time()
+        for entrada in os.scandir(self.directorio):
+            try:
+                if ahora - entrada.stat().st_mtime > self.retencion:
+                    os.remove(entrada.path)
+            except OSError:
+                pass
+
+    def listar(self):
+        """
+        Trabajos retenidos en este proceso, del más reciente al más antiguo
+        """
+        self._expulsar()
+        with self.lock:
+            trabajos = sorted(self.trabajos.values(), key=lambda t: t.creado, reverse=True)
+        return [t.a_dict() for t in trabajos]
+
+    def obtener_estadisticas(self):
+        """
+        Obtiene estadísticas de la cola
+
+        Returns:
+            dict: Trabajos por estado, límites y contadores
+        """
+        with self.lock:
+            por_estado = {}
+            for trabajo in self.trabajos.values():
+                por_estado[trabajo.estado] = por_estado.get(trabajo.estado, 0) + 1
+        return {
+            'trabajadores': self.max_trabajadores,
+            'max_pendientes': self.max_pendientes,
+            'retencion_s': self.retencion,
+            'por_estado': por_estado,
+            'enviados': self.enviados,
+            'rechazados': self.rechazados,
+            'expulsados': self.expulsados
+        }
+
+    def cerrar(self):
+        """Cancela lo pendiente y espera a los trabajos en ejecución"""
+        with self.lock:
+            trabajos = list(self.trabajos.values())
+        for trabajo in trabajos:
+            trabajo._cancelar.set()
+        self._ejecutor.shutdown(wait=True, cancel_futures=True)